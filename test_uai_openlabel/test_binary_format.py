@@ -0,0 +1,106 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import importlib.util
+import json
+from typing import Any
+
+import pytest
+
+from uai_openlabel import PACKED_FLOATS, Frame, OpenLabel, decode_binary, encode_binary
+
+HAS_MSGPACK = importlib.util.find_spec("msgpack") is not None
+DECODERS = [False, pytest.param(True, marks=pytest.mark.skipif(not HAS_MSGPACK, reason="msgpack is not installed"))]
+
+VALUES: list[Any] = [
+    None,
+    True,
+    False,
+    0,
+    127,
+    128,
+    -32,
+    -33,
+    255,
+    65536,
+    2**64 - 1,
+    -(2**63),
+    0.5,
+    -1e300,
+    "",
+    "ü" * 40,
+    "x" * 70_000,
+    [],
+    [1.0],
+    [1, 2.5],
+    [0.1, 2.5, -3.0],
+    [0.25] * 10_000,
+    list(range(20)),
+    {"a": {"b": [None, {"c": "d"}]}},
+    {str(i): i for i in range(100_000)},
+]
+
+
+@pytest.mark.parametrize("use_msgpack", DECODERS)
+def test_round_trip_of_json_values(use_msgpack: bool) -> None:
+    for value in VALUES:
+        decoded = decode_binary(encode_binary(value), use_msgpack=use_msgpack)
+        assert decoded == value and type(decoded) is type(value)
+    assert decode_binary(encode_binary((1.0, 2.0)), use_msgpack=use_msgpack) == [1.0, 2.0]
+
+
+@pytest.mark.parametrize("use_msgpack", DECODERS)
+def test_round_trip_of_openlabel(use_msgpack: bool) -> None:
+    openlabel = OpenLabel.example()
+    data = openlabel.to_dict(exclude_none=True)
+    binary = openlabel.to_binary(exclude_none=True)
+    # Equivalent to the JSON form, and smaller
+    assert decode_binary(binary, use_msgpack=use_msgpack) == json.loads(json.dumps(data))
+    assert len(binary) < len(json.dumps(data, separators=(",", ":")))
+    assert OpenLabel.from_binary(binary) == openlabel
+
+    frame = next(iter((openlabel.frames or {}).values()))
+    assert Frame.from_binary(frame.to_binary()) == frame
+
+
+def test_packed_floats() -> None:
+    binary = encode_binary({"val": [1.5, -2.0, 3.25]})
+    assert binary == b"\x81\xa3val\xc7\x18" + bytes([PACKED_FLOATS]) + b"\x00\x00\x00\x00\x00\x00\xf8?" + binary[16:]
+    assert len(binary) == 5 + 3 + 24
+    # Lists mixing ints and floats keep their types
+    assert encode_binary([1, 2.0])[0] == 0x92
+
+
+def test_invalid_data() -> None:
+    binary = encode_binary({"a": [1, 2, 3]})
+    with pytest.raises(ValueError, match="Truncated"):
+        decode_binary(binary[:-1], use_msgpack=False)
+    with pytest.raises(ValueError, match="after the end"):
+        decode_binary(binary + b"\x00", use_msgpack=False)
+    with pytest.raises(ValueError, match="extension type 5"):
+        decode_binary(b"\xd4\x05\x00", use_msgpack=False)
+    with pytest.raises(TypeError, match="Keys must be strings"):
+        encode_binary({1: 2})
+    with pytest.raises(TypeError, match="Can't encode"):
+        encode_binary(object())
+
+
+@pytest.mark.skipif(not HAS_MSGPACK, reason="msgpack is not installed")
+def test_readable_by_msgpack() -> None:
+    import msgpack
+
+    value = {"name": "box", "val": [1.0, 2.0], "num": [1, -300, 2**40], "text": "ä" * 300}
+    decoded = msgpack.unpackb(encode_binary(value))
+    assert decoded["val"] == msgpack.ExtType(PACKED_FLOATS, encode_binary(value)[17:33])
+    assert {key: decoded[key] for key in ("name", "num", "text")} == {key: value[key] for key in ("name", "num", "text")}
+    assert decode_binary(msgpack.packb({"a": [1.0, None]}, use_single_float=True), use_msgpack=False) == {"a": [1.0, None]}
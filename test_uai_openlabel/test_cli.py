@@ -0,0 +1,86 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import json
+from pathlib import Path
+
+import pytest
+
+from uai_openlabel import OpenLabel, check_integrity
+from uai_openlabel.cli import main
+
+
+@pytest.fixture
+def example_path(tmp_path: Path) -> Path:
+    path = tmp_path / "example.json"
+    path.write_text(json.dumps(OpenLabel.example().to_dict(exclude_none=True)))
+    return path
+
+
+def test_split_and_merge(example_path: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(["split", str(example_path), str(tmp_path / "parts"), "--frames", "2", "--indent", "2"]) == 0
+    parts = sorted((tmp_path / "parts").iterdir())
+    assert [part.name for part in parts] == ["example_0000.json", "example_0001.json"]
+    second = OpenLabel.from_dict(json.loads(parts[1].read_text()))
+    assert list(second.frames or {}) == ["003"]
+    assert check_integrity(second) == []
+
+    merged = tmp_path / "merged.json"
+    assert main(["merge", *map(str, parts), "-o", str(merged)]) == 0
+    assert OpenLabel.from_dict(json.loads(merged.read_text())) == OpenLabel.example()
+    assert main(["diff", str(example_path), str(merged)]) == 0
+    assert main(["merge", str(parts[0]), str(parts[0]), "-o", str(merged)]) == 2
+    assert "was read from another file" in capsys.readouterr().err
+
+
+def test_slice_and_diff(example_path: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    sliced = tmp_path / "sliced.json"
+    assert main(["slice", str(example_path), str(sliced), "--start", "2", "--end", "2"]) == 0
+    openlabel = OpenLabel.from_dict(json.loads(sliced.read_text()))
+    assert list(openlabel.frames or {}) == ["002"]
+    assert check_integrity(openlabel) == []
+    capsys.readouterr()
+
+    assert main(["diff", str(example_path), str(sliced)]) == 1
+    output = capsys.readouterr()
+    differences = output.out.splitlines()
+    assert '~ $.frame_intervals[0].frame_start: "1" -> "2"' in differences
+    # Differences are printed frame by frame, in the order of the frames
+    assert differences[-2].startswith("- $.frames['001']: ") and differences[-1].startswith("- $.frames['003']: ")
+    assert output.err == f"{len(differences)} difference(s)\n"
+
+
+def test_validate_stats_and_convert(example_path: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    invalid = tmp_path / "invalid" / "invalid.json"
+    invalid.parent.mkdir()
+    data = OpenLabel.example().to_dict(exclude_none=True)
+    data["openlabel"]["frames"]["001"]["objects"]["7"] = {}
+    invalid.write_text(json.dumps(data))
+
+    assert main(["validate", str(example_path), "--workers", "1"]) == 0
+    assert main(["validate", str(example_path), str(invalid.parent), "--workers", "1"]) == 1
+    assert capsys.readouterr().out == f"{invalid}: $.frames['001'].objects['7']: Missing required property 'object_data'\n"
+    data["openlabel"]["frames"]["001"]["objects"]["7"] = {"object_data": {}}
+    invalid.write_text(json.dumps(data))
+    assert main(["validate", str(invalid), "--no-schema"]) == 1
+    assert capsys.readouterr().out == f"{invalid}: $.frames['001'].objects['7']: Undeclared object 7\n"
+
+    assert main(["stats", str(example_path), str(example_path.parent), "--unit", "Microsecond"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert (report["sequences"], report["frames"]) == (2, 6)
+
+    converted = tmp_path / "converted"
+    assert main(["convert", str(invalid.parent), str(converted), "--indent", "1", "--workers", "1"]) == 0
+    assert json.loads((converted / "invalid.json").read_text()) == data
+    assert main(["convert", str(example_path), str(converted / "example.json"), "--normalize"]) == 0
+    assert OpenLabel.from_dict(json.loads((converted / "example.json").read_text())) == OpenLabel.example()
@@ -20,6 +20,7 @@ import pytest
 
 from uai_openlabel import (
     Attributes,
+    BooleanData,
     NumberData,
     ObjectData,
     ObjectUid,
@@ -99,3 +100,47 @@ def test_object_uid_in_text_data(caplog: pytest.LogCaptureFixture) -> None:
 
     assert isinstance(data, TextData)
     assert len(caplog.messages) == 0
+
+
+def test_attributes_lookup_by_name() -> None:
+    attributes = Attributes.static_attributes_example()
+
+    assert "nr_wheels" in attributes
+    assert "not_there" not in attributes
+    assert attributes.get("not_there") is None
+
+    number = attributes.get_number("nr_wheels")
+    assert number is not None and number.val == 4
+    assert attributes.get_boolean("not_there") is None
+    with pytest.raises(TypeError, match="nr_wheels"):
+        attributes.get_text("nr_wheels")
+
+
+def test_attributes_index_is_invalidated() -> None:
+    attributes = Attributes.static_attributes_example()
+    assert "has_driver" in attributes
+
+    attributes.boolean = [BooleanData(val=False, name="has_trailer")]
+    assert "has_driver" not in attributes
+    assert "has_trailer" in attributes
+
+    attributes.num = [*(attributes.num or []), NumberData(val=2, name="nr_doors")]
+    assert attributes.get_number("nr_doors") is not None
+
+    # In-place mutations need to be signalled explicitly
+    assert isinstance(attributes.num, list)
+    attributes.num.append(NumberData(val=1, name="nr_spare_wheels"))
+    attributes.invalidate_index_cache()
+    assert "nr_spare_wheels" in attributes
+
+
+def test_object_data_lookup_includes_geometric_data() -> None:
+    object_data = ObjectData.cuboid_with_dynamic_attributes_example(False, (1.0, 2.0, 3.0))
+
+    cuboid = object_data.get_cuboid("bounding_box")
+    assert cuboid is not None and cuboid.val[:3] == (1.0, 2.0, 3.0)
+    assert object_data.get("bounding_box") is cuboid
+    assert object_data.get_boolean("brake_lights_on") is not None
+    assert object_data.get_bbox("bounding_box_2d") is None
+    with pytest.raises(TypeError):
+        object_data.get_poly3d("bounding_box")
@@ -0,0 +1,155 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import json
+import math
+from dataclasses import astuple
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from uai_openlabel import (
+    Attributes,
+    Frame,
+    NumberData,
+    Object,
+    ObjectData,
+    ObjectInFrame,
+    OpenLabel,
+    ThreeDBoundingBoxEuler,
+    TwoDBoundingBox,
+    Uid,
+)
+from uai_openlabel.evaluation import (
+    AssignmentMethod,
+    DetectionGeometry,
+    evaluate_detection_files,
+    evaluate_detections,
+    greedy_assignment,
+    optimal_assignment,
+)
+from uai_openlabel.geometry import cuboid_iou_matrix
+
+
+def _box(x: float, score: Optional[float] = None) -> ObjectData:
+    attributes = Attributes(num=[NumberData(name="score", val=score)]) if score is not None else None
+    return ObjectData(bbox=[TwoDBoundingBox(val=(x, 10.0, 10.0, 10.0), name="box", attributes=attributes)])
+
+
+def _openlabel(types: dict[str, str], frames: dict[str, dict[str, ObjectData]]) -> OpenLabel:
+    return OpenLabel(
+        objects={Uid(uid): Object(name=uid, type=object_type) for uid, object_type in types.items()},
+        frames={
+            Uid(frame_uid): Frame(objects={Uid(uid): ObjectInFrame(object_data=data) for uid, data in objects.items()})
+            for frame_uid, objects in frames.items()
+        },
+    )
+
+
+def _ground_truth() -> OpenLabel:
+    return _openlabel(
+        {"1": "car", "2": "car", "3": "pedestrian"},
+        {"0": {"1": _box(0.0), "2": _box(100.0)}, "1": {"1": _box(0.0), "3": _box(50.0)}},
+    )
+
+
+def _predictions() -> OpenLabel:
+    return _openlabel(
+        {"10": "car", "11": "car", "12": "pedestrian", "13": "car"},
+        {
+            # A good match, and a bad one scored higher
+            "0": {"10": _box(1.0, score=0.9), "11": _box(6.0, score=0.95)},
+            "1": {"10": _box(0.0, score=0.8), "12": _box(80.0, score=0.5)},
+            "2": {"13": _box(0.0, score=0.3)},
+        },
+    )
+
+
+def test_assignments() -> None:
+    similarity = np.array([[0.9, 0.8], [0.85, 0.1]])
+    rows, cols = greedy_assignment(similarity, 0.5)
+    assert list(zip(rows.tolist(), cols.tolist())) == [(0, 0)]
+    rows, cols = optimal_assignment(similarity, 0.5)
+    assert list(zip(rows.tolist(), cols.tolist())) == [(0, 1), (1, 0)]
+    rows, cols = optimal_assignment(similarity.T[:, :1], 0.5)
+    assert list(zip(rows.tolist(), cols.tolist())) == [(0, 0)]
+    assert len(optimal_assignment(np.zeros((0, 3)), 0.5)[0]) == 0
+
+
+def test_detection_metrics() -> None:
+    evaluator = evaluate_detections(_ground_truth(), _predictions())
+    results = evaluator.results()
+    assert list(results) == ["car", "pedestrian"]
+
+    car = results["car"]
+    assert (car.num_ground_truth, car.num_predictions, car.true_positives) == (3, 4, 2)
+    assert (car.false_positives, car.false_negatives) == (2, 1)
+    assert car.precision == pytest.approx(0.5) and car.recall == pytest.approx(2 / 3)
+    # Sorted by score: FP (0.95), TP (0.9), TP (0.8), FP (0.3)
+    # The precision at recall 1/3 is interpolated from the higher one at recall 2/3
+    assert car.average_precision == pytest.approx(2 / 3 * 2 / 3)
+    assert car.mean_iou == pytest.approx((90 / 110 + 1.0) / 2)
+
+    pedestrian = results["pedestrian"]
+    assert (pedestrian.true_positives, pedestrian.average_precision) == (0, 0.0)
+    assert evaluator.mean_average_precision() == pytest.approx(car.average_precision / 2)
+
+    # Without ground truth there is no recall
+    empty = evaluate_detections(OpenLabel(), _predictions()).results()["car"]
+    assert math.isnan(empty.recall) and math.isnan(empty.average_precision) and empty.precision == 0.0
+
+
+def test_optimal_assignment() -> None:
+    greedy = evaluate_detections(_ground_truth(), _predictions(), iou_threshold=0.2).results()["car"]
+    optimal = evaluate_detections(
+        _ground_truth(), _predictions(), iou_threshold=0.2, assignment=AssignmentMethod.Optimal
+    ).results()["car"]
+    # Greedy lets the higher scored but worse box take the ground truth, leaving the better one unmatched
+    assert greedy.true_positives == 2 and greedy.mean_iou == pytest.approx((40 / 160 + 1.0) / 2)
+    assert optimal.true_positives == 2 and optimal.mean_iou == pytest.approx((90 / 110 + 1.0) / 2)
+
+
+def test_cuboids() -> None:
+    def cuboid(x: float, yaw: float) -> ObjectData:
+        return ObjectData(cuboid=[ThreeDBoundingBoxEuler(val=(x, 0.0, 0.0, 0.0, 0.0, yaw, 4.0, 2.0, 2.0), name="box")])
+
+    ground_truth = _openlabel({"1": "car"}, {"0": {"1": cuboid(0.0, 0.0)}})
+    predictions = _openlabel({"1": "car"}, {"0": {"1": cuboid(0.0, math.pi)}, "1": {"1": cuboid(2.0, 0.0)}})
+    car = evaluate_detections(ground_truth, predictions, geometry=DetectionGeometry.Cuboid).results()["car"]
+    assert (car.true_positives, car.num_predictions) == (1, 2) and car.mean_iou == pytest.approx(1.0)
+
+    shifted = ThreeDBoundingBoxEuler(val=(2.0, 0.0, 1.0, 0.0, 0.0, 0.0, 4.0, 2.0, 2.0), name="box")
+    rotated = ThreeDBoundingBoxEuler(val=(0.0, 0.0, 0.0, 0.0, 0.0, math.pi / 2, 2.0, 2.0, 2.0), name="box")
+    reference = ThreeDBoundingBoxEuler(val=(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 4.0, 2.0, 2.0), name="box")
+    # Half the footprint and half the height overlap: 4 / (16 + 16 - 4)
+    assert cuboid_iou_matrix([shifted, rotated], [reference]) == pytest.approx(np.array([[4 / 28], [0.5]]))
+
+
+def test_evaluates_files(tmp_path: Path) -> None:
+    ground_truth_path, predictions_path = tmp_path / "ground_truth.json", tmp_path / "predictions.json"
+    ground_truth_path.write_text(json.dumps(_ground_truth().to_dict(exclude_none=True)))
+    predictions = _predictions().to_dict(exclude_none=True)
+    predictions_path.write_text(json.dumps(predictions))
+
+    from_files = evaluate_detection_files(ground_truth_path, predictions_path).results()
+    in_memory = evaluate_detections(_ground_truth(), _predictions()).results()
+    np.testing.assert_equal([astuple(result) for result in from_files.values()], [astuple(r) for r in in_memory.values()])
+
+    # Frames must be listed by frame number
+    frames = predictions["openlabel"]["frames"]
+    predictions["openlabel"]["frames"] = dict(reversed(list(frames.items())))
+    predictions_path.write_text(json.dumps(predictions))
+    with pytest.raises(ValueError, match="increasing frame number"):
+        evaluate_detection_files(ground_truth_path, predictions_path)
@@ -0,0 +1,146 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import json
+import math
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from uai_openlabel import (
+    Frame,
+    FrameInterval,
+    Object,
+    ObjectData,
+    ObjectInFrame,
+    OpenLabel,
+    TwoDBoundingBox,
+    Uid,
+)
+from uai_openlabel.evaluation import (
+    TrackingEvaluator,
+    evaluate_tracking,
+    evaluate_tracking_files,
+)
+
+
+def _openlabel(tracks: dict[str, dict[int, float]]) -> OpenLabel:
+    """Tracks of cars given as the x position of their box per frame."""
+    frames: dict[Uid, Frame] = {}
+    for uid, positions in tracks.items():
+        for frame, x in positions.items():
+            box = TwoDBoundingBox(val=(x, 10.0, 10.0, 10.0), name="box")
+            objects = frames.setdefault(Uid(str(frame)), Frame(objects={})).objects
+            assert isinstance(objects, dict)
+            objects[Uid(uid)] = ObjectInFrame(object_data=ObjectData(bbox=[box]))
+    track_objects = {
+        Uid(uid): Object(name=uid, type="car", frame_intervals=[FrameInterval(min(positions), max(positions))])
+        for uid, positions in tracks.items()
+    }
+    return OpenLabel(objects=track_objects, frames=frames)
+
+
+def _ground_truth() -> OpenLabel:
+    return _openlabel({"1": {frame: 0.0 for frame in range(6)}, "2": {frame: 100.0 for frame in range(6)}})
+
+
+def _predictions() -> OpenLabel:
+    return _openlabel(
+        {
+            # Track 1 is lost in frame 2 and picked up again by another prediction
+            "10": {0: 0.0, 1: 0.0},
+            "11": {3: 0.0, 4: 0.0, 5: 0.0},
+            "12": {frame: 100.0 for frame in range(6)},
+            # A false positive
+            "13": {0: 300.0},
+        }
+    )
+
+
+def test_tracking_metrics() -> None:
+    car = evaluate_tracking(_ground_truth(), _predictions()).results()["car"]
+
+    assert (car.num_ground_truth, car.num_predictions, car.true_positives) == (12, 12, 11)
+    assert (car.false_negatives, car.false_positives, car.id_switches, car.fragmentations) == (1, 1, 1, 1)
+    assert (car.num_ground_truth_tracks, car.num_predicted_tracks, car.mostly_tracked, car.mostly_lost) == (2, 4, 2, 0)
+    assert car.mota == pytest.approx(1 - 3 / 12)
+    assert car.motp == pytest.approx(1.0)
+    # Track 1 is best identified with prediction 11, for 3 frames, and track 2 with prediction 12, for 6 frames
+    assert car.idf1 == pytest.approx(2 * 9 / 24)
+    assert car.det_a == pytest.approx(11 / 13)
+    assert car.ass_a == pytest.approx((2 * 2 / 6 + 3 * 3 / 6 + 6 * 6 / 6) / 11)
+    assert car.hota == pytest.approx(math.sqrt(car.det_a * car.ass_a))
+
+
+def test_drops_ended_tracks() -> None:
+    ground_truth, predictions = _ground_truth(), _predictions()
+    evaluator = TrackingEvaluator(ground_truth.objects or {}, predictions.objects or {})
+    gt_frames, prediction_frames = ground_truth.frames or {}, predictions.frames or {}
+    for frame in range(6):
+        evaluator.add_frame(gt_frames.get(Uid(str(frame))), prediction_frames.get(Uid(str(frame))), Uid(str(frame)))
+        if frame == 0:
+            # The false positive has ended and overlapped with no other track
+            assert (True, "13") not in evaluator._states["car"].groups
+
+    # Tracks 1, 10 and 11 overlapped and are dropped together at the end, like every other track
+    state = evaluator._states["car"]
+    assert not state.groups and not state.ground_truth_tracks and not state.pair_overlaps and not state.ends
+    result = asdict(evaluator.results()["car"])
+    assert result == pytest.approx(asdict(evaluate_tracking(ground_truth, predictions).results()["car"]))
+
+    # Without frame numbers, no track is dropped, with the same results
+    unnumbered = TrackingEvaluator(ground_truth.objects or {}, predictions.objects or {})
+    unnumbered.add_frames((gt_frames.get(Uid(str(frame))), prediction_frames.get(Uid(str(frame)))) for frame in range(6))
+    assert len(unnumbered._states["car"].groups) == 6
+    assert asdict(unnumbered.results()["car"]) == pytest.approx(result)
+
+
+def test_keeps_previous_matches() -> None:
+    ground_truth = _openlabel({"1": {0: 0.0, 1: 0.0}})
+    # In frame 1, prediction 11 fits better, but prediction 10 still overlaps enough to keep the track
+    predictions = _openlabel({"10": {0: 0.0, 1: 2.0}, "11": {1: 0.0}})
+    car = evaluate_tracking(ground_truth, predictions).results()["car"]
+
+    assert (car.true_positives, car.id_switches, car.false_positives) == (2, 0, 1)
+    assert car.motp == pytest.approx((1.0 + 80 / 120) / 2)
+
+
+def test_evaluates_files(tmp_path: Path) -> None:
+    paths = tmp_path / "ground_truth.json", tmp_path / "predictions.json"
+    for path, openlabel in zip(paths, (_ground_truth(), _predictions())):
+        document = openlabel.to_dict(exclude_none=True)
+        frames = document["openlabel"]["frames"]
+        document["openlabel"]["frames"] = dict(sorted(frames.items(), key=lambda item: int(item[0])))
+        path.write_text(json.dumps(document))
+
+    assert evaluate_tracking_files(*paths).results() == evaluate_tracking(_ground_truth(), _predictions()).results()
+
+
+def test_sparse_predictions(tmp_path: Path) -> None:
+    ground_truth = _openlabel({"1": {frame: 0.0 for frame in range(4)}, "2": {frame: 100.0 for frame in range(4)}})
+    # Predictions only in frames 0 and 2, track 2 switches from prediction 20 to 21
+    predictions = _openlabel({"10": {0: 0.0, 2: 0.0}, "20": {0: 100.0}, "21": {2: 100.0}})
+    paths = tmp_path / "ground_truth.json", tmp_path / "predictions.json"
+    for path, openlabel in zip(paths, (ground_truth, predictions)):
+        document = openlabel.to_dict(exclude_none=True)
+        frames = document["openlabel"]["frames"]
+        document["openlabel"]["frames"] = dict(sorted(frames.items(), key=lambda item: int(item[0])))
+        path.write_text(json.dumps(document))
+
+    for car in (
+        evaluate_tracking(ground_truth, predictions).results()["car"],
+        evaluate_tracking_files(*paths).results()["car"],
+    ):
+        assert (car.true_positives, car.id_switches, car.fragmentations) == (4, 1, 2)
+        assert (car.num_ground_truth_tracks, car.num_predicted_tracks) == (2, 3)
@@ -0,0 +1,177 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from uai_openlabel import OpenLabel, Poly2D, SyncByFrameShift, Uid
+from uai_openlabel.cli import main
+from uai_openlabel.export import CocoExporter, CocoWriter, coco_images, export_coco
+
+INTRINSICS = {"camera_matrix": [1000, 0, 960, 0, 0, 1000, 540, 0, 0, 0, 1, 0], "distortion_coeffs": [0] * 5}
+
+
+def _openlabel(object_type: str = "car") -> dict[str, Any]:
+    box = {"name": "box", "val": [15, 25, 10, 20], "coordinate_system": "front"}
+    square = {"name": "shape", "val": [0, 0, 4, 0, 4, 4, 0, 4], "closed": True, "mode": "MODE_POLY2D_ABSOLUTE"}
+    square = {**square, "coordinate_system": "rear"}
+    line = {**square, "name": "line", "closed": False}
+    return {
+        "openlabel": {
+            "metadata": {"schema_version": "1.0.0"},
+            "streams": {
+                "front": {
+                    "type": "camera",
+                    "uri": "images/front",
+                    "stream_properties": {
+                        "intrinsics_pinhole": {**INTRINSICS, "width_px": 1920, "height_px": 1080},
+                    },
+                },
+                "rear": {"type": "camera"},
+                "lidar": {"type": "lidar"},
+            },
+            "objects": {"1": {"name": "a", "type": object_type}, "2": {"name": "b", "type": "pedestrian"}},
+            "frames": {
+                "0": {"objects": {"1": {"object_data": {"bbox": [box], "poly2d": [line]}}}},
+                "1": {
+                    "frame_properties": {"streams": {"front": {"stream_properties": {"sync": {"frame_stream": 42}}}}},
+                    "objects": {
+                        "1": {"object_data": {"bbox": [box]}},
+                        "2": {"object_data": {"poly2d": [square, {**square, "name": "other", "coordinate_system": None}]}},
+                    },
+                },
+            },
+        }
+    }
+
+
+def test_exporter_resolves_streams_and_labels() -> None:
+    openlabel = OpenLabel.from_dict(_openlabel())
+    openlabel.streams["front"].stream_properties.sync = SyncByFrameShift(frame_shift=-10)  # type: ignore[index,union-attr]
+    exporter = CocoExporter(openlabel, "seq")
+    assert exporter.streams == ["front", "rear"]
+
+    images = exporter.add_frame(Uid("001"), openlabel.frames[Uid("1")])  # type: ignore[index]
+    front, rear = images
+    assert (front.file_name, front.stream_frame, front.width, front.height) == ("images/front/000042.jpg", 42, 1920, 1080)
+    assert front.to_coco(7) == {
+        "id": 7,
+        "file_name": "images/front/000042.jpg",
+        "width": 1920,
+        "height": 1080,
+        "sequence": "seq",
+        "stream": "front",
+        "frame": 1,
+        "stream_frame": 42,
+    }
+    assert [(a.category, a.bbox, a.area) for a in front.annotations] == [("car", (10.0, 15.0, 10.0, 20.0), 200.0)]
+    # Poly2D without a coordinate system is ambiguous with two exported streams
+    assert (rear.file_name, rear.width) == ("rear/000001.jpg", None)
+    (annotation,) = rear.annotations
+    assert (annotation.category, annotation.bbox, annotation.area) == ("pedestrian", (0.0, 0.0, 4.0, 4.0), 16.0)
+    assert annotation.to_coco(1, 2, 3)["segmentation"] == [[0.0, 0.0, 4.0, 0.0, 4.0, 4.0, 0.0, 4.0]]
+
+    # The stream shift by default, open polylines aren't exported
+    front, rear = exporter.add_frame(0, openlabel.frames[Uid("0")])  # type: ignore[index]
+    assert front.stream_frame == 10 and len(front.annotations) == 1 and rear.annotations == ()
+
+    single = CocoExporter(
+        openlabel, streams=["rear"], file_name_template="{sequence}/{stream}_{frame}.png", data_names={"other"}
+    )
+    (rear,) = single.add_frame(1, openlabel.frames[Uid("1")])  # type: ignore[index]
+    assert rear.file_name == "/rear_1.png"
+    assert [a.segmentation for a in rear.annotations] == [((0.0, 0.0, 4.0, 0.0, 4.0, 4.0, 0.0, 4.0),)]
+
+
+def test_exporter_decodes_polylines(monkeypatch: pytest.MonkeyPatch) -> None:
+    data = _openlabel()
+    relative = {"name": "shape", "val": [1, 2, 4, 0, 4, 4], "closed": True, "mode": "MODE_POLY2D_RELATIVE"}
+    chain_code = {**relative, "val": ["0", "0", "0", "g"], "mode": "MODE_POLY2D_SRF6DCC"}
+    empty = {**relative, "val": []}
+    frame = {"objects": {"1": {"object_data": {"poly2d": [relative, empty]}}, "2": {"object_data": {"poly2d": [empty]}}}}
+    data["openlabel"]["frames"] = {"0": frame}
+    openlabel = OpenLabel.from_dict(data)
+
+    def points_without_numpy(self: Poly2D) -> Any:
+        raise ImportError("No module named 'numpy'")
+
+    # Absolute and relative polylines are decoded without NumPy, degenerate ones are skipped
+    monkeypatch.setattr(Poly2D, "points", points_without_numpy)
+    (image,) = CocoExporter(openlabel, streams=["rear"]).add_frame(0, openlabel.frames[Uid("0")])  # type: ignore[index]
+    assert [(a.object_uid, a.segmentation) for a in image.annotations] == [("1", ((1.0, 2.0, 5.0, 2.0, 5.0, 6.0),))]
+
+    frame["objects"]["1"]["object_data"]["poly2d"] = [chain_code]
+    openlabel = OpenLabel.from_dict(data)
+    with pytest.raises(ImportError, match="numpy extra"):
+        CocoExporter(openlabel, streams=["rear"]).add_frame(0, openlabel.frames[Uid("0")])  # type: ignore[index]
+
+
+def test_writer_skips_unknown_categories() -> None:
+    images = list(coco_images(io.StringIO(json.dumps(_openlabel())), sequence="seq", streams=["front"]))
+    output = io.StringIO()
+    with CocoWriter(output, {"car": 5}, info={"description": "test"}) as writer:
+        for image in images:
+            writer.add_image(image)
+    coco = json.loads(output.getvalue())
+    assert coco["info"] == {"description": "test"}
+    assert [image["id"] for image in coco["images"]] == [1, 2]
+    assert [(a["id"], a["image_id"], a["category_id"], a["track_id"]) for a in coco["annotations"]] == [
+        (1, 1, 5, "1"),
+        (2, 2, 5, "1"),
+    ]
+    assert coco["categories"] == [{"id": 5, "name": "car"}]
+    with pytest.raises(ValueError, match="closed"):
+        writer.add_image(images[0])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_of_many_sequences(tmp_path: Path, workers: int) -> None:
+    paths = []
+    for index, object_type in enumerate(("car", "bus", "car")):
+        path = tmp_path / f"sequence_{index}.json"
+        path.write_text(json.dumps(_openlabel(object_type)))
+        paths.append(path)
+
+    target = tmp_path / "coco.json"
+    categories = export_coco(paths, target, workers=workers)
+    assert categories == {"bus": 1, "car": 2, "pedestrian": 3}
+    coco = json.loads(target.read_text())
+    assert len(coco["images"]) == 12 and len(coco["annotations"]) == 9
+    assert [image["sequence"] for image in coco["images"]][::4] == ["sequence_0", "sequence_1", "sequence_2"]
+    assert {a["image_id"] for a in coco["annotations"]} == {1, 3, 4, 5, 7, 8, 9, 11, 12}
+    assert [a["category_id"] for a in coco["annotations"]][:3] == [2, 2, 3]
+
+    assert export_coco(paths, target, categories={"pedestrian": 1}, workers=workers) == {"pedestrian": 1}
+    assert len(json.loads(target.read_text())["annotations"]) == 3
+
+
+def test_command_line(tmp_path: Path) -> None:
+    (tmp_path / "sequence.json").write_text(json.dumps(_openlabel()))
+    (tmp_path / "categories.json").write_text(json.dumps({"car": 3}))
+    target = tmp_path / "coco.json"
+    arguments = [
+        "--streams",
+        "front",
+        "--categories",
+        str(tmp_path / "categories.json"),
+        "--file-names",
+        "{stream}/{frame}.png",
+    ]
+    assert main(["coco", str(tmp_path / "sequence.json"), "-o", str(target), *arguments]) == 0
+    coco = json.loads(target.read_text())
+    assert [image["file_name"] for image in coco["images"]] == ["front/0.png", "front/1.png"]
+    assert coco["categories"] == [{"id": 3, "name": "car"}] and len(coco["annotations"]) == 2
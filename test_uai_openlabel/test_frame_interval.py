@@ -0,0 +1,63 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import random
+
+from uai_openlabel import (
+    FrameInterval,
+    FrameIntervalSet,
+    Uid,
+    normalize_frame_intervals,
+)
+
+
+def test_normalization() -> None:
+    intervals = [
+        FrameInterval(frame_start=Uid("7"), frame_end=Uid("9")),
+        FrameInterval(frame_start=0, frame_end=3),
+        FrameInterval(frame_start=2, frame_end=4),
+        FrameInterval(frame_start=10, frame_end=10),
+    ]
+    assert normalize_frame_intervals(intervals) == [
+        FrameInterval(frame_start=0, frame_end=4),
+        FrameInterval(frame_start=7, frame_end=10),
+    ]
+    assert FrameIntervalSet.from_frames([Uid("003"), 1, 2, 5, 5]).ranges == ((1, 3), (5, 5))
+    assert FrameIntervalSet([(4, 2)]) == FrameIntervalSet()
+    assert intervals[0].contains(Uid("008"))
+
+
+def test_set_operations() -> None:
+    a = FrameIntervalSet([(0, 10), (20, 30)])
+    b = FrameIntervalSet([(5, 22), (28, 40)])
+
+    assert (a | b).ranges == ((0, 40),)
+    assert (a & b).ranges == ((5, 10), (20, 22), (28, 30))
+    assert (a - b).ranges == ((0, 4), (23, 27))
+    assert (b - a).ranges == ((11, 19), (31, 40))
+    assert 25 in a and Uid("15") not in a and "abc" not in a
+    assert a.overlaps(11, 20) and not a.overlaps(11, 19)
+    assert len(a) == 22 and a.first == 0 and a.last == 30
+
+
+def test_set_operations_match_python_sets() -> None:
+    rng = random.Random(7)
+    for _ in range(200):
+        x = {rng.randrange(50) for _ in range(rng.randrange(30))}
+        y = {rng.randrange(50) for _ in range(rng.randrange(30))}
+        a, b = FrameIntervalSet.from_frames(x), FrameIntervalSet.from_frames(y)
+        assert set(a | b) == x | y
+        assert set(a & b) == x & y
+        assert set(a - b) == x - y
+        assert FrameIntervalSet.from_frames(x - y) == a - b
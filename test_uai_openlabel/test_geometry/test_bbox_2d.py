@@ -0,0 +1,103 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import itertools
+import math
+import random
+
+import numpy as np
+import pytest
+
+from uai_openlabel import (
+    Frame,
+    ObjectData,
+    ObjectInFrame,
+    RotatedTwoDBoundingBox,
+    TwoDBoundingBox,
+    Uid,
+)
+from uai_openlabel.geometry import BoundingBox2DIndex, iou_matrix, rotated_iou_matrix
+
+
+def test_iou_matrix() -> None:
+    boxes_a = [(0, 0, 2, 2), (10, 10, 1, 1)]
+    boxes_b = [(1, 0, 2, 2), (0, 0, 2, 2), (0, 0, 0, 0)]
+    expected = [[2 / 6, 1.0, 0.0], [0.0, 0.0, 0.0]]
+    assert iou_matrix(boxes_a, boxes_b) == pytest.approx(np.array(expected))
+
+
+def test_rotated_iou_matrix() -> None:
+    square = (0, 0, 2, 2, 0)
+    diamond = (0, 0, 2, 2, math.pi / 4)
+    # The intersection of a square with the same square rotated by 45° is a regular octagon
+    octagon_area = 8 * (math.sqrt(2) - 1)
+    expected_iou = octagon_area / (8 - octagon_area)
+
+    result = rotated_iou_matrix([square, diamond], [diamond, (0, 0, 2, 2, math.pi / 2), (5, 5, 1, 1, 0.3)])
+    assert result == pytest.approx(np.array([[expected_iou, 1.0, 0.0], [1.0, expected_iou, 0.0]]))
+
+    # Intersections with different numbers of vertices are clipped together: a contained box and a triangle
+    contained = (0, 0, 0.5, 0.5, 0.3)
+    shifted_diamond = (2, 0, 2, 2, math.pi / 4)
+    triangle_area = (math.sqrt(2) - 1) ** 2
+    result = rotated_iou_matrix([square], [diamond, contained, shifted_diamond])
+    assert result == pytest.approx(np.array([[expected_iou, 0.25 / 4, triangle_area / (8 - triangle_area)]]))
+
+    # Without rotation, both functions agree
+    axis_aligned = [(0, 0, 2, 3), (1, 1, 2, 2), (4, 0, 1, 1)]
+    assert rotated_iou_matrix([(*b, 0) for b in axis_aligned], [(*b, 0.0) for b in axis_aligned]) == pytest.approx(
+        iou_matrix(axis_aligned, axis_aligned)
+    )
+
+
+def _frame_with_boxes(boxes: list[tuple[float, ...]], coordinate_system: str = "cam") -> Frame:
+    objects = {}
+    for i, val in enumerate(boxes):
+        if len(val) == 4:
+            bbox = TwoDBoundingBox(val=val, name="box", coordinate_system=coordinate_system)
+            object_data = ObjectData(bbox=[bbox])
+        else:
+            rbbox = RotatedTwoDBoundingBox(val=val, name="box", coordinate_system=coordinate_system)  # type: ignore[arg-type]
+            object_data = ObjectData(rbbox=[rbbox])
+        objects[Uid(str(i))] = ObjectInFrame(object_data=object_data)
+    return Frame(objects=objects)
+
+
+def test_overlapping_pairs_match_brute_force() -> None:
+    rng = random.Random(7)
+    boxes: list[tuple[float, ...]] = []
+    for _ in range(200):
+        box = (rng.uniform(0, 1000), rng.uniform(0, 600), rng.uniform(5, 80), rng.uniform(5, 80))
+        boxes.append(box if rng.random() < 0.7 else (*box, rng.uniform(-1, 1)))
+    index = BoundingBox2DIndex.from_frame(_frame_with_boxes(boxes), "cam")
+
+    vals = [(*b, 0.0) if len(b) == 4 else b for b in boxes]
+    full = rotated_iou_matrix(vals, vals)
+    expected = {(i, j) for i, j in itertools.combinations(range(len(boxes)), 2) if full[i, j] > 0.01}
+
+    pairs = index.overlapping_pairs(min_iou=0.01)
+    assert {(int(p.first.object_uid), int(p.second.object_uid)) for p in pairs} == expected
+    for pair in pairs:
+        assert pair.iou == pytest.approx(full[int(pair.first.object_uid), int(pair.second.object_uid)])
+
+
+def test_index_is_per_coordinate_system_and_cached() -> None:
+    frame = _frame_with_boxes([(10, 10, 4, 4), (11, 10, 4, 4)])
+    assert len(BoundingBox2DIndex.from_frame(frame, "other_cam")) == 0
+
+    index = BoundingBox2DIndex.for_frame(frame, "cam")
+    assert BoundingBox2DIndex.for_frame(frame, "cam") is index
+    assert [p.iou for p in index.overlapping_pairs(min_iou=0.5)] == pytest.approx([12 / 20])
+    assert index.iou_with((10, 10, 4, 4)) == pytest.approx(np.array([1.0, 12 / 20]))
+    assert [b.object_uid for b in index.intersecting_region(12.5, 0, 20, 20)] == ["1"]
@@ -0,0 +1,110 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import json
+import math
+
+import numpy as np
+import pytest
+
+from uai_openlabel import Poly2D, Poly2DMode
+from uai_openlabel.geometry import decode_poly2d, encode_poly2d
+
+
+def _outline(n_vertices: int, radius: float) -> np.ndarray:
+    """The integer vertices of a noisy closed outline, like a simplified segmentation contour."""
+    rng = np.random.default_rng(7)
+    angles = np.linspace(0, 2 * math.pi, n_vertices, endpoint=False)
+    radii = radius * (1 + 0.1 * np.sin(5 * angles) + rng.uniform(-0.03, 0.03, n_vertices))
+    return np.round(np.column_stack((1000 + radii * np.cos(angles), 600 + radii * np.sin(angles)))).astype(np.int64)
+
+
+@pytest.mark.parametrize("mode", [Poly2DMode.SRF6DCC, Poly2DMode.RS6FCC])
+def test_chain_code_round_trip(mode: Poly2DMode) -> None:
+    vertices = _outline(200, 300)
+    val = encode_poly2d(vertices, mode)
+    pixels = decode_poly2d(val, mode)
+
+    # Every step moves to one of the eight neighbours, and the vertices are part of the outline in order
+    steps = np.abs(np.diff(pixels, axis=0))
+    assert np.all(steps.max(axis=1) == 1)
+    positions = [np.flatnonzero(np.all(pixels == vertex, axis=1))[0] for vertex in vertices]
+    assert positions == sorted(positions)
+    assert pixels[0].tolist() == vertices[0].tolist() and pixels[-1].tolist() == vertices[-1].tolist()
+
+    # Pixel outlines are encoded losslessly
+    assert encode_poly2d(pixels, mode) == val
+    assert np.array_equal(decode_poly2d(val, mode), pixels)
+
+
+def test_chain_code_turns() -> None:
+    # Straight, all turns of 45°, 90°, 135° and a reversal
+    points = np.array([[0, 0], [1, 0], [2, 0], [3, 1], [3, 2], [4, 1], [5, 1], [4, 2], [4, 1], [3, 0], [4, 1]])
+    for mode in (Poly2DMode.SRF6DCC, Poly2DMode.RS6FCC):
+        assert np.array_equal(decode_poly2d(encode_poly2d(points, mode), mode), points)
+
+    # The first step turns by -90° from the initial direction down
+    assert encode_poly2d(points[:3], Poly2DMode.SRF6DCC) == ("0", "0", "0", "g")
+    assert encode_poly2d(np.array([[5, 5]]), Poly2DMode.RS6FCC) == ("5", "5", "-1", "-1", "0", "")
+    assert decode_poly2d(("5", "5", "-1", "-1", "0", ""), Poly2DMode.RS6FCC).tolist() == [[5, 5]]
+
+
+def test_reference_chain_codes() -> None:
+    """Values written by the reference implementation of the standard, vcd.poly2d."""
+    vertices = np.array([[10, 20], [10, 40], [30, 40], [35, 35], [35, 20], [25, 20], [24, 21], [23, 20], [10, 20]])
+    pixels = decode_poly2d(encode_poly2d(vertices, Poly2DMode.SRF6DCC), Poly2DMode.SRF6DCC)
+    assert len(pixels) == 86
+
+    srf6dcc = ("10", "20", "1", "+AnwWC22Am2TW2w")
+    assert encode_poly2d(vertices, Poly2DMode.SRF6DCC) == srf6dcc
+    assert np.array_equal(decode_poly2d(srf6dcc, Poly2DMode.SRF6DCC), pixels)
+
+    # The reference chooses other run lengths, both are valid
+    rs6fcc = ("10", "20", "4", "9", "1", "/An4WXwnTXAA")
+    assert np.array_equal(decode_poly2d(rs6fcc, Poly2DMode.RS6FCC), pixels)
+    assert encode_poly2d(vertices, Poly2DMode.RS6FCC) == ("10", "20", "4", "14", "0", "+AnwWXmwTW2")
+
+
+def test_absolute_and_relative() -> None:
+    points = np.array([[10.5, 20.0], [12.0, 18.0], [9.0, 25.0]])
+    assert encode_poly2d(points, Poly2DMode.Relative) == (10.5, 20.0, 1.5, -2.0, -1.5, 5.0)
+    for mode in (Poly2DMode.Absolute, Poly2DMode.Relative):
+        assert decode_poly2d(encode_poly2d(points, mode), mode) == pytest.approx(points)
+
+    poly = Poly2D(closed=True, mode=Poly2DMode.Absolute, name="outline", val=[0, 0, 3, 0, 3, 2])
+    chain = poly.with_mode(Poly2DMode.SRF6DCC)
+    assert chain.mode is Poly2DMode.SRF6DCC and chain.closed and chain.name == "outline"
+    assert chain.points().tolist() == [[0, 0], [1, 0], [2, 0], [3, 0], [3, 1], [3, 2]]
+    assert chain.with_mode(Poly2DMode.Relative).val == (0, 0, 1, 0, 2, 0, 3, 0, 3, 1, 3, 2)
+
+
+def test_invalid_chain_codes() -> None:
+    with pytest.raises(ValueError, match="integer pixel grid"):
+        encode_poly2d(np.array([[0.5, 0.0], [1.0, 1.0]]), Poly2DMode.SRF6DCC)
+    with pytest.raises(ValueError, match="not base64"):
+        decode_poly2d(("0", "0", "0", "A?"), Poly2DMode.SRF6DCC)
+    with pytest.raises(ValueError, match="xinit, yinit, rest, payload"):
+        decode_poly2d(("0", "0", "A"), Poly2DMode.SRF6DCC)
+    with pytest.raises(ValueError, match="padding symbols"):
+        decode_poly2d(("0", "0", "3", "A"), Poly2DMode.SRF6DCC)
+    with pytest.raises(ValueError, match="run length is -1"):
+        decode_poly2d(("0", "0", "-1", "-1", "0", "w"), Poly2DMode.RS6FCC)
+
+
+def test_chain_code_size() -> None:
+    pixels = decode_poly2d(encode_poly2d(_outline(500, 2000), Poly2DMode.SRF6DCC), Poly2DMode.SRF6DCC)
+    absolute = json.dumps(encode_poly2d(pixels, Poly2DMode.Absolute))
+
+    for mode in (Poly2DMode.SRF6DCC, Poly2DMode.RS6FCC):
+        encoded = json.dumps(encode_poly2d(pixels, mode))
+        assert len(encoded) < len(absolute) / 15
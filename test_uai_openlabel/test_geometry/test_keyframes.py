@@ -0,0 +1,132 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import math
+
+import numpy as np
+import pytest
+
+from uai_openlabel import (
+    Frame,
+    FrameInterval,
+    FrameIntervalSet,
+    Object,
+    ObjectData,
+    ObjectInFrame,
+    OpenLabel,
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+    Uid,
+)
+from uai_openlabel.geometry import CuboidKeyframes, slerp_quaternions
+
+
+def _euler(x: float, yaw: float, length: float = 4.0) -> ThreeDBoundingBoxEuler:
+    return ThreeDBoundingBoxEuler(val=(x, 0.0, 0.0, 0.0, 0.0, yaw, length, 2.0, 1.5), name="box", coordinate_system="odom")
+
+
+def _keyframed_openlabel() -> OpenLabel:
+    def frame(cuboid: ThreeDBoundingBoxEuler) -> Frame:
+        return Frame(objects={Uid("1"): ObjectInFrame(object_data=ObjectData(cuboid=[cuboid]))})
+
+    return OpenLabel(
+        objects={Uid("1"): Object(name="car", type="car")},
+        frames={Uid("0"): frame(_euler(0.0, 3.0)), Uid("4"): frame(_euler(8.0, -3.0, 6.0))},
+    )
+
+
+def test_slerp_quaternions() -> None:
+    q0 = np.array([[0.0, 0.0, 0.0, 1.0], [0.0, 0.0, 0.0, 1.0]])
+    q1 = np.array([[0.0, 0.0, math.sin(0.5), math.cos(0.5)], [0.0, 0.0, 0.0, -2.0]])
+    result = slerp_quaternions(q0, q1, [0.5, 0.3])
+
+    assert result[0] == pytest.approx([0.0, 0.0, math.sin(0.25), math.cos(0.25)])
+    # Opposite signs describe the same rotation
+    assert result[1] == pytest.approx([0.0, 0.0, 0.0, 1.0])
+
+
+def test_interpolation() -> None:
+    keyframes = CuboidKeyframes.from_openlabel(_keyframed_openlabel())
+    assert keyframes.keyframes(Uid("1"), "box") == [0, 4]
+
+    middle = keyframes.cuboid(Uid("1"), 2, "box")
+    assert isinstance(middle, ThreeDBoundingBoxEuler)
+    assert middle.coordinate_system == "odom"
+    # The yaw passes through pi, the shorter arc between 3 and -3
+    assert middle.val[:3] == pytest.approx((4.0, 0.0, 0.0))
+    assert abs(middle.val[5]) == pytest.approx(math.pi)
+    assert middle.val[6:] == pytest.approx((5.0, 2.0, 1.5))
+    quarter = keyframes.cuboid(Uid("1"), Uid("001"), "box")
+    assert quarter is not None and quarter.val[5] == pytest.approx(3.0 + (2 * math.pi - 6.0) / 4)
+
+    assert keyframes.cuboid(Uid("1"), 5, "box") is None
+    assert keyframes.cuboid(Uid("1"), 2, "other") is None
+    assert keyframes.cuboids_at(4) == {Uid("1"): [keyframes.cuboid(Uid("1"), 4, "box")]}
+
+    # Quaternion keyframes are interpolated as quaternions
+    keyframes.set_keyframe(Uid("1"), 4, ThreeDBoundingBoxQuaternion(val=(8.0, 0, 0, 0, 0, 0, 1, 4.0, 2.0, 1.5), name="box"))
+    keyframes.set_keyframe(Uid("1"), 0, ThreeDBoundingBoxQuaternion(val=(0.0, 0, 0, 0, 0, 0, 2, 4.0, 2.0, 1.5), name="box"))
+    middle = keyframes.cuboid(Uid("1"), 2, "box")
+    assert isinstance(middle, ThreeDBoundingBoxQuaternion)
+    assert middle.val == pytest.approx((4.0, 0, 0, 0, 0, 0, 1, 4.0, 2.0, 1.5))
+
+    keyframes.remove_keyframe(Uid("1"), 4, "box")
+    assert keyframes.cuboid(Uid("1"), 2, "box") is None
+    with pytest.raises(KeyError):
+        keyframes.remove_keyframe(Uid("1"), 4, "box")
+
+
+def test_frame_intervals_restrict_interpolation() -> None:
+    openlabel = _keyframed_openlabel()
+    assert openlabel.objects is not None
+    openlabel.objects[Uid("1")].frame_intervals = [
+        FrameInterval(frame_start=0, frame_end=1),
+        FrameInterval(frame_start=3, frame_end=4),
+    ]
+    keyframes = CuboidKeyframes.from_openlabel(openlabel)
+
+    assert keyframes.cuboid(Uid("1"), 1, "box") is not None
+    assert keyframes.cuboid(Uid("1"), 2, "box") is None
+
+    keyframes.set_frame_intervals(Uid("1"), FrameIntervalSet([(0, 4)]))
+    assert keyframes.cuboid(Uid("1"), 2, "box") is not None
+
+
+def test_densify() -> None:
+    openlabel = _keyframed_openlabel()
+    keyframes = CuboidKeyframes.from_openlabel(openlabel)
+
+    assert keyframes.densify(openlabel) == 3
+    assert openlabel.frames is not None and list(openlabel.frames) == ["0", "1", "2", "3", "4"]
+    frame = openlabel.frames[Uid("2")]
+    assert frame.objects is not None
+    assert frame.objects[Uid("1")].object_data.get_cuboid("box") == keyframes.cuboid(Uid("1"), 2, "box")
+    assert [indexed.object_uid for indexed in frame.cuboid_index().within_radius((4.0, 0.0, 0.0), 0.1)] == [Uid("1")]
+    assert openlabel.objects is not None
+    assert openlabel.objects[Uid("1")].frame_intervals == [FrameInterval(frame_start=0, frame_end=4)]
+
+    # Frames that already hold the cuboid are kept
+    assert keyframes.densify(openlabel) == 0
+
+    keyframes.set_keyframe(Uid("2"), 0, _euler(0.0, 0.0))
+    with pytest.raises(ValueError, match="not defined"):
+        keyframes.densify(openlabel)
+
+
+def test_densify_keeps_frame_key_format() -> None:
+    openlabel = _keyframed_openlabel()
+    assert openlabel.frames is not None
+    openlabel.frames = {Uid(f"{int(frame_uid):04d}"): frame for frame_uid, frame in openlabel.frames.items()}
+
+    assert CuboidKeyframes.from_openlabel(openlabel).densify(openlabel) == 3
+    assert list(openlabel.frames) == ["0000", "0001", "0002", "0003", "0004"]
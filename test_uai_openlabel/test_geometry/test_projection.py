@@ -0,0 +1,194 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import math
+
+import numpy as np
+import pytest
+
+from uai_openlabel import (
+    CoordinateSystem,
+    FisheyeCameraIntrinsics,
+    FisheyeCameraStreamProperties,
+    Frame,
+    FrameProperties,
+    Matrix4x4TransformData,
+    ObjectData,
+    ObjectInFrame,
+    OpenLabel,
+    PinholeCameraIntrinsics,
+    PinholeCameraStreamProperties,
+    Poly3D,
+    Stream,
+    StreamType,
+    ThreeDBoundingBoxEuler,
+    Uid,
+)
+from uai_openlabel.geometry import (
+    CameraProjector,
+    FisheyeCamera,
+    PinholeCamera,
+    cuboid_corners,
+)
+
+
+def _intrinsics(focal_length: float = 100.0, k1: float = 0.0) -> PinholeCameraIntrinsics:
+    # fmt: off
+    camera_matrix = (
+        focal_length, 0.0, 50.0, 0.0,
+        0.0, focal_length, 40.0, 0.0,
+        0.0, 0.0, 1.0, 0.0,
+    )
+    # fmt: on
+    return PinholeCameraIntrinsics(
+        camera_matrix=camera_matrix, distortion_coeffs=(k1, 0.0, 0.0, 0.0, 0.0), width_px=100, height_px=80
+    )
+
+
+def _openlabel() -> OpenLabel:
+    # The camera looks along the x-axis of the vehicle, its x-axis points right and its y-axis down
+    # fmt: off
+    camera_pose = (
+        0.0, 0.0, 1.0, 0.0,
+        -1.0, 0.0, 0.0, 0.0,
+        0.0, -1.0, 0.0, 0.0,
+        0.0, 0.0, 0.0, 1.0,
+    )
+    # fmt: on
+    cuboid = ThreeDBoundingBoxEuler(val=(10, 0, 0, 0, 0, 0, 2, 2, 2), name="box", coordinate_system="vehicle")
+    lane = Poly3D(closed=False, name="lane", val=(10, 0, 0, 10, 1, 0, -5, 0, 0), coordinate_system="vehicle")
+    frame_override = Stream(stream_properties=PinholeCameraStreamProperties(intrinsics_pinhole=_intrinsics(200.0)))
+    return OpenLabel(
+        coordinate_systems={
+            "vehicle": CoordinateSystem(parent="", type="local_cs", children=["front"]),
+            "front": CoordinateSystem(
+                parent="vehicle", type="sensor_cs", pose_wrt_parent=Matrix4x4TransformData(matrix4x4=camera_pose)
+            ),
+        },
+        streams={
+            "front": Stream(
+                type=StreamType.Camera, stream_properties=PinholeCameraStreamProperties(intrinsics_pinhole=_intrinsics())
+            ),
+            "lidar": Stream(type=StreamType.Lidar),
+        },
+        frames={
+            Uid("0"): Frame(objects={Uid("1"): ObjectInFrame(object_data=ObjectData(cuboid=[cuboid], poly3d=[lane]))}),
+            Uid("1"): Frame(frame_properties=FrameProperties(streams={"front": frame_override})),
+        },
+    )
+
+
+def test_pinhole_camera() -> None:
+    camera = PinholeCamera.from_intrinsics(_intrinsics())
+    pixels, visible = camera.project([(0, 0, 10), (5, 0, 10), (0, 0, -10), (1, -2, 5)])
+
+    assert pixels[[0, 1, 3]] == pytest.approx(np.array([[50.0, 40.0], [100.0, 40.0], [70.0, 0.0]]))
+    assert np.isnan(pixels[2]).all()
+    assert visible.tolist() == [True, False, False, True]
+
+    distorted = PinholeCamera.from_intrinsics(_intrinsics(k1=0.1))
+    pixels, _ = distorted.project([(0.5, 0, 1), (0.3, 0.4, 1)])
+    assert pixels == pytest.approx(np.array([[50 + 100 * 0.5 * 1.025, 40.0], [50 + 100 * 0.3 * 1.025, 40 + 100 * 0.4 * 1.025]]))
+
+    with pytest.raises(ValueError, match="Tilted"):
+        PinholeCamera.from_intrinsics(
+            PinholeCameraIntrinsics(camera_matrix=(0,) * 12, distortion_coeffs=(0,) * 13 + (1,), width_px=1, height_px=1)
+        )
+
+
+def test_project_frame() -> None:
+    projector = CameraProjector.from_openlabel(_openlabel())
+
+    (projected_cuboid,) = projector.project_cuboids(0, "front")[Uid("1")]
+    assert projected_cuboid.points.shape == (8, 2) and projected_cuboid.visible.all()
+    assert isinstance(projected_cuboid.data, ThreeDBoundingBoxEuler)
+    # The first corner is at (9, -1, -1) in the vehicle coordinate system
+    assert cuboid_corners([projected_cuboid.data])[0, 0] == pytest.approx([9.0, -1.0, -1.0])
+    assert projected_cuboid.points[0] == pytest.approx([50 + 100 / 9, 40 + 100 / 9])
+
+    (projected_lane,) = projector.project_polylines(0, "front")[Uid("1")]
+    assert projected_lane.points[:2] == pytest.approx(np.array([[50.0, 40.0], [40.0, 40.0]]))
+    assert projected_lane.visible.tolist() == [True, True, False]
+
+    pixels, _ = projector.project_points([(10, 1, 0)], "vehicle", "front", frame=1)
+    assert pixels == pytest.approx(np.array([[30.0, 40.0]]))
+    assert projector.camera("front", 1) is projector.camera("front", Uid("001"))
+    camera = projector.camera("front", 1)
+    assert isinstance(camera, PinholeCamera) and camera.camera_matrix[0, 0] == 200.0
+
+    with pytest.raises(ValueError, match="no pinhole or fisheye intrinsics"):
+        projector.camera("lidar")
+
+
+def test_cuboid_corners() -> None:
+    cuboid = ThreeDBoundingBoxEuler(val=(1, 2, 3, 0, 0, math.pi / 2, 4, 2, 1), name="box")
+    corners = cuboid_corners([cuboid])
+    assert corners.shape == (1, 8, 3)
+    # Rotated by 90 degrees, the length of the cuboid extends along the y-axis
+    assert corners[0].min(axis=0) == pytest.approx([0.0, 0.0, 2.5])
+    assert corners[0].max(axis=0) == pytest.approx([2.0, 4.0, 3.5])
+
+
+def _fisheye_intrinsics() -> FisheyeCameraIntrinsics:
+    # Equidistant lens with a slight distortion, r = 300 * (a - 0.05 * a^3) pixels
+    return FisheyeCameraIntrinsics(width_px=1000, height_px=800, lens_coeffs=(300.0, 0.0, -15.0, 0.0))
+
+
+def test_fisheye_camera() -> None:
+    camera = FisheyeCamera.from_intrinsics(_fisheye_intrinsics())
+    assert camera.center_px == (500.0, 400.0)
+    # The radius stops increasing where its derivative 300 * (1 - 0.15 * a^2) becomes 0
+    assert camera.max_angle == pytest.approx(math.sqrt(1 / 0.15), abs=1e-3)
+
+    pixels, visible = camera.project([(0, 0, 1), (1, 0, 1), (1, 0, 0), (0, 0, -1)])
+    angle = math.pi / 4
+    assert pixels[:3] == pytest.approx(
+        np.array(
+            [
+                [500.0, 400.0],
+                [500 + 300 * (angle - 0.05 * angle**3), 400.0],
+                [500 + 300 * (math.pi / 2 - 0.05 * (math.pi / 2) ** 3), 400.0],
+            ]
+        )
+    )
+    assert visible.tolist() == [True, True, True, False]
+
+    rng = np.random.default_rng(1)
+    directions = rng.normal(size=(5000, 3))
+    directions[:, 2] = np.abs(directions[:, 2])
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    pixels, _ = camera.project(directions)
+    rays, valid = camera.unproject(pixels)
+    assert valid.all()
+    assert rays == pytest.approx(directions, abs=1e-9)
+
+    rays, valid = camera.unproject([(500 + 10_000, 400)])
+    assert not valid[0] and np.isnan(rays[0]).all()
+
+    with pytest.raises(ValueError, match="increasing"):
+        FisheyeCamera.from_intrinsics(FisheyeCameraIntrinsics(width_px=1, height_px=1, lens_coeffs=(-1.0, 0, 0, 0)))
+
+
+def test_fisheye_cameras_are_shared_by_frames() -> None:
+    openlabel = _openlabel()
+    assert openlabel.streams is not None
+    openlabel.streams["front"].stream_properties = FisheyeCameraStreamProperties(intrinsics_fisheye=_fisheye_intrinsics())
+    openlabel.frames = {Uid(str(n)): Frame() for n in range(3)}
+    projector = CameraProjector.from_openlabel(openlabel)
+
+    camera = projector.camera("front", 0)
+    assert isinstance(camera, FisheyeCamera)
+    assert projector.camera("front", 2) is camera
+    pixels, visible = projector.project_points([(10, 0, 0)], "vehicle", "front", 1)
+    assert pixels == pytest.approx(np.array([[500.0, 400.0]])) and visible.all()
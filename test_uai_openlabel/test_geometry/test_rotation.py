@@ -0,0 +1,107 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import math
+
+import numpy as np
+import pytest
+
+from uai_openlabel import (
+    ObjectData,
+    OpenLabel,
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+    Uid,
+)
+from uai_openlabel.geometry import (
+    cuboids_to_euler,
+    cuboids_to_quaternion,
+    euler_vals_to_quaternion_vals,
+    euler_zyx_from_quaternions,
+    quaternion_vals_to_euler_vals,
+    quaternions_from_euler_zyx,
+    quaternions_from_rotation_matrices,
+    rotation_matrices_from_euler,
+    rotation_matrices_from_quaternions,
+)
+
+
+def _random_angles(n: int) -> np.ndarray:
+    rng = np.random.default_rng(42)
+    angles = rng.uniform(-math.pi, math.pi, (n, 3))
+    angles[:, 1] /= 2
+    return angles
+
+
+def test_euler_quaternion_round_trip() -> None:
+    angles = _random_angles(10_000)
+    quaternions = quaternions_from_euler_zyx(angles)
+
+    assert np.linalg.norm(quaternions, axis=1) == pytest.approx(1.0)
+    assert quaternions == pytest.approx(quaternions_from_rotation_matrices(rotation_matrices_from_euler(angles)), abs=1e-12)
+    assert rotation_matrices_from_quaternions(quaternions) == pytest.approx(rotation_matrices_from_euler(angles), abs=1e-12)
+    assert euler_zyx_from_quaternions(quaternions) == pytest.approx(angles, abs=1e-9)
+    # Non-unit quaternions describe the same rotation
+    assert euler_zyx_from_quaternions(3 * quaternions) == pytest.approx(angles, abs=1e-9)
+
+
+def test_gimbal_lock() -> None:
+    angles = np.array([[0.3, math.pi / 2, 0.2], [-1.0, -math.pi / 2, 0.5]])
+    recovered = euler_zyx_from_quaternions(quaternions_from_euler_zyx(angles))
+    assert recovered[:, 2] == pytest.approx([0.0, 0.0])
+    assert rotation_matrices_from_euler(recovered) == pytest.approx(rotation_matrices_from_euler(angles), abs=1e-7)
+
+
+def test_cuboid_vals() -> None:
+    euler_vals = np.concatenate([np.ones((100, 3)), _random_angles(100)[:, ::-1], np.full((100, 3), 2.0)], axis=1)
+    quaternion_vals = euler_vals_to_quaternion_vals(euler_vals)
+
+    assert quaternion_vals.shape == (100, 10)
+    assert quaternion_vals_to_euler_vals(quaternion_vals) == pytest.approx(euler_vals, abs=1e-9)
+    assert euler_vals_to_quaternion_vals([(0, 0, 0, 0, 0, math.pi / 2, 1, 1, 1)]) == pytest.approx(
+        np.array([[0, 0, 0, 0, 0, math.sqrt(0.5), math.sqrt(0.5), 1, 1, 1]])
+    )
+    with pytest.raises(ValueError, match="norm 0"):
+        quaternion_vals_to_euler_vals([(0,) * 10])
+
+
+def test_convert_document() -> None:
+    openlabel = OpenLabel.example()
+    assert openlabel.objects is not None and openlabel.frames is not None
+    openlabel.objects[Uid("1")].object_data = ObjectData(
+        cuboid=[ThreeDBoundingBoxQuaternion(val=(0, 0, 0, 0, 0, 1, 1, 4, 2, 1), name="static")]
+    )
+    original = [
+        c.val for f in openlabel.frames.values() for o in (f.objects or {}).values() for c in o.object_data.cuboid or ()
+    ]
+    openlabel.frames[Uid("001")].cuboid_index()
+
+    assert cuboids_to_quaternion(openlabel) == 9
+    assert cuboids_to_quaternion(openlabel) == 0
+    frame_objects = openlabel.frames[Uid("001")].objects
+    assert frame_objects is not None
+    cuboid = frame_objects[Uid("1")].object_data.get_cuboid("bounding_box")
+    assert isinstance(cuboid, ThreeDBoundingBoxQuaternion)
+    assert openlabel.frames[Uid("001")].cuboid_index().nearest((0.0, 0.0, 0.0))[0].cuboid is cuboid
+
+    assert cuboids_to_euler(openlabel) == 10
+    converted = [
+        c.val for f in openlabel.frames.values() for o in (f.objects or {}).values() for c in o.object_data.cuboid or ()
+    ]
+    assert np.array(converted) == pytest.approx(np.array(original))
+    static_data = openlabel.objects[Uid("1")].object_data
+    assert static_data is not None
+    static_cuboid = static_data.get_cuboid("static")
+    assert isinstance(static_cuboid, ThreeDBoundingBoxEuler)
+    assert static_cuboid.val[5] == pytest.approx(math.pi / 2)
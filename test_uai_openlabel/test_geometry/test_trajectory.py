@@ -0,0 +1,100 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import math
+from typing import Union
+
+import numpy as np
+import pytest
+
+from uai_openlabel import (
+    Frame,
+    FrameProperties,
+    ObjectData,
+    ObjectInFrame,
+    OpenLabel,
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+    TimestampUnit,
+    Uid,
+)
+
+
+def _frame(timestamp: float, cuboid: Union[ThreeDBoundingBoxEuler, ThreeDBoundingBoxQuaternion]) -> Frame:
+    return Frame(
+        frame_properties=FrameProperties(timestamp=timestamp),
+        objects={Uid("1"): ObjectInFrame(object_data=ObjectData(cuboid=[cuboid]))},
+    )
+
+
+def _euler(x: float, yaw: float) -> ThreeDBoundingBoxEuler:
+    return ThreeDBoundingBoxEuler(val=(x, 0.0, 0.0, 0.0, 0.0, yaw, 4.0, 2.0, 1.5), name="box")
+
+
+def _quaternion(x: float, yaw: float) -> ThreeDBoundingBoxQuaternion:
+    # Non-unit quaternion, scaled by 2
+    val = (x, 0.0, 0.0, 0.0, 0.0, 2 * math.sin(yaw / 2), 2 * math.cos(yaw / 2), 4.0, 2.0, 1.5)
+    return ThreeDBoundingBoxQuaternion(val=val, name="box")
+
+
+def test_trajectories_from_example() -> None:
+    trajectories = OpenLabel.example().trajectories(unit=TimestampUnit.Millisecond)
+
+    assert set(trajectories) == {"1", "2", "3"}
+    trajectory = trajectories[Uid("1")]
+    assert trajectory.frames is not None and trajectory.frames.tolist() == [1, 2, 3]
+    assert np.diff(trajectory.timestamps) == pytest.approx([0.01, 0.01], abs=1e-3)
+    assert trajectory.centers[:, 0] == pytest.approx([1.0, 1.1, 1.2])
+    assert trajectory.sizes[0] == pytest.approx([4.1, 1.75, 1.45])
+
+
+def test_mixed_rotations_and_gaps() -> None:
+    frames = {
+        Uid("1"): _frame(0.0, _euler(0.0, 3.0)),
+        Uid("2"): _frame(0.1, _quaternion(1.0, -3.0)),
+        Uid("5"): _frame(0.4, _euler(4.0, -3.0)),
+        Uid("6"): Frame(frame_properties=FrameProperties(timestamp=0.5)),
+    }
+    openlabel = OpenLabel(frames=frames)
+    trajectory = openlabel.trajectories()[Uid("1")]
+
+    assert trajectory.yaw == pytest.approx([3.0, -3.0, -3.0])
+    assert [segment.frames.tolist() for segment in trajectory.segments() if segment.frames is not None] == [[1, 2], [5]]
+    assert len(trajectory.segments(max_frame_gap=3)) == 1
+    assert openlabel.trajectories(cuboid_name="other") == {}
+
+
+def test_resample() -> None:
+    frames = {
+        Uid("1"): _frame(0.0, _euler(0.0, 3.0)),
+        Uid("2"): _frame(0.1, _quaternion(1.0, -3.0)),
+        Uid("5"): _frame(0.4, _euler(4.0, -3.0)),
+    }
+    trajectory = OpenLabel(frames=frames).trajectories()[Uid("1")]
+
+    resampled = trajectory.resample(rate=20.0)
+    assert resampled.frames is None
+    assert resampled.timestamps == pytest.approx([0.0, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4])
+    assert resampled.centers[:3, 0] == pytest.approx([0.0, 0.5, 1.0])
+    # The yaw is interpolated across the discontinuity at pi
+    assert abs(resampled.yaw[1]) == pytest.approx(math.pi)
+
+    assert resampled.timestamps.shape == resampled.yaw.shape == resampled.sizes[:, 0].shape
+    without_gap = trajectory.resample(rate=20.0, max_time_gap=0.2)
+    assert without_gap.timestamps == pytest.approx([0.0, 0.05, 0.1, 0.4])
+
+    no_timestamps = OpenLabel(frames={Uid("1"): Frame(objects=frames[Uid("1")].objects)}).trajectories()[Uid("1")]
+    assert np.isnan(no_timestamps.timestamps).all()
+    with pytest.raises(ValueError, match="without timestamp"):
+        no_timestamps.resample(rate=10.0)
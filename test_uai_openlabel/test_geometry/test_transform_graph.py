@@ -0,0 +1,156 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import math
+from typing import Union
+
+import numpy as np
+import pytest
+
+from uai_openlabel import (
+    CoordinateSystem,
+    EulerTransformData,
+    Frame,
+    FrameProperties,
+    Matrix4x4TransformData,
+    ObjectData,
+    ObjectInFrame,
+    OpenLabel,
+    Poly3D,
+    QuaternionTransformData,
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+    Transform,
+    Uid,
+)
+from uai_openlabel.geometry import TransformGraph, transform_to_matrix
+
+
+def _coordinate_systems() -> dict[str, CoordinateSystem]:
+    # fmt: off
+    camera_pose = (
+        0.0, 0.0, 1.0, 1.0,
+        -1.0, 0.0, 0.0, 0.0,
+        0.0, -1.0, 0.0, 1.5,
+        0.0, 0.0, 0.0, 1.0,
+    )
+    # fmt: on
+    return {
+        "world": CoordinateSystem(parent="", type="scene_cs", children=["vehicle"]),
+        "vehicle": CoordinateSystem(
+            parent="world",
+            type="local_cs",
+            children=["lidar", "camera"],
+            pose_wrt_parent=EulerTransformData(euler_angles=(math.pi / 2, 0.0, 0.0), translation=(10.0, 0.0, 0.0)),
+        ),
+        "lidar": CoordinateSystem(
+            parent="vehicle",
+            type="sensor_cs",
+            pose_wrt_parent=QuaternionTransformData(quaternion=(0.0, 0.0, 0.0, 2.0), translation=(0.0, 0.0, 2.0)),
+        ),
+        "camera": CoordinateSystem(
+            parent="vehicle", type="sensor_cs", pose_wrt_parent=Matrix4x4TransformData(matrix4x4=camera_pose)
+        ),
+        "radar": CoordinateSystem(parent="vehicle", type="sensor_cs"),
+    }
+
+
+def _frame() -> Frame:
+    cuboids: list[Union[ThreeDBoundingBoxEuler, ThreeDBoundingBoxQuaternion]] = [
+        ThreeDBoundingBoxEuler(val=(1, 0, 0, 0, 0, 0.5, 4, 2, 1.5), name="box", coordinate_system="lidar"),
+        ThreeDBoundingBoxQuaternion(
+            val=(0, 1, 0, 0, 0, math.sin(0.25), math.cos(0.25), 4, 2, 1.5), name="box_q", coordinate_system="vehicle"
+        ),
+    ]
+    return Frame(
+        frame_properties=FrameProperties(
+            transforms={
+                "world_to_vehicle": Transform(
+                    src="world",
+                    dst="vehicle",
+                    transform_src_to_dst=EulerTransformData(euler_angles=(0.0, 0.0, 0.0), translation=(-20.0, 0.0, 0.0)),
+                )
+            }
+        ),
+        objects={
+            Uid("1"): ObjectInFrame(object_data=ObjectData(cuboid=cuboids)),
+            Uid("2"): ObjectInFrame(
+                object_data=ObjectData(
+                    poly3d=[Poly3D(closed=False, name="lane", val=(0, 0, 0, 1, 0, 0), coordinate_system="lidar")]
+                )
+            ),
+        },
+    )
+
+
+def test_static_transforms() -> None:
+    graph = TransformGraph(_coordinate_systems())
+
+    assert graph.transform_points([(1, 0, 0)], "lidar", "world") == pytest.approx(np.array([[10.0, 1.0, 2.0]]))
+    assert graph.transform_points([(10, 1, 2)], "world", "lidar") == pytest.approx(np.array([[1.0, 0.0, 0.0]]))
+    # The optical axis z of the camera points along the x-axis of the vehicle
+    assert graph.transform_points([(0, 0, 1)], "camera", "vehicle") == pytest.approx(np.array([[2.0, 0.0, 1.5]]))
+    assert graph.matrix("lidar", "camera") @ graph.matrix("camera", "lidar") == pytest.approx(np.eye(4))
+    assert graph.matrix("world", "world") == pytest.approx(np.eye(4))
+
+    with pytest.raises(ValueError, match="pose of radar"):
+        graph.matrix("radar", "world")
+    with pytest.raises(ValueError, match="no transform"):
+        graph.matrix("lidar", "sun")
+
+
+def test_caching_and_frame_transforms() -> None:
+    openlabel = OpenLabel(coordinate_systems=_coordinate_systems(), frames={Uid("7"): _frame()})
+    graph = TransformGraph.from_openlabel(openlabel)
+
+    static = graph.matrix("lidar", "world")
+    assert graph.matrix("lidar", "world") is static
+    assert not static.flags.writeable
+
+    # The frame transform from world to vehicle overrides the static pose of the vehicle
+    assert graph.transform_points([(1, 0, 0)], "lidar", "world", Uid("007")) == pytest.approx(np.array([[21.0, 0.0, 2.0]]))
+
+    assert openlabel.frames is not None
+    frame_properties = openlabel.frames[Uid("7")].frame_properties
+    assert frame_properties is not None
+    frame_properties.transforms = None
+    assert graph.transform_points([(1, 0, 0)], "lidar", "world", 7) == pytest.approx(np.array([[21.0, 0.0, 2.0]]))
+    graph.invalidate(7)
+    assert graph.transform_points([(1, 0, 0)], "lidar", "world", 7) == pytest.approx(np.array([[10.0, 1.0, 2.0]]))
+    assert graph.matrix("lidar", "world") is static
+
+
+def test_transform_cuboids_and_polylines() -> None:
+    graph = TransformGraph(_coordinate_systems(), {Uid("1"): _frame()})
+
+    euler, quaternion = graph.transform_cuboids(1, "world")[Uid("1")]
+    assert isinstance(euler, ThreeDBoundingBoxEuler) and isinstance(quaternion, ThreeDBoundingBoxQuaternion)
+    assert euler.coordinate_system == quaternion.coordinate_system == "world"
+    assert euler.val == pytest.approx((21.0, 0.0, 2.0, 0.0, 0.0, 0.5, 4.0, 2.0, 1.5))
+    assert quaternion.val == pytest.approx((20.0, 1.0, 0.0, 0.0, 0.0, math.sin(0.25), math.cos(0.25), 4.0, 2.0, 1.5))
+
+    static_graph = TransformGraph(_coordinate_systems(), {Uid("1"): Frame(objects=_frame().objects)})
+    (euler,) = [c for c in static_graph.transform_cuboids(1, "world")[Uid("1")] if c.name == "box"]
+    assert euler.val[:6] == pytest.approx((10.0, 1.0, 2.0, 0.0, 0.0, 0.5 + math.pi / 2))
+
+    (lane,) = static_graph.transform_polylines(1, "vehicle")[Uid("2")]
+    assert lane.coordinate_system == "vehicle"
+    assert lane.val == pytest.approx((0.0, 0.0, 2.0, 1.0, 0.0, 2.0))
+
+
+def test_transform_to_matrix() -> None:
+    matrix = transform_to_matrix(
+        EulerTransformData(euler_angles=(0.0, 0.0, math.pi / 2), sequence="XYZ", translation=(1, 2, 3))
+    )
+    assert matrix @ np.array([0.0, 1.0, 0.0, 1.0]) == pytest.approx(np.array([0.0, 2.0, 3.0, 1.0]))
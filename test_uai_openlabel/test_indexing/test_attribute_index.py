@@ -0,0 +1,68 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from uai_openlabel import (
+    AttributeIndex,
+    AttributeMatches,
+    Between,
+    Equals,
+    Object,
+    ObjectData,
+    OpenLabel,
+    TextData,
+    Uid,
+)
+
+
+def _example_with_truck() -> OpenLabel:
+    example = OpenLabel.example()
+    assert example.objects is not None
+    truck = Object(name="truck", type="truck", object_data=ObjectData(text=[TextData(val="blue", name="color")]))
+    example.objects = {**example.objects, Uid("4"): truck}
+    return example
+
+
+def test_equality_on_dynamic_attributes() -> None:
+    example = OpenLabel.example()
+    index = AttributeIndex.from_openlabel(example)
+
+    # The example toggles all dynamic attributes in all frames
+    assert index.frames_where(Equals("brake_lights_on", False)) == ["001", "002", "003"]
+    assert index.frames_where(Equals("brake_lights_on", True)) == []
+    assert index.objects_where(Equals("compass_heading", "NE")) == {"1", "2", "3"}
+    assert index.objects_where(Equals("compass_heading", "S")) == set()
+
+
+def test_number_ranges() -> None:
+    index = AttributeIndex.from_openlabel(OpenLabel.example())
+
+    assert index.objects_where(Between("leaves_on_hood", minimum=4)) == {"1", "2", "3"}
+    assert index.objects_where(Between("leaves_on_hood", minimum=5, include_minimum=False)) == set()
+    assert index.objects_where(Equals("leaves_on_hood", 5)) == {"1", "2", "3"}
+    assert index.objects_where(Between("nr_wheels", maximum=4, include_maximum=False)) == set()
+    assert index.matches(Between("nr_wheels", 3, 4)) == AttributeMatches(static=frozenset({Uid("1"), Uid("2"), Uid("3")}))
+
+
+def test_combined_predicates_and_object_types() -> None:
+    index = AttributeIndex.from_openlabel(_example_with_truck())
+
+    # Static match of "color" combined with a dynamic match
+    red_braking = Equals("color", "red") & Equals("brake_lights_on", False)
+    assert index.frames_where(red_braking, object_type="car") == ["001", "002", "003"]
+    assert index.objects_where(red_braking, object_type="truck") == set()
+
+    blue_or_red = Equals("color", "blue") | Equals("color", "red")
+    assert index.objects_where(blue_or_red) == {"1", "2", "3", "4"}
+    assert index.objects_where(blue_or_red, object_type="truck") == {"4"}
+    assert index.frames_where(Equals("color", "blue")) == [], "The truck has no in-frame data"
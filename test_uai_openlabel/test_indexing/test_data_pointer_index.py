@@ -0,0 +1,147 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import copy
+from typing import Union
+
+import pytest
+
+from uai_openlabel import (
+    Attributes,
+    BooleanData,
+    Frame,
+    FrameInterval,
+    FrameIntervalSet,
+    GenericDataType,
+    NumberData,
+    Object,
+    ObjectData,
+    ObjectInFrame,
+    OpenLabel,
+    RdfAgentType,
+    Uid,
+)
+
+
+def test_derived_pointers_match_example() -> None:
+    example = OpenLabel.example()
+    derived = copy.deepcopy(example)
+    derived.frame_intervals = None
+    assert derived.objects is not None
+    for obj in derived.objects.values():
+        obj.frame_intervals = None
+        obj.object_data_pointers = None
+
+    derived.update_frame_intervals()
+
+    assert derived.frame_intervals == [FrameInterval(frame_start=1, frame_end=3)]
+    assert example.objects is not None
+    for uid, obj in derived.objects.items():
+        expected = example.objects[uid]
+        assert obj.frame_intervals == [FrameInterval(frame_start=1, frame_end=3)]
+        assert obj.object_data_pointers is not None and expected.object_data_pointers is not None
+        assert obj.object_data_pointers.keys() == expected.object_data_pointers.keys()
+        for name, pointer in obj.object_data_pointers.items():
+            expected_pointer = expected.object_data_pointers[name]
+            assert pointer.type == expected_pointer.type
+            assert FrameIntervalSet.from_intervals(pointer.frame_intervals) == FrameIntervalSet.from_intervals(
+                expected_pointer.frame_intervals
+            )
+
+
+def _frame_with_occluded_object(occluded: Union[BooleanData, NumberData]) -> Frame:
+    object_data = ObjectData(boolean=[occluded]) if isinstance(occluded, BooleanData) else ObjectData(num=[occluded])
+    return Frame(objects={Uid("1"): ObjectInFrame(object_data=object_data)})
+
+
+def test_incremental_updates() -> None:
+    example = OpenLabel.example()
+    index = example.update_frame_intervals()
+
+    index.remove_frame(Uid("002"))
+    occluded = BooleanData(val=True, name="occluded", attributes=Attributes(num=[NumberData(val=0.5, name="ratio")]))
+    index.add_frame(Uid("7"), _frame_with_occluded_object(occluded))
+    index.apply(example)
+
+    assert example.frame_intervals == [
+        FrameInterval(frame_start=1, frame_end=1),
+        FrameInterval(frame_start=3, frame_end=3),
+        FrameInterval(frame_start=7, frame_end=7),
+    ]
+    assert example.objects is not None
+    assert example.objects[Uid("2")].frame_intervals == [
+        FrameInterval(frame_start=1, frame_end=1),
+        FrameInterval(frame_start=3, frame_end=3),
+    ]
+    pointers = example.objects[Uid("1")].object_data_pointers
+    assert pointers is not None
+    assert pointers["occluded"].type == GenericDataType.Boolean
+    assert pointers["occluded"].frame_intervals == [FrameInterval(frame_start=7, frame_end=7)]
+    assert pointers["occluded"].attribute_pointers == {"ratio": GenericDataType.Number}
+
+    with pytest.raises(ValueError, match="occluded of type num"):
+        index.add_frame(Uid("8"), _frame_with_occluded_object(NumberData(val=1, name="occluded")))
+    # Replacing the only frame with this data may change its type
+    index.add_frame(Uid("7"), _frame_with_occluded_object(NumberData(val=1, name="occluded")))
+    replaced = index.element_data_pointers(RdfAgentType.Object, Uid("1"))
+    assert replaced is not None and replaced["occluded"].type == GenericDataType.Number
+
+    index.remove_frame(Uid("7"))
+    index.apply(example)
+    assert "occluded" not in (example.objects[Uid("1")].object_data_pointers or {})
+    assert index.element_frame_intervals(RdfAgentType.Object, Uid("4")) is None
+
+
+def test_apply_rewrites_only_changed_elements() -> None:
+    example = OpenLabel.example()
+    assert example.objects is not None
+    static = Object(name="static", type="sign", frame_intervals=[FrameInterval(frame_start=0, frame_end=9)])
+    example.objects = {**example.objects, Uid("9"): static}
+    index = example.update_frame_intervals()
+    assert static.frame_intervals == [FrameInterval(frame_start=0, frame_end=9)]
+
+    # Object 2 doesn't change, so a manual edit of it survives the next apply
+    marker = [FrameInterval(frame_start=100, frame_end=100)]
+    example.objects[Uid("2")].frame_intervals = marker
+    index.add_frame(Uid("7"), _frame_with_occluded_object(BooleanData(val=True, name="occluded")))
+    index.apply(example)
+    assert example.objects[Uid("2")].frame_intervals == marker
+    assert example.objects[Uid("1")].frame_intervals == [
+        FrameInterval(frame_start=1, frame_end=3),
+        FrameInterval(frame_start=7, frame_end=7),
+    ]
+    assert static.frame_intervals == [FrameInterval(frame_start=0, frame_end=9)]
+
+    # Without changes, apply doesn't touch anything
+    example.frame_intervals = None
+    index.apply(example)
+    assert example.frame_intervals is None
+
+
+def test_apply_sets_elements_defined_later() -> None:
+    example = OpenLabel.example()
+    assert example.objects is not None
+    objects = dict(example.objects)
+    late = objects.pop(Uid("1"))
+    late.frame_intervals = None
+    late.object_data_pointers = None
+    example.objects = objects
+    index = example.update_frame_intervals()
+
+    # Object 1 has in-frame data, so it is set once it is defined, although its frames didn't change
+    example.objects = {**objects, Uid("1"): late}
+    index.apply(example)
+    assert late.frame_intervals == [FrameInterval(frame_start=1, frame_end=3)]
+    assert late.object_data_pointers == index.element_data_pointers(RdfAgentType.Object, Uid("1"))
+    assert late.object_data_pointers
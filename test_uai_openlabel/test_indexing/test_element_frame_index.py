@@ -0,0 +1,71 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from uai_openlabel import (
+    ActionInFrame,
+    Attributes,
+    ElementFrameIndex,
+    Frame,
+    ObjectInFrame,
+    OpenLabel,
+    RdfAgentType,
+    Uid,
+)
+
+
+def _frame_with_objects(*object_uids: str) -> Frame:
+    return Frame(
+        objects={
+            Uid(uid): ObjectInFrame.example(toggle_attribute_values=False, cuboid_translation=(0, 0, 0)) for uid in object_uids
+        }
+    )
+
+
+def test_index_from_example() -> None:
+    example = OpenLabel.example()
+    index = ElementFrameIndex.from_openlabel(example)
+
+    assert set(index.element_uids(RdfAgentType.Object)) == {"1", "2", "3"}
+    assert index.object_frames(Uid("2")) == ("001", "002", "003")
+    assert index.frames_in_range(RdfAgentType.Object, Uid("2"), 2, 5) == ("002", "003")
+    assert index.object_frames(Uid("4")) == ()
+
+    assert example.frames is not None
+    frame_objects = example.frames[Uid("002")].objects
+    assert frame_objects is not None
+    assert index.object_in_frame(Uid("1"), 2) is frame_objects[Uid("1")]
+    assert index.object_in_frame(Uid("1"), 4) is None
+
+
+def test_frames_are_sorted_numerically() -> None:
+    frames = {Uid(str(n)): _frame_with_objects("7") for n in (10, 2, 33, 1)}
+    index = ElementFrameIndex.from_frames(frames)
+    assert index.object_frames(Uid("7")) == ("1", "2", "10", "33")
+
+
+def test_incremental_updates() -> None:
+    index = ElementFrameIndex.from_frames({Uid("5"): _frame_with_objects("1", "2")})
+
+    index.add_frame(Uid("3"), _frame_with_objects("1"))
+    index.add_frame(Uid("8"), Frame(actions={Uid("9"): ActionInFrame(action_data=Attributes())}))
+    assert index.object_frames(Uid("1")) == ("3", "5")
+    assert index.frames(RdfAgentType.Action, Uid("9")) == ("8",)
+
+    # Re-adding a frame replaces its content
+    index.add_frame(Uid("5"), _frame_with_objects("2"))
+    assert index.object_frames(Uid("1")) == ("3",)
+
+    index.remove_frame(Uid("3"))
+    assert Uid("3") not in index
+    assert list(index.element_uids(RdfAgentType.Object)) == ["2"]
@@ -0,0 +1,49 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import random
+
+from uai_openlabel import (
+    FrameIntervalSet,
+    FrameIntervalTree,
+    OpenLabel,
+    RdfAgentType,
+    Uid,
+)
+
+
+def test_tree_matches_linear_scan() -> None:
+    rng = random.Random(3)
+    sets = {}
+    for value in range(300):
+        ranges = []
+        for _ in range(rng.randrange(1, 4)):
+            start = rng.randrange(1000)
+            ranges.append((start, start + rng.randrange(50)))
+        sets[value] = FrameIntervalSet(ranges)
+    tree = FrameIntervalTree(sets.items())
+
+    for _ in range(200):
+        first = rng.randrange(1100)
+        last = first + rng.randrange(30)
+        assert sorted(tree.overlapping(first, last)) == [v for v, s in sets.items() if s.overlaps(first, last)]
+        assert sorted(tree.at(first)) == [v for v, s in sets.items() if first in s]
+
+
+def test_tree_from_elements() -> None:
+    tree = FrameIntervalTree.from_elements(OpenLabel.example())
+    assert len(tree) == 3
+    assert tree.at(Uid("002")) == [(RdfAgentType.Object, "1"), (RdfAgentType.Object, "2"), (RdfAgentType.Object, "3")]
+    assert tree.at(4) == []
+    assert FrameIntervalTree([]).overlapping(0, 10) == []
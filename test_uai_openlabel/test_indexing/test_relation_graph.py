@@ -0,0 +1,105 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from typing import Optional, Sequence
+
+from uai_openlabel import (
+    Direction,
+    FrameInterval,
+    OpenLabel,
+    RdfAgent,
+    RdfAgentType,
+    RdfRole,
+    Relation,
+    RelationGraph,
+    Uid,
+)
+
+
+def _agent(agent_type: RdfAgentType, uid: str) -> RdfAgent:
+    return RdfAgent(type=agent_type, uid=Uid(uid))
+
+
+def _relation(
+    type_: str, subject: RdfAgent, obj: RdfAgent, frame_intervals: Optional[Sequence[FrameInterval]] = None
+) -> Relation:
+    return Relation(name=type_, type=type_, rdf_subjects=[subject], rdf_objects=[obj], frame_intervals=frame_intervals)
+
+
+def _example() -> OpenLabel:
+    car, trailer, truck = (_agent(RdfAgentType.Object, uid) for uid in ("1", "2", "3"))
+    braking = _agent(RdfAgentType.Action, "10")
+    openlabel = OpenLabel.example()
+    openlabel.relations = {
+        Uid("0"): _relation("isTowedBy", trailer, car),
+        Uid("1"): _relation("performs", car, braking, frame_intervals=[FrameInterval(frame_start=1, frame_end=2)]),
+        Uid("2"): _relation("isTowedBy", car, truck),
+    }
+    assert openlabel.frames is not None
+    openlabel.frames[Uid("003")].relations = {Uid("3"): _relation("isNear", truck, trailer)}
+    return openlabel
+
+
+def test_neighbors() -> None:
+    graph = RelationGraph.from_openlabel(_example())
+
+    assert set(graph.elements(RdfAgentType.Object)) == {"1", "2", "3"}
+    assert [a.uid for a in graph.neighbors(RdfAgentType.Object, Uid("1"))] == ["2", "10", "3"]
+    assert [a.uid for a in graph.neighbors(RdfAgentType.Object, Uid("1"), direction=Direction.Incoming)] == ["2"]
+    assert graph.neighbors(RdfAgentType.Object, Uid("1"), neighbor_type=RdfAgentType.Action) == [
+        _agent(RdfAgentType.Action, "10")
+    ]
+    assert [a.uid for a in graph.neighbors(RdfAgentType.Object, Uid("1"), relation_type="isTowedBy")] == ["2", "3"]
+    assert graph.neighbors(RdfAgentType.Object, Uid("404")) == []
+
+    memberships = graph.relations_of(RdfAgentType.Object, Uid("2"), role=RdfRole.Object)
+    assert [(m.relation_uid, m.frame_uid) for m in memberships] == [("3", "003")]
+    assert [uid for uid, _ in graph.relations_of_type("isTowedBy")] == ["0", "2"]
+
+
+def test_frame_restricted_queries() -> None:
+    graph = RelationGraph.from_openlabel(_example())
+
+    def relations_at(frame: int) -> list[str]:
+        return [m.relation_uid for m in graph.relations_of(RdfAgentType.Object, Uid("1"), frame=frame)]
+
+    assert relations_at(1) == ["0", "1", "2"]
+    assert relations_at(3) == ["0", "2"]
+    assert [m.relation_uid for m in graph.relations_of(RdfAgentType.Object, Uid("3"), frame=2)] == ["2"]
+    assert [m.relation_uid for m in graph.relations_of(RdfAgentType.Object, Uid("3"), frame=Uid("003"))] == ["2", "3"]
+
+
+def test_reachable() -> None:
+    graph = RelationGraph.from_openlabel(_example())
+
+    reached = graph.reachable(RdfAgentType.Object, Uid("2"), relation_types=["isTowedBy"])
+    assert [(agent.uid, depth) for agent, depth in reached] == [("1", 1), ("3", 2)]
+
+    reached = graph.reachable(RdfAgentType.Object, Uid("2"), relation_types=["isTowedBy"], max_depth=1)
+    assert [(agent.uid, depth) for agent, depth in reached] == [("1", 1)]
+
+    reached = graph.reachable(RdfAgentType.Object, Uid("3"), direction=Direction.Both, neighbor_type=RdfAgentType.Object)
+    assert [(agent.uid, depth) for agent, depth in reached] == [("1", 1), ("2", 1)]
+
+    reached = graph.reachable(RdfAgentType.Object, Uid("3"), direction=Direction.Both, frame=1)
+    assert [(agent.uid, depth) for agent, depth in reached] == [("1", 1), ("2", 2), ("10", 2)]
+
+
+def test_incremental_add() -> None:
+    graph = RelationGraph()
+    graph.add_relations(
+        {Uid("0"): _relation("isNear", _agent(RdfAgentType.Object, "1"), _agent(RdfAgentType.Object, "2"))}, frame_uid=Uid("4")
+    )
+    assert graph.relations_of(RdfAgentType.Object, Uid("2"), frame=3) == []
+    assert [m.role for m in graph.relations_of(RdfAgentType.Object, Uid("2"), frame=4)] == [RdfRole.Object]
@@ -0,0 +1,135 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import math
+import random
+
+import pytest
+
+from uai_openlabel import (
+    CuboidSpatialIndex,
+    Frame,
+    IndexedCuboid,
+    ObjectData,
+    ObjectInFrame,
+    OpenLabel,
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+    Uid,
+)
+
+use_numpy_params = [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not CuboidSpatialIndex([]).use_numpy, reason="needs numpy")),
+]
+
+
+def _random_cuboids(count: int, seed: int = 42) -> list[IndexedCuboid]:
+    rng = random.Random(seed)
+    cuboids = []
+    for i in range(count):
+        val = (
+            rng.uniform(-50, 50),
+            rng.uniform(-50, 50),
+            rng.uniform(-2, 2),
+            0.0,
+            0.0,
+            rng.uniform(-math.pi, math.pi),
+            4.0,
+            2.0,
+            1.5,
+        )
+        cuboids.append(IndexedCuboid.from_cuboid(Uid(str(i)), ThreeDBoundingBoxEuler(val=val, name="box")))
+    return cuboids
+
+
+@pytest.mark.skipif(not CuboidSpatialIndex([]).use_numpy, reason="needs numpy")
+def test_rotations_agree_with_geometry_module() -> None:
+    from uai_openlabel.geometry.rotation import (
+        rotation_matrices_from_euler,
+        rotation_matrices_from_quaternions,
+    )
+    from uai_openlabel.indexing.spatial_index import (
+        _rotation_from_euler_zyx,
+        _rotation_from_quaternion,
+    )
+
+    roll, pitch, yaw = 0.3, -1.1, 2.5
+    expected = rotation_matrices_from_euler([(yaw, pitch, roll)])[0]
+    assert _rotation_from_euler_zyx(roll, pitch, yaw) == [pytest.approx(row) for row in expected.tolist()]
+    quaternion = (0.1, -0.4, 0.7, 2.0)
+    expected = rotation_matrices_from_quaternions([quaternion])[0]
+    assert _rotation_from_quaternion(*quaternion) == [pytest.approx(row) for row in expected.tolist()]
+
+
+def test_axis_aligned_box_of_rotated_cuboids() -> None:
+    euler = IndexedCuboid.from_cuboid(Uid("1"), ThreeDBoundingBoxEuler(val=(1, 2, 3, 0, 0, math.pi / 2, 4, 2, 1), name="b"))
+    assert euler.box_min == pytest.approx((0, 0, 2.5))
+    assert euler.box_max == pytest.approx((2, 4, 3.5))
+
+    # The same rotation as a non-unit quaternion
+    s = math.sin(math.pi / 4)
+    quaternion_val = (1, 2, 3, 0, 0, 2 * s, 2 * s, 4, 2, 1)
+    quaternion = IndexedCuboid.from_cuboid(Uid("1"), ThreeDBoundingBoxQuaternion(val=quaternion_val, name="b"))
+    assert quaternion.box_min == pytest.approx(euler.box_min)
+    assert quaternion.box_max == pytest.approx(euler.box_max)
+
+
+@pytest.mark.parametrize("use_numpy", use_numpy_params)
+def test_queries_match_brute_force(use_numpy: bool) -> None:
+    cuboids = _random_cuboids(300)
+    index = CuboidSpatialIndex(cuboids, use_numpy=use_numpy)
+    point = (3.0, -7.0, 0.0)
+
+    def distance(c: IndexedCuboid) -> float:
+        return math.dist(c.center, point)
+
+    by_distance = sorted(cuboids, key=distance)
+    assert index.within_radius(point, 20.0) == [c for c in by_distance if distance(c) <= 20.0]
+    assert index.nearest(point, k=7) == by_distance[:7]
+    assert index.nearest(point, k=1000) == by_distance
+
+    box_min, box_max = (-10.0, -10.0, -1.0), (5.0, 0.0, 1.0)
+    expected = [c for c in cuboids if all(c.box_max[d] >= box_min[d] and c.box_min[d] <= box_max[d] for d in range(3))]
+    assert index.intersecting_box(box_min, box_max) == expected
+
+
+@pytest.mark.parametrize("use_numpy", use_numpy_params)
+def test_queries_on_empty_index(use_numpy: bool) -> None:
+    index = CuboidSpatialIndex([], use_numpy=use_numpy)
+    assert index.within_radius((0, 0, 0), 10) == []
+    assert index.nearest((0, 0, 0), 3) == []
+    assert index.intersecting_box((0, 0, 0), (1, 1, 1)) == []
+
+
+def test_frame_caches_cuboid_index() -> None:
+    example = OpenLabel.example()
+    assert example.frames is not None
+    frame = example.frames[Uid("001")]
+
+    index = frame.cuboid_index()
+    assert frame.cuboid_index() is index
+    assert [c.object_uid for c in index.within_radius_of_object(Uid("1"), 5.0)] == ["2"]
+
+    frame.objects = {Uid("1"): ObjectInFrame(object_data=ObjectData())}
+    assert len(frame.cuboid_index()) == 0
+
+    assert isinstance(frame.objects, dict)
+    frame.objects[Uid("2")] = ObjectInFrame.example(toggle_attribute_values=False, cuboid_translation=(0, 0, 0))
+    frame.invalidate_index_cache()
+    assert len(frame.cuboid_index()) == 1
+
+
+def test_frame_without_objects() -> None:
+    assert len(Frame().cuboid_index()) == 0
@@ -0,0 +1,96 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from typing import Optional, Union
+
+from uai_openlabel import (
+    Frame,
+    FrameProperties,
+    OpenLabel,
+    PinholeCameraStreamProperties,
+    Stream,
+    StreamAssociation,
+    StreamSyncIndex,
+    SyncByFrameShift,
+    SyncByFrameStream,
+    TimestampUnit,
+    Uid,
+)
+
+
+def _frame(camera: Optional[Union[SyncByFrameStream, SyncByFrameShift]], lidar_timestamp: Optional[float] = None) -> Frame:
+    streams: dict[str, Stream] = {}
+    if camera is not None:
+        streams["camera"] = Stream(stream_properties=PinholeCameraStreamProperties(sync=camera))
+    if lidar_timestamp is not None:
+        sync = SyncByFrameStream(timestamp=lidar_timestamp)
+        streams["lidar"] = Stream(stream_properties=PinholeCameraStreamProperties(sync=sync))
+    return Frame(frame_properties=FrameProperties(streams=streams))
+
+
+def _openlabel() -> OpenLabel:
+    return OpenLabel(
+        streams={
+            "camera": Stream(stream_properties=PinholeCameraStreamProperties(sync=SyncByFrameShift(frame_shift=-10))),
+            "radar": Stream(),
+        },
+        frames={
+            Uid("000"): _frame(None, lidar_timestamp=0.0),
+            Uid("001"): _frame(SyncByFrameStream(frame_stream=20, timestamp=0.12), lidar_timestamp=0.1),
+            Uid("002"): _frame(SyncByFrameShift(frame_shift=-19), lidar_timestamp=0.2),
+            Uid("003"): _frame(SyncByFrameStream(timestamp=0.28)),
+        },
+    )
+
+
+def test_frame_mapping() -> None:
+    index = StreamSyncIndex.from_openlabel(_openlabel())
+    assert sorted(index.streams) == ["camera", "lidar", "radar"]
+
+    # The stream shift by default, overridden per frame
+    assert [index.stream_frame("camera", frame) for frame in range(5)] == [10, 20, 21, 13, None]
+    assert index.master_frame("camera", 21) == "002"
+    assert index.master_frame("camera", 11) is None
+    # Without any sync, stream frames are master frames
+    assert index.stream_frame("radar", Uid("3")) == 3
+    assert index.master_frames("lidar", 1) == (Uid("001"),)
+    # A stream defined only in some frames is indexed at every frame
+    assert [index.stream_frame("lidar", frame) for frame in range(4)] == [0, 1, 2, 3]
+    assert index.master_frames("lidar", 3) == (Uid("003"),)
+    assert index.stream_frame("unknown", 1) is None and index.master_frames("unknown", 1) == ()
+
+
+def test_frame_order() -> None:
+    # Frames out of order in the file are indexed by frame number
+    stream_frame = SyncByFrameStream(frame_stream=5)
+    frames = {Uid(uid): _frame(None if uid == "1" else stream_frame) for uid in ("3", "1", "2", "0")}
+    index = StreamSyncIndex.from_openlabel(OpenLabel(frames=frames))
+    assert index.master_frames("camera", 5) == (Uid("0"), Uid("2"), Uid("3"))
+    assert index.master_frame("camera", 5) == "0"
+    assert [index.stream_frame("camera", frame) for frame in range(4)] == [5, 1, 5, 5]
+
+
+def test_timestamps() -> None:
+    index = StreamSyncIndex.from_openlabel(_openlabel(), TimestampUnit.Second)
+    assert index.timestamp_ns("camera", 1) == 120_000_000
+    assert index.timestamp_ns("camera", 2) is None
+    assert index.nearest("lidar", 0.16) == "002"
+    assert index.nearest("radar", 0.16) is None
+
+    associations = index.associate("camera", "lidar")
+    assert associations == [
+        StreamAssociation(Uid("001"), 20, Uid("001"), 1, -20_000_000),
+        StreamAssociation(Uid("003"), 13, Uid("002"), 2, -80_000_000),
+    ]
+    assert index.associate("camera", "lidar", max_difference=0.05) == associations[:1]
+    assert [a.target_frame for a in index.associate("lidar", "camera")] == ["001", "001", "001"]
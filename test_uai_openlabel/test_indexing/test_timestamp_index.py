@@ -0,0 +1,90 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from typing import Union
+
+import pytest
+
+from uai_openlabel import (
+    Frame,
+    FrameProperties,
+    Number,
+    OpenLabel,
+    PinholeCameraStreamProperties,
+    Stream,
+    SyncByFrameStream,
+    TimestampIndex,
+    TimestampUnit,
+    Uid,
+    parse_timestamp_ns,
+)
+
+
+@pytest.mark.parametrize(
+    "timestamp,unit,expected",
+    [
+        (3, TimestampUnit.Second, 3_000_000_000),
+        (0.1, TimestampUnit.Second, 100_000_000),
+        ("1700126000005000", TimestampUnit.Microsecond, 1_700_126_000_005_000_000),
+        (" 12.5 ", TimestampUnit.Millisecond, 12_500_000),
+        ("1970-01-01T00:00:01.5Z", TimestampUnit.Second, 1_500_000_000),
+        ("1970-01-01T01:00:00+01:00", TimestampUnit.Second, 0),
+        ("1970-01-01T00:00:02.123456789Z", TimestampUnit.Second, 2_123_456_789),
+        ("1970-01-01T01:00:00.0051+01:00", TimestampUnit.Second, 5_100_000),
+        ("1970-01-01 00:00:00,1234567891", TimestampUnit.Second, 123_456_789),
+    ],
+)
+def test_parse_timestamp_ns(timestamp: Union[str, Number], unit: TimestampUnit, expected: int) -> None:
+    assert parse_timestamp_ns(timestamp, unit) == expected
+
+
+@pytest.mark.parametrize("timestamp", ["yesterday", "NaN"])
+def test_parse_timestamp_ns_rejects_garbage(timestamp: str) -> None:
+    with pytest.raises(ValueError, match="Can't parse timestamp"):
+        parse_timestamp_ns(timestamp)
+
+
+def test_parse_timestamp_ns_rejects_booleans() -> None:
+    with pytest.raises(TypeError, match="Can't parse timestamp"):
+        parse_timestamp_ns(True)
+
+
+def test_queries_on_example() -> None:
+    index = TimestampIndex.from_openlabel(OpenLabel.example(), unit=TimestampUnit.Microsecond)
+
+    assert len(index) == 3
+    assert index.timestamp_ns(Uid("002")) == 1_700_126_000_005_010_000
+    assert index.nearest("1700126000005013") == "002"
+    assert index.nearest("1700126000005015") == "002", "Ties should resolve to the earlier frame"
+    assert index.nearest(0) == "001"
+    assert index.floor("1700126000005019") == "002"
+    assert index.floor("1700126000005000") == "001"
+    assert index.floor("1700126000004999") is None
+    assert index.ceil("1700126000005011") == "003"
+    assert index.ceil("1700126000005021") is None
+    assert index.window("1700126000005000", "1700126000005010") == ("001", "002")
+
+
+def test_index_of_stream_timestamps() -> None:
+    def frame(stream_timestamp: float) -> Frame:
+        sync = SyncByFrameStream(timestamp=stream_timestamp)
+        stream = Stream(stream_properties=PinholeCameraStreamProperties(sync=sync))
+        return Frame(frame_properties=FrameProperties(timestamp=0, streams={"cam": stream}))
+
+    frames = {Uid("0"): frame(0.5), Uid("1"): frame(0.1), Uid("2"): Frame()}
+    index = TimestampIndex.from_frames(frames, stream="cam")
+
+    assert len(index) == 2
+    assert index.nearest(0.2) == "1"
+    assert index.window(0, 1) == ("1", "0")
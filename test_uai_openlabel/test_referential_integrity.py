@@ -0,0 +1,135 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import io
+import json
+
+from uai_openlabel import (
+    IntegrityChecker,
+    OpenLabel,
+    RdfAgentType,
+    Uid,
+    check_file_integrity,
+    check_integrity,
+)
+
+
+def broken_example() -> OpenLabel:
+    data = OpenLabel.example().to_dict(exclude_none=True)
+    openlabel = data["openlabel"]
+    openlabel["coordinate_systems"]["world"]["children"].append("lidar")
+    openlabel["objects"]["1"]["frame_intervals"] = [{"frame_start": 1, "frame_end": 5}]
+    openlabel["objects"]["1"]["ontology_uid"] = "0"
+    pointers = openlabel["objects"]["2"]["object_data_pointers"]
+    pointers["bounding_box"]["type"] = "bbox"
+    pointers["ghost"] = {"frame_intervals": [{"frame_start": 1, "frame_end": 1}], "type": "text"}
+    del pointers["compass_heading"]
+    openlabel["objects"]["3"]["object_data_pointers"]["leaves_on_hood"]["frame_intervals"] = [
+        {"frame_start": 1, "frame_end": 2}
+    ]
+    openlabel["relations"] = {
+        "0": {
+            "name": "r",
+            "type": "follows",
+            "rdf_subjects": [{"type": "object", "uid": "1"}],
+            "rdf_objects": [{"type": "action", "uid": "1"}],
+        }
+    }
+
+    frame = openlabel["frames"]["002"]
+    frame["objects"]["9"] = frame["objects"]["1"]
+    frame["objects"]["1"]["object_data"]["cuboid"][0]["coordinate_system"] = "nowhere"
+    frame["frame_properties"]["transforms"]["reference_to_world"]["src"] = "lidar"
+    frame["frame_properties"]["streams"] = {"camera": {}}
+    return OpenLabel.from_dict(data)
+
+
+EXPECTED = [
+    "$.coordinate_systems.world.children[1]: Undeclared coordinate system 'lidar'",
+    "$.objects['1'].ontology_uid: Undeclared ontology 0",
+    "$.relations['0'].rdf_objects[0]: Undeclared action 1",
+    "$.frames['002'].objects['1'].object_data.bounding_box.coordinate_system: Undeclared coordinate system 'nowhere'",
+    "$.frames['002'].objects['9']: Undeclared object 9",
+    "$.frames['002'].frame_properties.streams.camera: Undeclared stream camera",
+    "$.frames['002'].frame_properties.transforms.reference_to_world.src: Undeclared coordinate system 'lidar'",
+    "$.objects['1'].frame_intervals: Has no data in frames 4-5 of its frame intervals",
+    "$.objects['2'].object_data_pointers: Missing pointer to the in-frame data 'compass_heading'",
+    "$.objects['2'].object_data_pointers.bounding_box.type: Is bbox, but the data is cuboid",
+    "$.objects['2'].object_data_pointers.ghost: Points to no in-frame data",
+    "$.objects['3'].object_data_pointers.leaves_on_hood.frame_intervals: The data is in frames 1-3",
+]
+
+
+def test_valid_example_has_no_violations() -> None:
+    assert check_integrity(OpenLabel.example()) == []
+
+
+def test_reports_all_violations() -> None:
+    broken = broken_example()
+
+    assert [str(violation) for violation in check_integrity(broken)] == EXPECTED
+    text = io.StringIO(json.dumps(broken.to_dict(exclude_none=True)))
+    assert [str(violation) for violation in check_file_integrity(text, chunk_size=256)] == EXPECTED
+
+
+def test_reports_frames_outside_of_frame_intervals() -> None:
+    openlabel = OpenLabel.example()
+    assert openlabel.objects is not None
+    openlabel.objects[Uid("1")].frame_intervals = None
+    openlabel.objects[Uid("2")].frame_intervals = []
+    openlabel.frame_intervals = None
+
+    assert [str(violation) for violation in check_integrity(openlabel)] == [
+        "$.objects['1'].frame_intervals: Missing, has data in frames 1-3",
+        "$.objects['2'].frame_intervals: Has data in frames 1-3 outside its frame intervals",
+    ]
+
+
+def test_keeps_frame_ranges() -> None:
+    openlabel = OpenLabel.example()
+    frames = openlabel.frames or {}
+    checker = IntegrityChecker(openlabel)
+    # Repeated frames fall into the last range, out of order frames start a new one
+    for frame_uid in ("002", "003", "003", "001"):
+        checker.add_frame(Uid(frame_uid), frames[Uid(frame_uid)])
+
+    assert checker.violations() == []
+    track = checker._tracks[RdfAgentType.Object][Uid("1")]
+    assert track.frames == [(2, 3), (1, 1)]
+    assert all(ranges == [(2, 3), (1, 1)] for ranges in track.data_frames.values())
+
+
+def test_reports_elements_missing_from_all_frames() -> None:
+    bbox_pointer = {"type": "bbox", "frame_intervals": [{"frame_start": 0, "frame_end": 5}]}
+    data = {
+        "openlabel": {
+            "metadata": {"schema_version": "1.0.0"},
+            "objects": {
+                "1": {
+                    "name": "car",
+                    "type": "car",
+                    "frame_intervals": [{"frame_start": 0, "frame_end": 5}],
+                    "object_data_pointers": {"box": bbox_pointer},
+                },
+                # Only static data, nothing is expected in the frames
+                "2": {"name": "sign", "type": "sign"},
+            },
+            "frame_intervals": [{"frame_start": 0, "frame_end": 0}],
+            "frames": {"0": {}},
+        }
+    }
+
+    assert [str(violation) for violation in check_integrity(OpenLabel.from_dict(data))] == [
+        "$.objects['1'].frame_intervals: Has no data in frames 0-5 of its frame intervals",
+        "$.objects['1'].object_data_pointers.box: Points to no in-frame data",
+    ]
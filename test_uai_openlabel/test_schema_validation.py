@@ -0,0 +1,102 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import copy
+import io
+import json
+from typing import Any
+
+import pytest
+
+from uai_openlabel import (
+    OpenLabel,
+    SchemaValidationError,
+    SchemaValidator,
+    openlabel_stream_violations,
+    openlabel_violations,
+    schema_validator,
+)
+
+
+def invalid_example() -> dict[str, Any]:
+    example = OpenLabel.example().to_dict(exclude_none=True)
+    invalid = copy.deepcopy(example)
+    frame = invalid["openlabel"]["frames"]["001"]
+    frame["objects"]["1"]["object_data"]["cuboid"][0]["val"] = [1.0, 2.0]
+    frame["objects"]["2"]["object_data"]["boolean"][0]["val"] = 3
+    frame["frame_properties"]["timestamp"] = True
+    del invalid["openlabel"]["objects"]["1"]["type"]
+    invalid["openlabel"]["metadata"]["schema_version"] = "2.0.0"
+    return invalid
+
+
+EXPECTED = [
+    "$.metadata.schema_version: '2.0.0' is not one of ['1.0.0']",
+    "$.frames['001'].frame_properties.timestamp: Expected string or number or null, got boolean",
+    "$.frames['001'].objects['1'].object_data.cuboid[0].val: Expected 9 items, got 2",
+    "$.frames['001'].objects['2'].object_data.boolean[0].val: Expected boolean, got integer",
+    "$.objects['1']: Missing required property 'type'",
+]
+
+
+def test_valid_openlabel_has_no_violations() -> None:
+    example = OpenLabel.example().to_dict(exclude_none=True)
+    assert openlabel_violations(example) == []
+    assert openlabel_violations(example["openlabel"]) == []
+    assert list(openlabel_stream_violations(io.StringIO(json.dumps(example)), chunk_size=64)) == []
+    assert OpenLabel.from_dict(example, validate=True) == OpenLabel.example()
+    assert schema_validator(OpenLabel) is schema_validator(OpenLabel)
+
+
+def test_reports_all_violations_with_paths() -> None:
+    invalid = invalid_example()
+
+    assert [str(violation) for violation in openlabel_violations(invalid)] == EXPECTED
+    assert [str(violation) for violation in openlabel_stream_violations(io.StringIO(json.dumps(invalid)))] == EXPECTED
+    with pytest.raises(SchemaValidationError, match="5 schema violation") as error:
+        OpenLabel.from_dict(invalid, validate=True)
+    assert error.value.violations[2].path == ("frames", "001", "objects", "1", "object_data", "cuboid", 0, "val")
+
+
+def test_compiles_other_keywords() -> None:
+    validator = SchemaValidator(
+        {
+            "$ref": "#/$defs/Node",
+            "$defs": {
+                "Node": {
+                    "type": "object",
+                    "properties": {
+                        "size": {"type": "integer", "minimum": 0, "exclusiveMaximum": 10},
+                        "label": {"type": "string", "pattern": "^[a-z]+$", "maxLength": 5},
+                        "kind": {"oneOf": [{"const": 1}, {"type": "integer", "maximum": 1}]},
+                        "children": {"type": "array", "items": {"$ref": "#/$defs/Node"}},
+                    },
+                    "additionalProperties": False,
+                }
+            },
+        }
+    )
+    valid = {"size": 3, "label": "abc", "kind": 0, "children": [{"children": [{"size": 9}]}]}
+    invalid = {"size": 10, "label": "Abcdef", "kind": 1, "children": [{"children": [{"size": True, "other": 1}]}]}
+
+    assert validator.is_valid(valid)
+    assert validator.violations(valid) == []
+    assert [str(violation) for violation in validator.violations(invalid)] == [
+        "$.size: Expected a number less than 10, got 10",
+        "$.label: Expected between 0 and 5 characters",
+        "$.label: 'Abcdef' doesn't match the pattern '^[a-z]+$'",
+        "$.kind: Matches 2 schemas of oneOf instead of one",
+        "$.children[0].children[0].size: Expected integer, got boolean",
+        "$.children[0].children[0]: Unexpected property 'other'",
+    ]
+    assert validator.at("children").violations([{"size": -1}], ("children",))[0].json_path == "$.children[0].size"
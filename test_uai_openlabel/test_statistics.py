@@ -0,0 +1,94 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from uai_openlabel import (
+    DatasetStatistics,
+    NumericSummary,
+    OpenLabel,
+    QuantileSketch,
+    TimestampUnit,
+    collect_dataset_statistics,
+    collect_statistics,
+)
+
+
+def test_quantile_sketch_has_bounded_relative_error() -> None:
+    rng = random.Random(0)
+    values = [rng.lognormvariate(0, 2) * rng.choice((-1, 1)) for _ in range(10_000)] + [0.0] * 100
+    first, second = QuantileSketch(0.01), QuantileSketch(0.01)
+    for index, value in enumerate(values):
+        (first if index % 2 else second).add(value)
+    first.merge(second)
+
+    values.sort()
+    for q in (0.0, 0.01, 0.25, 0.5, 0.75, 0.99, 1.0):
+        exact = values[round(q * (len(values) - 1))]
+        assert first.quantile(q) == pytest.approx(exact, rel=0.011, abs=1e-12)
+    assert first.count == len(values)
+
+    with pytest.raises(ValueError, match="relative accuracy"):
+        first.merge(QuantileSketch(0.02))
+
+
+def test_numeric_summary() -> None:
+    summary, other = NumericSummary(), NumericSummary()
+    for value in (1.0, 2.0, 3.0):
+        summary.add(value)
+    other.add(10.0)
+    summary.merge(other)
+
+    report = summary.to_dict()
+    assert (report["count"], report["min"], report["max"], report["mean"]) == (4, 1.0, 10.0, 4.0)
+    assert report["quantiles"]["0.5"] == pytest.approx(2.0, rel=0.01)
+    assert NumericSummary().to_dict() == {"count": 0}
+
+
+def test_collects_and_merges_statistics(tmp_path: Path) -> None:
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"sequence_{index}.json"
+        path.write_text(json.dumps(OpenLabel.example().to_dict(exclude_none=True)))
+        paths.append(path)
+
+    single = collect_statistics(paths[0], sequence="a", unit=TimestampUnit.Microsecond)
+    merged = DatasetStatistics(unit=TimestampUnit.Microsecond)
+    merged.add_openlabel(OpenLabel.example(), "a")
+    merged.merge(single)
+    report = single.report()
+
+    assert report["sequences"] == 1
+    assert report["frames"] == 3
+    assert report["objects_per_type"] == {"car": 3}
+    assert report["object_frames_per_type"] == {"car": 9}
+    assert report["objects_per_frame"]["histogram"] == {"3": 3}
+    assert report["attribute_values"]["color"] == {"red": 3}
+    assert report["attribute_values"]["brake_lights_on"] == {"false": 9}
+    assert report["numeric_attributes"]["leaves_on_hood"]["count"] == 9
+    assert report["cuboid_sizes"]["car"]["sx"]["max"] == pytest.approx(4.1)
+    assert report["sequence_details"]["a"] == {"frames": 3, "duration": pytest.approx(2e-5), "frame_rate": pytest.approx(1e5)}
+    assert merged.report()["sequence_details"]["a"]["frames"] == 6
+    assert merged.report()["object_frames_per_type"] == {"car": 18}
+
+    for workers in (1, 2):
+        dataset = collect_dataset_statistics(paths, workers=workers, unit=TimestampUnit.Microsecond).report()
+        assert dataset["sequences"] == 3
+        assert dataset["frames"] == 9
+        assert dataset["objects_per_type"] == {"car": 9}
+        assert dataset["sequence_details"][str(paths[2])]["frames"] == 3
+    json.dumps(dataset)
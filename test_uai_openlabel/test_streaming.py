@@ -0,0 +1,115 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import io
+import json
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pytest
+
+from uai_openlabel import (
+    OpenLabel,
+    OpenLabelReader,
+    OpenLabelWriter,
+    Uid,
+    pair_by_frame_number,
+)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_reads_frames_and_header(tmp_path: Path, chunk_size: int) -> None:
+    example = OpenLabel.example().to_dict(exclude_none=True)
+    path = tmp_path / "example.json"
+    path.write_text(json.dumps(example, indent=2))
+    reader = OpenLabelReader(path, chunk_size=chunk_size)
+
+    assert dict(reader.raw_frames()) == example["openlabel"]["frames"]
+    assert reader.raw_header() == {key: value for key, value in example["openlabel"].items() if key != "frames"}
+    assert [path for path, _ in reader.raw_items()][:2] == [("metadata",), ("coordinate_systems",)]
+
+    frames = dict(reader.frames())
+    assert frames == OpenLabel.example().frames
+    assert reader.header().objects == OpenLabel.example().objects
+
+
+def test_reads_text_files_without_root_key() -> None:
+    text = '{"metadata": {"schema_version": "1.0.0"}, "frames": {"0": {}, "1": {"objects": {}}}, "tags": {}}'
+    reader = OpenLabelReader(io.StringIO(text), chunk_size=4)
+
+    assert [frame_uid for frame_uid, _ in reader.frames()] == [Uid("0"), Uid("1")]
+    assert reader.raw_header() == {"metadata": {"schema_version": "1.0.0"}, "tags": {}}
+    assert list(OpenLabelReader(io.StringIO("{}")).raw_items()) == []
+
+
+@pytest.mark.parametrize(
+    "text,message",
+    [
+        ('{"openlabel": {"frames": {"0": {}', "Expected"),
+        ('{"openlabel": {"frames": {"0": {"objects": }}}}', "Invalid JSON"),
+        ('{"openlabel": {}, "other": 1}', "next to the root key"),
+        ('{"openlabel": {}} {}', "after the end"),
+        ('{"openlabel": {1: 2}}', "object key"),
+    ],
+)
+def test_invalid_documents(text: str, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        list(OpenLabelReader(io.StringIO(text), chunk_size=3).raw_items())
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_writes_documents_piece_by_piece(indent: Optional[int]) -> None:
+    example = OpenLabel.example()
+    header = example.to_dict(exclude_none=True)["openlabel"]
+    frames = header.pop("frames")
+    target = io.StringIO()
+    with OpenLabelWriter(target, indent=indent) as writer:
+        writer.write_field("metadata", example.metadata)
+        for frame_uid, frame in (example.frames or {}).items():
+            writer.write_frame(frame_uid, frame)
+        writer.write_fields({key: value for key, value in header.items() if key != "metadata"})
+        with pytest.raises(ValueError, match="one after another"):
+            writer.write_frame(Uid("4"), {})
+        with pytest.raises(ValueError, match="written already"):
+            writer.write_field("metadata", {})
+
+    assert json.loads(target.getvalue()) == {"openlabel": {**header, "frames": frames}}
+    assert writer.num_frames == 3
+    assert OpenLabel.from_dict(json.loads(target.getvalue())) == example
+
+
+def test_pairs_frames_by_number() -> None:
+    read: dict[str, list[int]] = {"a": [], "b": []}
+
+    def frames(name: str, numbers: list[int]) -> Iterator[tuple[Uid, str]]:
+        for number in numbers:
+            read[name].append(number)
+            yield Uid(f"{number:03d}" if name == "b" else str(number)), f"{name}{number}"
+
+    pairs = []
+    # Unmatched frames of a sparse stream are yielded in order, holding no more than the next frame of each stream
+    for number, first, second in pair_by_frame_number(frames("a", list(range(6))), frames("b", [0, 2, 4, 5, 7])):
+        pairs.append((number, first, second))
+        assert all(n <= number for n in read["a"][:-1] + read["b"][:-1])
+    assert pairs == [
+        (0, "a0", "b0"),
+        (1, "a1", None),
+        (2, "a2", "b2"),
+        (3, "a3", None),
+        (4, "a4", "b4"),
+        (5, "a5", "b5"),
+        (7, None, "b7"),
+    ]
+
+    with pytest.raises(ValueError, match="increasing frame number"):
+        list(pair_by_frame_number(frames("a", [1, 3, 2]), frames("b", [1, 2, 3])))
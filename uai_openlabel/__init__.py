@@ -12,6 +12,9 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+# noinspection PyProtectedMember
+from uai_openlabel.binary_format import PACKED_FLOATS, decode_binary, encode_binary
+
 # noinspection PyProtectedMember
 from uai_openlabel.coordinate_system import CoordinateSystem
 
@@ -76,7 +79,52 @@ from uai_openlabel.elements.relation import RdfAgent, RdfAgentType, Relation
 from uai_openlabel.frame import Frame, FrameProperties
 
 # noinspection PyProtectedMember
-from uai_openlabel.frame_interval import FrameInterval
+from uai_openlabel.frame_interval import (
+    FrameInterval,
+    FrameIntervalSet,
+    normalize_frame_intervals,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.attribute_index import (
+    AllOf,
+    AnyOf,
+    AttributeIndex,
+    AttributeMatches,
+    AttributePredicate,
+    Between,
+    Equals,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.data_pointer_index import DataPointerIndex
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.element_frame_index import ElementFrameIndex, ElementInFrame
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.interval_tree import FrameIntervalTree
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.relation_graph import (
+    Direction,
+    RdfRole,
+    RelationGraph,
+    RelationMembership,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.spatial_index import CuboidSpatialIndex, IndexedCuboid
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.stream_sync import StreamAssociation, StreamSyncIndex
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.timestamp_index import (
+    TimestampIndex,
+    TimestampUnit,
+    parse_timestamp_ns,
+)
 
 # noinspection PyProtectedMember
 from uai_openlabel.metadata import Metadata
@@ -87,6 +135,34 @@ from uai_openlabel.ontology import DetailedOntology
 # noinspection PyProtectedMember
 from uai_openlabel.openlabel import OpenLabel
 
+# noinspection PyProtectedMember
+from uai_openlabel.referential_integrity import (
+    IntegrityChecker,
+    IntegrityViolation,
+    check_file_integrity,
+    check_integrity,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.schema_validation import (
+    SchemaValidationError,
+    SchemaValidator,
+    SchemaViolation,
+    openlabel_stream_violations,
+    openlabel_violations,
+    schema_validator,
+    validate_openlabel,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.statistics import (
+    DatasetStatistics,
+    NumericSummary,
+    QuantileSketch,
+    collect_dataset_statistics,
+    collect_statistics,
+)
+
 # noinspection PyProtectedMember
 from uai_openlabel.stream.camera_intrinsics import (
     CustomCameraIntrinsics,
@@ -107,6 +183,13 @@ from uai_openlabel.stream.stream_properties import (
     SyncByFrameStream,
 )
 
+# noinspection PyProtectedMember
+from uai_openlabel.streaming import (
+    OpenLabelReader,
+    OpenLabelWriter,
+    pair_by_frame_number,
+)
+
 # noinspection PyProtectedMember
 from uai_openlabel.tag import Tag
 
@@ -194,6 +277,29 @@ __all__ = [
     "FisheyeCameraStreamProperties",
     "CustomCameraStreamProperties",
     "StreamProperties",
+    # indexing
+    "AttributeIndex",
+    "AttributeMatches",
+    "AttributePredicate",
+    "AllOf",
+    "AnyOf",
+    "Between",
+    "Equals",
+    "DataPointerIndex",
+    "ElementFrameIndex",
+    "ElementInFrame",
+    "FrameIntervalTree",
+    "Direction",
+    "RdfRole",
+    "RelationGraph",
+    "RelationMembership",
+    "CuboidSpatialIndex",
+    "IndexedCuboid",
+    "StreamAssociation",
+    "StreamSyncIndex",
+    "TimestampIndex",
+    "TimestampUnit",
+    "parse_timestamp_ns",
     # types_and_constants
     "URI",
     "Uid",
@@ -218,11 +324,35 @@ __all__ = [
     # All the rest
     "CoordinateSystem",
     "FrameInterval",
+    "FrameIntervalSet",
+    "normalize_frame_intervals",
     "FrameProperties",
     "Frame",
     "Metadata",
     "DetailedOntology",
     "OpenLabel",
+    "OpenLabelReader",
+    "OpenLabelWriter",
+    "pair_by_frame_number",
+    "IntegrityChecker",
+    "IntegrityViolation",
+    "check_integrity",
+    "check_file_integrity",
+    "SchemaValidationError",
+    "SchemaValidator",
+    "SchemaViolation",
+    "schema_validator",
+    "openlabel_violations",
+    "openlabel_stream_violations",
+    "validate_openlabel",
+    "DatasetStatistics",
+    "NumericSummary",
+    "QuantileSketch",
+    "collect_statistics",
+    "collect_dataset_statistics",
+    "PACKED_FLOATS",
+    "encode_binary",
+    "decode_binary",
     "Tag",
     "Matrix4x4TransformData",
     "QuaternionTransformData",
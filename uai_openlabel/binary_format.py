@@ -0,0 +1,294 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+A compact binary encoding of the JSON data model, for storing OpenLABEL without the cost of JSON text.
+
+The encoding is MessagePack (https://msgpack.org) with one extension: lists of at least two floats, e.g. the val
+of geometric data, are packed as an array of little-endian IEEE 754 doubles in an extension of type PACKED_FLOATS.
+Any MessagePack library can read the encoding, the packed floats appear as extensions to it. Numbers, strings and the
+order of keys are kept exactly, so decode_binary(encode_binary(data)) == data for all JSON data.
+
+Decoding uses the msgpack package if it is installed, e.g. as the msgpack extra, whose C implementation is several times faster than the pure
+Python decoder used otherwise. Both pause the garbage collector, which would otherwise repeatedly scan the growing tree of
+containers of a large document without finding anything to collect.
+"""
+
+import gc
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from typing import Any, Iterator, Mapping, Optional
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+__all__: list[str] = []
+
+PACKED_FLOATS = 1
+"""The MessagePack extension type of packed float arrays."""
+
+_DOUBLE = struct.Struct(">d")
+_FLOAT = struct.Struct(">f")
+_SWAP_PACKED = sys.byteorder != "little"
+
+
+def encode_binary(data: Any) -> bytes:
+    """Encodes JSON data, i.e. dicts with string keys, lists, tuples, strings, numbers, booleans and None."""
+    buffer = bytearray()
+    _encode(data, buffer)
+    return bytes(buffer)
+
+
+def decode_binary(data: bytes, use_msgpack: Optional[bool] = None) -> Any:
+    """
+    Decodes the output of encode_binary, tuples are decoded as lists. By default, the msgpack package is used if it
+    is installed. Raises a ValueError for invalid data.
+    """
+    use_msgpack = msgpack is not None if use_msgpack is None else use_msgpack
+    if use_msgpack and msgpack is None:
+        raise ImportError("msgpack is not installed, install uai_openlabel[msgpack]")
+
+    data = bytes(data)
+    with _gc_paused():
+        if use_msgpack:
+            return msgpack.unpackb(data, ext_hook=_ext_hook, strict_map_key=False)
+        try:
+            value, position = _decode(data, 0)
+        except (IndexError, struct.error):
+            position = len(data) + 1
+        if position > len(data):
+            raise ValueError("Truncated binary data")
+        if position < len(data):
+            raise ValueError(f"Unexpected data after the end at offset {position}")
+        return value
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _encode(value: Any, buffer: bytearray) -> None:
+    value_type = type(value)
+    if value_type is str:
+        encoded = value.encode()
+        _write_header(buffer, len(encoded), 0xA0, 31, 0xD9)
+        buffer += encoded
+    elif value_type is dict:
+        _write_header(buffer, len(value), 0x80, 15, None)
+        for key, item in value.items():
+            if not isinstance(key, str):
+                raise TypeError(f"Keys must be strings, not {type(key).__name__}")
+            _encode(key, buffer)
+            _encode(item, buffer)
+    elif value_type is list or value_type is tuple:
+        if len(value) >= 2 and all(isinstance(item, float) for item in value):
+            packed = array("d", value)
+            if _SWAP_PACKED:
+                packed.byteswap()
+            _write_ext_header(buffer, len(value) * 8, PACKED_FLOATS)
+            buffer += packed.tobytes()
+            return
+        _write_header(buffer, len(value), 0x90, 15, None)
+        for item in value:
+            _encode(item, buffer)
+    elif value_type is float:
+        buffer.append(0xCB)
+        buffer += _DOUBLE.pack(value)
+    elif value_type is int:
+        _write_int(buffer, value)
+    elif value is None:
+        buffer.append(0xC0)
+    elif value is True:
+        buffer.append(0xC3)
+    elif value is False:
+        buffer.append(0xC2)
+    # Subclasses, e.g. Uid, are encoded as their base type
+    elif isinstance(value, str):
+        _encode(str.__str__(value), buffer)
+    elif isinstance(value, int):
+        _encode(int(value), buffer)
+    elif isinstance(value, float):
+        _encode(float(value), buffer)
+    elif isinstance(value, Mapping):
+        _encode(dict(value), buffer)
+    elif isinstance(value, (list, tuple)):
+        _encode(list(value), buffer)
+    else:
+        raise TypeError(f"Can't encode {type(value).__name__}")
+
+
+def _write_header(buffer: bytearray, length: int, fix: int, fix_max: int, code_8: Optional[int]) -> None:
+    # fixstr/fixmap/fixarray, then str 8, and the 16 and 32 bit variants
+    if length <= fix_max:
+        buffer.append(fix | length)
+    elif code_8 is not None and length <= 0xFF:
+        buffer += bytes((code_8, length))
+    else:
+        code_16 = {0xA0: 0xDA, 0x80: 0xDE, 0x90: 0xDC}[fix]
+        if length <= 0xFFFF:
+            buffer.append(code_16)
+            buffer += length.to_bytes(2, "big")
+        else:
+            buffer.append(code_16 + 1)
+            buffer += length.to_bytes(4, "big")
+
+
+def _write_ext_header(buffer: bytearray, length: int, ext_type: int) -> None:
+    if length <= 0xFF:
+        buffer += bytes((0xC7, length, ext_type))
+    elif length <= 0xFFFF:
+        buffer.append(0xC8)
+        buffer += length.to_bytes(2, "big")
+        buffer.append(ext_type)
+    else:
+        buffer.append(0xC9)
+        buffer += length.to_bytes(4, "big")
+        buffer.append(ext_type)
+
+
+def _write_int(buffer: bytearray, value: int) -> None:
+    if 0 <= value <= 0x7F or -32 <= value < 0:
+        buffer.append(value & 0xFF)
+    elif 0 <= value <= 0xFFFFFFFFFFFFFFFF:
+        size = 1 if value <= 0xFF else 2 if value <= 0xFFFF else 4 if value <= 0xFFFFFFFF else 8
+        buffer.append({1: 0xCC, 2: 0xCD, 4: 0xCE, 8: 0xCF}[size])
+        buffer += value.to_bytes(size, "big")
+    elif -(1 << 63) <= value < 0:
+        size = 1 if value >= -0x80 else 2 if value >= -0x8000 else 4 if value >= -0x80000000 else 8
+        buffer.append({1: 0xD0, 2: 0xD1, 4: 0xD2, 8: 0xD3}[size])
+        buffer += value.to_bytes(size, "big", signed=True)
+    else:
+        raise ValueError(f"Integer {value} doesn't fit into 64 bits")
+
+
+def _decode(data: bytes, position: int) -> tuple[Any, int]:
+    code = data[position]
+    position += 1
+    if code <= 0x7F:
+        return code, position
+    if code >= 0xE0:
+        return code - 0x100, position
+    if code >= 0xA0 and code <= 0xBF:
+        end = position + (code & 0x1F)
+        return data[position:end].decode(), end
+    if code <= 0x8F:
+        return _decode_map(data, position, code & 0x0F)
+    if code <= 0x9F:
+        return _decode_array(data, position, code & 0x0F)
+    if code == 0xCB:
+        return _DOUBLE.unpack_from(data, position)[0], position + 8
+    if code == 0xC7:
+        return _decode_ext(data, position + 2, data[position], data[position + 1])
+    if code == 0xC0:
+        return None, position
+    if code == 0xC2 or code == 0xC3:
+        return code == 0xC3, position
+    if code >= 0xD4 and code <= 0xD8:
+        # fixext 1, 2, 4, 8 and 16
+        return _decode_ext(data, position + 1, 1 << (code - 0xD4), data[position])
+    size, kind = _SIZED.get(code, (0, ""))
+    if not size:
+        raise ValueError(f"Unsupported type code 0x{code:02x} at offset {position - 1}")
+    header = int.from_bytes(data[position : position + size], "big", signed=kind == "signed")
+    position += size
+    if kind == "unsigned" or kind == "signed":
+        return header, position
+    if kind == "float":
+        return _FLOAT.unpack_from(data, position - size)[0], position
+    if kind == "str":
+        return data[position : position + header].decode(), position + header
+    if kind == "bin":
+        return data[position : position + header], position + header
+    if kind == "array":
+        return _decode_array(data, position, header)
+    if kind == "map":
+        return _decode_map(data, position, header)
+    return _decode_ext(data, position + 1, header, data[position])
+
+
+def _decode_map(data: bytes, position: int, length: int) -> tuple[dict[str, Any], int]:
+    result = {}
+    for _ in range(length):
+        # Keys are almost always short strings
+        code = data[position]
+        if code >= 0xA0 and code <= 0xBF:
+            end = position + 1 + (code & 0x1F)
+            key = data[position + 1 : end].decode()
+            position = end
+        else:
+            key, position = _decode(data, position)
+        result[key], position = _decode(data, position)
+    return result, position
+
+
+def _decode_array(data: bytes, position: int, length: int) -> tuple[list[Any], int]:
+    result = [None] * length
+    for index in range(length):
+        result[index], position = _decode(data, position)
+    return result, position
+
+
+def _decode_ext(data: bytes, position: int, length: int, ext_type: int) -> tuple[Any, int]:
+    if ext_type != PACKED_FLOATS or length % 8:
+        raise ValueError(f"Unsupported extension type {ext_type} of length {length} at offset {position}")
+    return _unpack_floats(data[position : position + length]), position + length
+
+
+def _ext_hook(ext_type: int, payload: bytes) -> Any:
+    if ext_type != PACKED_FLOATS or len(payload) % 8:
+        raise ValueError(f"Unsupported extension type {ext_type} of length {len(payload)}")
+    return _unpack_floats(payload)
+
+
+def _unpack_floats(packed: bytes) -> list[float]:
+    floats = array("d", packed)
+    if _SWAP_PACKED:
+        floats.byteswap()
+    return floats.tolist()
+
+
+# The type codes with a big-endian header of the given size, i.e. the value itself for numbers and the length otherwise
+_SIZED: dict[int, tuple[int, str]] = {
+    0xC4: (1, "bin"),
+    0xC5: (2, "bin"),
+    0xC6: (4, "bin"),
+    0xC8: (2, "ext"),
+    0xC9: (4, "ext"),
+    0xCA: (4, "float"),
+    0xCC: (1, "unsigned"),
+    0xCD: (2, "unsigned"),
+    0xCE: (4, "unsigned"),
+    0xCF: (8, "unsigned"),
+    0xD0: (1, "signed"),
+    0xD1: (2, "signed"),
+    0xD2: (4, "signed"),
+    0xD3: (8, "signed"),
+    0xD9: (1, "str"),
+    0xDA: (2, "str"),
+    0xDB: (4, "str"),
+    0xDC: (2, "array"),
+    0xDD: (4, "array"),
+    0xDE: (2, "map"),
+    0xDF: (4, "map"),
+}
@@ -0,0 +1,524 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+The command line tool uai-openlabel. Its commands read and write OpenLABEL JSON files one frame at a time,
+so they work on files larger than the memory. Commands taking several files or directories run in a pool of workers.
+Run uai-openlabel <command> --help for details.
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, TypeVar
+
+from apischema import ValidationError
+
+# noinspection PyProtectedMember
+from uai_openlabel.export.coco import DEFAULT_FILE_NAME_TEMPLATE, export_coco
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame_interval import FrameIntervalSet
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.timestamp_index import TimestampUnit
+
+# noinspection PyProtectedMember
+from uai_openlabel.openlabel import OpenLabel
+
+# noinspection PyProtectedMember
+from uai_openlabel.referential_integrity import check_file_integrity
+
+# noinspection PyProtectedMember
+from uai_openlabel.schema_validation import (
+    SchemaPath,
+    _json_path,
+    openlabel_stream_violations,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.statistics import collect_dataset_statistics
+
+# noinspection PyProtectedMember
+from uai_openlabel.streaming import (
+    OpenLabelReader,
+    OpenLabelWriter,
+    pair_by_frame_number,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+__all__: list[str] = []
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Top-level fields which refer to frames, written after the frames since they depend on which frames were written
+_FRAME_DEPENDENT_FIELDS = ("frame_intervals", "objects", "actions", "events", "contexts", "relations")
+_ELEMENT_FIELDS = {"objects": "object", "actions": "action", "events": "event", "contexts": "context"}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Runs the command line tool and returns its exit code."""
+    arguments = _parser().parse_args(argv)
+    try:
+        return int(arguments.run(arguments))
+    except (OSError, ValueError, ValidationError) as error:
+        print(f"uai-openlabel: {error}", file=sys.stderr)
+        return 2
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="uai-openlabel", description="Operations on OpenLABEL JSON files of any size.")
+    commands = parser.add_subparsers(title="commands", required=True)
+
+    stats = commands.add_parser("stats", help="Print dataset statistics of files and directories as JSON.")
+    stats.add_argument("paths", nargs="+", type=Path, help="OpenLABEL JSON files or directories containing them")
+    stats.add_argument("--unit", choices=[unit.name for unit in TimestampUnit], default="Second", help="Unit of timestamps")
+    stats.add_argument("-o", "--output", type=Path, help="Write the report to this file instead of the standard output")
+    _add_workers(stats)
+    stats.set_defaults(run=_stats)
+
+    validate = commands.add_parser("validate", help="Check files and directories against the schema and for broken references.")
+    validate.add_argument("paths", nargs="+", type=Path, help="OpenLABEL JSON files or directories containing them")
+    validate.add_argument("--no-schema", action="store_true", help="Skip the JSON schema validation")
+    validate.add_argument("--no-integrity", action="store_true", help="Skip the referential integrity checks")
+    _add_workers(validate)
+    validate.set_defaults(run=_validate)
+
+    slice_ = commands.add_parser("slice", help="Write the frames of a range of frame numbers to a new file.")
+    slice_.add_argument("input", type=Path)
+    slice_.add_argument("output", type=Path)
+    slice_.add_argument("--start", type=int, help="First frame number, inclusive")
+    slice_.add_argument("--end", type=int, help="Last frame number, inclusive")
+    _add_indent(slice_)
+    slice_.set_defaults(run=_slice)
+
+    split = commands.add_parser("split", help="Split a file into files of a fixed number of frames.")
+    split.add_argument("input", type=Path)
+    split.add_argument("output_directory", type=Path)
+    split.add_argument("--frames", type=int, required=True, help="Number of frames per file")
+    _add_indent(split)
+    split.set_defaults(run=_split)
+
+    merge = commands.add_parser("merge", help="Merge files with disjoint frames, e.g. the parts of a split file.")
+    merge.add_argument("inputs", nargs="+", type=Path)
+    merge.add_argument("-o", "--output", type=Path, required=True)
+    _add_indent(merge)
+    merge.set_defaults(run=_merge)
+
+    convert = commands.add_parser("convert", help="Rewrite files, e.g. to change their indentation.")
+    convert.add_argument("input", type=Path, help="An OpenLABEL JSON file or a directory containing them")
+    convert.add_argument("output", type=Path, help="The output file, or directory if the input is a directory")
+    convert.add_argument("--normalize", action="store_true", help="Parse and serialize every frame with this library")
+    _add_indent(convert)
+    _add_workers(convert)
+    convert.set_defaults(run=_convert)
+
+    diff = commands.add_parser(
+        "diff",
+        help="Print the differences between two files, frames are matched by frame number and must be listed by it.",
+    )
+    diff.add_argument("first", type=Path)
+    diff.add_argument("second", type=Path)
+    diff.add_argument("--tolerance", type=float, default=0.0, help="Maximal absolute difference of equal numbers")
+    diff.set_defaults(run=_diff)
+
+    coco = commands.add_parser("coco", help="Export the 2D labels of camera streams to one COCO-style JSON file.")
+    coco.add_argument("paths", nargs="+", type=Path, help="OpenLABEL JSON files or directories containing them")
+    coco.add_argument("-o", "--output", type=Path, required=True)
+    coco.add_argument("--streams", nargs="+", help="Camera streams to export, by default all streams of type camera")
+    coco.add_argument("--categories", type=Path, help="JSON file mapping object types to category IDs, others are skipped")
+    coco.add_argument("--data-names", nargs="+", help="Export only the bbox and poly2d data of these names")
+    coco.add_argument(
+        "--file-names",
+        default=DEFAULT_FILE_NAME_TEMPLATE,
+        help="Template of the image file names with the fields uri, stream, sequence, frame and stream_frame",
+    )
+    _add_workers(coco)
+    coco.set_defaults(run=_coco)
+    return parser
+
+
+def _add_workers(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("-j", "--workers", type=int, help="Number of worker processes, by default one per CPU")
+
+
+def _add_indent(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--indent", type=int, help="Indent the JSON output by this many spaces")
+
+
+def _stats(arguments: argparse.Namespace) -> int:
+    statistics = collect_dataset_statistics(_json_files(arguments.paths), arguments.workers, TimestampUnit[arguments.unit])
+    report = json.dumps(statistics.report(), indent=2)
+    if arguments.output is None:
+        print(report)
+    else:
+        arguments.output.write_text(report + "\n", encoding="utf-8")
+    return 0
+
+
+def _validate(arguments: argparse.Namespace) -> int:
+    files = _json_files(arguments.paths)
+    check = partial(_validate_file, schema=not arguments.no_schema, integrity=not arguments.no_integrity)
+    invalid = 0
+    for path, violations in zip(files, _map(check, files, arguments.workers)):
+        for violation in violations:
+            print(f"{path}: {violation}")
+        invalid += bool(violations)
+    print(f"{invalid} of {len(files)} file(s) invalid", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+def _validate_file(path: Path, schema: bool, integrity: bool) -> list[str]:
+    try:
+        violations = [str(violation) for violation in openlabel_stream_violations(path)] if schema else []
+        # References can only be checked in data which can be deserialized
+        if integrity and not violations:
+            violations.extend(str(violation) for violation in check_file_integrity(path))
+    except (ValueError, ValidationError) as error:
+        return [str(error)]
+    return violations
+
+
+def _slice(arguments: argparse.Namespace) -> int:
+    start = arguments.start if arguments.start is not None else -sys.maxsize
+    end = arguments.end if arguments.end is not None else sys.maxsize
+    reader = OpenLabelReader(arguments.input)
+    header = reader.raw_header()
+    with OpenLabelWriter(arguments.output, arguments.indent) as writer:
+        _write_static_fields(writer, header)
+        numbers = []
+        for frame_uid, frame in reader.raw_frames():
+            number = frame_number(frame_uid)
+            if start <= number <= end:
+                writer.write_frame(frame_uid, frame)
+                numbers.append(number)
+        _write_frame_dependent_fields(writer, _slice_header(header, FrameIntervalSet((n, n) for n in numbers)))
+    print(f"Wrote {len(numbers)} frame(s) to {arguments.output}", file=sys.stderr)
+    return 0
+
+
+def _split(arguments: argparse.Namespace) -> int:
+    if arguments.frames < 1:
+        raise ValueError("--frames has to be positive")
+    reader = OpenLabelReader(arguments.input)
+    header = reader.raw_header()
+    arguments.output_directory.mkdir(parents=True, exist_ok=True)
+    parts = 0
+    writer: Optional[OpenLabelWriter] = None
+    numbers: list[int] = []
+    for frame_uid, frame in reader.raw_frames():
+        if writer is None:
+            writer = OpenLabelWriter(arguments.output_directory / f"{arguments.input.stem}_{parts:04d}.json", arguments.indent)
+            _write_static_fields(writer, header)
+            parts += 1
+        writer.write_frame(frame_uid, frame)
+        numbers.append(frame_number(frame_uid))
+        if len(numbers) == arguments.frames:
+            _finish_part(writer, header, numbers)
+            writer, numbers = None, []
+    if writer is not None:
+        _finish_part(writer, header, numbers)
+    print(f"Wrote {parts} file(s) to {arguments.output_directory}", file=sys.stderr)
+    return 0
+
+
+def _finish_part(writer: OpenLabelWriter, header: dict[str, Any], numbers: list[int]) -> None:
+    _write_frame_dependent_fields(writer, _slice_header(header, FrameIntervalSet((n, n) for n in numbers)))
+    writer.close()
+
+
+def _merge(arguments: argparse.Namespace) -> int:
+    readers = [OpenLabelReader(path) for path in arguments.inputs]
+    header = _merge_headers([(path, reader.raw_header()) for path, reader in zip(arguments.inputs, readers)])
+    written: set[int] = set()
+    with OpenLabelWriter(arguments.output, arguments.indent) as writer:
+        _write_static_fields(writer, header)
+        for path, reader in zip(arguments.inputs, readers):
+            for frame_uid, frame in reader.raw_frames():
+                number = frame_number(frame_uid)
+                if number in written:
+                    raise ValueError(f"Frame {frame_uid} of {path} was read from another file already")
+                written.add(number)
+                writer.write_frame(frame_uid, frame)
+        _write_frame_dependent_fields(writer, header)
+    print(f"Wrote {len(written)} frame(s) to {arguments.output}", file=sys.stderr)
+    return 0
+
+
+def _convert(arguments: argparse.Namespace) -> int:
+    if not arguments.input.is_dir():
+        _convert_file(arguments.input, arguments.output, arguments.indent, arguments.normalize)
+        return 0
+    files = _json_files([arguments.input])
+    outputs = [arguments.output / file.relative_to(arguments.input) for file in files]
+    for output in outputs:
+        output.parent.mkdir(parents=True, exist_ok=True)
+    convert = partial(_convert_paths, indent=arguments.indent, normalize=arguments.normalize)
+    for _ in _map(convert, list(zip(files, outputs)), arguments.workers):
+        pass
+    print(f"Converted {len(files)} file(s) to {arguments.output}", file=sys.stderr)
+    return 0
+
+
+def _convert_paths(paths: tuple[Path, Path], indent: Optional[int], normalize: bool) -> None:
+    _convert_file(*paths, indent=indent, normalize=normalize)
+
+
+def _convert_file(source: Path, target: Path, indent: Optional[int], normalize: bool) -> None:
+    reader = OpenLabelReader(source)
+    header = reader.raw_header()
+    if normalize:
+        header = OpenLabel.from_dict(header).to_dict(exclude_none=True)["openlabel"]
+    with OpenLabelWriter(target, indent) as writer:
+        _write_static_fields(writer, header)
+        for frame_uid, frame in reader.raw_frames():
+            writer.write_frame(frame_uid, Frame.from_dict(frame) if normalize else frame)
+        _write_frame_dependent_fields(writer, header)
+
+
+def _diff(arguments: argparse.Namespace) -> int:
+    first, second = OpenLabelReader(arguments.first), OpenLabelReader(arguments.second)
+    num_differences = 0
+    for difference in _file_differences(first, second, arguments.tolerance):
+        print(difference)
+        num_differences += 1
+    print(f"{num_differences} difference(s)", file=sys.stderr)
+    return 1 if num_differences else 0
+
+
+def _file_differences(first: OpenLabelReader, second: OpenLabelReader, tolerance: float) -> Iterator[str]:
+    """The differences of the headers, then of the frames, produced one frame at a time."""
+    yield from _differences(first.raw_header(), second.raw_header(), (), tolerance)
+    # Frames are paired with their keys, which may differ between the files, e.g. "1" and "001"
+    first_frames = ((frame_uid, (frame_uid, frame)) for frame_uid, frame in first.raw_frames())
+    second_frames = ((frame_uid, (frame_uid, frame)) for frame_uid, frame in second.raw_frames())
+    for _, first_frame, second_frame in pair_by_frame_number(first_frames, second_frames):
+        frame_uid = (first_frame or second_frame or ("", None))[0]
+        yield from _differences(
+            first_frame[1] if first_frame is not None else None,
+            second_frame[1] if second_frame is not None else None,
+            ("frames", frame_uid),
+            tolerance,
+        )
+
+
+def _coco(arguments: argparse.Namespace) -> int:
+    categories = None
+    if arguments.categories is not None:
+        categories = json.loads(arguments.categories.read_text(encoding="utf-8"))
+    export_coco(
+        _json_files(arguments.paths),
+        arguments.output,
+        categories,
+        arguments.workers,
+        arguments.streams,
+        arguments.file_names,
+        arguments.data_names,
+    )
+    return 0
+
+
+def _differences(first: Any, second: Any, path: SchemaPath, tolerance: float) -> Iterator[str]:
+    """Lines describing the differences between two JSON values, "-" for values only in the first, "+" only in the second."""
+    if first is None and second is not None:
+        yield f"+ {_json_path(path)}: {_short(second)}"
+    elif second is None and first is not None:
+        yield f"- {_json_path(path)}: {_short(first)}"
+    elif isinstance(first, dict) and isinstance(second, dict):
+        for key in {**first, **second}:
+            yield from _differences(first.get(key), second.get(key), (*path, key), tolerance)
+    elif isinstance(first, list) and isinstance(second, list):
+        for index in range(max(len(first), len(second))):
+            yield from _differences(
+                first[index] if index < len(first) else None,
+                second[index] if index < len(second) else None,
+                (*path, index),
+                tolerance,
+            )
+    elif not _equal(first, second, tolerance):
+        yield f"~ {_json_path(path)}: {_short(first)} -> {_short(second)}"
+
+
+def _equal(first: Any, second: Any, tolerance: float) -> bool:
+    numbers = (int, float)
+    if (
+        isinstance(first, numbers)
+        and isinstance(second, numbers)
+        and not isinstance(first, bool)
+        and not isinstance(second, bool)
+    ):
+        return abs(first - second) <= tolerance
+    return type(first) is type(second) and first == second
+
+
+def _short(value: Any, length: int = 80) -> str:
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= length else text[: length - 3] + "..."
+
+
+def _write_static_fields(writer: OpenLabelWriter, header: dict[str, Any]) -> None:
+    writer.write_fields({key: value for key, value in header.items() if key not in _FRAME_DEPENDENT_FIELDS})
+
+
+def _write_frame_dependent_fields(writer: OpenLabelWriter, header: dict[str, Any]) -> None:
+    writer.write_fields({key: header[key] for key in _FRAME_DEPENDENT_FIELDS if header.get(key) is not None})
+
+
+def _slice_header(header: dict[str, Any], frames: FrameIntervalSet) -> dict[str, Any]:
+    """
+    The header of the frames of a document. Frame intervals are intersected with the frames, elements and relations
+    which are in none of the frames are removed, as are relations between removed elements.
+    """
+    sliced = dict(header)
+    if header.get("frame_intervals") is not None:
+        sliced["frame_intervals"] = _intervals(frames, header["frame_intervals"])
+    removed: dict[str, set[str]] = {element_type: set() for element_type in _ELEMENT_FIELDS.values()}
+    for field, element_type in _ELEMENT_FIELDS.items():
+        if header.get(field) is None:
+            continue
+        sliced[field] = {}
+        for uid, element in header[field].items():
+            sliced_element = _slice_element(element, f"{element_type}_data_pointers", frames)
+            if sliced_element is None:
+                removed[element_type].add(uid)
+            else:
+                sliced[field][uid] = sliced_element
+    if header.get("relations") is not None:
+        sliced["relations"] = {}
+        for uid, relation in header["relations"].items():
+            agents = [*relation.get("rdf_subjects", ()), *relation.get("rdf_objects", ())]
+            if any(agent["uid"] in removed.get(agent["type"], ()) for agent in agents):
+                continue
+            sliced_relation = _slice_element(relation, None, frames)
+            if sliced_relation is not None:
+                sliced["relations"][uid] = sliced_relation
+    return sliced
+
+
+def _slice_element(
+    element: dict[str, Any], pointers_field: Optional[str], frames: FrameIntervalSet
+) -> Optional[dict[str, Any]]:
+    """The element restricted to the frames, None if it exists in none of them. Elements without frame intervals are static."""
+    if element.get("frame_intervals") is None:
+        return element
+    intervals = _interval_set(element["frame_intervals"]) & frames
+    if not intervals:
+        return None
+    sliced = {**element, "frame_intervals": _intervals(intervals, element["frame_intervals"])}
+    if pointers_field is not None and element.get(pointers_field) is not None:
+        pointers = {}
+        for name, pointer in element[pointers_field].items():
+            pointer_intervals = _interval_set(pointer["frame_intervals"]) & frames
+            if pointer_intervals:
+                pointers[name] = {**pointer, "frame_intervals": _intervals(pointer_intervals, pointer["frame_intervals"])}
+        sliced[pointers_field] = pointers
+    return sliced
+
+
+def _merge_headers(headers: list[tuple[Path, dict[str, Any]]]) -> dict[str, Any]:
+    """
+    The header of the union of documents with disjoint frames. Mappings of UIDs are united, elements and relations
+    declared in several documents have to be equal except for their frame intervals and data pointers, which are united.
+    """
+    merged: dict[str, Any] = {}
+    for path, header in headers:
+        for key, value in header.items():
+            if key not in merged:
+                merged[key] = value
+            elif key == "frame_intervals":
+                merged[key] = _intervals(_interval_set(merged[key]) | _interval_set(value), merged[key])
+            elif isinstance(value, dict) and key != "metadata":
+                merged[key] = {**merged[key]}
+                for uid, item in value.items():
+                    merged[key][uid] = (
+                        item if uid not in merged[key] else _merge_items(merged[key][uid], item, f"{key} {uid} of {path}")
+                    )
+    return merged
+
+
+def _merge_items(first: dict[str, Any], second: dict[str, Any], description: str) -> dict[str, Any]:
+    if first == second:
+        return first
+    interval_keys = {
+        key
+        for key in {*first, *second}
+        if isinstance(key, str) and (key == "frame_intervals" or key.endswith("_data_pointers"))
+    }
+    if not interval_keys or _without(first, interval_keys) != _without(second, interval_keys):
+        raise ValueError(f"Conflicting definitions of {description}")
+    merged = {**first, **second}
+    if first.get("frame_intervals") is not None and second.get("frame_intervals") is not None:
+        merged["frame_intervals"] = _intervals(
+            _interval_set(first["frame_intervals"]) | _interval_set(second["frame_intervals"]), first["frame_intervals"]
+        )
+    for key in interval_keys - {"frame_intervals"}:
+        pointers = {**(first.get(key) or {})}
+        for name, pointer in (second.get(key) or {}).items():
+            if name in pointers:
+                intervals = _interval_set(pointers[name]["frame_intervals"]) | _interval_set(pointer["frame_intervals"])
+                pointer = {**pointers[name], **pointer, "frame_intervals": _intervals(intervals, pointer["frame_intervals"])}
+            pointers[name] = pointer
+        merged[key] = pointers
+    return merged
+
+
+def _without(item: dict[str, Any], keys: set[str]) -> dict[str, Any]:
+    return {key: value for key, value in item.items() if key not in keys}
+
+
+def _interval_set(intervals: Iterable[dict[str, Any]]) -> FrameIntervalSet:
+    return FrameIntervalSet((frame_number(i["frame_start"]), frame_number(i["frame_end"])) for i in intervals)
+
+
+def _intervals(frames: FrameIntervalSet, like: Sequence[dict[str, Any]]) -> list[dict[str, Any]]:
+    """The frames as JSON frame intervals, with frame numbers as strings if they are strings in the intervals it's like."""
+    as_string = bool(like) and isinstance(like[0]["frame_start"], str)
+    return [
+        {"frame_start": str(start), "frame_end": str(end)} if as_string else {"frame_start": start, "frame_end": end}
+        for start, end in frames.ranges
+    ]
+
+
+def _json_files(paths: Iterable[Path]) -> list[Path]:
+    """The files, and the JSON files in the directories and their subdirectories, each once."""
+    files: list[Path] = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(path.rglob("*.json")))
+        elif path.exists():
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+    return list(dict.fromkeys(files))
+
+
+def _map(function: Callable[[T], R], items: list[T], workers: Optional[int]) -> Iterator[R]:
+    """Applies the function in a pool of worker processes, in this process for a single item or worker."""
+    if workers == 1 or len(items) <= 1:
+        yield from map(function, items)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(function, items)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,7 +15,7 @@
 import builtins
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Iterable, Iterator, Optional, Sequence, TypeVar, Union
+from typing import Iterable, Iterator, Mapping, Optional, Sequence, TypeVar, Union
 
 from apischema.metadata import required
 
@@ -31,7 +31,12 @@ from uai_openlabel.types_and_constants import (
 )
 
 # noinspection PyProtectedMember
-from uai_openlabel.utils import convert_values, no_default, unpack_sequence_of_length_1
+from uai_openlabel.utils import (
+    CachedIndexMixin,
+    convert_values,
+    no_default,
+    unpack_sequence_of_length_1,
+)
 
 __all__: list[str] = []
 
@@ -232,10 +237,17 @@ GenericData = Union[BooleanData, NumberData, TextData, VectorData]
 
 
 A = TypeVar("A", bound="Attributes")
+G = TypeVar("G")
 
 
 @dataclass
-class Attributes(JsonSnakeCaseSerializableMixin, Iterable[GenericData]):
+class Attributes(JsonSnakeCaseSerializableMixin, CachedIndexMixin, Iterable[GenericData]):
+    """
+    Lookups by name via get(), `in` and the typed getters use an index that is built on first use.
+    The index is dropped when a field is reassigned. After mutating one of the sequences in place,
+    call invalidate_index_cache().
+    """
+
     boolean: Optional[Sequence[BooleanData]] = field(default=None)
     num: Optional[Sequence[NumberData]] = field(default=None)
     text: Optional[Sequence[TextData]] = field(default=None)
@@ -250,6 +262,44 @@ class Attributes(JsonSnakeCaseSerializableMixin, Iterable[GenericData]):
             for a in attributes:
                 yield a
 
+    def __contains__(self, name: object) -> bool:
+        return name in self._data_by_name()
+
+    def get(self, name: AttributeName, default: Optional[GenericData] = None) -> Optional[GenericData]:
+        """Returns the data with the given name. If several data share a name, the first one in iteration order wins."""
+        return self._data_by_name().get(name, default)
+
+    def get_boolean(self, name: AttributeName) -> Optional[BooleanData]:
+        return self._get_typed(name, BooleanData)
+
+    def get_number(self, name: AttributeName) -> Optional[NumberData]:
+        return self._get_typed(name, NumberData)
+
+    def get_text(self, name: AttributeName) -> Optional[TextData]:
+        return self._get_typed(name, TextData)
+
+    def get_vector(self, name: AttributeName) -> Optional[VectorData]:
+        return self._get_typed(name, VectorData)
+
+    def _data_by_name(self) -> Mapping[AttributeName, GenericData]:
+        return self._cached_index("data_by_name", self._build_data_by_name)
+
+    def _build_data_by_name(self) -> dict[AttributeName, GenericData]:
+        data_by_name: dict[AttributeName, GenericData] = {}
+        for data in self:
+            if data.name is not None and data.name not in data_by_name:
+                data_by_name[data.name] = data
+        return data_by_name
+
+    def _get_typed(self, name: AttributeName, data_type: builtins.type[G]) -> Optional[G]:
+        """Returns None if there is no data with this name, raises a TypeError if it is of a different type."""
+        data = self._data_by_name().get(name)
+        if data is None:
+            return None
+        if not isinstance(data, data_type):
+            raise TypeError(f"{name} is a {data.__class__.__name__}, not a {data_type.__name__}")
+        return data
+
     @classmethod
     def static_attributes_example(cls: builtins.type[A]) -> A:
         """Contains attributes meant to be static."""
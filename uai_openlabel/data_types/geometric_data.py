@@ -12,9 +12,9 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
-from typing import Optional, Sequence, Union
+from typing import TYPE_CHECKING, Optional, Sequence, Union
 
 from apischema.metadata import required
 
@@ -36,6 +36,10 @@ from uai_openlabel.types_and_constants import (
 # noinspection PyProtectedMember
 from uai_openlabel.utils import convert_values, no_default
 
+if TYPE_CHECKING:
+    from uai_openlabel.geometry.bbox_2d import FloatArray
+    from uai_openlabel.geometry.chain_code import IntArray
+
 __all__: list[str] = []
 
 
@@ -262,6 +266,24 @@ class Poly2D(JsonSnakeCaseSerializableMixin):
         )
         self.val = tuple(converted_val)
 
+    def points(self) -> Union["FloatArray", "IntArray"]:
+        """
+        The (n, 2) points of the polyline, decoded according to its mode.
+        See uai_openlabel.geometry.decode_poly2d, this requires NumPy.
+        """
+        from uai_openlabel.geometry.chain_code import decode_poly2d
+
+        return decode_poly2d(self.val, self.mode)
+
+    def with_mode(self, mode: Poly2DMode) -> "Poly2D":
+        """
+        A copy of this polyline with its points encoded in another mode.
+        See uai_openlabel.geometry.encode_poly2d, this requires NumPy.
+        """
+        from uai_openlabel.geometry.chain_code import encode_poly2d
+
+        return replace(self, mode=mode, val=encode_poly2d(self.points(), mode))
+
 
 @dataclass
 class Poly3D(JsonSnakeCaseSerializableMixin):
@@ -14,15 +14,16 @@
 
 import builtins
 from dataclasses import dataclass, field
-from typing import Mapping, Optional, Sequence, TypeVar, Union
+from typing import Mapping, Optional, Sequence, TypeVar, Union, cast
 
 from apischema.metadata import required
 
 # noinspection PyProtectedMember
-from uai_openlabel.data_types.generic_data import Attributes
+from uai_openlabel.data_types.generic_data import Attributes, GenericData
 
 # noinspection PyProtectedMember
 from uai_openlabel.data_types.geometric_data import (
+    GeometricData,
     Poly2D,
     Poly3D,
     RotatedTwoDBoundingBox,
@@ -67,6 +68,35 @@ class ObjectData(Attributes):
     poly3d: Optional[Sequence[Poly3D]] = field(default=None)
     rbbox: Optional[Sequence[RotatedTwoDBoundingBox]] = field(default=None)
 
+    def get(  # type: ignore[override]
+        self,
+        name: AttributeName,
+        default: Optional[Union[GenericData, GeometricData]] = None,
+    ) -> Optional[Union[GenericData, GeometricData]]:
+        """Same as Attributes.get, but the index of ObjectData also contains the geometric data."""
+        data_by_name = cast(Mapping[AttributeName, Union[GenericData, GeometricData]], self._data_by_name())
+        return data_by_name.get(name, default)
+
+    def get_bbox(self, name: AttributeName) -> Optional[TwoDBoundingBox]:
+        return self._get_typed(name, TwoDBoundingBox)
+
+    def get_rbbox(self, name: AttributeName) -> Optional[RotatedTwoDBoundingBox]:
+        return self._get_typed(name, RotatedTwoDBoundingBox)
+
+    def get_cuboid(self, name: AttributeName) -> Optional[Union[ThreeDBoundingBoxEuler, ThreeDBoundingBoxQuaternion]]:
+        data = self.get(name)
+        if data is None:
+            return None
+        if not isinstance(data, (ThreeDBoundingBoxEuler, ThreeDBoundingBoxQuaternion)):
+            raise TypeError(f"{name} is a {data.__class__.__name__}, not a cuboid")
+        return data
+
+    def get_poly2d(self, name: AttributeName) -> Optional[Poly2D]:
+        return self._get_typed(name, Poly2D)
+
+    def get_poly3d(self, name: AttributeName) -> Optional[Poly3D]:
+        return self._get_typed(name, Poly3D)
+
     @classmethod
     def cuboid_with_dynamic_attributes_example(
         cls: type[D],
@@ -0,0 +1,52 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Evaluation of predictions against ground truth, both as OpenLABEL. This subpackage requires NumPy, see the numpy extra."""
+
+# noinspection PyProtectedMember
+from uai_openlabel.evaluation.assignment import greedy_assignment, optimal_assignment
+
+# noinspection PyProtectedMember
+from uai_openlabel.evaluation.detection import (
+    AssignmentMethod,
+    DetectionEvaluator,
+    DetectionGeometry,
+    DetectionResult,
+    evaluate_detection_files,
+    evaluate_detections,
+    pair_frames,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.evaluation.tracking import (
+    TrackingEvaluator,
+    TrackingResult,
+    evaluate_tracking,
+    evaluate_tracking_files,
+)
+
+__all__ = [
+    "greedy_assignment",
+    "optimal_assignment",
+    "AssignmentMethod",
+    "DetectionEvaluator",
+    "DetectionGeometry",
+    "DetectionResult",
+    "evaluate_detection_files",
+    "evaluate_detections",
+    "pair_frames",
+    "TrackingEvaluator",
+    "TrackingResult",
+    "evaluate_tracking",
+    "evaluate_tracking_files",
+]
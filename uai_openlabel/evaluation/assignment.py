@@ -0,0 +1,104 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+__all__: list[str] = []
+
+
+IntArray = npt.NDArray[np.intp]
+
+
+def greedy_assignment(
+    similarity: npt.ArrayLike, min_similarity: float, row_order: Optional[npt.ArrayLike] = None
+) -> tuple[IntArray, IntArray]:
+    """
+    Pairs the rows and columns of the similarity matrix: visiting the rows in row_order, by default from the first to
+    the last row, every row takes the most similar column not taken yet, if their similarity is at least min_similarity.
+    Returns the row and column indices of the pairs.
+    """
+    s = np.asarray(similarity, dtype=np.float64)
+    order = np.arange(s.shape[0]) if row_order is None else np.asarray(row_order, dtype=np.intp)
+    taken = np.zeros(s.shape[1], dtype=np.bool_)
+    rows, cols = [], []
+    for row in order.tolist():
+        candidates = np.where(taken, -np.inf, s[row])
+        if len(candidates) == 0:
+            break
+        col = int(np.argmax(candidates))
+        if candidates[col] >= min_similarity:
+            taken[col] = True
+            rows.append(row)
+            cols.append(col)
+    return np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
+
+def optimal_assignment(similarity: npt.ArrayLike, min_similarity: float) -> tuple[IntArray, IntArray]:
+    """
+    Pairs the rows and columns of the similarity matrix such that the total similarity of all pairs is maximal,
+    using only pairs with a similarity of at least min_similarity. Returns the row and column indices of the pairs,
+    sorted by row. Solved by the Hungarian algorithm in O(n² m) for n = min(rows, columns) and m = max(rows, columns).
+    """
+    s = np.asarray(similarity, dtype=np.float64)
+    # Pairs below the threshold gain nothing, which is the same as leaving both unpaired
+    gain = np.where(s >= min_similarity, s, 0.0)
+    transposed = gain.shape[0] > gain.shape[1]
+    rows, cols = _hungarian(-(gain.T if transposed else gain))
+    if transposed:
+        rows, cols = cols, rows
+    keep = s[rows, cols] >= min_similarity
+    rows, cols = rows[keep], cols[keep]
+    order = np.argsort(rows, kind="stable")
+    return rows[order], cols[order]
+
+
+def _hungarian(cost: npt.NDArray[np.float64]) -> tuple[IntArray, IntArray]:
+    """Minimal cost assignment of every row to a distinct column, for at most as many rows as columns."""
+    n, m = cost.shape
+    if n == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    # Potentials of rows and columns, and the row assigned to each column, all 1-based with 0 as sentinel
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    row_of_col = np.zeros(m + 1, dtype=np.intp)
+    previous_col = np.zeros(m + 1, dtype=np.intp)
+    for row in range(1, n + 1):
+        row_of_col[0] = row
+        col = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=np.bool_)
+        while row_of_col[col] != 0:
+            used[col] = True
+            current_row = row_of_col[col]
+            slack = cost[current_row - 1] - u[current_row] - v[1:]
+            free = ~used[1:]
+            improved = free & (slack < min_slack[1:])
+            min_slack[1:][improved] = slack[improved]
+            previous_col[1:][improved] = col
+            free_slack = np.where(free, min_slack[1:], np.inf)
+            next_col = int(np.argmin(free_slack)) + 1
+            delta = free_slack[next_col - 1]
+            u[row_of_col[used]] += delta
+            v[used] -= delta
+            min_slack[1:][free] -= delta
+            col = next_col
+        # Augment along the alternating path
+        while col != 0:
+            previous = previous_col[col]
+            row_of_col[col] = row_of_col[previous]
+            col = previous
+    cols = np.flatnonzero(row_of_col[1:])
+    return row_of_col[1:][cols] - 1, cols
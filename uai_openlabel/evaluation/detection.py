@@ -0,0 +1,342 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from array import array
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterable, Iterator, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.geometric_data import (
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+    TwoDBoundingBox,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.object import Object, ObjectData
+
+# noinspection PyProtectedMember
+from uai_openlabel.evaluation.assignment import greedy_assignment, optimal_assignment
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.bbox_2d import FloatArray, iou_matrix
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.cuboids import cuboid_iou_matrix
+
+# noinspection PyProtectedMember
+from uai_openlabel.openlabel import OpenLabel
+
+# noinspection PyProtectedMember
+from uai_openlabel.streaming import OpenLabelReader, Source, pair_by_frame_number
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import AttributeName, ObjectUid, Uid
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+__all__: list[str] = []
+
+
+Cuboid = Union[ThreeDBoundingBoxEuler, ThreeDBoundingBoxQuaternion]
+Detection = Union[TwoDBoundingBox, Cuboid]
+# An object in a frame with its detection and the object data holding it
+_FrameDetection = tuple[ObjectUid, Detection, ObjectData]
+
+
+class DetectionGeometry(Enum):
+    """The object data compared between ground truth and predictions."""
+
+    BoundingBox2D = "bbox"
+    Cuboid = "cuboid"
+
+
+class AssignmentMethod(Enum):
+    """
+    Greedy: Predictions, from the highest to the lowest score, take the ground truth with the highest IoU left, as in COCO.
+    Optimal: The total IoU of all matches is maximized.
+    """
+
+    Greedy = "greedy"
+    Optimal = "optimal"
+
+
+@dataclass(frozen=True)
+class DetectionResult:
+    """
+    The detection metrics of one object type. Metrics without a defined value, e.g. the recall without ground truth, are NaN.
+
+    :param object_type: The type of the objects, Object.type.
+    :param num_ground_truth: The number of ground truth detections.
+    :param num_predictions: The number of predicted detections.
+    :param true_positives: The number of predictions matched to a ground truth detection.
+    :param precision: The true positives per prediction.
+    :param recall: The true positives per ground truth detection.
+    :param average_precision: The area under the precision-recall curve of the predictions ordered by score,
+        with the precision interpolated as the maximal precision at any higher recall.
+    :param mean_iou: The mean IoU of the true positives.
+    """
+
+    object_type: str
+    num_ground_truth: int
+    num_predictions: int
+    true_positives: int
+    precision: float
+    recall: float
+    average_precision: float
+    mean_iou: float
+
+    @property
+    def false_positives(self) -> int:
+        return self.num_predictions - self.true_positives
+
+    @property
+    def false_negatives(self) -> int:
+        return self.num_ground_truth - self.true_positives
+
+
+class _Accumulator:
+    """The counts and scored matches of one object type. The predictions take 9 bytes each."""
+
+    def __init__(self) -> None:
+        self.num_ground_truth = 0
+        self.scores = array("d")
+        self.matched = array("b")
+        self.iou_sum = 0.0
+
+    def merge(self, other: "_Accumulator") -> None:
+        self.num_ground_truth += other.num_ground_truth
+        self.scores.extend(other.scores)
+        self.matched.extend(other.matched)
+        self.iou_sum += other.iou_sum
+
+    def result(self, object_type: str) -> DetectionResult:
+        scores = np.frombuffer(self.scores, dtype=np.float64) if self.scores else np.zeros(0)
+        matched = np.frombuffer(self.matched, dtype=np.int8).astype(np.bool_) if self.matched else np.zeros(0, np.bool_)
+        true_positives = int(matched.sum())
+        return DetectionResult(
+            object_type=object_type,
+            num_ground_truth=self.num_ground_truth,
+            num_predictions=len(scores),
+            true_positives=true_positives,
+            precision=true_positives / len(scores) if len(scores) else float("nan"),
+            recall=true_positives / self.num_ground_truth if self.num_ground_truth else float("nan"),
+            average_precision=_average_precision(scores, matched, self.num_ground_truth),
+            mean_iou=self.iou_sum / true_positives if true_positives else float("nan"),
+        )
+
+
+class DetectionEvaluator:
+    """
+    Compares predicted detections to ground truth frame by frame, per object type, and accumulates precision, recall
+    and average precision. Only counts and one score per prediction are kept, so frames can be fed one at a time.
+
+    Within a frame, the IoU of all predictions with all ground truth detections of the same type is computed at once
+    and the detections are matched by the assignment method. A match is a true positive if its IoU is at least
+    iou_threshold. Each object contributes the first of its bounding boxes or cuboids, restricted to data_name if given.
+    The score of a prediction is the number attribute score_name of the detection, or else of its object data,
+    and 1 if neither exists.
+
+    :param ground_truth_objects: The objects of the ground truth, for their types.
+    :param prediction_objects: The objects of the predictions, for their types.
+    """
+
+    def __init__(
+        self,
+        ground_truth_objects: Mapping[ObjectUid, Object],
+        prediction_objects: Mapping[ObjectUid, Object],
+        geometry: DetectionGeometry = DetectionGeometry.BoundingBox2D,
+        iou_threshold: float = 0.5,
+        assignment: AssignmentMethod = AssignmentMethod.Greedy,
+        data_name: Optional[AttributeName] = None,
+        score_name: AttributeName = "score",
+    ):
+        self.geometry = geometry
+        self.iou_threshold = iou_threshold
+        self.assignment = assignment
+        self.data_name = data_name
+        self.score_name = score_name
+        self._ground_truth_types = {uid: obj.type for uid, obj in ground_truth_objects.items()}
+        self._prediction_types = {uid: obj.type for uid, obj in prediction_objects.items()}
+        self._accumulators: dict[str, _Accumulator] = {}
+
+    def add_frame(self, ground_truth: Optional[Frame], predictions: Optional[Frame]) -> None:
+        """Matches the detections of one frame. A missing frame counts as a frame without detections."""
+        ground_truth_by_type = _detections_by_type(ground_truth, self._ground_truth_types, self.geometry, self.data_name)
+        predictions_by_type = _detections_by_type(predictions, self._prediction_types, self.geometry, self.data_name)
+        for object_type in ground_truth_by_type.keys() | predictions_by_type.keys():
+            self._match(object_type, ground_truth_by_type.get(object_type, []), predictions_by_type.get(object_type, []))
+
+    def add_frames(self, frame_pairs: Iterable[tuple[Optional[Frame], Optional[Frame]]]) -> None:
+        for ground_truth, predictions in frame_pairs:
+            self.add_frame(ground_truth, predictions)
+
+    def merge(self, other: "DetectionEvaluator") -> None:
+        """Adds the frames evaluated by another evaluator, e.g. one that ran on another part of the documents."""
+        for object_type, accumulator in other._accumulators.items():
+            self._accumulators.setdefault(object_type, _Accumulator()).merge(accumulator)
+
+    def results(self) -> dict[str, DetectionResult]:
+        """The metrics per object type, sorted by type."""
+        return {object_type: self._accumulators[object_type].result(object_type) for object_type in sorted(self._accumulators)}
+
+    def mean_average_precision(self) -> float:
+        """The mean of the average precision over the object types that have ground truth."""
+        values = [result.average_precision for result in self.results().values() if result.num_ground_truth > 0]
+        return float(np.mean(values)) if values else float("nan")
+
+    def _match(
+        self,
+        object_type: str,
+        ground_truth: list[_FrameDetection],
+        predictions: list[_FrameDetection],
+    ) -> None:
+        accumulator = self._accumulators.setdefault(object_type, _Accumulator())
+        accumulator.num_ground_truth += len(ground_truth)
+        if not predictions:
+            return
+
+        scores = np.array([self._score(detection, object_data) for _, detection, object_data in predictions])
+        matched_iou = np.zeros(len(predictions))
+        matched = np.zeros(len(predictions), dtype=np.bool_)
+        if ground_truth:
+            ious = _iou_matrix(self.geometry, [d for _, d, _ in predictions], [d for _, d, _ in ground_truth])
+            if self.assignment is AssignmentMethod.Greedy:
+                rows, cols = greedy_assignment(ious, self.iou_threshold, np.argsort(-scores, kind="stable"))
+            else:
+                rows, cols = optimal_assignment(ious, self.iou_threshold)
+            matched_iou[rows] = ious[rows, cols]
+            matched[rows] = True
+
+        accumulator.scores.extend(scores.tolist())
+        accumulator.matched.extend(matched.astype(np.int8).tolist())
+        accumulator.iou_sum += float(matched_iou.sum())
+
+    def _score(self, detection: Detection, object_data: ObjectData) -> float:
+        for attributes in (detection.attributes, object_data):
+            number = attributes.get_number(self.score_name) if attributes is not None else None
+            if number is not None:
+                return float(number.val)
+        return 1.0
+
+
+def evaluate_detections(
+    ground_truth: OpenLabel,
+    predictions: OpenLabel,
+    geometry: DetectionGeometry = DetectionGeometry.BoundingBox2D,
+    iou_threshold: float = 0.5,
+    assignment: AssignmentMethod = AssignmentMethod.Greedy,
+    data_name: Optional[AttributeName] = None,
+    score_name: AttributeName = "score",
+) -> DetectionEvaluator:
+    """Evaluates the frames of two OpenLabels in memory, see DetectionEvaluator."""
+    evaluator = DetectionEvaluator(
+        ground_truth.objects or {}, predictions.objects or {}, geometry, iou_threshold, assignment, data_name, score_name
+    )
+    evaluator.add_frames(pair_frames(iter(_sorted_frames(ground_truth).items()), iter(_sorted_frames(predictions).items())))
+    return evaluator
+
+
+def evaluate_detection_files(
+    ground_truth: Source,
+    predictions: Source,
+    geometry: DetectionGeometry = DetectionGeometry.BoundingBox2D,
+    iou_threshold: float = 0.5,
+    assignment: AssignmentMethod = AssignmentMethod.Greedy,
+    data_name: Optional[AttributeName] = None,
+    score_name: AttributeName = "score",
+) -> DetectionEvaluator:
+    """
+    Evaluates two OpenLABEL JSON documents without loading either of them completely, see DetectionEvaluator.
+    Each document is read twice, first for its objects and then frame by frame, holding only one frame per document.
+    Both documents must list their frames by increasing frame number.
+    """
+    ground_truth_reader, predictions_reader = OpenLabelReader(ground_truth), OpenLabelReader(predictions)
+    evaluator = DetectionEvaluator(
+        ground_truth_reader.header().objects or {},
+        predictions_reader.header().objects or {},
+        geometry,
+        iou_threshold,
+        assignment,
+        data_name,
+        score_name,
+    )
+    evaluator.add_frames(pair_frames(ground_truth_reader.frames(), predictions_reader.frames()))
+    return evaluator
+
+
+def pair_frames(
+    first: Iterator[tuple[Uid, Frame]], second: Iterator[tuple[Uid, Frame]]
+) -> Iterator[tuple[Optional[Frame], Optional[Frame]]]:
+    """
+    Pairs the frames of two frame streams listed by increasing frame number, see pair_by_frame_number.
+    Frames without partner are paired with None.
+    """
+    for _, first_frame, second_frame in pair_by_frame_number(first, second):
+        yield first_frame, second_frame
+
+
+def _sorted_frames(openlabel: OpenLabel) -> dict[Uid, Frame]:
+    return dict(sorted((openlabel.frames or {}).items(), key=lambda item: frame_number(item[0])))
+
+
+def _detections_by_type(
+    frame: Optional[Frame],
+    types: Mapping[ObjectUid, str],
+    geometry: DetectionGeometry,
+    data_name: Optional[AttributeName],
+) -> dict[str, list[_FrameDetection]]:
+    """The first bounding box or cuboid of every object in the frame, grouped by object type."""
+    detections_by_type: dict[str, list[_FrameDetection]] = {}
+    for object_uid, object_in_frame in ((frame.objects or {}) if frame is not None else {}).items():
+        object_data = object_in_frame.object_data
+        candidates: Sequence[Detection] = (
+            (object_data.bbox or ()) if geometry is DetectionGeometry.BoundingBox2D else (object_data.cuboid or ())
+        )
+        detection = next((d for d in candidates if data_name is None or d.name == data_name), None)
+        if detection is not None:
+            detections_by_type.setdefault(types.get(object_uid, ""), []).append((object_uid, detection, object_data))
+    return detections_by_type
+
+
+def _iou_matrix(
+    geometry: DetectionGeometry, detections_a: Sequence[Detection], detections_b: Sequence[Detection]
+) -> FloatArray:
+    if geometry is DetectionGeometry.BoundingBox2D:
+        return iou_matrix([d.val for d in detections_a], [d.val for d in detections_b])
+    return cuboid_iou_matrix(
+        [d for d in detections_a if not isinstance(d, TwoDBoundingBox)],
+        [d for d in detections_b if not isinstance(d, TwoDBoundingBox)],
+    )
+
+
+def _average_precision(scores: FloatArray, matched: np.ndarray, num_ground_truth: int) -> float:
+    if num_ground_truth == 0:
+        return float("nan")
+    if len(scores) == 0:
+        return 0.0
+    order = np.argsort(-scores, kind="stable")
+    true_positives = np.cumsum(matched[order])
+    precision = true_positives / np.arange(1, len(scores) + 1)
+    recall = true_positives / num_ground_truth
+    # The precision at each recall is the maximal precision at any recall at least as high
+    envelope = np.maximum.accumulate(precision[::-1])[::-1]
+    recall_steps = np.diff(recall, prepend=0.0)
+    return float(np.sum(recall_steps * envelope))
@@ -0,0 +1,443 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import heapq
+import math
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.object import Object
+
+# noinspection PyProtectedMember
+from uai_openlabel.evaluation.assignment import optimal_assignment
+
+# noinspection PyProtectedMember
+from uai_openlabel.evaluation.detection import (
+    DetectionGeometry,
+    _detections_by_type,
+    _FrameDetection,
+    _iou_matrix,
+    _sorted_frames,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.openlabel import OpenLabel
+
+# noinspection PyProtectedMember
+from uai_openlabel.streaming import OpenLabelReader, Source, pair_by_frame_number
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import AttributeName, FrameUid, ObjectUid
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+__all__: list[str] = []
+
+
+# Fractions of its frames in which a ground truth track is matched to count as mostly tracked or mostly lost
+_MOSTLY_TRACKED = 0.8
+_MOSTLY_LOST = 0.2
+
+
+@dataclass(frozen=True)
+class TrackingResult:
+    """
+    The tracking metrics of one object type. Metrics without a defined value, e.g. MOTA without ground truth, are NaN.
+
+    :param object_type: The type of the objects, Object.type.
+    :param num_ground_truth: The number of ground truth detections over all frames.
+    :param num_predictions: The number of predicted detections over all frames.
+    :param true_positives: The number of matched detections.
+    :param id_switches: How often a ground truth track is matched to another prediction than in its last match.
+    :param fragmentations: How often a ground truth track is matched again after having been unmatched.
+    :param num_ground_truth_tracks: The number of ground truth objects.
+    :param num_predicted_tracks: The number of predicted objects.
+    :param mostly_tracked: The number of ground truth tracks matched in at least 80 % of their frames.
+    :param mostly_lost: The number of ground truth tracks matched in less than 20 % of their frames.
+    :param mota: Multi-object tracking accuracy, 1 - (false negatives + false positives + id switches) / ground truth.
+    :param motp: Multi-object tracking precision, the mean IoU of the matches.
+    :param idf1: The F1 score of the detections correctly identified under the best one-to-one mapping of tracks.
+    :param det_a: The detection accuracy of HOTA at the IoU threshold, TP / (TP + FN + FP).
+    :param ass_a: The association accuracy of HOTA at the IoU threshold.
+    :param hota: The higher order tracking accuracy at the IoU threshold, the geometric mean of det_a and ass_a.
+    """
+
+    object_type: str
+    num_ground_truth: int
+    num_predictions: int
+    true_positives: int
+    id_switches: int
+    fragmentations: int
+    num_ground_truth_tracks: int
+    num_predicted_tracks: int
+    mostly_tracked: int
+    mostly_lost: int
+    mota: float
+    motp: float
+    idf1: float
+    det_a: float
+    ass_a: float
+    hota: float
+
+    @property
+    def false_positives(self) -> int:
+        return self.num_predictions - self.true_positives
+
+    @property
+    def false_negatives(self) -> int:
+        return self.num_ground_truth - self.true_positives
+
+
+@dataclass
+class _GroundTruthTrack:
+    frames: int = 0
+    matched_frames: int = 0
+    last_match: Optional[ObjectUid] = None
+    # Whether the track was matched in the last frame it appeared in
+    tracked: bool = False
+
+
+# A track, (True, uid) for predictions and (False, uid) for ground truth
+_TrackNode = tuple[bool, ObjectUid]
+
+
+@dataclass
+class _TrackGroup:
+    """Tracks connected by overlaps, and the pairs of ground truth and predicted tracks that overlapped."""
+
+    tracks: list[_TrackNode] = field(default_factory=list)
+    pairs: list[tuple[ObjectUid, ObjectUid]] = field(default_factory=list)
+    # The number of tracks of the group that haven't ended yet
+    active: int = 0
+
+
+class _TrackingState:
+    """
+    The state of one object type.
+
+    The IDF1 and HOTA contributions of tracks depend on all tracks they overlapped with. So tracks connected by overlaps
+    form a group, and once every track of a group has ended, its contributions are folded into the counters and the
+    group is dropped. The state thus grows with the number of tracks in groups with an active track, and doesn't
+    shrink for tracks that never end, i.e. objects without frame intervals.
+    """
+
+    def __init__(self) -> None:
+        self.ground_truth_tracks: dict[ObjectUid, _GroundTruthTrack] = {}
+        self.prediction_frames: dict[ObjectUid, int] = {}
+        # Frames in which a pair of tracks was matched, and in which it overlapped enough to be matched
+        self.pair_matches: dict[tuple[ObjectUid, ObjectUid], int] = {}
+        self.pair_overlaps: dict[tuple[ObjectUid, ObjectUid], int] = {}
+        self.groups: dict[_TrackNode, _TrackGroup] = {}
+        # The last frame of the active tracks that end, as a heap
+        self.ends: list[tuple[int, _TrackNode]] = []
+        self.num_ground_truth = 0
+        self.num_predictions = 0
+        self.true_positives = 0
+        self.id_switches = 0
+        self.fragmentations = 0
+        self.iou_sum = 0.0
+        # The contributions of the dropped groups
+        self.ended_ground_truth_tracks = 0
+        self.ended_predicted_tracks = 0
+        self.ended_mostly_tracked = 0
+        self.ended_mostly_lost = 0
+        self.ended_identity_true_positives = 0
+        self.ended_association = 0.0
+
+    def add_track(self, track: _TrackNode, last_frame: Optional[int]) -> None:
+        self.groups[track] = _TrackGroup(tracks=[track], active=1)
+        if last_frame is not None:
+            heapq.heappush(self.ends, (last_frame, track))
+
+    def add_overlap(self, ground_truth: ObjectUid, prediction: ObjectUid) -> None:
+        """Merges the groups of the tracks when they overlap for the first time."""
+        pair = (ground_truth, prediction)
+        self.pair_overlaps[pair] = self.pair_overlaps.get(pair, 0) + 1
+        if self.pair_overlaps[pair] > 1:
+            return
+        group, other = self.groups[(False, ground_truth)], self.groups[(True, prediction)]
+        if group is not other:
+            if len(group.tracks) < len(other.tracks):
+                group, other = other, group
+            group.tracks.extend(other.tracks)
+            group.pairs.extend(other.pairs)
+            group.active += other.active
+            for track in other.tracks:
+                self.groups[track] = group
+        group.pairs.append(pair)
+
+    def end_tracks(self, frame: int) -> None:
+        """Ends the tracks whose last frame is at most the frame, and drops the groups without an active track."""
+        while self.ends and self.ends[0][0] <= frame:
+            _, track = heapq.heappop(self.ends)
+            group = self.groups[track]
+            group.active -= 1
+            if group.active == 0:
+                self._drop(group)
+
+    def _drop(self, group: _TrackGroup) -> None:
+        pair_overlaps = {pair: self.pair_overlaps.pop(pair) for pair in group.pairs}
+        self.ended_identity_true_positives += _identity_true_positives(pair_overlaps)
+        self.ended_association += self._association(
+            {pair: self.pair_matches.pop(pair) for pair in group.pairs if pair in self.pair_matches}
+        )
+        for is_prediction, uid in group.tracks:
+            del self.groups[(is_prediction, uid)]
+            if is_prediction:
+                del self.prediction_frames[uid]
+                self.ended_predicted_tracks += 1
+            else:
+                track = self.ground_truth_tracks.pop(uid)
+                self.ended_ground_truth_tracks += 1
+                self.ended_mostly_tracked += track.matched_frames >= _MOSTLY_TRACKED * track.frames
+                self.ended_mostly_lost += track.matched_frames < _MOSTLY_LOST * track.frames
+
+    def _association(self, pair_matches: Mapping[tuple[ObjectUid, ObjectUid], int]) -> float:
+        """The sum of the association scores of HOTA over the matches of the pairs."""
+        return sum(
+            matches * matches / (self.ground_truth_tracks[gt].frames + self.prediction_frames[prediction] - matches)
+            for (gt, prediction), matches in pair_matches.items()
+        )
+
+    def result(self, object_type: str) -> TrackingResult:
+        tracks = self.ground_truth_tracks.values()
+        true_positives, num_ground_truth = self.true_positives, self.num_ground_truth
+        false_negatives, false_positives = num_ground_truth - true_positives, self.num_predictions - true_positives
+        det_a = _ratio(true_positives, true_positives + false_negatives + false_positives)
+        ass_a = _ratio(self.ended_association + self._association(self.pair_matches), true_positives)
+        identity_true_positives = self.ended_identity_true_positives + _identity_true_positives(self.pair_overlaps)
+        return TrackingResult(
+            object_type=object_type,
+            num_ground_truth=num_ground_truth,
+            num_predictions=self.num_predictions,
+            true_positives=true_positives,
+            id_switches=self.id_switches,
+            fragmentations=self.fragmentations,
+            num_ground_truth_tracks=self.ended_ground_truth_tracks + len(tracks),
+            num_predicted_tracks=self.ended_predicted_tracks + len(self.prediction_frames),
+            mostly_tracked=self.ended_mostly_tracked
+            + sum(track.matched_frames >= _MOSTLY_TRACKED * track.frames for track in tracks),
+            mostly_lost=self.ended_mostly_lost + sum(track.matched_frames < _MOSTLY_LOST * track.frames for track in tracks),
+            mota=1 - _ratio(false_negatives + false_positives + self.id_switches, num_ground_truth),
+            motp=_ratio(self.iou_sum, true_positives),
+            idf1=_ratio(2 * identity_true_positives, num_ground_truth + self.num_predictions),
+            det_a=det_a,
+            ass_a=ass_a,
+            hota=math.sqrt(det_a * ass_a),
+        )
+
+
+class TrackingEvaluator:
+    """
+    Compares predicted tracks to ground truth tracks over a sequence, per object type, with the CLEAR MOT metrics,
+    IDF1 and HOTA at a single IoU threshold. Tracks are the objects and identified by their uids.
+    Frames must be fed in temporal order, one at a time. The time per frame doesn't depend on the frames before,
+    so a sequence is evaluated in time linear in its length. Given the frame numbers, tracks end after the last frame
+    of their Object.frame_intervals, and groups of overlapping tracks that have all ended are folded into the metrics
+    and dropped. Memory then grows with the active tracks rather than with all tracks of the sequence.
+    The frame intervals must cover every frame of their object, a track appearing after its end is counted again.
+
+    In every frame, a ground truth detection stays matched to the prediction it was last matched to if their IoU is
+    at least iou_threshold. The remaining detections are matched by optimal assignment on their IoU.
+    Detections are selected as in DetectionEvaluator.
+
+    :param ground_truth_objects: The objects of the ground truth, for their types.
+    :param prediction_objects: The objects of the predictions, for their types.
+    """
+
+    def __init__(
+        self,
+        ground_truth_objects: Mapping[ObjectUid, Object],
+        prediction_objects: Mapping[ObjectUid, Object],
+        geometry: DetectionGeometry = DetectionGeometry.BoundingBox2D,
+        iou_threshold: float = 0.5,
+        data_name: Optional[AttributeName] = None,
+    ):
+        self.geometry = geometry
+        self.iou_threshold = iou_threshold
+        self.data_name = data_name
+        self._ground_truth_types = {uid: obj.type for uid, obj in ground_truth_objects.items()}
+        self._prediction_types = {uid: obj.type for uid, obj in prediction_objects.items()}
+        self._last_frames: dict[_TrackNode, int] = {
+            (is_prediction, uid): max(frame_number(interval.frame_end) for interval in obj.frame_intervals)
+            for is_prediction, objects in ((False, ground_truth_objects), (True, prediction_objects))
+            for uid, obj in objects.items()
+            if obj.frame_intervals
+        }
+        self._states: dict[str, _TrackingState] = {}
+
+    def add_frame(self, ground_truth: Optional[Frame], predictions: Optional[Frame], frame: Optional[FrameUid] = None) -> None:
+        """
+        Matches the detections of the next frame. A missing frame counts as a frame without detections.
+        With the frame number, the tracks ending in this frame are dropped after it.
+        """
+        ground_truth_by_type = _detections_by_type(ground_truth, self._ground_truth_types, self.geometry, self.data_name)
+        predictions_by_type = _detections_by_type(predictions, self._prediction_types, self.geometry, self.data_name)
+        for object_type in ground_truth_by_type.keys() | predictions_by_type.keys():
+            self._match(object_type, ground_truth_by_type.get(object_type, []), predictions_by_type.get(object_type, []))
+        if frame is not None:
+            for state in self._states.values():
+                state.end_tracks(frame_number(frame))
+
+    def add_frames(self, frame_pairs: Iterable[tuple[Optional[Frame], Optional[Frame]]]) -> None:
+        for ground_truth, predictions in frame_pairs:
+            self.add_frame(ground_truth, predictions)
+
+    def results(self) -> dict[str, TrackingResult]:
+        """The metrics per object type, sorted by type."""
+        return {object_type: self._states[object_type].result(object_type) for object_type in sorted(self._states)}
+
+    def _match(self, object_type: str, ground_truth: list[_FrameDetection], predictions: list[_FrameDetection]) -> None:
+        state = self._states.setdefault(object_type, _TrackingState())
+        state.num_ground_truth += len(ground_truth)
+        state.num_predictions += len(predictions)
+        for gt_uid, _, _ in ground_truth:
+            if gt_uid not in state.ground_truth_tracks:
+                state.ground_truth_tracks[gt_uid] = _GroundTruthTrack()
+                state.add_track((False, gt_uid), self._last_frames.get((False, gt_uid)))
+        for prediction_uid, _, _ in predictions:
+            if prediction_uid not in state.prediction_frames:
+                state.prediction_frames[prediction_uid] = 0
+                state.add_track((True, prediction_uid), self._last_frames.get((True, prediction_uid)))
+            state.prediction_frames[prediction_uid] += 1
+
+        gt_uids = [uid for uid, _, _ in ground_truth]
+        prediction_uids = [uid for uid, _, _ in predictions]
+        if ground_truth and predictions:
+            ious = _iou_matrix(self.geometry, [d for _, d, _ in ground_truth], [d for _, d, _ in predictions])
+        else:
+            ious = np.zeros((len(ground_truth), len(predictions)))
+        overlapping = ious >= self.iou_threshold
+        for row, col in zip(*np.nonzero(overlapping)):
+            state.add_overlap(gt_uids[row], prediction_uids[col])
+
+        # Keep the matches of the last frames that still overlap enough
+        matches: dict[int, int] = {}
+        taken_cols: set[int] = set()
+        column_by_uid = {uid: col for col, uid in enumerate(prediction_uids)}
+        for row, gt_uid in enumerate(gt_uids):
+            track = state.ground_truth_tracks[gt_uid]
+            col = column_by_uid.get(track.last_match) if track.last_match is not None else None
+            if col is not None and overlapping[row, col] and col not in taken_cols:
+                matches[row] = col
+                taken_cols.add(col)
+        free_rows = np.array([row for row in range(len(gt_uids)) if row not in matches], dtype=np.intp)
+        free_cols = np.array([col for col in range(len(prediction_uids)) if col not in taken_cols], dtype=np.intp)
+        if len(free_rows) and len(free_cols):
+            rows, cols = optimal_assignment(ious[np.ix_(free_rows, free_cols)], self.iou_threshold)
+            matches.update(zip(free_rows[rows].tolist(), free_cols[cols].tolist()))
+
+        for row, gt_uid in enumerate(gt_uids):
+            track = state.ground_truth_tracks[gt_uid]
+            track.frames += 1
+            col = matches.get(row)
+            if col is None:
+                track.tracked = False
+                continue
+            prediction_uid = prediction_uids[col]
+            if track.last_match is not None and track.last_match != prediction_uid:
+                state.id_switches += 1
+            if track.last_match is not None and not track.tracked:
+                state.fragmentations += 1
+            track.last_match, track.tracked = prediction_uid, True
+            track.matched_frames += 1
+            pair = (gt_uid, prediction_uid)
+            state.pair_matches[pair] = state.pair_matches.get(pair, 0) + 1
+            state.true_positives += 1
+            state.iou_sum += float(ious[row, col])
+
+
+def evaluate_tracking(
+    ground_truth: OpenLabel,
+    predictions: OpenLabel,
+    geometry: DetectionGeometry = DetectionGeometry.BoundingBox2D,
+    iou_threshold: float = 0.5,
+    data_name: Optional[AttributeName] = None,
+) -> TrackingEvaluator:
+    """Evaluates the frames of two OpenLabels in memory, see TrackingEvaluator. Frames are visited by frame number."""
+    evaluator = TrackingEvaluator(ground_truth.objects or {}, predictions.objects or {}, geometry, iou_threshold, data_name)
+    frames = pair_by_frame_number(iter(_sorted_frames(ground_truth).items()), iter(_sorted_frames(predictions).items()))
+    for number, ground_truth_frame, predictions_frame in frames:
+        evaluator.add_frame(ground_truth_frame, predictions_frame, number)
+    return evaluator
+
+
+def evaluate_tracking_files(
+    ground_truth: Source,
+    predictions: Source,
+    geometry: DetectionGeometry = DetectionGeometry.BoundingBox2D,
+    iou_threshold: float = 0.5,
+    data_name: Optional[AttributeName] = None,
+) -> TrackingEvaluator:
+    """
+    Evaluates two OpenLABEL JSON documents without loading either of them completely, see TrackingEvaluator.
+    Both documents must list their frames by increasing frame number, frames are paired as they are read.
+    """
+    ground_truth_reader, predictions_reader = OpenLabelReader(ground_truth), OpenLabelReader(predictions)
+    evaluator = TrackingEvaluator(
+        ground_truth_reader.header().objects or {},
+        predictions_reader.header().objects or {},
+        geometry,
+        iou_threshold,
+        data_name,
+    )
+    for number, ground_truth_frame, predictions_frame in pair_by_frame_number(
+        ground_truth_reader.frames(), predictions_reader.frames()
+    ):
+        evaluator.add_frame(ground_truth_frame, predictions_frame, number)
+    return evaluator
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator else float("nan")
+
+
+def _identity_true_positives(pair_overlaps: Mapping[tuple[ObjectUid, ObjectUid], int]) -> int:
+    """
+    The number of detections identified correctly under the one-to-one mapping of ground truth to predicted tracks
+    that maximizes it. The mapping is solved separately for each group of tracks connected by overlaps.
+    """
+    parent: dict[tuple[bool, ObjectUid], tuple[bool, ObjectUid]] = {}
+
+    def find(node: tuple[bool, ObjectUid]) -> tuple[bool, ObjectUid]:
+        root = node
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for gt_uid, prediction_uid in pair_overlaps:
+        parent[find((False, gt_uid))] = find((True, prediction_uid))
+
+    components: dict[tuple[bool, ObjectUid], list[tuple[tuple[ObjectUid, ObjectUid], int]]] = {}
+    for pair, count in pair_overlaps.items():
+        components.setdefault(find((False, pair[0])), []).append((pair, count))
+
+    total = 0
+    for pairs in components.values():
+        gt_index = {gt: i for i, gt in enumerate(dict.fromkeys(gt for (gt, _), _ in pairs))}
+        prediction_index = {p: i for i, p in enumerate(dict.fromkeys(p for (_, p), _ in pairs))}
+        counts = np.zeros((len(gt_index), len(prediction_index)))
+        for (gt, prediction), count in pairs:
+            counts[gt_index[gt], prediction_index[prediction]] = count
+        rows, cols = optimal_assignment(counts, 1.0)
+        total += int(counts[rows, cols].sum())
+    return total
@@ -0,0 +1,35 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Export of OpenLABEL labels to other annotation formats."""
+
+# noinspection PyProtectedMember
+from uai_openlabel.export.coco import (
+    DEFAULT_FILE_NAME_TEMPLATE,
+    CocoAnnotation,
+    CocoExporter,
+    CocoImage,
+    CocoWriter,
+    coco_images,
+    export_coco,
+)
+
+__all__ = [
+    "DEFAULT_FILE_NAME_TEMPLATE",
+    "CocoAnnotation",
+    "CocoExporter",
+    "CocoImage",
+    "CocoWriter",
+    "coco_images",
+    "export_coco",
+]
@@ -0,0 +1,443 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Export of the 2D labels of camera streams to COCO-style object detection JSON, frame by frame.
+
+Each frame of an OpenLABEL yields one COCO image per camera stream. An object yields one annotation per image with
+a TwoDBoundingBox or a closed Poly2D in that stream: the first bounding box gives the COCO bbox, all closed polylines give
+the segmentation polygons. Polylines with less than three points are skipped. Absolute and relative polylines are
+decoded without NumPy, chain-code polylines require the numpy extra. Geometric data belongs to a stream if its coordinate_system is the stream UID. Data without
+a coordinate system belongs to the only exported stream, if only one stream is exported.
+"""
+
+import json
+import os
+import tempfile
+from collections.abc import Collection, Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Optional, TextIO, Union
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.geometric_data import Poly2D, Poly2DMode, TwoDBoundingBox
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.object import ObjectData
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.stream_sync import _stream_frame, _sync
+
+# noinspection PyProtectedMember
+from uai_openlabel.openlabel import OpenLabel
+
+# noinspection PyProtectedMember
+from uai_openlabel.stream.stream import Stream, StreamType
+
+# noinspection PyProtectedMember
+from uai_openlabel.streaming import OpenLabelReader, Source
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import FrameUid, StreamUid
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+__all__: list[str] = []
+
+DEFAULT_FILE_NAME_TEMPLATE = "{uri}/{stream_frame:06d}.jpg"
+
+
+@dataclass(frozen=True)
+class CocoAnnotation:
+    """
+    The 2D label of one object in one COCO image.
+
+    :param category: The type of the object, mapped to a COCO category ID on export.
+    :param object_uid: The UID of the object, exported as track_id.
+    :param bbox: The COCO bounding box, i.e. x and y of the top left corner, width and height in pixels.
+    :param area: The area of the segmentation polygons, or of the bounding box without segmentation.
+    :param segmentation: The COCO segmentation polygons, each a flat list of x and y coordinates.
+    """
+
+    category: str
+    object_uid: str
+    bbox: tuple[float, float, float, float]
+    area: float
+    segmentation: tuple[tuple[float, ...], ...] = ()
+
+    def to_coco(self, annotation_id: int, image_id: int, category_id: int) -> dict[str, Any]:
+        annotation = {
+            "id": annotation_id,
+            "image_id": image_id,
+            "category_id": category_id,
+            "bbox": list(self.bbox),
+            "area": self.area,
+            "iscrowd": 0,
+            "track_id": self.object_uid,
+        }
+        if self.segmentation:
+            annotation["segmentation"] = [list(polygon) for polygon in self.segmentation]
+        return annotation
+
+
+@dataclass(frozen=True)
+class CocoImage:
+    """
+    One frame of one camera stream and its annotations.
+
+    :param file_name: The image file name, see CocoExporter.
+    :param sequence: The name of the OpenLABEL the frame belongs to.
+    :param stream: The UID of the camera stream.
+    :param frame: The master frame number of the OpenLABEL.
+    :param stream_frame: The internal frame number of the stream.
+    :param width: The image width in pixels from the camera intrinsics, if any.
+    :param height: The image height in pixels from the camera intrinsics, if any.
+    """
+
+    file_name: str
+    sequence: str
+    stream: str
+    frame: int
+    stream_frame: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    annotations: tuple[CocoAnnotation, ...] = field(default=())
+
+    def to_coco(self, image_id: int) -> dict[str, Any]:
+        image: dict[str, Any] = {"id": image_id, "file_name": self.file_name}
+        if self.width is not None and self.height is not None:
+            image.update(width=self.width, height=self.height)
+        image.update(sequence=self.sequence, stream=self.stream, frame=self.frame, stream_frame=self.stream_frame)
+        return image
+
+
+class CocoExporter:
+    """
+    Converts the frames of one OpenLABEL into COCO images, one frame at a time.
+
+    By default, all streams of type camera are exported. The image file name is file_name_template formatted with
+    the fields uri (Stream.uri, or the stream UID without one), stream, sequence, frame (the master frame number) and
+    stream_frame. The stream frame follows the sync of the stream, where the sync in FrameProperties.streams of a frame
+    takes precedence over the sync of the stream itself, see uai_openlabel.StreamSyncIndex.
+
+    With data_names, only geometric data of these names is exported.
+    """
+
+    def __init__(
+        self,
+        openlabel: OpenLabel,
+        sequence: str = "",
+        streams: Optional[Iterable[StreamUid]] = None,
+        file_name_template: str = DEFAULT_FILE_NAME_TEMPLATE,
+        data_names: Optional[Collection[str]] = None,
+    ):
+        declared = openlabel.streams or {}
+        if streams is None:
+            streams = [stream_uid for stream_uid, stream in declared.items() if stream.type == StreamType.Camera]
+        self.sequence = sequence
+        self.streams = list(streams)
+        self.file_name_template = file_name_template
+        self.data_names = None if data_names is None else set(data_names)
+        self.object_types = {str(uid): obj.type for uid, obj in (openlabel.objects or {}).items()}
+        self._uris = {stream_uid: _uri(stream_uid, declared.get(stream_uid)) for stream_uid in self.streams}
+        self._syncs = {
+            stream_uid: _sync(declared[stream_uid]) if stream_uid in declared else None for stream_uid in self.streams
+        }
+        self._sizes = {stream_uid: _image_size(declared.get(stream_uid)) for stream_uid in self.streams}
+
+    def add_frame(self, frame_uid: FrameUid, frame: Frame) -> list[CocoImage]:
+        """The COCO images of a frame, one for each exported stream."""
+        master = frame_number(frame_uid)
+        frame_streams = frame.frame_properties.streams if frame.frame_properties is not None else None
+        annotations = self._annotations(frame)
+        images = []
+        for stream_uid in self.streams:
+            stream_frame = _stream_frame(master, self._syncs[stream_uid], master)
+            if frame_streams is not None and stream_uid in frame_streams:
+                stream_frame = _stream_frame(master, _sync(frame_streams[stream_uid]), stream_frame)
+            file_name = self.file_name_template.format(
+                uri=self._uris[stream_uid],
+                stream=stream_uid,
+                sequence=self.sequence,
+                frame=master,
+                stream_frame=stream_frame,
+            )
+            width, height = self._sizes[stream_uid]
+            images.append(
+                CocoImage(
+                    file_name=file_name,
+                    sequence=self.sequence,
+                    stream=stream_uid,
+                    frame=master,
+                    stream_frame=stream_frame,
+                    width=width,
+                    height=height,
+                    annotations=tuple(annotations.get(stream_uid, ())),
+                )
+            )
+        return images
+
+    def _annotations(self, frame: Frame) -> dict[StreamUid, list[CocoAnnotation]]:
+        annotations: dict[StreamUid, list[CocoAnnotation]] = {}
+        default_stream = self.streams[0] if len(self.streams) == 1 else None
+        for object_uid, object_in_frame in (frame.objects or {}).items():
+            category = self.object_types.get(str(object_uid))
+            if category is None:
+                continue
+            for stream_uid, (bbox, polygons) in self._labels(object_in_frame.object_data, default_stream).items():
+                annotations.setdefault(stream_uid, []).append(_annotation(category, str(object_uid), bbox, polygons))
+        return annotations
+
+    def _labels(
+        self, data: ObjectData, default_stream: Optional[StreamUid]
+    ) -> dict[StreamUid, tuple[Optional[TwoDBoundingBox], list[tuple[float, ...]]]]:
+        labels: dict[StreamUid, tuple[Optional[TwoDBoundingBox], list[tuple[float, ...]]]] = {}
+        for bbox in data.bbox or ():
+            stream_uid = self._stream_of(bbox, default_stream)
+            if stream_uid is not None and stream_uid not in labels:
+                labels[stream_uid] = (bbox, [])
+        for poly in data.poly2d or ():
+            stream_uid = self._stream_of(poly, default_stream)
+            polygon = _polygon(poly) if stream_uid is not None and poly.closed else None
+            if stream_uid is not None and polygon is not None:
+                labels.setdefault(stream_uid, (None, []))[1].append(polygon)
+        return labels
+
+    def _stream_of(self, data: Union[TwoDBoundingBox, Poly2D], default_stream: Optional[StreamUid]) -> Optional[StreamUid]:
+        if self.data_names is not None and data.name not in self.data_names:
+            return None
+        if data.coordinate_system is None:
+            return default_stream
+        return data.coordinate_system if data.coordinate_system in self._uris else None
+
+
+class CocoWriter:
+    """
+    Writes a COCO JSON file incrementally. The images are written as they are added, the annotations are buffered
+    in a temporary file until the writer is closed, so neither needs to be held in memory.
+
+    Annotations of categories without an ID in categories are skipped. Image and annotation IDs count up from 1.
+    """
+
+    def __init__(self, target: Source, categories: Mapping[str, int], info: Optional[Mapping[str, Any]] = None):
+        self.categories = dict(categories)
+        self.num_images = 0
+        self.num_annotations = 0
+        self.num_skipped = 0
+        if isinstance(target, (str, os.PathLike)):
+            self._file: TextIO = open(target, "w", encoding="utf-8")
+            self._owns_file = True
+        else:
+            self._file = target
+            self._owns_file = False
+        self._annotations = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self._file.write("{")
+        if info is not None:
+            self._file.write(f'"info": {json.dumps(info)}, ')
+        self._file.write('"images": [')
+        self._closed = False
+
+    def add_image(self, image: CocoImage) -> int:
+        """Writes an image with its annotations and returns its ID."""
+        if self._closed:
+            raise ValueError("The COCO writer is closed")
+        self.num_images += 1
+        self._file.write((",\n" if self.num_images > 1 else "\n") + json.dumps(image.to_coco(self.num_images)))
+        for annotation in image.annotations:
+            category_id = self.categories.get(annotation.category)
+            if category_id is None:
+                self.num_skipped += 1
+                continue
+            self.num_annotations += 1
+            coco = annotation.to_coco(self.num_annotations, self.num_images, category_id)
+            self._annotations.write(json.dumps(coco) + "\n")
+        return self.num_images
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._file.write('\n], "annotations": [')
+        self._annotations.seek(0)
+        for index, line in enumerate(self._annotations):
+            self._file.write((",\n" if index else "\n") + line.rstrip("\n"))
+        self._annotations.close()
+        categories = [{"id": category_id, "name": name} for name, category_id in sorted(self.categories.items(), key=_by_id)]
+        self._file.write(f'\n], "categories": {json.dumps(categories)}}}\n')
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> "CocoWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def coco_images(
+    source: Source,
+    sequence: Optional[str] = None,
+    streams: Optional[Iterable[StreamUid]] = None,
+    file_name_template: str = DEFAULT_FILE_NAME_TEMPLATE,
+    data_names: Optional[Collection[str]] = None,
+) -> Iterator[CocoImage]:
+    """
+    The COCO images of an OpenLABEL JSON document, read frame by frame, see CocoExporter.
+    The sequence is named after the file unless given.
+    """
+    reader = OpenLabelReader(source)
+    if sequence is None:
+        sequence = _sequence_name(source)
+    exporter = CocoExporter(reader.header(), sequence, streams, file_name_template, data_names)
+    for frame_uid, frame in reader.frames():
+        yield from exporter.add_frame(frame_uid, frame)
+
+
+def export_coco(
+    sources: Iterable[Union[str, "os.PathLike[str]"]],
+    target: Source,
+    categories: Optional[Mapping[str, int]] = None,
+    workers: Optional[int] = None,
+    streams: Optional[Iterable[StreamUid]] = None,
+    file_name_template: str = DEFAULT_FILE_NAME_TEMPLATE,
+    data_names: Optional[Collection[str]] = None,
+) -> dict[str, int]:
+    """
+    Exports the 2D labels of many OpenLABEL JSON files into one COCO JSON file and returns the category IDs.
+
+    The files are converted by coco_images in a pool of worker processes, each into a temporary file of one image per
+    line, which are then concatenated in the order of the sources. With workers=1 the files are converted in this process.
+    By default, there is one worker per CPU. Each sequence is named after the stem of its file.
+
+    Without categories, the object types found are numbered from 1 in alphabetical order. Otherwise, annotations of
+    object types not in categories are skipped.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        parts = [(Path(source), Path(directory) / f"{index}.jsonl") for index, source in enumerate(sources)]
+        export = partial(
+            _export_part,
+            streams=None if streams is None else list(streams),
+            file_name_template=file_name_template,
+            data_names=None if data_names is None else list(data_names),
+        )
+        if workers == 1 or len(parts) <= 1:
+            found = [export(part) for part in parts]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                found = list(pool.map(export, parts))
+        if categories is None:
+            categories = {name: index for index, name in enumerate(sorted(set().union(*found)), start=1)}
+
+        with CocoWriter(target, categories) as writer:
+            for _, part in parts:
+                with open(part, encoding="utf-8") as file:
+                    for line in file:
+                        writer.add_image(_image_from_dict(json.loads(line)))
+    return dict(categories)
+
+
+def _export_part(
+    paths: tuple[Path, Path],
+    streams: Optional[list[StreamUid]],
+    file_name_template: str,
+    data_names: Optional[list[str]],
+) -> set[str]:
+    source, part = paths
+    categories: set[str] = set()
+    with open(part, "w", encoding="utf-8") as file:
+        for image in coco_images(source, source.stem, streams, file_name_template, data_names):
+            categories.update(annotation.category for annotation in image.annotations)
+            file.write(json.dumps(asdict(image)) + "\n")
+    return categories
+
+
+def _image_from_dict(image: dict[str, Any]) -> CocoImage:
+    annotations = tuple(
+        CocoAnnotation(
+            category=annotation["category"],
+            object_uid=annotation["object_uid"],
+            bbox=tuple(annotation["bbox"]),
+            area=annotation["area"],
+            segmentation=tuple(tuple(polygon) for polygon in annotation["segmentation"]),
+        )
+        for annotation in image.pop("annotations")
+    )
+    return CocoImage(**image, annotations=annotations)
+
+
+def _annotation(
+    category: str, object_uid: str, bbox: Optional[TwoDBoundingBox], polygons: list[tuple[float, ...]]
+) -> CocoAnnotation:
+    if bbox is not None:
+        x, y, w, h = (float(value) for value in bbox.val)
+        coco_bbox = (x - w / 2, y - h / 2, w, h)
+    else:
+        xs = [x for polygon in polygons for x in polygon[0::2]]
+        ys = [y for polygon in polygons for y in polygon[1::2]]
+        coco_bbox = (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+    area = sum(_polygon_area(polygon) for polygon in polygons) if polygons else coco_bbox[2] * coco_bbox[3]
+    return CocoAnnotation(category, object_uid, coco_bbox, area, tuple(polygons))
+
+
+def _polygon(poly: Poly2D) -> Optional[tuple[float, ...]]:
+    """The flat x, y coordinates of the polyline, or None if it has less than three points."""
+    if poly.mode == Poly2DMode.Absolute or poly.mode == Poly2DMode.Relative:
+        values = [float(value) for value in poly.val]
+        if poly.mode == Poly2DMode.Relative:
+            values[2:] = [value + values[index % 2] for index, value in enumerate(values[2:])]
+    else:
+        try:
+            values = [float(value) for value in poly.points().ravel().tolist()]
+        except ImportError as e:
+            raise ImportError(f"Decoding {poly.mode.value} polylines requires the numpy extra of uai_openlabel") from e
+    return tuple(values) if len(values) >= 6 else None
+
+
+def _polygon_area(polygon: tuple[float, ...]) -> float:
+    xs, ys = polygon[0::2], polygon[1::2]
+    twice_area = sum(xs[i - 1] * ys[i] - xs[i] * ys[i - 1] for i in range(len(xs)))
+    return abs(twice_area) / 2
+
+
+def _uri(stream_uid: StreamUid, stream: Optional[Stream]) -> str:
+    return stream.uri if stream is not None and stream.uri is not None else stream_uid
+
+
+def _image_size(stream: Optional[Stream]) -> tuple[Optional[int], Optional[int]]:
+    properties = stream.stream_properties if stream is not None else None
+    intrinsics = getattr(properties, "intrinsics_pinhole", None) or getattr(properties, "intrinsics_fisheye", None)
+    if intrinsics is None:
+        return None, None
+    return int(intrinsics.width_px), int(intrinsics.height_px)
+
+
+def _sequence_name(source: Source) -> str:
+    if isinstance(source, (str, os.PathLike)):
+        return Path(source).stem
+    return str(getattr(source, "name", "<stream>"))
+
+
+def _by_id(item: tuple[str, int]) -> int:
+    return item[1]
@@ -30,6 +30,9 @@ from uai_openlabel.elements.object import ObjectInFrame
 # noinspection PyProtectedMember
 from uai_openlabel.elements.relation import Relation
 
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.spatial_index import CuboidSpatialIndex
+
 # noinspection PyProtectedMember
 from uai_openlabel.serializer import JsonSnakeCaseSerializableMixin
 
@@ -50,6 +53,9 @@ from uai_openlabel.types_and_constants import (
     StreamUid,
 )
 
+# noinspection PyProtectedMember
+from uai_openlabel.utils import CachedIndexMixin
+
 __all__: list[str] = []
 
 
@@ -64,7 +70,7 @@ T = TypeVar("T", bound="Frame")
 
 
 @dataclass
-class Frame(JsonSnakeCaseSerializableMixin):
+class Frame(JsonSnakeCaseSerializableMixin, CachedIndexMixin):
     """
     In case time-information is needed, for example, for labeling video sequences, the item frames contains a dictionary of containers at frame level.
 
@@ -74,6 +80,9 @@ class Frame(JsonSnakeCaseSerializableMixin):
     Only the dynamic information inside them is detailed.
     In addition, frame_properties may contain information about timestamping details,
     or transforms of specific coordinate systems and other stream properties.
+
+    Indices over the frame's content, such as cuboid_index(), are cached and dropped when a field is reassigned.
+    After modifying the objects in place, call invalidate_index_cache().
     """
 
     actions: Optional[Mapping[ActionUid, ActionInFrame]] = field(default=None)
@@ -85,6 +94,10 @@ class Frame(JsonSnakeCaseSerializableMixin):
         default=None
     )  # The spec doesn't specify this correctly, see 7.5. Is there sth like a RelationInFrame we should use here?
 
+    def cuboid_index(self) -> CuboidSpatialIndex:
+        """A spatial index over the cuboids of all objects in this frame."""
+        return self._cached_index("cuboids", lambda: CuboidSpatialIndex.from_objects(self.objects or {}))
+
     @classmethod
     def example(
         cls: type[T],
@@ -12,7 +12,9 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+from bisect import bisect_right
 from dataclasses import dataclass, field
+from typing import Iterable, Iterator
 
 from apischema.metadata import required
 
@@ -23,7 +25,7 @@ from uai_openlabel.serializer import JsonSnakeCaseSerializableMixin
 from uai_openlabel.types_and_constants import FrameUid
 
 # noinspection PyProtectedMember
-from uai_openlabel.utils import no_default
+from uai_openlabel.utils import frame_number, no_default
 
 __all__: list[str] = []
 
@@ -42,3 +44,128 @@ class FrameInterval(JsonSnakeCaseSerializableMixin):
         default_factory=lambda: no_default(field="FrameInterval.frame_end"),
         metadata=required,
     )
+
+    def contains(self, frame: FrameUid) -> bool:
+        return frame_number(self.frame_start) <= frame_number(frame) <= frame_number(self.frame_end)
+
+
+class FrameIntervalSet:
+    """
+    An immutable set of frames, stored as the minimal sorted list of disjoint, non-adjacent inclusive ranges.
+    Supports the set operators |, & and -, and membership tests in logarithmic time.
+    """
+
+    __slots__ = ("_ends", "_starts")
+
+    def __init__(self, ranges: Iterable[tuple[int, int]] = ()):
+        starts: list[int] = []
+        ends: list[int] = []
+        for start, end in sorted(r for r in ranges if r[0] <= r[1]):
+            if ends and start <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self._starts = tuple(starts)
+        self._ends = tuple(ends)
+
+    @classmethod
+    def from_intervals(cls, intervals: Iterable[FrameInterval]) -> "FrameIntervalSet":
+        return cls((frame_number(i.frame_start), frame_number(i.frame_end)) for i in intervals)
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[FrameUid]) -> "FrameIntervalSet":
+        return cls((n, n) for n in {frame_number(f) for f in frames})
+
+    @property
+    def ranges(self) -> tuple[tuple[int, int], ...]:
+        return tuple(zip(self._starts, self._ends))
+
+    def to_frame_intervals(self) -> list[FrameInterval]:
+        return [FrameInterval(frame_start=start, frame_end=end) for start, end in self.ranges]
+
+    def frames(self) -> Iterator[int]:
+        for start, end in self.ranges:
+            yield from range(start, end + 1)
+
+    def overlaps(self, start: FrameUid, end: FrameUid) -> bool:
+        """Whether any frame of the inclusive range [start, end] is in the set."""
+        position = bisect_right(self._starts, frame_number(end)) - 1
+        return position >= 0 and self._ends[position] >= frame_number(start)
+
+    def __contains__(self, frame: object) -> bool:
+        if not isinstance(frame, (int, str)):
+            return False
+        try:
+            number = frame_number(frame)  # type: ignore[arg-type]
+        except ValueError:
+            return False
+        return self.overlaps(number, number)
+
+    def __len__(self) -> int:
+        return sum(end - start + 1 for start, end in self.ranges)
+
+    def __bool__(self) -> bool:
+        return bool(self._starts)
+
+    def __iter__(self) -> Iterator[int]:
+        return self.frames()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FrameIntervalSet) and self.ranges == other.ranges
+
+    def __hash__(self) -> int:
+        return hash(self.ranges)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self.ranges)})"
+
+    def __or__(self, other: "FrameIntervalSet") -> "FrameIntervalSet":
+        return FrameIntervalSet(self.ranges + other.ranges)
+
+    def __and__(self, other: "FrameIntervalSet") -> "FrameIntervalSet":
+        result: list[tuple[int, int]] = []
+        i = j = 0
+        while i < len(self._starts) and j < len(other._starts):
+            start = max(self._starts[i], other._starts[j])
+            end = min(self._ends[i], other._ends[j])
+            if start <= end:
+                result.append((start, end))
+            if self._ends[i] < other._ends[j]:
+                i += 1
+            else:
+                j += 1
+        return FrameIntervalSet(result)
+
+    def __sub__(self, other: "FrameIntervalSet") -> "FrameIntervalSet":
+        result: list[tuple[int, int]] = []
+        j = 0
+        for start, end in self.ranges:
+            while j < len(other._ends) and other._ends[j] < start:
+                j += 1
+            k = j
+            while k < len(other._starts) and other._starts[k] <= end:
+                if other._starts[k] > start:
+                    result.append((start, other._starts[k] - 1))
+                start = max(start, other._ends[k] + 1)
+                k += 1
+            if start <= end:
+                result.append((start, end))
+        return FrameIntervalSet(result)
+
+    @property
+    def first(self) -> int:
+        if not self._starts:
+            raise ValueError("The frame interval set is empty")
+        return self._starts[0]
+
+    @property
+    def last(self) -> int:
+        if not self._ends:
+            raise ValueError("The frame interval set is empty")
+        return self._ends[-1]
+
+
+def normalize_frame_intervals(intervals: Iterable[FrameInterval]) -> list[FrameInterval]:
+    """Merges overlapping and adjacent frame intervals and sorts them."""
+    return FrameIntervalSet.from_intervals(intervals).to_frame_intervals()
@@ -0,0 +1,99 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Vectorized geometric computations on OpenLABEL data. This subpackage requires NumPy, see the numpy extra."""
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.bbox_2d import (
+    BoundingBox2DIndex,
+    IndexedBox2D,
+    OverlappingBoxes,
+    iou_matrix,
+    rotated_iou_matrix,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.chain_code import decode_poly2d, encode_poly2d
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.cuboids import (
+    cuboid_corners,
+    cuboid_iou_matrix,
+    cuboid_rotation_matrices,
+    cuboids_to_euler,
+    cuboids_to_quaternion,
+    euler_vals_to_quaternion_vals,
+    quaternion_vals_to_euler_vals,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.keyframes import CuboidKeyframes
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.projection import (
+    CameraProjector,
+    FisheyeCamera,
+    PinholeCamera,
+    ProjectedLabel,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.rotation import (
+    euler_zyx_from_quaternions,
+    euler_zyx_from_rotation_matrices,
+    quaternions_from_euler_zyx,
+    quaternions_from_rotation_matrices,
+    rotation_matrices_from_euler,
+    rotation_matrices_from_quaternions,
+    slerp_quaternions,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.trajectory import Trajectory, extract_trajectories
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.transform_graph import TransformGraph, transform_to_matrix
+
+__all__ = [
+    "BoundingBox2DIndex",
+    "IndexedBox2D",
+    "OverlappingBoxes",
+    "iou_matrix",
+    "rotated_iou_matrix",
+    "Trajectory",
+    "extract_trajectories",
+    "TransformGraph",
+    "transform_to_matrix",
+    "euler_zyx_from_quaternions",
+    "euler_zyx_from_rotation_matrices",
+    "quaternions_from_euler_zyx",
+    "quaternions_from_rotation_matrices",
+    "rotation_matrices_from_euler",
+    "rotation_matrices_from_quaternions",
+    "cuboid_corners",
+    "cuboid_iou_matrix",
+    "cuboid_rotation_matrices",
+    "cuboids_to_euler",
+    "cuboids_to_quaternion",
+    "euler_vals_to_quaternion_vals",
+    "quaternion_vals_to_euler_vals",
+    "CameraProjector",
+    "FisheyeCamera",
+    "PinholeCamera",
+    "ProjectedLabel",
+    "decode_poly2d",
+    "encode_poly2d",
+    "slerp_quaternions",
+    "CuboidKeyframes",
+]
@@ -0,0 +1,280 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.geometric_data import (
+    RotatedTwoDBoundingBox,
+    TwoDBoundingBox,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import CoordinateSystemUid, ObjectUid
+
+__all__: list[str] = []
+
+
+FloatArray = npt.NDArray[np.float64]
+Box2D = Union[TwoDBoundingBox, RotatedTwoDBoundingBox]
+
+
+def iou_matrix(boxes_a: npt.ArrayLike, boxes_b: npt.ArrayLike) -> FloatArray:
+    """
+    IoU of every box in boxes_a with every box in boxes_b, for axis-aligned boxes given as rows of (x, y, w, h)
+    with x, y being the center, as in TwoDBoundingBox.val. Returns an array of shape (len(boxes_a), len(boxes_b)).
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    a_min, a_max = a[:, None, :2] - a[:, None, 2:] / 2, a[:, None, :2] + a[:, None, 2:] / 2
+    b_min, b_max = b[None, :, :2] - b[None, :, 2:] / 2, b[None, :, :2] + b[None, :, 2:] / 2
+
+    overlap = np.clip(np.minimum(a_max, b_max) - np.maximum(a_min, b_min), 0.0, None)
+    intersection = overlap[..., 0] * overlap[..., 1]
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - intersection
+    iou: FloatArray = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+    return iou
+
+
+def rotated_iou_matrix(boxes_a: npt.ArrayLike, boxes_b: npt.ArrayLike) -> FloatArray:
+    """
+    IoU of every box in boxes_a with every box in boxes_b, for rotated boxes given as rows of (x, y, w, h, alpha)
+    as in RotatedTwoDBoundingBox.val. Returns an array of shape (len(boxes_a), len(boxes_b)).
+
+    Pairs whose enclosing axis-aligned boxes don't overlap are discarded in a vectorized way,
+    the exact intersections of the remaining pairs are clipped all at once, looping only over the four box edges.
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 5)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 5)
+    a_min, a_max = _rotated_extents(a)
+    b_min, b_max = _rotated_extents(b)
+
+    candidates = np.all(
+        (a_max[:, None, :] >= b_min[None, :, :]) & (a_min[:, None, :] <= b_max[None, :, :]),
+        axis=2,
+    )
+    rows, cols = np.nonzero(candidates)
+
+    result = np.zeros((len(a), len(b)), dtype=np.float64)
+    result[rows, cols] = _pairwise_rotated_iou(a[rows], b[cols])
+    return result
+
+
+@dataclass(frozen=True)
+class IndexedBox2D:
+    """A 2D box of an object in a frame, with val in the rotated form (x, y, w, h, alpha)."""
+
+    object_uid: ObjectUid
+    box: Box2D
+    val: tuple[float, float, float, float, float]
+
+
+@dataclass(frozen=True)
+class OverlappingBoxes:
+    first: IndexedBox2D
+    second: IndexedBox2D
+    iou: float
+
+
+class BoundingBox2DIndex:
+    """
+    Index over the TwoDBoundingBox and RotatedTwoDBoundingBox data of one frame in one coordinate system,
+    e.g. the image of one camera stream.
+
+    Overlapping pairs are found with a sweep line over the x-extents of the boxes, so the IoU is only computed for
+    pairs that can overlap at all. Axis-aligned pairs are computed vectorized, rotated ones via polygon clipping.
+    """
+
+    def __init__(self, boxes: Sequence[IndexedBox2D]):
+        self.boxes: tuple[IndexedBox2D, ...] = tuple(boxes)
+        self._vals = np.array([b.val for b in self.boxes], dtype=np.float64).reshape(-1, 5)
+        self._box_mins, self._box_maxs = _rotated_extents(self._vals)
+
+    @classmethod
+    def from_frame(cls, frame: Frame, coordinate_system: Optional[CoordinateSystemUid]) -> "BoundingBox2DIndex":
+        """
+        Indexes the boxes of all objects in the frame whose coordinate_system matches.
+        Use None to index the boxes without coordinate system.
+        """
+        boxes: list[IndexedBox2D] = []
+        for object_uid, object_in_frame in (frame.objects or {}).items():
+            object_data = object_in_frame.object_data
+            object_boxes: list[Box2D] = [*(object_data.bbox or ()), *(object_data.rbbox or ())]
+            for box in object_boxes:
+                if box.coordinate_system == coordinate_system:
+                    boxes.append(IndexedBox2D(object_uid=object_uid, box=box, val=_as_rotated_val(box)))
+        return cls(boxes)
+
+    @classmethod
+    def for_frame(cls, frame: Frame, coordinate_system: Optional[CoordinateSystemUid]) -> "BoundingBox2DIndex":
+        """Same as from_frame, but the index is cached on the frame until it is modified, see Frame.cuboid_index."""
+        # noinspection PyProtectedMember
+        return frame._cached_index(f"bbox_2d:{coordinate_system}", lambda: cls.from_frame(frame, coordinate_system))
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def overlapping_pairs(self, min_iou: float = 0.0) -> list[OverlappingBoxes]:
+        """All pairs of boxes with an IoU greater than min_iou, e.g. for duplicate detection."""
+        first, second = self._candidate_pairs()
+        if len(first) == 0:
+            return []
+        ious = _pairwise_rotated_iou(self._vals[first], self._vals[second])
+        keep = np.nonzero(ious > min_iou)[0]
+        return [OverlappingBoxes(self.boxes[first[k]], self.boxes[second[k]], float(ious[k])) for k in keep]
+
+    def iou_with(self, val: Sequence[float]) -> FloatArray:
+        """IoU of every indexed box with a box given as (x, y, w, h) or (x, y, w, h, alpha)."""
+        query = np.zeros((1, 5), dtype=np.float64)
+        query[0, : len(val)] = val
+        return rotated_iou_matrix(self._vals, query)[:, 0]
+
+    def intersecting_region(self, x_min: float, y_min: float, x_max: float, y_max: float) -> list[IndexedBox2D]:
+        """All boxes whose enclosing axis-aligned box intersects the region."""
+        mask = (
+            (self._box_maxs[:, 0] >= x_min)
+            & (self._box_mins[:, 0] <= x_max)
+            & (self._box_maxs[:, 1] >= y_min)
+            & (self._box_mins[:, 1] <= y_max)
+        )
+        return [self.boxes[i] for i in np.nonzero(mask)[0]]
+
+    def _candidate_pairs(self) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+        """Sweep line over the x-extents: after sorting by x_min, box i can only overlap the boxes that start before it ends."""
+        order = np.argsort(self._box_mins[:, 0], kind="stable")
+        x_mins = self._box_mins[order, 0]
+        ends = np.searchsorted(x_mins, self._box_maxs[order, 0], side="right")
+        starts = np.arange(1, len(order) + 1)
+        counts = np.maximum(ends - starts, 0)
+
+        first = np.repeat(np.arange(len(order)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = first + 1 + offsets
+        first, second = order[first], order[second]
+
+        overlaps_in_y = (self._box_maxs[first, 1] >= self._box_mins[second, 1]) & (
+            self._box_mins[first, 1] <= self._box_maxs[second, 1]
+        )
+        first, second = first[overlaps_in_y], second[overlaps_in_y]
+        first, second = np.minimum(first, second), np.maximum(first, second)
+        by_index = np.lexsort((second, first))
+        return first[by_index], second[by_index]
+
+
+def _as_rotated_val(box: Box2D) -> tuple[float, float, float, float, float]:
+    if isinstance(box, RotatedTwoDBoundingBox):
+        x, y, w, h, alpha = box.val
+        return float(x), float(y), float(w), float(h), float(alpha)
+    x, y, w, h = box.val
+    return float(x), float(y), float(w), float(h), 0.0
+
+
+def _rotated_extents(boxes: FloatArray) -> tuple[FloatArray, FloatArray]:
+    """Corners of the axis-aligned boxes enclosing rotated boxes given as rows of (x, y, w, h, alpha)."""
+    cos, sin = np.abs(np.cos(boxes[:, 4])), np.abs(np.sin(boxes[:, 4]))
+    half_x = (boxes[:, 2] * cos + boxes[:, 3] * sin) / 2
+    half_y = (boxes[:, 2] * sin + boxes[:, 3] * cos) / 2
+    half = np.stack([half_x, half_y], axis=1)
+    return boxes[:, :2] - half, boxes[:, :2] + half
+
+
+def _pairwise_rotated_iou(a: FloatArray, b: FloatArray) -> FloatArray:
+    """IoU of a[i] with b[i] for rotated boxes given as rows of (x, y, w, h, alpha)."""
+    result = np.zeros(len(a), dtype=np.float64)
+
+    axis_aligned = (a[:, 4] == 0) & (b[:, 4] == 0)
+    if np.any(axis_aligned):
+        aa, bb = a[axis_aligned], b[axis_aligned]
+        overlap = np.clip(
+            np.minimum(aa[:, :2] + aa[:, 2:4] / 2, bb[:, :2] + bb[:, 2:4] / 2)
+            - np.maximum(aa[:, :2] - aa[:, 2:4] / 2, bb[:, :2] - bb[:, 2:4] / 2),
+            0.0,
+            None,
+        )
+        intersection = overlap[:, 0] * overlap[:, 1]
+        union = aa[:, 2] * aa[:, 3] + bb[:, 2] * bb[:, 3] - intersection
+        result[axis_aligned] = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+    rotated = ~axis_aligned
+    if np.any(rotated):
+        ra, rb = a[rotated], b[rotated]
+        polygons, counts = _clip_convex(_corners(ra), np.full(len(ra), 4), _corners(rb))
+        intersection = _polygon_areas(polygons, counts)
+        union = ra[:, 2] * ra[:, 3] + rb[:, 2] * rb[:, 3] - intersection
+        result[rotated] = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+    return result
+
+
+def _corners(boxes: FloatArray) -> FloatArray:
+    """Counter-clockwise corners of rotated boxes, shape (n, 4, 2)."""
+    cos, sin = np.cos(boxes[:, 4]), np.sin(boxes[:, 4])
+    local = np.array([[-0.5, -0.5], [0.5, -0.5], [0.5, 0.5], [-0.5, 0.5]])
+    x = local[None, :, 0] * boxes[:, 2, None]
+    y = local[None, :, 1] * boxes[:, 3, None]
+    corners_x = boxes[:, 0, None] + x * cos[:, None] - y * sin[:, None]
+    corners_y = boxes[:, 1, None] + x * sin[:, None] + y * cos[:, None]
+    return np.stack([corners_x, corners_y], axis=2)
+
+
+def _clip_convex(
+    subject: FloatArray, counts: npt.NDArray[np.intp], clip: FloatArray
+) -> tuple[FloatArray, npt.NDArray[np.intp]]:
+    """
+    Sutherland-Hodgman clipping of convex polygons by counter-clockwise convex polygons, vectorized over pairs.
+    Row i of subject, shape (n, m, 2), holds a polygon in its first counts[i] vertices and is clipped by clip[i].
+    Returns the clipped polygons in the same layout.
+    """
+    n = len(subject)
+    for i in range(clip.shape[1]):
+        start, end = clip[:, i, None, :], clip[:, (i + 1) % clip.shape[1], None, :]
+        positions = np.arange(subject.shape[1])[None, :]
+        valid = positions < counts[:, None]
+        previous_index = np.where(positions == 0, counts[:, None] - 1, positions - 1).clip(0)
+
+        side = (end[..., 0] - start[..., 0]) * (subject[..., 1] - start[..., 1]) - (end[..., 1] - start[..., 1]) * (
+            subject[..., 0] - start[..., 0]
+        )
+        side_previous = np.take_along_axis(side, previous_index, axis=1)
+        previous = np.take_along_axis(subject, previous_index[..., None], axis=1)
+        inside = side >= 0
+        crossing = valid & (inside != (side_previous >= 0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(crossing, side_previous / np.where(crossing, side_previous - side, 1.0), 0.0)
+        intersection = previous + t[..., None] * (subject - previous)
+
+        # Each vertex emits the intersection with the clip edge when entering or leaving, then itself when inside.
+        candidates = np.stack([intersection, subject], axis=2).reshape(n, -1, 2)
+        emitted = np.stack([crossing, valid & inside], axis=2).reshape(n, -1)
+        order = np.argsort(~emitted, axis=1, kind="stable")
+        counts = emitted.sum(axis=1)
+        width = max(int(counts.max(initial=0)), 1)
+        subject = np.take_along_axis(candidates, order[:, :width, None], axis=1)
+    return subject, counts
+
+
+def _polygon_areas(polygons: FloatArray, counts: npt.NDArray[np.intp]) -> FloatArray:
+    """Shoelace areas of polygons in the layout of _clip_convex."""
+    positions = np.arange(polygons.shape[1])[None, :]
+    next_index = np.where(positions + 1 >= counts[:, None], 0, positions + 1)
+    following = np.take_along_axis(polygons, next_index[..., None], axis=1)
+    cross = polygons[..., 0] * following[..., 1] - following[..., 0] * polygons[..., 1]
+    area: FloatArray = np.abs(np.where(positions < counts[:, None], cross, 0.0).sum(axis=1)) / 2
+    return area
@@ -0,0 +1,261 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Encoding and decoding of the Poly2D modes, see uai_openlabel.data_types.Poly2DMode.
+
+The chain-code modes follow the reference implementation of the ASAM OpenLABEL standard in the VCD library
+(vcd.poly2d). A polyline on the integer pixel grid is stored as its first point and one symbol per step, relative to the
+direction of the previous step, which is initially 2, i.e. down:
+
+ - 0 steps straight on, 1 and 2 turn by +45° and -45°, 3 and 4 by +90° and -90° before stepping.
+ - 5 reverses the direction without stepping. It is followed by 2 (+135°), 1 (-135°) or 0 (180°).
+ - 6 and 7 stand for runs of low and high straight steps.
+
+The Freeman directions 0 to 7 are the steps (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1) and (1, -1).
+Two 3 bit symbols are packed into one base64 character, the first in the high bits, and an odd number of symbols
+is padded with a 0. The val of the modes, all as strings, is
+
+ - "MODE_POLY2D_SRF6DCC": [xinit, yinit, rest, payload] with low = 3 and high = 15,
+ - "MODE_POLY2D_RS6FCC": [xinit, yinit, low, high, rest, payload], with low and high chosen for the polyline,
+   or -1 if unused,
+
+where rest is the number of padding symbols. Straight segments longer than one pixel, e.g. the vertices of a simplified
+contour, are rasterized before encoding, so decoding yields every pixel of the outline.
+"""
+
+from typing import Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.geometric_data import Poly2DMode
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.bbox_2d import FloatArray
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import Number
+
+__all__: list[str] = []
+
+
+IntArray = npt.NDArray[np.int64]
+Poly2DVal = Union[Sequence[Number], Sequence[str]]
+
+_BASE64 = np.frombuffer(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/", dtype=np.uint8)
+_BASE64_VALUES = np.full(256, -1, dtype=np.int64)
+_BASE64_VALUES[_BASE64] = np.arange(64)
+
+_FREEMAN_STEPS = np.array([[1, 0], [1, 1], [0, 1], [-1, 1], [-1, 0], [-1, -1], [0, -1], [1, -1]], dtype=np.int64)
+_FREEMAN_CODES = np.full(9, -1, dtype=np.int64)
+_FREEMAN_CODES[(_FREEMAN_STEPS[:, 0] + 1) * 3 + _FREEMAN_STEPS[:, 1] + 1] = np.arange(8)
+
+_INITIAL_DIRECTION = 2
+_REVERSE = 5
+_LOW_RUN = 6
+_HIGH_RUN = 7
+_SRF6DCC_LOW = 3
+_SRF6DCC_HIGH = 15
+# Direction change modulo 8 -> (symbol, symbol after the reversal or -1)
+_TURN_SYMBOLS = np.array(
+    [[0, -1], [1, -1], [3, -1], [_REVERSE, 2], [_REVERSE, 0], [_REVERSE, 1], [4, -1], [2, -1]], dtype=np.int64
+)
+# Symbol 0 to 5 -> direction change modulo 8
+_SYMBOL_TURNS = np.array([0, 1, 7, 2, 6, 4], dtype=np.int64)
+# At most this many of the most frequent run lengths are tried as low and high of RS6FCC
+_MAX_RUN_CANDIDATES = 64
+
+
+def encode_poly2d(points: npt.ArrayLike, mode: Poly2DMode) -> Poly2DVal:
+    """
+    The val of a Poly2D with the given mode through the (n, 2) points.
+    The chain-code modes require integer points and raise a ValueError otherwise.
+    """
+    points = np.asarray(points)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError(f"Expected points of shape (n, 2), got {points.shape}")
+    if mode is Poly2DMode.Absolute:
+        return tuple(points.ravel().tolist())
+    if mode is Poly2DMode.Relative:
+        if len(points) == 0:
+            return ()
+        relative = points.copy()
+        relative[1:] -= points[0]
+        return tuple(relative.ravel().tolist())
+
+    if len(points) == 0:
+        raise ValueError(f"{mode.value} requires at least one point")
+    if not np.issubdtype(points.dtype, np.integer):
+        if not np.all(np.isfinite(points)) or np.any(points != np.round(points)):
+            raise ValueError(f"{mode.value} requires points on the integer pixel grid")
+    pixels = _rasterize(points.astype(np.int64))
+    steps = np.diff(pixels, axis=0)
+    directions = _FREEMAN_CODES[(steps[:, 0] + 1) * 3 + steps[:, 1] + 1]
+    symbols = _turn_symbols(directions)
+    start = (str(pixels[0, 0]), str(pixels[0, 1]))
+
+    if mode is Poly2DMode.SRF6DCC:
+        payload, rest = _pack(_simplify_runs(symbols, _SRF6DCC_LOW, _SRF6DCC_HIGH))
+        return (*start, str(rest), payload)
+    if mode is Poly2DMode.RS6FCC:
+        low, high = _run_lengths(symbols)
+        payload, rest = _pack(_simplify_runs(symbols, low, high))
+        return (*start, str(low), str(high), str(rest), payload)
+    raise ValueError(f"Unsupported Poly2D mode {mode}")
+
+
+def decode_poly2d(val: Poly2DVal, mode: Poly2DMode) -> Union[FloatArray, IntArray]:
+    """
+    The (n, 2) points of a Poly2D val with the given mode.
+    The chain-code modes decode to integer points, one per pixel of the outline.
+    """
+    if mode is Poly2DMode.Absolute or mode is Poly2DMode.Relative:
+        if len(val) % 2 != 0:
+            raise ValueError(f"{mode.value} requires an even number of values, got {len(val)}")
+        points = np.asarray(val, dtype=np.float64).reshape(-1, 2)
+        if mode is Poly2DMode.Relative and len(points) > 1:
+            points[1:] += points[0]
+        return points
+
+    if mode is Poly2DMode.SRF6DCC:
+        if len(val) != 4:
+            raise ValueError(f"{mode.value} requires [xinit, yinit, rest, payload], got {len(val)} values")
+        x0, y0, rest, payload = val
+        low, high = _SRF6DCC_LOW, _SRF6DCC_HIGH
+    elif mode is Poly2DMode.RS6FCC:
+        if len(val) != 6:
+            raise ValueError(f"{mode.value} requires [xinit, yinit, low, high, rest, payload], got {len(val)} values")
+        x0, y0, low_value, high_value, rest, payload = val
+        low, high = int(low_value), int(high_value)
+    else:
+        raise ValueError(f"Unsupported Poly2D mode {mode}")
+
+    symbols = _expand_runs(_unpack(str(payload), int(rest)), low, high)
+    turns = _SYMBOL_TURNS[symbols]
+    directions = (_INITIAL_DIRECTION + np.cumsum(turns)) % 8
+    directions = directions[symbols != _REVERSE]
+    points = np.empty((len(directions) + 1, 2), dtype=np.int64)
+    points[0] = int(x0), int(y0)
+    np.cumsum(_FREEMAN_STEPS[directions], axis=0, out=points[1:])
+    points[1:] += points[0]
+    return points
+
+
+def _rasterize(points: IntArray) -> IntArray:
+    """Insert the pixels between consecutive points, so that every step moves by at most one pixel per axis."""
+    deltas = np.diff(points, axis=0)
+    counts = np.abs(deltas).max(axis=1)
+    # Repeated points add no step
+    segments = np.flatnonzero(counts)
+    deltas, counts = deltas[segments], counts[segments]
+    starts = points[segments]
+    segment_of_step = np.repeat(np.arange(len(counts)), counts)
+    step_in_segment = np.arange(len(segment_of_step)) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    # Round half away from the start of the segment, symmetric for both signs of the delta
+    numerator = 2 * step_in_segment[:, None] * deltas[segment_of_step]
+    denominator = 2 * counts[segment_of_step, None]
+    offsets = np.sign(numerator) * ((np.abs(numerator) + denominator // 2) // denominator)
+    rasterized = np.empty((len(segment_of_step) + 1, 2), dtype=np.int64)
+    rasterized[0] = points[0]
+    rasterized[1:] = starts[segment_of_step] + offsets
+    return rasterized
+
+
+def _turn_symbols(directions: IntArray) -> IntArray:
+    """The symbols of the direction changes between consecutive Freeman directions, with reversals."""
+    pairs: IntArray = _TURN_SYMBOLS[np.diff(directions, prepend=_INITIAL_DIRECTION) % 8]
+    return pairs[pairs >= 0]
+
+
+def _zero_runs(symbols: IntArray) -> tuple[IntArray, IntArray]:
+    """The start and length of every run of straight steps."""
+    is_zero = np.concatenate(([False], symbols == 0, [False]))
+    edges = np.flatnonzero(np.diff(is_zero.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    return starts, ends - starts
+
+
+def _simplify_runs(symbols: IntArray, low: int, high: int) -> IntArray:
+    """Replaces every run of at least low straight steps by its high runs, low runs and remaining straight steps."""
+    if low < 1:
+        return symbols
+    starts, lengths = _zero_runs(symbols)
+    keep = lengths >= low
+    starts, lengths = starts[keep], lengths[keep]
+    n_high = lengths // high if high >= 1 else np.zeros_like(lengths)
+    remainder = lengths - n_high * max(high, 0)
+    n_low, n_straight = remainder // low, remainder % low
+
+    boundaries = np.zeros(len(symbols) + 1, dtype=np.int64)
+    np.add.at(boundaries, starts, 1)
+    np.add.at(boundaries, starts + lengths, -1)
+    outside = np.cumsum(boundaries)[:-1] == 0
+    run_counts = np.column_stack((n_high, n_low, n_straight)).ravel()
+    run_symbols = np.repeat(np.tile([_HIGH_RUN, _LOW_RUN, 0], len(starts)), run_counts)
+    # The replacement of a run takes the place of its first symbol, which is not kept itself
+    positions = np.concatenate((np.flatnonzero(outside), np.repeat(starts, n_high + n_low + n_straight)))
+    simplified: IntArray = np.concatenate((symbols[outside], run_symbols))[np.argsort(positions, kind="stable")]
+    return simplified
+
+
+def _run_lengths(symbols: IntArray) -> tuple[int, int]:
+    """The low and high run lengths giving the fewest symbols, or -1 if unused."""
+    _, lengths = _zero_runs(symbols)
+    distinct, frequencies = np.unique(lengths[lengths > 1], return_counts=True)
+    if len(distinct) == 0:
+        return -1, -1
+    if len(distinct) == 1:
+        return int(distinct[0]), -1
+    candidates = distinct[np.argsort(-frequencies, kind="stable")[:_MAX_RUN_CANDIDATES]]
+    low, high = candidates[:, None, None], candidates[None, :, None]
+    n_high = distinct // high
+    remainder = distinct % high
+    costs = ((n_high + remainder // low + remainder % low) * frequencies).sum(axis=2)
+    # Only pairs with a high run longer than the low run
+    costs = np.where(high[:, :, 0] > low[:, :, 0], costs, np.iinfo(np.int64).max)
+    best_low, best_high = np.unravel_index(np.argmin(costs), costs.shape)
+    return int(candidates[best_low]), int(candidates[best_high])
+
+
+def _expand_runs(symbols: IntArray, low: int, high: int) -> IntArray:
+    counts = np.ones(len(symbols), dtype=np.int64)
+    for symbol, run in ((_LOW_RUN, low), (_HIGH_RUN, high)):
+        is_run = symbols == symbol
+        if np.any(is_run) and run < 1:
+            raise ValueError(f"Chain code contains the run symbol {symbol}, but its run length is {run}")
+        counts[is_run] = run
+    return np.repeat(np.where(symbols >= _LOW_RUN, 0, symbols), counts)
+
+
+def _pack(symbols: IntArray) -> tuple[str, int]:
+    rest = len(symbols) % 2
+    if rest:
+        symbols = np.append(symbols, 0)
+    pairs = symbols.reshape(-1, 2)
+    return str(_BASE64[pairs[:, 0] * 8 + pairs[:, 1]].tobytes().decode("ascii")), rest
+
+
+def _unpack(payload: str, rest: int) -> IntArray:
+    try:
+        raw = np.frombuffer(payload.encode("ascii"), dtype=np.uint8)
+    except UnicodeEncodeError as e:
+        raise ValueError("Chain code payload is not base64") from e
+    values = _BASE64_VALUES[raw]
+    if np.any(values < 0):
+        raise ValueError("Chain code payload is not base64")
+    symbols = np.column_stack((values // 8, values % 8)).ravel()
+    if not 0 <= rest <= len(symbols):
+        raise ValueError(f"Invalid number of padding symbols {rest}")
+    return symbols[: len(symbols) - rest]
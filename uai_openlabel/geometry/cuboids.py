@@ -0,0 +1,195 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import itertools
+from typing import Iterator, Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.geometric_data import (
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.object import ObjectData
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.bbox_2d import FloatArray, rotated_iou_matrix
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.rotation import (
+    euler_zyx_from_quaternions,
+    quaternions_from_euler_zyx,
+    rotation_matrices_from_euler,
+    rotation_matrices_from_quaternions,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.openlabel import OpenLabel
+
+__all__: list[str] = []
+
+
+Cuboid = Union[ThreeDBoundingBoxEuler, ThreeDBoundingBoxQuaternion]
+
+_CORNER_SIGNS = np.array(list(itertools.product((-1.0, 1.0), repeat=3)))
+
+
+def euler_vals_to_quaternion_vals(vals: npt.ArrayLike) -> FloatArray:
+    """
+    Converts rows of ThreeDBoundingBoxEuler.val (x, y, z, rx, ry, rz, sx, sy, sz) to rows of
+    ThreeDBoundingBoxQuaternion.val (x, y, z, qx, qy, qz, qw, sx, sy, sz), using the ZYX convention.
+    """
+    v = np.asarray(vals, dtype=np.float64).reshape(-1, 9)
+    converted = np.empty((len(v), 10), dtype=np.float64)
+    converted[:, 0:3] = v[:, 0:3]
+    # Cuboids store (roll, pitch, yaw), the rotation functions expect the angles in the order of the sequence
+    converted[:, 3:7] = quaternions_from_euler_zyx(v[:, 5:2:-1])
+    converted[:, 7:10] = v[:, 6:9]
+    return converted
+
+
+def quaternion_vals_to_euler_vals(vals: npt.ArrayLike) -> FloatArray:
+    """The inverse of euler_vals_to_quaternion_vals. The quaternions may be in non-unit form."""
+    v = np.asarray(vals, dtype=np.float64).reshape(-1, 10)
+    converted = np.empty((len(v), 9), dtype=np.float64)
+    converted[:, 0:3] = v[:, 0:3]
+    converted[:, 3:6] = euler_zyx_from_quaternions(v[:, 3:7])[:, ::-1]
+    converted[:, 6:9] = v[:, 7:10]
+    return converted
+
+
+def cuboids_to_quaternion(openlabel: OpenLabel) -> int:
+    """
+    Replaces all ThreeDBoundingBoxEuler in the object data of the OpenLabel, static and in frames,
+    by the equivalent ThreeDBoundingBoxQuaternion. The values of all cuboids are converted at once.
+    Returns the number of converted cuboids.
+    """
+    return _convert_cuboids(openlabel, to_quaternion=True)
+
+
+def cuboids_to_euler(openlabel: OpenLabel) -> int:
+    """Same as cuboids_to_quaternion, the other way round."""
+    return _convert_cuboids(openlabel, to_quaternion=False)
+
+
+def _convert_cuboids(openlabel: OpenLabel, to_quaternion: bool) -> int:
+    source_type = ThreeDBoundingBoxEuler if to_quaternion else ThreeDBoundingBoxQuaternion
+    containers = [
+        object_data
+        for object_data in _iter_object_data(openlabel)
+        if object_data.cuboid and any(isinstance(cuboid, source_type) for cuboid in object_data.cuboid)
+    ]
+    sources = [cuboid for object_data in containers for cuboid in object_data.cuboid or () if isinstance(cuboid, source_type)]
+    if not sources:
+        return 0
+
+    vals = np.array([cuboid.val for cuboid in sources], dtype=np.float64)
+    converted_vals = euler_vals_to_quaternion_vals(vals) if to_quaternion else quaternion_vals_to_euler_vals(vals)
+    converted: Iterator[Cuboid] = (
+        (ThreeDBoundingBoxQuaternion if to_quaternion else ThreeDBoundingBoxEuler)(
+            val=tuple(val),
+            name=cuboid.name,
+            attributes=cuboid.attributes,
+            coordinate_system=cuboid.coordinate_system,
+        )
+        for cuboid, val in zip(sources, converted_vals.tolist())
+    )
+
+    for object_data in containers:
+        object_data.cuboid = [
+            next(converted) if isinstance(cuboid, source_type) else cuboid for cuboid in object_data.cuboid or ()
+        ]
+    for frame in (openlabel.frames or {}).values():
+        # Frames cache indices over the cuboids of their objects
+        frame.invalidate_index_cache()
+    return len(sources)
+
+
+def _iter_object_data(openlabel: OpenLabel) -> Iterator[ObjectData]:
+    for obj in (openlabel.objects or {}).values():
+        if obj.object_data is not None:
+            yield obj.object_data
+    for frame in (openlabel.frames or {}).values():
+        for object_in_frame in (frame.objects or {}).values():
+            yield object_in_frame.object_data
+
+
+def cuboid_rotation_matrices(cuboids: Sequence[Cuboid]) -> FloatArray:
+    """The rotation matrices of Euler and quaternion cuboids, of shape (n, 3, 3)."""
+    rotations = np.empty((len(cuboids), 3, 3), dtype=np.float64)
+    euler = np.array([isinstance(cuboid, ThreeDBoundingBoxEuler) for cuboid in cuboids], dtype=bool)
+    if euler.any():
+        # Cuboids store (roll, pitch, yaw), the rotation functions expect the angles in the order of the sequence
+        angles = [cuboid.val[5:2:-1] for cuboid in cuboids if isinstance(cuboid, ThreeDBoundingBoxEuler)]
+        rotations[euler] = rotation_matrices_from_euler(angles, "ZYX")
+    if not euler.all():
+        quaternions = [cuboid.val[3:7] for cuboid in cuboids if isinstance(cuboid, ThreeDBoundingBoxQuaternion)]
+        rotations[~euler] = rotation_matrices_from_quaternions(quaternions)
+    return rotations
+
+
+def cuboid_corners(cuboids: Sequence[Cuboid]) -> FloatArray:
+    """
+    The corners of the cuboids, of shape (n, 8, 3). The corners of each cuboid are ordered by their offset from the
+    center along the cuboid's own x-, y- and z-axes: (-, -, -), (-, -, +), (-, +, -), (-, +, +), (+, -, -), ...
+    """
+    centers = np.array([cuboid.val[:3] for cuboid in cuboids], dtype=np.float64).reshape(-1, 3)
+    sizes = np.array([cuboid.val[-3:] for cuboid in cuboids], dtype=np.float64).reshape(-1, 3)
+    rotations = cuboid_rotation_matrices(cuboids)
+
+    offsets = _CORNER_SIGNS[None, :, :] * sizes[:, None, :] / 2
+    corners: FloatArray = centers[:, None, :] + offsets @ rotations.transpose(0, 2, 1)
+    return corners
+
+
+def cuboid_iou_matrix(cuboids_a: Sequence[Cuboid], cuboids_b: Sequence[Cuboid]) -> FloatArray:
+    """
+    3D IoU of every cuboid in cuboids_a with every cuboid in cuboids_b, of shape (len(cuboids_a), len(cuboids_b)).
+    As common for road scenes, the cuboids are taken as rotated by their yaw only: the intersection is the overlap of
+    their rotated footprints in the x-y plane times the overlap of their extents along z. Roll and pitch are ignored.
+    """
+    centers_a, sizes_a, yaw_a = _cuboid_arrays(cuboids_a)
+    centers_b, sizes_b, yaw_b = _cuboid_arrays(cuboids_b)
+    footprint_iou = rotated_iou_matrix(
+        np.column_stack((centers_a[:, :2], sizes_a[:, :2], yaw_a)),
+        np.column_stack((centers_b[:, :2], sizes_b[:, :2], yaw_b)),
+    )
+    areas_a, areas_b = sizes_a[:, 0] * sizes_a[:, 1], sizes_b[:, 0] * sizes_b[:, 1]
+    # IoU = I / (A + B - I) solved for the intersection I
+    footprint_intersection = footprint_iou * (areas_a[:, None] + areas_b[None, :]) / (1 + footprint_iou)
+
+    top = np.minimum((centers_a[:, 2] + sizes_a[:, 2] / 2)[:, None], (centers_b[:, 2] + sizes_b[:, 2] / 2)[None, :])
+    bottom = np.maximum((centers_a[:, 2] - sizes_a[:, 2] / 2)[:, None], (centers_b[:, 2] - sizes_b[:, 2] / 2)[None, :])
+    intersection = footprint_intersection * np.clip(top - bottom, 0.0, None)
+    union = (areas_a * sizes_a[:, 2])[:, None] + (areas_b * sizes_b[:, 2])[None, :] - intersection
+    iou: FloatArray = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+    return iou
+
+
+def _cuboid_arrays(cuboids: Sequence[Cuboid]) -> tuple[FloatArray, FloatArray, FloatArray]:
+    """The centers (n, 3), sizes (n, 3) and yaw (n,) of Euler and quaternion cuboids."""
+    centers = np.array([cuboid.val[:3] for cuboid in cuboids], dtype=np.float64).reshape(-1, 3)
+    sizes = np.array([cuboid.val[-3:] for cuboid in cuboids], dtype=np.float64).reshape(-1, 3)
+    yaw = np.empty(len(cuboids), dtype=np.float64)
+    euler = np.array([isinstance(cuboid, ThreeDBoundingBoxEuler) for cuboid in cuboids], dtype=bool)
+    if euler.any():
+        yaw[euler] = [cuboid.val[5] for cuboid in cuboids if isinstance(cuboid, ThreeDBoundingBoxEuler)]
+    if not euler.all():
+        quaternions = [cuboid.val[3:7] for cuboid in cuboids if isinstance(cuboid, ThreeDBoundingBoxQuaternion)]
+        yaw[~euler] = euler_zyx_from_quaternions(quaternions)[:, 0]
+    return centers, sizes, yaw
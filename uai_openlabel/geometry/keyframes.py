@@ -0,0 +1,253 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.geometric_data import (
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.object import ObjectData, ObjectInFrame
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame_interval import FrameIntervalSet
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.bbox_2d import FloatArray
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.cuboids import (
+    euler_vals_to_quaternion_vals,
+    quaternion_vals_to_euler_vals,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.rotation import slerp_quaternions
+
+# noinspection PyProtectedMember
+from uai_openlabel.openlabel import OpenLabel
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import (
+    AttributeName,
+    FrameUid,
+    ObjectUid,
+    Uid,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+__all__: list[str] = []
+
+
+IntArray = npt.NDArray[np.int64]
+Cuboid = Union[ThreeDBoundingBoxEuler, ThreeDBoundingBoxQuaternion]
+TrackKey = tuple[ObjectUid, AttributeName]
+
+
+class CuboidKeyframes:
+    """
+    The cuboids of objects, stored only at keyframes. The cuboids between two keyframes of the same object and name
+    are interpolated when accessed: linearly for the center and size, by SLERP for the rotation.
+    Interpolated cuboids have the type and coordinate system of the preceding keyframe, and no attributes.
+
+    If the frame intervals of an object are known, no cuboids are interpolated for frames outside of them.
+    Use densify() to write the interpolated cuboids into an OpenLabel for consumers that expect every frame to be labeled.
+    """
+
+    def __init__(self) -> None:
+        self._keyframes: dict[TrackKey, dict[int, Cuboid]] = {}
+        self._frame_intervals: dict[ObjectUid, FrameIntervalSet] = {}
+        # Sorted keyframe numbers and quaternion values per track, built on first access
+        self._arrays: dict[TrackKey, tuple[IntArray, FloatArray]] = {}
+
+    @classmethod
+    def from_openlabel(cls, openlabel: OpenLabel) -> "CuboidKeyframes":
+        """Every cuboid in the frames of the OpenLabel becomes a keyframe, the frame intervals of the objects are kept."""
+        keyframes = cls()
+        for object_uid, obj in (openlabel.objects or {}).items():
+            if obj.frame_intervals:
+                keyframes.set_frame_intervals(object_uid, FrameIntervalSet.from_intervals(obj.frame_intervals))
+        for frame_uid, frame in (openlabel.frames or {}).items():
+            for object_uid, object_in_frame in (frame.objects or {}).items():
+                for cuboid in object_in_frame.object_data.cuboid or ():
+                    keyframes.set_keyframe(object_uid, frame_uid, cuboid)
+        return keyframes
+
+    def set_keyframe(self, object_uid: ObjectUid, frame: FrameUid, cuboid: Cuboid) -> None:
+        """Adds the cuboid as keyframe, replacing the keyframe of the same object and name at this frame."""
+        key = (object_uid, cuboid.name)
+        self._keyframes.setdefault(key, {})[frame_number(frame)] = cuboid
+        self._arrays.pop(key, None)
+
+    def remove_keyframe(self, object_uid: ObjectUid, frame: FrameUid, name: AttributeName) -> None:
+        """Raises a KeyError if there is no such keyframe."""
+        key = (object_uid, name)
+        track = self._keyframes.get(key)
+        if track is None or frame_number(frame) not in track:
+            raise KeyError(f"Object {object_uid} has no keyframe of {name} at frame {frame}")
+        del track[frame_number(frame)]
+        if not track:
+            del self._keyframes[key]
+        self._arrays.pop(key, None)
+
+    def set_frame_intervals(self, object_uid: ObjectUid, frame_intervals: Optional[FrameIntervalSet]) -> None:
+        """Restricts the interpolation of the object's cuboids to these frames. None lifts the restriction."""
+        if frame_intervals is None:
+            self._frame_intervals.pop(object_uid, None)
+        else:
+            self._frame_intervals[object_uid] = frame_intervals
+
+    def keyframes(self, object_uid: ObjectUid, name: AttributeName) -> list[int]:
+        """The sorted keyframe numbers of the object's cuboid with this name."""
+        return sorted(self._keyframes.get((object_uid, name), {}))
+
+    def tracks(self) -> list[TrackKey]:
+        """The (object uid, cuboid name) pairs that have keyframes."""
+        return list(self._keyframes)
+
+    def cuboid(self, object_uid: ObjectUid, frame: FrameUid, name: AttributeName) -> Optional[Cuboid]:
+        """
+        The keyframe at this frame, or the cuboid interpolated between the surrounding keyframes.
+        None outside of the keyframes or the frame intervals of the object.
+        """
+        key = (object_uid, name)
+        number = frame_number(frame)
+        keyframe = self._keyframes.get(key, {}).get(number)
+        if keyframe is not None:
+            return keyframe
+        cuboids = self._interpolate(key, np.array([number], dtype=np.int64))
+        return cuboids.get(number)
+
+    def cuboids_at(self, frame: FrameUid) -> dict[ObjectUid, list[Cuboid]]:
+        """The keyframed or interpolated cuboids of all objects at this frame."""
+        cuboids_by_object: dict[ObjectUid, list[Cuboid]] = {}
+        for object_uid, name in self._keyframes:
+            cuboid = self.cuboid(object_uid, frame, name)
+            if cuboid is not None:
+                cuboids_by_object.setdefault(object_uid, []).append(cuboid)
+        return cuboids_by_object
+
+    def densify(self, openlabel: OpenLabel) -> int:
+        """
+        Adds the interpolated cuboids of all frames between keyframes to the frames of the OpenLabel, creating missing frames,
+        and updates the frame intervals and data pointers. New frame keys are zero-padded like the existing ones. Cuboids already present in a frame are kept.
+        All objects must be defined in the OpenLabel. Returns the number of added cuboids.
+        """
+        unknown = {object_uid for object_uid, _ in self._keyframes} - set(openlabel.objects or {})
+        if unknown:
+            raise ValueError(f"The objects {sorted(unknown)} are not defined in the OpenLabel")
+
+        frames = dict(openlabel.frames or {})
+        frame_uids = {frame_number(frame_uid): frame_uid for frame_uid in frames}
+        width = _frame_key_width(frames)
+        touched: dict[Uid, Frame] = {}
+        added = 0
+        for key in self._keyframes:
+            numbers, _ = self._track_arrays(key)
+            between = np.arange(numbers[0], numbers[-1] + 1, dtype=np.int64)
+            between = between[~np.isin(between, numbers)]
+            object_uid, name = key
+            for number, cuboid in self._interpolate(key, between).items():
+                frame_uid = frame_uids.setdefault(number, Uid(str(number).zfill(width)))
+                frame = frames.get(frame_uid)
+                if frame is None:
+                    frame = frames[frame_uid] = Frame()
+                objects = dict(frame.objects or {})
+                object_in_frame = objects.get(object_uid)
+                if object_in_frame is None:
+                    object_in_frame = objects[object_uid] = ObjectInFrame(object_data=ObjectData())
+                object_data = object_in_frame.object_data
+                if any(existing.name == name for existing in object_data.cuboid or ()):
+                    continue
+                object_data.cuboid = [*(object_data.cuboid or ()), cuboid]
+                frame.objects = objects
+                touched[frame_uid] = frame
+                added += 1
+
+        for frame in touched.values():
+            frame.invalidate_index_cache()
+        openlabel.frames = dict(sorted(frames.items(), key=lambda item: frame_number(item[0])))
+        if added:
+            openlabel.update_frame_intervals()
+        return added
+
+    def _track_arrays(self, key: TrackKey) -> tuple[IntArray, FloatArray]:
+        arrays = self._arrays.get(key)
+        if arrays is None:
+            track = self._keyframes[key]
+            numbers = np.array(sorted(track), dtype=np.int64)
+            vals = np.empty((len(numbers), 10), dtype=np.float64)
+            for row, number in enumerate(numbers.tolist()):
+                cuboid = track[number]
+                if isinstance(cuboid, ThreeDBoundingBoxEuler):
+                    vals[row] = euler_vals_to_quaternion_vals(cuboid.val)[0]
+                else:
+                    vals[row] = cuboid.val
+            arrays = self._arrays[key] = (numbers, vals)
+        return arrays
+
+    def _interpolate(self, key: TrackKey, numbers: IntArray) -> dict[int, Cuboid]:
+        """Interpolates the track at frames that aren't keyframes."""
+        if key not in self._keyframes:
+            return {}
+        keyframe_numbers, vals = self._track_arrays(key)
+        object_uid, name = key
+        frame_intervals = self._frame_intervals.get(object_uid)
+
+        following = np.searchsorted(keyframe_numbers, numbers)
+        valid = (following > 0) & (following < len(keyframe_numbers))
+        if frame_intervals is not None:
+            valid &= np.array([number in frame_intervals for number in numbers.tolist()], dtype=np.bool_)
+        numbers, following = numbers[valid], following[valid]
+        if len(numbers) == 0:
+            return {}
+
+        preceding = following - 1
+        fractions = (numbers - keyframe_numbers[preceding]) / (keyframe_numbers[following] - keyframe_numbers[preceding])
+        start, end = vals[preceding], vals[following]
+        interpolated = start + fractions[:, None] * (end - start)
+        interpolated[:, 3:7] = slerp_quaternions(start[:, 3:7], end[:, 3:7], fractions)
+
+        track = self._keyframes[key]
+        templates = [track[number] for number in keyframe_numbers[preceding].tolist()]
+        euler = np.array([isinstance(template, ThreeDBoundingBoxEuler) for template in templates], dtype=np.bool_)
+        euler_vals = iter(quaternion_vals_to_euler_vals(interpolated[euler]).tolist() if euler.any() else [])
+        quaternion_vals = iter(interpolated[~euler].tolist())
+
+        cuboids: dict[int, Cuboid] = {}
+        for number, template, is_euler in zip(numbers.tolist(), templates, euler.tolist()):
+            if is_euler:
+                cuboids[number] = ThreeDBoundingBoxEuler(
+                    val=tuple(next(euler_vals)), name=name, coordinate_system=template.coordinate_system
+                )
+            else:
+                cuboids[number] = ThreeDBoundingBoxQuaternion(
+                    val=tuple(next(quaternion_vals)), name=name, coordinate_system=template.coordinate_system
+                )
+        return cuboids
+
+
+def _frame_key_width(frame_uids: Iterable[Uid]) -> int:
+    """The width to which the frame keys are zero-padded, e.g. 4 for "0001", or 0 if they aren't."""
+    return max((len(frame_uid) for frame_uid in frame_uids if len(frame_uid) > 1 and frame_uid.startswith("0")), default=0)
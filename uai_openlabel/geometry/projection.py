@@ -0,0 +1,437 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.geometric_data import (
+    Poly3D,
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.bbox_2d import FloatArray
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.cuboids import cuboid_corners
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.transform_graph import TransformGraph
+
+# noinspection PyProtectedMember
+from uai_openlabel.stream.camera_intrinsics import (
+    FisheyeCameraIntrinsics,
+    PinholeCameraIntrinsics,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.stream.stream import Stream
+
+# noinspection PyProtectedMember
+from uai_openlabel.stream.stream_properties import (
+    FisheyeCameraStreamProperties,
+    PinholeCameraStreamProperties,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import (
+    CoordinateSystemUid,
+    FrameUid,
+    ObjectUid,
+    StreamUid,
+    Uid,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+if TYPE_CHECKING:
+    from uai_openlabel.openlabel import OpenLabel
+
+__all__: list[str] = []
+
+
+BoolArray = npt.NDArray[np.bool_]
+Cuboid = Union[ThreeDBoundingBoxEuler, ThreeDBoundingBoxQuaternion]
+
+# Points closer to the image plane than this, in the unit of the camera coordinate system, are not visible
+_MIN_DEPTH = 1e-6
+
+
+@dataclass(frozen=True, eq=False)
+class PinholeCamera:
+    """
+    A pinhole camera with the OpenCV distortion model, built from PinholeCameraIntrinsics.
+
+    :param camera_matrix: The 3x4 camera matrix.
+    :param distortion_coeffs: (k1, k2, p1, p2, k3, k4, k5, k6, s1, s2, s3, s4), padded with zeros.
+    :param width_px: The width of the image.
+    :param height_px: The height of the image.
+    """
+
+    camera_matrix: FloatArray
+    distortion_coeffs: FloatArray
+    width_px: float
+    height_px: float
+
+    @classmethod
+    def from_intrinsics(cls, intrinsics: PinholeCameraIntrinsics) -> "PinholeCamera":
+        coeffs = np.zeros(14, dtype=np.float64)
+        coeffs[: len(intrinsics.distortion_coeffs)] = intrinsics.distortion_coeffs
+        if np.any(coeffs[12:] != 0):
+            raise ValueError("Tilted sensors, i.e. the distortion coefficients tau_x and tau_y, aren't supported")
+        camera_matrix = np.asarray(intrinsics.camera_matrix, dtype=np.float64).reshape(3, 4)
+        camera_matrix.flags.writeable = False
+        distortion_coeffs = coeffs[:12]
+        distortion_coeffs.flags.writeable = False
+        return cls(camera_matrix, distortion_coeffs, float(intrinsics.width_px), float(intrinsics.height_px))
+
+    def project(self, points: npt.ArrayLike) -> tuple[FloatArray, BoolArray]:
+        """
+        Projects points given as rows of (x, y, z) in the camera coordinate system to pixels.
+        Returns the pixels, of shape (n, 2), and whether each point is in front of the camera and inside the image.
+        The pixels of points behind the camera are NaN.
+        """
+        p = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        depth = p[:, 2]
+        in_front = depth > _MIN_DEPTH
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x, y = p[:, 0] / depth, p[:, 1] / depth
+        x, y = self._distort(np.where(in_front, x, np.nan), np.where(in_front, y, np.nan))
+
+        # The camera matrix is applied to the distorted point at its original depth, which keeps its 4th column exact
+        homogeneous = np.stack([x * depth, y * depth, depth, np.ones_like(depth)], axis=1) @ self.camera_matrix.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pixels: FloatArray = homogeneous[:, :2] / homogeneous[:, 2:3]
+        visible: BoolArray = (
+            in_front
+            & (pixels[:, 0] >= 0)
+            & (pixels[:, 0] < self.width_px)
+            & (pixels[:, 1] >= 0)
+            & (pixels[:, 1] < self.height_px)
+        )
+        return pixels, visible
+
+    def _distort(self, x: FloatArray, y: FloatArray) -> tuple[FloatArray, FloatArray]:
+        k1, k2, p1, p2, k3, k4, k5, k6, s1, s2, s3, s4 = self.distortion_coeffs
+        r2 = x * x + y * y
+        r4 = r2 * r2
+        r6 = r4 * r2
+        radial = (1 + k1 * r2 + k2 * r4 + k3 * r6) / (1 + k4 * r2 + k5 * r4 + k6 * r6)
+        xy = x * y
+        distorted_x = x * radial + 2 * p1 * xy + p2 * (r2 + 2 * x * x) + s1 * r2 + s2 * r4
+        distorted_y = y * radial + p1 * (r2 + 2 * y * y) + 2 * p2 * xy + s3 * r2 + s4 * r4
+        return distorted_x, distorted_y
+
+
+@dataclass(frozen=True, eq=False)
+class FisheyeCamera:
+    """
+    A fisheye camera built from FisheyeCameraIntrinsics, with the lens model r = k1*a + k2*a^2 + ... + k5*a^5
+    relating the angle of incidence a to the distance r of the pixel from the image center.
+    r is scaled by focal_length_x and focal_length_y if they are given, otherwise the lens coefficients are in pixels.
+    The center defaults to the middle of the image.
+
+    Unprojection inverts the lens model with a lookup table of r over a, built once per camera, refined by one
+    vectorized Newton step. Only angles up to max_angle, where r stops increasing or a reaches pi, are valid.
+
+    :param lens_coeffs: (k1, k2, k3, k4, k5), padded with zeros.
+    """
+
+    lens_coeffs: FloatArray
+    center_px: tuple[float, float]
+    focal_lengths: tuple[float, float]
+    width_px: float
+    height_px: float
+    max_angle: float
+    angle_table: FloatArray
+    radius_table: FloatArray
+
+    @classmethod
+    def from_intrinsics(cls, intrinsics: FisheyeCameraIntrinsics, table_size: int = 4096) -> "FisheyeCamera":
+        coeffs = np.zeros(5, dtype=np.float64)
+        coeffs[: len(intrinsics.lens_coeffs)] = intrinsics.lens_coeffs
+        angles = np.linspace(0.0, np.pi, table_size)
+        radii = _lens_polynomial(coeffs, angles)
+
+        decreasing = np.nonzero(np.diff(radii) <= 0)[0]
+        end = int(decreasing[0]) + 1 if len(decreasing) else table_size
+        if end < 2:
+            raise ValueError("The lens model must map increasing angles to increasing radii")
+        angles, radii = angles[:end], radii[:end]
+        for array in coeffs, angles, radii:
+            array.flags.writeable = False
+
+        return cls(
+            lens_coeffs=coeffs,
+            center_px=(
+                float(intrinsics.center_x_px) if intrinsics.center_x_px is not None else intrinsics.width_px / 2,
+                float(intrinsics.center_y_px) if intrinsics.center_y_px is not None else intrinsics.height_px / 2,
+            ),
+            focal_lengths=(
+                float(intrinsics.focal_length_x) if intrinsics.focal_length_x is not None else 1.0,
+                float(intrinsics.focal_length_y) if intrinsics.focal_length_y is not None else 1.0,
+            ),
+            width_px=float(intrinsics.width_px),
+            height_px=float(intrinsics.height_px),
+            max_angle=float(angles[-1]),
+            angle_table=angles,
+            radius_table=radii,
+        )
+
+    def project(self, points: npt.ArrayLike) -> tuple[FloatArray, BoolArray]:
+        """
+        Projects points given as rows of (x, y, z) in the camera coordinate system to pixels.
+        Returns the pixels, of shape (n, 2), and whether each point is within max_angle and inside the image.
+        The pixels of points beyond max_angle are NaN.
+        """
+        p = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        distance_from_axis = np.hypot(p[:, 0], p[:, 1])
+        angle = np.arctan2(distance_from_axis, p[:, 2])
+        in_view = angle <= self.max_angle
+
+        radius = np.where(in_view, _lens_polynomial(self.lens_coeffs, angle), np.nan)
+        scale = np.divide(radius, distance_from_axis, out=np.zeros_like(radius), where=distance_from_axis > 0)
+        scale[~in_view] = np.nan
+        pixels = np.stack(
+            [
+                self.center_px[0] + self.focal_lengths[0] * p[:, 0] * scale,
+                self.center_px[1] + self.focal_lengths[1] * p[:, 1] * scale,
+            ],
+            axis=1,
+        )
+        visible: BoolArray = (
+            in_view
+            & (pixels[:, 0] >= 0)
+            & (pixels[:, 0] < self.width_px)
+            & (pixels[:, 1] >= 0)
+            & (pixels[:, 1] < self.height_px)
+        )
+        return pixels, visible
+
+    def unproject(self, pixels: npt.ArrayLike) -> tuple[FloatArray, BoolArray]:
+        """
+        The unit rays in the camera coordinate system, of shape (n, 3), for pixels given as rows of (u, v).
+        Also returns whether each pixel is within max_angle, the rays of the other pixels are NaN.
+        """
+        px = np.asarray(pixels, dtype=np.float64).reshape(-1, 2)
+        x = (px[:, 0] - self.center_px[0]) / self.focal_lengths[0]
+        y = (px[:, 1] - self.center_px[1]) / self.focal_lengths[1]
+        radius = np.hypot(x, y)
+        valid: BoolArray = radius <= self.radius_table[-1]
+
+        angle = np.interp(radius, self.radius_table, self.angle_table)
+        derivative = _lens_polynomial_derivative(self.lens_coeffs, angle)
+        step = np.divide(
+            _lens_polynomial(self.lens_coeffs, angle) - radius, derivative, out=np.zeros_like(angle), where=derivative > 0
+        )
+        angle = np.clip(angle - step, 0.0, self.max_angle)
+
+        sin_angle = np.sin(angle)
+        scale = np.divide(sin_angle, radius, out=np.zeros_like(radius), where=radius > 0)
+        rays = np.stack([x * scale, y * scale, np.cos(angle)], axis=1)
+        rays[~valid] = np.nan
+        return rays, valid
+
+
+Camera = Union[PinholeCamera, FisheyeCamera]
+Intrinsics = Union[PinholeCameraIntrinsics, FisheyeCameraIntrinsics]
+
+
+def _lens_polynomial(coeffs: FloatArray, angles: FloatArray) -> FloatArray:
+    k1, k2, k3, k4, k5 = coeffs
+    radii: FloatArray = angles * (k1 + angles * (k2 + angles * (k3 + angles * (k4 + angles * k5))))
+    return radii
+
+
+def _lens_polynomial_derivative(coeffs: FloatArray, angles: FloatArray) -> FloatArray:
+    k1, k2, k3, k4, k5 = coeffs
+    derivative: FloatArray = k1 + angles * (2 * k2 + angles * (3 * k3 + angles * (4 * k4 + angles * 5 * k5)))
+    return derivative
+
+
+@dataclass(frozen=True, eq=False)
+class ProjectedLabel:
+    """
+    The projection of a cuboid or 3D polyline into a camera image.
+
+    :param data: The projected cuboid or polyline.
+    :param points: The pixels of the cuboid corners, in the order of cuboid_corners(), or of the polyline vertices.
+    :param visible: Whether each point is in front of the camera and inside the image.
+    """
+
+    data: Union[Cuboid, Poly3D]
+    points: FloatArray
+    visible: BoolArray
+
+
+class CameraProjector:
+    """
+    Projects 3D labels into the images of camera streams.
+
+    Pinhole and fisheye streams are supported. The intrinsics of a stream are taken from the stream,
+    unless the frame overrides them in FrameProperties.streams.
+    The camera coordinate system of a stream is the coordinate system with the same name as the stream.
+    A camera is built once per intrinsics and shared by all frames using them, transforms are cached by the TransformGraph.
+    After editing streams or frames, call invalidate().
+    """
+
+    def __init__(
+        self,
+        streams: Mapping[StreamUid, Stream],
+        transform_graph: TransformGraph,
+        frames: Optional[Mapping[Uid, Frame]] = None,
+    ):
+        self._streams = streams
+        self._transform_graph = transform_graph
+        self._frames = {frame_number(frame_uid): frame for frame_uid, frame in (frames or {}).items()}
+        self._cameras: dict[tuple[StreamUid, Optional[int]], Camera] = {}
+        # Keyed by id(), the intrinsics are kept alive to make sure the id isn't reused
+        self._cameras_by_intrinsics: dict[int, tuple[Intrinsics, Camera]] = {}
+
+    @classmethod
+    def from_openlabel(cls, openlabel: "OpenLabel") -> "CameraProjector":
+        return cls(openlabel.streams or {}, TransformGraph.from_openlabel(openlabel), openlabel.frames)
+
+    def invalidate(self, frame: Optional[FrameUid] = None) -> None:
+        """Drops the cached cameras and transforms of the frame, or of all frames if no frame is given."""
+        if frame is None:
+            self._cameras.clear()
+            self._cameras_by_intrinsics.clear()
+        else:
+            number = frame_number(frame)
+            for key in [key for key in self._cameras if key[1] == number]:
+                del self._cameras[key]
+        self._transform_graph.invalidate(frame)
+
+    def camera(self, stream: StreamUid, frame: Optional[FrameUid] = None) -> Camera:
+        number = frame_number(frame) if frame is not None else None
+        camera = self._cameras.get((stream, number))
+        if camera is None:
+            intrinsics = self._intrinsics(stream, number)
+            shared = self._cameras_by_intrinsics.get(id(intrinsics))
+            if shared is not None:
+                camera = shared[1]
+            else:
+                if isinstance(intrinsics, PinholeCameraIntrinsics):
+                    camera = PinholeCamera.from_intrinsics(intrinsics)
+                else:
+                    camera = FisheyeCamera.from_intrinsics(intrinsics)
+                self._cameras_by_intrinsics[id(intrinsics)] = (intrinsics, camera)
+            self._cameras[(stream, number)] = camera
+        return camera
+
+    def project_points(
+        self,
+        points: npt.ArrayLike,
+        src: CoordinateSystemUid,
+        stream: StreamUid,
+        frame: Optional[FrameUid] = None,
+    ) -> tuple[FloatArray, BoolArray]:
+        """Projects points given as rows of (x, y, z) in src into the image of the stream, see the project() method of the cameras."""
+        camera_points = self._transform_graph.transform_points(points, src, stream, frame)
+        return self.camera(stream, frame).project(camera_points)
+
+    def project_cuboids(
+        self,
+        frame: FrameUid,
+        stream: StreamUid,
+        default_src: Optional[CoordinateSystemUid] = None,
+    ) -> dict[ObjectUid, list[ProjectedLabel]]:
+        """
+        Projects the corners of all cuboids of the objects in the frame, in one batch per coordinate system.
+        Cuboids without coordinate system are assumed to be in default_src.
+        """
+        cuboids = [
+            (object_uid, cuboid)
+            for object_uid, object_in_frame in (self._frame(frame).objects or {}).items()
+            for cuboid in object_in_frame.object_data.cuboid or ()
+        ]
+        return self._project(frame, stream, default_src, cuboids, lambda group: cuboid_corners(group).reshape(-1, 3))
+
+    def project_polylines(
+        self,
+        frame: FrameUid,
+        stream: StreamUid,
+        default_src: Optional[CoordinateSystemUid] = None,
+    ) -> dict[ObjectUid, list[ProjectedLabel]]:
+        """Same as project_cuboids(), for the vertices of the 3D polylines."""
+        polylines = [
+            (object_uid, polyline)
+            for object_uid, object_in_frame in (self._frame(frame).objects or {}).items()
+            for polyline in object_in_frame.object_data.poly3d or ()
+        ]
+        return self._project(
+            frame,
+            stream,
+            default_src,
+            polylines,
+            lambda group: np.concatenate([np.asarray(p.val, dtype=np.float64).reshape(-1, 3) for p in group]),
+        )
+
+    def _project(
+        self,
+        frame: FrameUid,
+        stream: StreamUid,
+        default_src: Optional[CoordinateSystemUid],
+        labels: Sequence[tuple[ObjectUid, Union[Cuboid, Poly3D]]],
+        points_of: Callable[[list[Any]], FloatArray],
+    ) -> dict[ObjectUid, list[ProjectedLabel]]:
+        groups: dict[CoordinateSystemUid, list[int]] = {}
+        for i, (_, data) in enumerate(labels):
+            src = data.coordinate_system or default_src
+            if src is None:
+                raise ValueError(f"{data.name} has no coordinate system and no default was given")
+            groups.setdefault(src, []).append(i)
+
+        projected: list[Optional[ProjectedLabel]] = [None] * len(labels)
+        for src, indices in groups.items():
+            group = [labels[i][1] for i in indices]
+            pixels, visible = self.project_points(points_of(group), src, stream, frame)
+            offset = 0
+            for i, data in zip(indices, group):
+                count = 8 if not isinstance(data, Poly3D) else len(data.val) // 3
+                projected[i] = ProjectedLabel(data, pixels[offset : offset + count], visible[offset : offset + count])
+                offset += count
+
+        result: dict[ObjectUid, list[ProjectedLabel]] = {}
+        for (object_uid, _), label in zip(labels, projected):
+            assert label is not None
+            result.setdefault(object_uid, []).append(label)
+        return result
+
+    def _frame(self, frame: FrameUid) -> Frame:
+        number = frame_number(frame)
+        if number not in self._frames:
+            raise KeyError(f"There is no frame {frame}")
+        return self._frames[number]
+
+    def _intrinsics(self, stream: StreamUid, number: Optional[int]) -> Intrinsics:
+        frame = self._frames.get(number) if number is not None else None
+        frame_streams = frame.frame_properties.streams if frame is not None and frame.frame_properties else None
+        for candidate in (frame_streams or {}).get(stream), self._streams.get(stream):
+            properties = candidate.stream_properties if candidate is not None else None
+            if isinstance(properties, PinholeCameraStreamProperties) and properties.intrinsics_pinhole is not None:
+                return properties.intrinsics_pinhole
+            if isinstance(properties, FisheyeCameraStreamProperties) and properties.intrinsics_fisheye is not None:
+                return properties.intrinsics_fisheye
+        raise ValueError(f"Stream {stream} has no pinhole or fisheye intrinsics")
@@ -0,0 +1,194 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import numpy as np
+import numpy.typing as npt
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.bbox_2d import FloatArray
+
+__all__: list[str] = []
+
+
+def rotation_matrices_from_quaternions(quaternions: npt.ArrayLike) -> FloatArray:
+    """
+    Rotation matrices of shape (n, 3, 3) for quaternions given as rows of (x, y, z, w), the SciPy convention.
+    The quaternions may be in non-unit form.
+    """
+    q = np.asarray(quaternions, dtype=np.float64).reshape(-1, 4)
+    norm = np.linalg.norm(q, axis=1)
+    if np.any(norm == 0.0):
+        raise ValueError("Can't compute a rotation from a quaternion with norm 0")
+    x, y, z, w = (q / norm[:, None]).T
+
+    matrices = np.empty((len(q), 3, 3), dtype=np.float64)
+    matrices[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    matrices[:, 0, 1] = 2 * (x * y - z * w)
+    matrices[:, 0, 2] = 2 * (x * z + y * w)
+    matrices[:, 1, 0] = 2 * (x * y + z * w)
+    matrices[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    matrices[:, 1, 2] = 2 * (y * z - x * w)
+    matrices[:, 2, 0] = 2 * (x * z - y * w)
+    matrices[:, 2, 1] = 2 * (y * z + x * w)
+    matrices[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return matrices
+
+
+def rotation_matrices_from_euler(angles: npt.ArrayLike, sequence: str = "ZYX") -> FloatArray:
+    """
+    Rotation matrices of shape (n, 3, 3) for intrinsic Euler angles given as rows of three angles in radians,
+    in the order of the axes in the sequence. For the default sequence ZYX the rows are (yaw, pitch, roll)
+    and R = Rz(yaw) * Ry(pitch) * Rx(roll).
+    """
+    if len(sequence) != 3 or any(axis not in "XYZ" for axis in sequence.upper()):
+        raise ValueError(f"{sequence} is not a sequence of three of the axes X, Y and Z")
+    a = np.asarray(angles, dtype=np.float64).reshape(-1, 3)
+
+    matrices = np.broadcast_to(np.eye(3), (len(a), 3, 3))
+    for axis, angle in zip(sequence.upper(), a.T):
+        matrices = matrices @ _elementary_rotations(axis, angle)
+    return np.ascontiguousarray(matrices)
+
+
+def quaternions_from_rotation_matrices(matrices: npt.ArrayLike) -> FloatArray:
+    """
+    Unit quaternions (x, y, z, w) of shape (n, 4) for rotation matrices of shape (n, 3, 3), with w >= 0.
+    Uses the numerically stable branch of Shepperd's method for every matrix.
+    """
+    m = np.asarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+    trace = np.trace(m, axis1=1, axis2=2)
+    diagonal = np.diagonal(m, axis1=1, axis2=2)
+    # Index 0-2: the largest diagonal element, index 3: the trace
+    branch = np.argmax(np.concatenate([diagonal, trace[:, None]], axis=1), axis=1)
+
+    q = np.empty((len(m), 4), dtype=np.float64)
+    for i in range(3):
+        j, k = (i + 1) % 3, (i + 2) % 3
+        rows = branch == i
+        mr = m[rows]
+        q[rows, i] = 1 + 2 * mr[:, i, i] - trace[rows]
+        q[rows, j] = mr[:, j, i] + mr[:, i, j]
+        q[rows, k] = mr[:, k, i] + mr[:, i, k]
+        q[rows, 3] = mr[:, k, j] - mr[:, j, k]
+    rows = branch == 3
+    mr = m[rows]
+    q[rows, 0] = mr[:, 2, 1] - mr[:, 1, 2]
+    q[rows, 1] = mr[:, 0, 2] - mr[:, 2, 0]
+    q[rows, 2] = mr[:, 1, 0] - mr[:, 0, 1]
+    q[rows, 3] = 1 + trace[rows]
+
+    q /= np.linalg.norm(q, axis=1)[:, None]
+    q[q[:, 3] < 0] *= -1
+    return q
+
+
+def euler_zyx_from_rotation_matrices(matrices: npt.ArrayLike) -> FloatArray:
+    """
+    Intrinsic ZYX Euler angles (yaw, pitch, roll) of shape (n, 3) for rotation matrices of shape (n, 3, 3),
+    the inverse of rotation_matrices_from_euler(angles, "ZYX"). The pitch is in [-pi/2, pi/2].
+    In gimbal lock, when the pitch is +-pi/2, the roll is set to 0.
+    """
+    m = np.asarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+    pitch = np.arcsin(np.clip(-m[:, 2, 0], -1.0, 1.0))
+    cos_pitch = np.hypot(m[:, 0, 0], m[:, 1, 0])
+    gimbal_lock = cos_pitch < 1e-9
+
+    yaw = np.where(gimbal_lock, np.arctan2(-m[:, 0, 1], m[:, 1, 1]), np.arctan2(m[:, 1, 0], m[:, 0, 0]))
+    roll = np.where(gimbal_lock, 0.0, np.arctan2(m[:, 2, 1], m[:, 2, 2]))
+    return np.stack([yaw, pitch, roll], axis=1)
+
+
+def quaternions_from_euler_zyx(angles: npt.ArrayLike) -> FloatArray:
+    """
+    Unit quaternions (x, y, z, w) of shape (n, 4), with w >= 0, for intrinsic ZYX Euler angles given as rows of
+    (yaw, pitch, roll). Same result as going via rotation_matrices_from_euler(angles, "ZYX"), in closed form.
+    """
+    half = np.asarray(angles, dtype=np.float64).reshape(-1, 3) / 2
+    cy, cp, cr = np.cos(half).T
+    sy, sp, sr = np.sin(half).T
+
+    q = np.empty((len(half), 4), dtype=np.float64)
+    q[:, 0] = sr * cp * cy - cr * sp * sy
+    q[:, 1] = cr * sp * cy + sr * cp * sy
+    q[:, 2] = cr * cp * sy - sr * sp * cy
+    q[:, 3] = cr * cp * cy + sr * sp * sy
+    q[q[:, 3] < 0] *= -1
+    return q
+
+
+def euler_zyx_from_quaternions(quaternions: npt.ArrayLike) -> FloatArray:
+    """
+    Intrinsic ZYX Euler angles (yaw, pitch, roll) of shape (n, 3) for quaternions given as rows of (x, y, z, w),
+    which may be in non-unit form. Same conventions as euler_zyx_from_rotation_matrices, in closed form.
+    """
+    q = np.asarray(quaternions, dtype=np.float64).reshape(-1, 4)
+    norm = np.linalg.norm(q, axis=1)
+    if np.any(norm == 0.0):
+        raise ValueError("Can't compute a rotation from a quaternion with norm 0")
+    x, y, z, w = (q / norm[:, None]).T
+
+    sin_pitch = 2 * (w * y - z * x)
+    angles = np.stack(
+        [
+            np.arctan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z)),
+            np.arcsin(np.clip(sin_pitch, -1.0, 1.0)),
+            np.arctan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y)),
+        ],
+        axis=1,
+    )
+    # Close to gimbal lock the closed form loses precision, the rare rows affected go via the rotation matrix
+    gimbal_lock = np.abs(sin_pitch) > 1 - 1e-12
+    if gimbal_lock.any():
+        angles[gimbal_lock] = euler_zyx_from_rotation_matrices(rotation_matrices_from_quaternions(q[gimbal_lock]))
+    return angles
+
+
+def slerp_quaternions(q0: npt.ArrayLike, q1: npt.ArrayLike, t: npt.ArrayLike) -> FloatArray:
+    """
+    Spherical linear interpolation between rows of quaternions (x, y, z, w) at the fractions t of shape (n,),
+    along the shorter arc. The quaternions may be in non-unit form, the results are unit quaternions.
+    """
+    a = np.asarray(q0, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(q1, dtype=np.float64).reshape(-1, 4)
+    fractions = np.asarray(t, dtype=np.float64).reshape(-1, 1)
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    dot = np.sum(a * b, axis=1, keepdims=True)
+    # q and -q are the same rotation, take the one closer to the start
+    b = np.where(dot < 0, -b, b)
+    dot = np.abs(dot)
+
+    angle = np.arccos(np.minimum(dot, 1.0))
+    sin_angle = np.sin(angle)
+    # Nearly identical rotations are interpolated linearly to avoid dividing by sin(angle) close to 0
+    nearly_identical = sin_angle < 1e-6
+    safe_sin = np.where(nearly_identical, 1.0, sin_angle)
+    weight_a = np.where(nearly_identical, 1 - fractions, np.sin((1 - fractions) * angle) / safe_sin)
+    weight_b = np.where(nearly_identical, fractions, np.sin(fractions * angle) / safe_sin)
+    interpolated = weight_a * a + weight_b * b
+    result: FloatArray = interpolated / np.linalg.norm(interpolated, axis=1, keepdims=True)
+    return result
+
+
+def _elementary_rotations(axis: str, angles: FloatArray) -> FloatArray:
+    cos, sin = np.cos(angles), np.sin(angles)
+    rotations = np.zeros((len(angles), 3, 3), dtype=np.float64)
+    i = "XYZ".index(axis)
+    j, k = (i + 1) % 3, (i + 2) % 3
+    rotations[:, i, i] = 1.0
+    rotations[:, j, j] = cos
+    rotations[:, k, k] = cos
+    rotations[:, j, k] = -sin
+    rotations[:, k, j] = sin
+    return rotations
@@ -0,0 +1,196 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from dataclasses import dataclass
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.geometric_data import (
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.bbox_2d import FloatArray
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.timestamp_index import TimestampUnit, parse_timestamp_ns
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import (
+    AttributeName,
+    CoordinateSystemUid,
+    ObjectUid,
+    Uid,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+__all__: list[str] = []
+
+
+IntArray = npt.NDArray[np.int64]
+Cuboid = Union[ThreeDBoundingBoxEuler, ThreeDBoundingBoxQuaternion]
+
+
+@dataclass(frozen=True, eq=False)
+class Trajectory:
+    """
+    The cuboids of an object over time, ordered by frame.
+
+    :param object_uid: The object this trajectory belongs to.
+    :param frames: The frame numbers, shape (n,). None for resampled trajectories.
+    :param timestamps: The timestamps in seconds, shape (n,). NaN for frames without timestamp.
+    :param centers: The cuboid centers (x, y, z), shape (n, 3).
+    :param yaw: The rotation around the z-axis in radians, shape (n,).
+    :param sizes: The cuboid dimensions (sx, sy, sz), shape (n, 3).
+    """
+
+    object_uid: ObjectUid
+    frames: Optional[IntArray]
+    timestamps: FloatArray
+    centers: FloatArray
+    yaw: FloatArray
+    sizes: FloatArray
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def segments(self, max_frame_gap: int = 1) -> list["Trajectory"]:
+        """
+        Splits the trajectory where the object is absent for more than max_frame_gap - 1 consecutive frames.
+        With the default of 1, every segment covers consecutive frames.
+        """
+        if self.frames is None:
+            raise ValueError("Resampled trajectories have no frames to split at")
+        splits = np.nonzero(np.diff(self.frames) > max_frame_gap)[0] + 1
+        bounds = [0, *splits.tolist(), len(self)]
+        return [self._slice(start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+    def resample(self, rate: float, max_time_gap: Optional[float] = None) -> "Trajectory":
+        """
+        Linearly interpolates the trajectory at a fixed rate in Hz, starting at its first timestamp.
+        The yaw is interpolated along the shorter arc. Sample times falling into a gap longer than max_time_gap seconds
+        between two frames are left out. Raises a ValueError if some frames have no timestamp.
+        """
+        if np.isnan(self.timestamps).any():
+            raise ValueError(f"The trajectory of object {self.object_uid} has frames without timestamp")
+        if len(self) == 0:
+            return self
+
+        times = self.timestamps[0] + np.arange(int(np.floor((self.timestamps[-1] - self.timestamps[0]) * rate)) + 1) / rate
+        if max_time_gap is not None and len(self) > 1:
+            following = np.searchsorted(self.timestamps, times)
+            on_frame = np.isclose(self.timestamps[np.minimum(following, len(self) - 1)], times, rtol=0.0, atol=1e-9)
+            following = np.clip(following, 1, len(self) - 1)
+            gaps = self.timestamps[following] - self.timestamps[following - 1]
+            times = times[on_frame | (gaps <= max_time_gap)]
+
+        unwrapped_yaw = np.unwrap(self.yaw)
+        yaw = np.interp(times, self.timestamps, unwrapped_yaw)
+        return Trajectory(
+            object_uid=self.object_uid,
+            frames=None,
+            timestamps=times,
+            centers=np.stack([np.interp(times, self.timestamps, self.centers[:, i]) for i in range(3)], axis=1),
+            yaw=np.arctan2(np.sin(yaw), np.cos(yaw)),
+            sizes=np.stack([np.interp(times, self.timestamps, self.sizes[:, i]) for i in range(3)], axis=1),
+        )
+
+    def _slice(self, start: int, end: int) -> "Trajectory":
+        return Trajectory(
+            object_uid=self.object_uid,
+            frames=self.frames[start:end] if self.frames is not None else None,
+            timestamps=self.timestamps[start:end],
+            centers=self.centers[start:end],
+            yaw=self.yaw[start:end],
+            sizes=self.sizes[start:end],
+        )
+
+
+def extract_trajectories(
+    frames: Mapping[Uid, Frame],
+    cuboid_name: Optional[AttributeName] = None,
+    coordinate_system: Optional[CoordinateSystemUid] = None,
+    unit: TimestampUnit = TimestampUnit.Second,
+) -> dict[ObjectUid, Trajectory]:
+    """
+    Collects the trajectory of every object with cuboid data in one pass over the frames.
+    If an object has several cuboids in a frame, the first one matching cuboid_name and coordinate_system is used.
+    Timestamps are taken from FrameProperties.timestamp and interpreted in the given unit.
+    """
+    frame_numbers: dict[ObjectUid, list[int]] = {}
+    timestamps: dict[ObjectUid, list[float]] = {}
+    euler_rows: dict[ObjectUid, list[int]] = {}
+    vals: dict[ObjectUid, list[tuple[float, ...]]] = {}
+
+    for frame_uid in sorted(frames, key=frame_number):
+        frame = frames[frame_uid]
+        if not frame.objects:
+            continue
+        raw_timestamp = frame.frame_properties.timestamp if frame.frame_properties is not None else None
+        timestamp = parse_timestamp_ns(raw_timestamp, unit) / 1e9 if raw_timestamp is not None else np.nan
+
+        for object_uid, object_in_frame in frame.objects.items():
+            cuboid = _select_cuboid(object_in_frame.object_data.cuboid, cuboid_name, coordinate_system)
+            if cuboid is None:
+                continue
+            if object_uid not in vals:
+                frame_numbers[object_uid], timestamps[object_uid], euler_rows[object_uid], vals[object_uid] = [], [], [], []
+            if isinstance(cuboid, ThreeDBoundingBoxEuler):
+                euler_rows[object_uid].append(len(vals[object_uid]))
+                # Padded to the layout of quaternion cuboids, the yaw is read from position 5 for Euler rows
+                x, y, z, rx, ry, rz, sx, sy, sz = cuboid.val
+                vals[object_uid].append((x, y, z, rx, ry, rz, 0.0, sx, sy, sz))
+            else:
+                vals[object_uid].append(tuple(cuboid.val))
+            frame_numbers[object_uid].append(frame_number(frame_uid))
+            timestamps[object_uid].append(timestamp)
+
+    trajectories: dict[ObjectUid, Trajectory] = {}
+    for object_uid, object_vals in vals.items():
+        val = np.asarray(object_vals, dtype=np.float64)
+        qx, qy, qz, qw = val[:, 3], val[:, 4], val[:, 5], val[:, 6]
+        yaw = np.arctan2(2.0 * (qw * qz + qx * qy), qw * qw + qx * qx - qy * qy - qz * qz)
+        euler = np.asarray(euler_rows[object_uid], dtype=np.int64)
+        yaw[euler] = val[euler, 5]
+        trajectories[object_uid] = Trajectory(
+            object_uid=object_uid,
+            frames=np.asarray(frame_numbers[object_uid], dtype=np.int64),
+            timestamps=np.asarray(timestamps[object_uid], dtype=np.float64),
+            centers=val[:, 0:3],
+            yaw=yaw,
+            sizes=val[:, 7:10],
+        )
+    return trajectories
+
+
+def _select_cuboid(
+    cuboids: Optional[Sequence[Cuboid]],
+    name: Optional[AttributeName],
+    coordinate_system: Optional[CoordinateSystemUid],
+) -> Optional[Cuboid]:
+    for cuboid in cuboids or ():
+        if (name is None or cuboid.name == name) and (
+            coordinate_system is None or cuboid.coordinate_system == coordinate_system
+        ):
+            return cuboid
+    return None
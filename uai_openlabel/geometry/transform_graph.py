@@ -0,0 +1,309 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from collections import deque
+from dataclasses import replace
+from typing import TYPE_CHECKING, Mapping, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+# noinspection PyProtectedMember
+from uai_openlabel.coordinate_system import CoordinateSystem
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.geometric_data import (
+    Poly3D,
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.bbox_2d import FloatArray
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.cuboids import cuboid_rotation_matrices
+
+# noinspection PyProtectedMember
+from uai_openlabel.geometry.rotation import (
+    euler_zyx_from_rotation_matrices,
+    quaternions_from_rotation_matrices,
+    rotation_matrices_from_euler,
+    rotation_matrices_from_quaternions,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.transform import (
+    EulerTransformData,
+    Matrix4x4TransformData,
+    QuaternionTransformData,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import (
+    CoordinateSystemUid,
+    FrameUid,
+    ObjectUid,
+    Uid,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+if TYPE_CHECKING:
+    from uai_openlabel.openlabel import OpenLabel
+
+__all__: list[str] = []
+
+
+TransformData = Union[Matrix4x4TransformData, QuaternionTransformData, EulerTransformData]
+Cuboid = Union[ThreeDBoundingBoxEuler, ThreeDBoundingBoxQuaternion]
+_Edges = dict[tuple[CoordinateSystemUid, CoordinateSystemUid], Optional[FloatArray]]
+
+
+def transform_to_matrix(transform: TransformData) -> FloatArray:
+    """The 4x4 homogeneous matrix M of a transform, such that X_dst = M * X_src for column vectors X."""
+    if isinstance(transform, Matrix4x4TransformData):
+        return np.asarray(transform.matrix4x4, dtype=np.float64).reshape(4, 4)
+
+    matrix = np.eye(4)
+    if isinstance(transform, QuaternionTransformData):
+        matrix[:3, :3] = rotation_matrices_from_quaternions(transform.quaternion)[0]
+    else:
+        matrix[:3, :3] = rotation_matrices_from_euler(transform.euler_angles, transform.sequence or "ZYX")[0]
+    matrix[:3, 3] = transform.translation
+    return matrix
+
+
+class TransformGraph:
+    """
+    Resolves transforms between any two coordinate systems.
+
+    The static edges of the graph are the pose_wrt_parent of each coordinate system, taken as the transform from the
+    coordinate system to its parent. The transforms in FrameProperties.transforms add edges for their frame,
+    and override the static pose between the same two coordinate systems.
+    Composed transforms are cached per (src, dst, frame). After editing the coordinate systems or the transforms
+    of a frame, call invalidate().
+    """
+
+    def __init__(
+        self,
+        coordinate_systems: Mapping[CoordinateSystemUid, CoordinateSystem],
+        frames: Optional[Mapping[Uid, Frame]] = None,
+    ):
+        self._coordinate_systems = coordinate_systems
+        self._frames = {frame_number(frame_uid): frame for frame_uid, frame in (frames or {}).items()}
+        self._static_edges: Optional[_Edges] = None
+        self._frame_edges: dict[int, _Edges] = {}
+        self._cache: dict[tuple[CoordinateSystemUid, CoordinateSystemUid, Optional[int]], FloatArray] = {}
+
+    @classmethod
+    def from_openlabel(cls, openlabel: "OpenLabel") -> "TransformGraph":
+        return cls(openlabel.coordinate_systems or {}, openlabel.frames)
+
+    def invalidate(self, frame: Optional[FrameUid] = None) -> None:
+        """Drops the cached transforms of the frame, or all cached transforms if no frame is given."""
+        if frame is None:
+            self._static_edges = None
+            self._frame_edges.clear()
+            self._cache.clear()
+            return
+        number = frame_number(frame)
+        self._frame_edges.pop(number, None)
+        for key in [key for key in self._cache if key[2] == number]:
+            del self._cache[key]
+
+    def matrix(self, src: CoordinateSystemUid, dst: CoordinateSystemUid, frame: Optional[FrameUid] = None) -> FloatArray:
+        """
+        The 4x4 matrix M transforming points from src to dst, X_dst = M * X_src, at the frame if one is given.
+        Raises a ValueError if the coordinate systems aren't connected or a transform on the path is unknown.
+        The returned array is shared by all callers and must not be modified.
+        """
+        number = frame_number(frame) if frame is not None else None
+        key = (src, dst, number)
+        matrix = self._cache.get(key)
+        if matrix is None:
+            matrix = self._compose(src, dst, number)
+            matrix.flags.writeable = False
+            self._cache[key] = matrix
+        return matrix
+
+    def transform_points(
+        self,
+        points: npt.ArrayLike,
+        src: CoordinateSystemUid,
+        dst: CoordinateSystemUid,
+        frame: Optional[FrameUid] = None,
+    ) -> FloatArray:
+        """Transforms points given as rows of (x, y, z) from src to dst."""
+        p = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        matrix = self.matrix(src, dst, frame)
+        transformed: FloatArray = p @ matrix[:3, :3].T + matrix[:3, 3]
+        return transformed
+
+    def transform_cuboids(
+        self,
+        frame: FrameUid,
+        dst: CoordinateSystemUid,
+        default_src: Optional[CoordinateSystemUid] = None,
+    ) -> dict[ObjectUid, list[Cuboid]]:
+        """
+        All cuboids of the objects in the frame, transformed to dst. The cuboids keep their type,
+        Euler angles and quaternions are recomputed from the composed rotation.
+        Cuboids without coordinate system are assumed to be in default_src, a ValueError is raised if it isn't given.
+        """
+        cuboids = [
+            (object_uid, cuboid)
+            for object_uid, object_in_frame in (self._frame(frame).objects or {}).items()
+            for cuboid in object_in_frame.object_data.cuboid or ()
+        ]
+        groups = self._group_by_coordinate_system([cuboid for _, cuboid in cuboids], default_src)
+
+        transformed: list[Optional[Cuboid]] = [None] * len(cuboids)
+        for src, indices in groups.items():
+            matrix = self.matrix(src, dst, frame)
+            group = [cuboids[i][1] for i in indices]
+            centers = np.array([cuboid.val[:3] for cuboid in group], dtype=np.float64)
+            rotations = cuboid_rotation_matrices(group)
+
+            new_centers = centers @ matrix[:3, :3].T + matrix[:3, 3]
+            new_rotations = matrix[:3, :3] @ rotations
+            new_euler = euler_zyx_from_rotation_matrices(new_rotations)[:, ::-1]
+            new_quaternions = quaternions_from_rotation_matrices(new_rotations)
+            for row, (i, cuboid) in enumerate(zip(indices, group)):
+                x, y, z = new_centers[row].tolist()
+                if isinstance(cuboid, ThreeDBoundingBoxEuler):
+                    rx, ry, rz = new_euler[row].tolist()
+                    size = cuboid.val[6:9]
+                    transformed[i] = replace(cuboid, val=(x, y, z, rx, ry, rz, *size), coordinate_system=dst)
+                else:
+                    qx, qy, qz, qw = new_quaternions[row].tolist()
+                    size = cuboid.val[7:10]
+                    transformed[i] = replace(cuboid, val=(x, y, z, qx, qy, qz, qw, *size), coordinate_system=dst)
+
+        result: dict[ObjectUid, list[Cuboid]] = {}
+        for (object_uid, _), transformed_cuboid in zip(cuboids, transformed):
+            assert transformed_cuboid is not None
+            result.setdefault(object_uid, []).append(transformed_cuboid)
+        return result
+
+    def transform_polylines(
+        self,
+        frame: FrameUid,
+        dst: CoordinateSystemUid,
+        default_src: Optional[CoordinateSystemUid] = None,
+    ) -> dict[ObjectUid, list[Poly3D]]:
+        """
+        All 3D polylines of the objects in the frame, transformed to dst. The points of all polylines in the same
+        coordinate system are transformed at once. Polylines without coordinate system are assumed to be in default_src.
+        """
+        polylines = [
+            (object_uid, polyline)
+            for object_uid, object_in_frame in (self._frame(frame).objects or {}).items()
+            for polyline in object_in_frame.object_data.poly3d or ()
+        ]
+        groups = self._group_by_coordinate_system([polyline for _, polyline in polylines], default_src)
+
+        transformed: list[Optional[Poly3D]] = [None] * len(polylines)
+        for src, indices in groups.items():
+            points = np.concatenate([np.asarray(polylines[i][1].val, dtype=np.float64).reshape(-1, 3) for i in indices])
+            new_points = self.transform_points(points, src, dst, frame)
+            offset = 0
+            for i in indices:
+                polyline = polylines[i][1]
+                count = len(polyline.val) // 3
+                val = new_points[offset : offset + count].ravel().tolist()
+                transformed[i] = replace(polyline, val=val, coordinate_system=dst)
+                offset += count
+
+        result: dict[ObjectUid, list[Poly3D]] = {}
+        for (object_uid, _), transformed_polyline in zip(polylines, transformed):
+            assert transformed_polyline is not None
+            result.setdefault(object_uid, []).append(transformed_polyline)
+        return result
+
+    def _frame(self, frame: FrameUid) -> Frame:
+        number = frame_number(frame)
+        if number not in self._frames:
+            raise KeyError(f"There is no frame {frame}")
+        return self._frames[number]
+
+    @staticmethod
+    def _group_by_coordinate_system(
+        data: list[Union[Cuboid, Poly3D]],
+        default_src: Optional[CoordinateSystemUid],
+    ) -> dict[CoordinateSystemUid, list[int]]:
+        groups: dict[CoordinateSystemUid, list[int]] = {}
+        for i, datum in enumerate(data):
+            src = datum.coordinate_system or default_src
+            if src is None:
+                raise ValueError(f"{datum.name} has no coordinate system and no default was given")
+            groups.setdefault(src, []).append(i)
+        return groups
+
+    def _edges(self, number: Optional[int]) -> _Edges:
+        if self._static_edges is None:
+            self._static_edges = {}
+            for uid, coordinate_system in self._coordinate_systems.items():
+                if coordinate_system.parent:
+                    pose = coordinate_system.pose_wrt_parent
+                    self._static_edges[(uid, coordinate_system.parent)] = (
+                        transform_to_matrix(pose) if pose is not None else None
+                    )
+        if number is None:
+            return self._static_edges
+
+        edges = self._frame_edges.get(number)
+        if edges is None:
+            edges = dict(self._static_edges)
+            frame = self._frames.get(number)
+            transforms = frame.frame_properties.transforms if frame is not None and frame.frame_properties else None
+            for transform in (transforms or {}).values():
+                edges.pop((transform.dst, transform.src), None)
+                edges[(transform.src, transform.dst)] = transform_to_matrix(transform.transform_src_to_dst)
+            self._frame_edges[number] = edges
+        return edges
+
+    def _compose(self, src: CoordinateSystemUid, dst: CoordinateSystemUid, number: Optional[int]) -> FloatArray:
+        edges = self._edges(number)
+        neighbors: dict[CoordinateSystemUid, list[tuple[CoordinateSystemUid, bool]]] = {}
+        for a, b in edges:
+            neighbors.setdefault(a, []).append((b, False))
+            neighbors.setdefault(b, []).append((a, True))
+
+        # Breadth-first search for the shortest path from src to dst
+        previous: dict[CoordinateSystemUid, Optional[tuple[CoordinateSystemUid, bool]]] = {src: None}
+        queue = deque([src])
+        while queue and dst not in previous:
+            current = queue.popleft()
+            for neighbor, inverted in neighbors.get(current, ()):
+                if neighbor not in previous:
+                    previous[neighbor] = (current, inverted)
+                    queue.append(neighbor)
+        if dst not in previous:
+            raise ValueError(f"There is no transform from {src} to {dst}")
+
+        matrix = np.eye(4)
+        node = dst
+        while (step := previous[node]) is not None:
+            parent, inverted = step
+            edge = edges[(node, parent)] if inverted else edges[(parent, node)]
+            if edge is None:
+                raise ValueError(f"The pose of {parent if not inverted else node} with respect to its parent is unknown")
+            matrix = matrix @ (np.linalg.inv(edge) if inverted else edge)
+            node = parent
+        return matrix
@@ -0,0 +1,285 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional, Union
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.generic_data import (
+    Attributes,
+    BooleanData,
+    NumberData,
+    TextData,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.element_frame_index import ElementFrameIndex
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import AttributeName, Number, ObjectUid, Uid
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+if TYPE_CHECKING:
+    from uai_openlabel.openlabel import OpenLabel
+
+__all__: list[str] = []
+
+
+@dataclass(frozen=True)
+class AttributeMatches:
+    """
+    The result of evaluating an AttributePredicate.
+
+    :param static: Objects whose static object_data matches. They match in every frame.
+    :param dynamic: Pairs of object and frame where the object's in-frame object_data matches.
+    """
+
+    static: frozenset[ObjectUid] = field(default_factory=frozenset)
+    dynamic: frozenset[tuple[ObjectUid, Uid]] = field(default_factory=frozenset)
+
+    def __and__(self, other: "AttributeMatches") -> "AttributeMatches":
+        dynamic = (
+            (self.dynamic & other.dynamic)
+            | {match for match in self.dynamic if match[0] in other.static}
+            | {match for match in other.dynamic if match[0] in self.static}
+        )
+        return AttributeMatches(static=self.static & other.static, dynamic=frozenset(dynamic))
+
+    def __or__(self, other: "AttributeMatches") -> "AttributeMatches":
+        return AttributeMatches(static=self.static | other.static, dynamic=self.dynamic | other.dynamic)
+
+    def objects(self) -> set[ObjectUid]:
+        return set(self.static) | {object_uid for object_uid, _ in self.dynamic}
+
+
+class AttributePredicate(ABC):
+    """A condition on the attributes of objects, combinable via `&` and `|`."""
+
+    @abstractmethod
+    def evaluate(self, index: "AttributeIndex") -> AttributeMatches: ...
+
+    def __and__(self, other: "AttributePredicate") -> "AllOf":
+        return AllOf(predicates=(self, other))
+
+    def __or__(self, other: "AttributePredicate") -> "AnyOf":
+        return AnyOf(predicates=(self, other))
+
+
+@dataclass(frozen=True)
+class Equals(AttributePredicate):
+    """Matches BooleanData, TextData or NumberData with the given name and value."""
+
+    name: AttributeName
+    value: Union[bool, str, Number]
+
+    def evaluate(self, index: "AttributeIndex") -> AttributeMatches:
+        if isinstance(self.value, bool):
+            return index.lookup_boolean(self.name, self.value)
+        if isinstance(self.value, str):
+            return index.lookup_text(self.name, self.value)
+        return index.lookup_number_range(self.name, self.value, self.value)
+
+
+@dataclass(frozen=True)
+class Between(AttributePredicate):
+    """Matches NumberData with the given name and a value in the range. Leave a bound at None to not restrict it."""
+
+    name: AttributeName
+    minimum: Optional[Number] = None
+    maximum: Optional[Number] = None
+    include_minimum: bool = True
+    include_maximum: bool = True
+
+    def evaluate(self, index: "AttributeIndex") -> AttributeMatches:
+        return index.lookup_number_range(self.name, self.minimum, self.maximum, self.include_minimum, self.include_maximum)
+
+
+@dataclass(frozen=True)
+class AllOf(AttributePredicate):
+    predicates: tuple[AttributePredicate, ...]
+
+    def evaluate(self, index: "AttributeIndex") -> AttributeMatches:
+        # Evaluating the most selective predicate first keeps the intermediate results small
+        results = sorted((p.evaluate(index) for p in self.predicates), key=lambda m: len(m.static) + len(m.dynamic))
+        combined = results[0] if results else AttributeMatches()
+        for result in results[1:]:
+            combined = combined & result
+        return combined
+
+
+@dataclass(frozen=True)
+class AnyOf(AttributePredicate):
+    predicates: tuple[AttributePredicate, ...]
+
+    def evaluate(self, index: "AttributeIndex") -> AttributeMatches:
+        combined = AttributeMatches()
+        for predicate in self.predicates:
+            combined = combined | predicate.evaluate(index)
+        return combined
+
+
+_Posting = tuple[ObjectUid, Optional[Uid]]
+"""An object and the frame of the matching in-frame data, or None for static object_data."""
+
+
+class _Postings:
+    __slots__ = ("dynamic", "static")
+
+    def __init__(self) -> None:
+        self.static: set[ObjectUid] = set()
+        self.dynamic: set[tuple[ObjectUid, Uid]] = set()
+
+    def add(self, object_uid: ObjectUid, frame_uid: Optional[Uid]) -> None:
+        if frame_uid is None:
+            self.static.add(object_uid)
+        else:
+            self.dynamic.add((object_uid, frame_uid))
+
+    def to_matches(self) -> AttributeMatches:
+        return AttributeMatches(static=frozenset(self.static), dynamic=frozenset(self.dynamic))
+
+
+class _SortedPostings:
+    """Numerical values in ascending order, with the posting of each value at the same position."""
+
+    __slots__ = ("is_sorted", "postings", "values")
+
+    def __init__(self) -> None:
+        self.values: list[Number] = []
+        self.postings: list[_Posting] = []
+        self.is_sorted = True
+
+    def add(self, value: Number, posting: _Posting) -> None:
+        if self.values and value < self.values[-1]:
+            self.is_sorted = False
+        self.values.append(value)
+        self.postings.append(posting)
+
+    def sort(self) -> None:
+        if self.is_sorted:
+            return
+        order = sorted(range(len(self.values)), key=self.values.__getitem__)
+        self.values = [self.values[i] for i in order]
+        self.postings = [self.postings[i] for i in order]
+        self.is_sorted = True
+
+
+class AttributeIndex:
+    """
+    Indexes the boolean, text and number attributes of all objects, both the static Object.object_data and the
+    in-frame ObjectInFrame.object_data, so that predicates can be answered without scanning the frames.
+
+    Boolean and text values are kept in hash indices, number values in sorted indices for range queries.
+    Only top-level attributes of object_data are indexed, not the attributes nested inside other data.
+
+    For example, all frames in which any car has its brake lights on are given by
+    index.frames_where(Equals("brake_lights_on", True), object_type="car").
+    """
+
+    def __init__(self) -> None:
+        self.element_frame_index = ElementFrameIndex()
+        self._object_types: dict[ObjectUid, str] = {}
+        self._booleans: dict[AttributeName, dict[bool, _Postings]] = {}
+        self._texts: dict[AttributeName, dict[str, _Postings]] = {}
+        self._numbers: dict[AttributeName, _SortedPostings] = {}
+
+    @classmethod
+    def from_openlabel(cls, openlabel: "OpenLabel") -> "AttributeIndex":
+        index = cls()
+        for object_uid, obj in (openlabel.objects or {}).items():
+            index._object_types[object_uid] = obj.type
+            if obj.object_data is not None:
+                index._add_attributes(obj.object_data, object_uid, None)
+
+        frames = openlabel.frames or {}
+        for frame_uid in sorted(frames, key=frame_number):
+            frame = frames[frame_uid]
+            index.element_frame_index.add_frame(frame_uid, frame)
+            for object_uid, object_in_frame in (frame.objects or {}).items():
+                index._add_attributes(object_in_frame.object_data, object_uid, frame_uid)
+
+        for sorted_postings in index._numbers.values():
+            sorted_postings.sort()
+        return index
+
+    def _add_attributes(self, attributes: Attributes, object_uid: ObjectUid, frame_uid: Optional[Uid]) -> None:
+        for data in attributes:
+            if data.name is None:
+                continue
+            if isinstance(data, BooleanData):
+                self._booleans.setdefault(data.name, {}).setdefault(data.val, _Postings()).add(object_uid, frame_uid)
+            elif isinstance(data, TextData):
+                self._texts.setdefault(data.name, {}).setdefault(data.val, _Postings()).add(object_uid, frame_uid)
+            elif isinstance(data, NumberData):
+                sorted_postings = self._numbers.get(data.name)
+                if sorted_postings is None:
+                    sorted_postings = self._numbers[data.name] = _SortedPostings()
+                sorted_postings.add(data.val, (object_uid, frame_uid))
+
+    def lookup_boolean(self, name: AttributeName, value: bool) -> AttributeMatches:
+        postings = self._booleans.get(name, {}).get(value)
+        return postings.to_matches() if postings is not None else AttributeMatches()
+
+    def lookup_text(self, name: AttributeName, value: str) -> AttributeMatches:
+        postings = self._texts.get(name, {}).get(value)
+        return postings.to_matches() if postings is not None else AttributeMatches()
+
+    def lookup_number_range(
+        self,
+        name: AttributeName,
+        minimum: Optional[Number],
+        maximum: Optional[Number],
+        include_minimum: bool = True,
+        include_maximum: bool = True,
+    ) -> AttributeMatches:
+        sorted_postings = self._numbers.get(name)
+        if sorted_postings is None:
+            return AttributeMatches()
+
+        values = sorted_postings.values
+        start = 0 if minimum is None else (bisect_left if include_minimum else bisect_right)(values, minimum)
+        end = len(values) if maximum is None else (bisect_right if include_maximum else bisect_left)(values, maximum)
+
+        postings = _Postings()
+        for object_uid, frame_uid in sorted_postings.postings[start:end]:
+            postings.add(object_uid, frame_uid)
+        return postings.to_matches()
+
+    def matches(self, predicate: AttributePredicate, object_type: Optional[str] = None) -> AttributeMatches:
+        result = predicate.evaluate(self)
+        if object_type is None:
+            return result
+        return AttributeMatches(
+            static=frozenset(o for o in result.static if self._object_types.get(o) == object_type),
+            dynamic=frozenset(m for m in result.dynamic if self._object_types.get(m[0]) == object_type),
+        )
+
+    def objects_where(self, predicate: AttributePredicate, object_type: Optional[str] = None) -> set[ObjectUid]:
+        """Objects that match the predicate statically or in at least one frame."""
+        return self.matches(predicate, object_type).objects()
+
+    def frames_where(self, predicate: AttributePredicate, object_type: Optional[str] = None) -> list[Uid]:
+        """
+        Frames in which at least one object matches the predicate, sorted by frame number.
+        Objects that match statically count for all frames in which they have in-frame data.
+        """
+        result = self.matches(predicate, object_type)
+        frames: set[Uid] = {frame_uid for _, frame_uid in result.dynamic}
+        for object_uid in result.static:
+            frames.update(self.element_frame_index.object_frames(object_uid))
+        return sorted(frames, key=frame_number)
@@ -0,0 +1,245 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from collections import Counter
+from typing import TYPE_CHECKING, Mapping, Optional, Union, cast
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.data_pointer_types import (
+    GenericDataType,
+    GeometricDataType,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.data_to_pointer_type_mapping import (
+    map_data_to_data_pointer_type,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.generic_data import Attributes
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.element_data_pointer import ElementDataPointer
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.relation import RdfAgentType
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame_interval import FrameInterval, FrameIntervalSet
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.element_frame_index import _iter_elements_in_frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import AttributeName, ElementUid, FrameUid, Uid
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+if TYPE_CHECKING:
+    from uai_openlabel.openlabel import OpenLabel
+
+__all__: list[str] = []
+
+
+PointerType = Union[GenericDataType, GeometricDataType]
+_NestedPointers = tuple[tuple[AttributeName, GenericDataType], ...]
+
+
+class _AttributeTrack:
+    """The frames in which an element has data with a given name, and the names of the attributes nested in that data."""
+
+    __slots__ = ("frames", "nested", "type")
+
+    def __init__(self, pointer_type: PointerType) -> None:
+        self.type = pointer_type
+        self.frames: set[int] = set()
+        self.nested: Counter[tuple[AttributeName, GenericDataType]] = Counter()
+
+
+class _ElementTrack:
+    __slots__ = ("attributes", "frames")
+
+    def __init__(self) -> None:
+        self.frames: set[int] = set()
+        self.attributes: dict[AttributeName, _AttributeTrack] = {}
+
+
+class DataPointerIndex:
+    """
+    Derives the frame_intervals of the OpenLabel and of its elements, and the element data pointers, from the frames.
+
+    The index is built in one pass over the frames and kept up to date with add_frame() and remove_frame(),
+    so edits don't require rescanning all frames. apply() writes the derived values into an OpenLabel, but only for
+    the elements whose in-frame data changed since the last apply(). Elements without in-frame data are left untouched.
+    """
+
+    def __init__(self) -> None:
+        self._tracks: dict[RdfAgentType, dict[ElementUid, _ElementTrack]] = {t: {} for t in RdfAgentType}
+        self._content_by_frame: dict[int, list[tuple[RdfAgentType, ElementUid, dict[AttributeName, _NestedPointers]]]] = {}
+        # Changes since the last apply()
+        self._changed: set[tuple[RdfAgentType, ElementUid]] = set()
+        self._frames_changed = False
+
+    @classmethod
+    def from_frames(cls, frames: Mapping[Uid, Frame]) -> "DataPointerIndex":
+        index = cls()
+        for frame_uid, frame in frames.items():
+            index.add_frame(frame_uid, frame)
+        return index
+
+    @classmethod
+    def from_openlabel(cls, openlabel: "OpenLabel") -> "DataPointerIndex":
+        return cls.from_frames(openlabel.frames or {})
+
+    def add_frame(self, frame_uid: FrameUid, frame: Frame) -> None:
+        """
+        Adds a frame to the index. If a frame with this number was added before, it is replaced.
+        Raises a ValueError if the frame contains data whose type differs from that of data with the same name in other frames.
+        """
+        number = frame_number(frame_uid)
+        content: list[tuple[RdfAgentType, ElementUid, dict[AttributeName, _NestedPointers]]] = []
+        types: list[dict[AttributeName, PointerType]] = []
+        for element_type, in_frame in _iter_elements_in_frame(frame):
+            for uid, element in in_frame:
+                element_data = cast(Attributes, getattr(element, f"{element_type.value}_data"))
+                pointer_types, nested = _describe(element_data)
+                track = self._tracks[element_type].get(uid)
+                if track is not None:
+                    for name, pointer_type in pointer_types.items():
+                        attribute = track.attributes.get(name)
+                        if attribute is not None and attribute.type != pointer_type and attribute.frames != {number}:
+                            raise ValueError(
+                                f"{element_type.value} {uid} has {name} of type {pointer_type.value} in frame {frame_uid}, "
+                                f"but of type {attribute.type.value} in other frames"
+                            )
+                content.append((element_type, uid, nested))
+                types.append(pointer_types)
+
+        self.remove_frame(number)
+        self._frames_changed = True
+        for (element_type, uid, nested), pointer_types in zip(content, types):
+            self._changed.add((element_type, uid))
+            track = self._tracks[element_type].setdefault(uid, _ElementTrack())
+            track.frames.add(number)
+            for name, pointer_type in pointer_types.items():
+                attribute = track.attributes.get(name)
+                if attribute is None:
+                    attribute = track.attributes[name] = _AttributeTrack(pointer_type)
+                attribute.frames.add(number)
+                attribute.nested.update(nested[name])
+        self._content_by_frame[number] = content
+
+    def remove_frame(self, frame_uid: FrameUid) -> None:
+        number = frame_number(frame_uid)
+        content = self._content_by_frame.pop(number, None)
+        if content is None:
+            return
+
+        self._frames_changed = True
+        for element_type, uid, nested_by_name in content:
+            self._changed.add((element_type, uid))
+            tracks = self._tracks[element_type]
+            track = tracks[uid]
+            track.frames.discard(number)
+            for name, nested in nested_by_name.items():
+                attribute = track.attributes[name]
+                attribute.frames.discard(number)
+                attribute.nested.subtract(nested)
+                attribute.nested = +attribute.nested
+                if not attribute.frames:
+                    del track.attributes[name]
+            if not track.frames:
+                del tracks[uid]
+
+    def __contains__(self, frame_uid: FrameUid) -> bool:
+        return frame_number(frame_uid) in self._content_by_frame
+
+    def frame_intervals(self) -> Optional[list[FrameInterval]]:
+        """The frame intervals of the OpenLabel, i.e. of all frames. None if there are no frames."""
+        if not self._content_by_frame:
+            return None
+        return FrameIntervalSet((n, n) for n in self._content_by_frame).to_frame_intervals()
+
+    def element_frame_intervals(self, element_type: RdfAgentType, uid: ElementUid) -> Optional[list[FrameInterval]]:
+        """The frame intervals in which the element has in-frame data. None if it has none."""
+        track = self._tracks[element_type].get(uid)
+        if track is None:
+            return None
+        return FrameIntervalSet((n, n) for n in track.frames).to_frame_intervals()
+
+    def element_data_pointers(
+        self,
+        element_type: RdfAgentType,
+        uid: ElementUid,
+    ) -> Optional[dict[AttributeName, ElementDataPointer]]:
+        """The data pointers of the element, one for each name of its in-frame data. None if it has no named in-frame data."""
+        track = self._tracks[element_type].get(uid)
+        if track is None or not track.attributes:
+            return None
+        return {
+            name: ElementDataPointer(
+                frame_intervals=FrameIntervalSet((n, n) for n in attribute.frames).to_frame_intervals(),
+                type=attribute.type,
+                attribute_pointers=dict(sorted(attribute.nested, key=lambda pointer: pointer[0])) or None,
+            )
+            for name, attribute in sorted(track.attributes.items())
+        }
+
+    def apply(self, openlabel: "OpenLabel") -> None:
+        """
+        Sets the frame_intervals of the OpenLabel, and the frame_intervals and element data pointers of the elements
+        whose in-frame data changed since the last apply(). The first apply() sets those of all elements with in-frame data.
+        An element whose in-frame data was removed entirely gets neither frame intervals nor data pointers.
+        Elements with in-frame data that the OpenLabel doesn't define yet are set by the first apply() after they are added.
+        An element object that replaces an already applied one isn't detected, rebuild the index in that case.
+        """
+        if self._frames_changed:
+            openlabel.frame_intervals = self.frame_intervals()
+        elements_by_type = {
+            RdfAgentType.Object: openlabel.objects,
+            RdfAgentType.Action: openlabel.actions,
+            RdfAgentType.Event: openlabel.events,
+            RdfAgentType.Context: openlabel.contexts,
+        }
+        # Elements not defined in the OpenLabel yet stay changed until they are
+        undefined = set()
+        for element_type, uid in self._changed:
+            element = (elements_by_type[element_type] or {}).get(uid)
+            if element is None:
+                undefined.add((element_type, uid))
+                continue
+            element.frame_intervals = self.element_frame_intervals(element_type, uid)
+            setattr(element, f"{element_type.value}_data_pointers", self.element_data_pointers(element_type, uid))
+        self._changed = undefined
+        self._frames_changed = False
+
+
+def _describe(element_data: Attributes) -> tuple[dict[AttributeName, PointerType], dict[AttributeName, _NestedPointers]]:
+    """The pointer type and nested attribute pointers of each named data. If several data share a name, the first one wins."""
+    pointer_types: dict[AttributeName, PointerType] = {}
+    nested: dict[AttributeName, _NestedPointers] = {}
+    for data in element_data:
+        if data.name is None or data.name in pointer_types:
+            continue
+        pointer_types[data.name] = map_data_to_data_pointer_type(data)
+        nested[data.name] = tuple(
+            (attribute.name, cast(GenericDataType, map_data_to_data_pointer_type(attribute)))
+            for attribute in (data.attributes or ())
+            if attribute.name is not None
+        )
+    return pointer_types, nested
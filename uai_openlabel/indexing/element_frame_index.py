@@ -0,0 +1,189 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Iterable, Mapping, Optional, Sequence, Union
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.action import ActionInFrame
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.context import ContextInFrame
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.event import EventInFrame
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.object import ObjectInFrame
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.relation import RdfAgentType
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import ElementUid, FrameUid, ObjectUid, Uid
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+if TYPE_CHECKING:
+    from uai_openlabel.openlabel import OpenLabel
+
+__all__: list[str] = []
+
+
+ElementInFrame = Union[ObjectInFrame, ActionInFrame, EventInFrame, ContextInFrame]
+
+
+class _ElementTrack:
+    """The frames of a single element, sorted by frame number."""
+
+    __slots__ = ("data_by_frame", "frame_numbers", "frame_uids")
+
+    def __init__(self) -> None:
+        self.frame_numbers: list[int] = []
+        self.frame_uids: list[Uid] = []
+        self.data_by_frame: dict[int, ElementInFrame] = {}
+
+    def add(self, number: int, frame_uid: Uid, data: ElementInFrame) -> None:
+        if number not in self.data_by_frame:
+            if not self.frame_numbers or number > self.frame_numbers[-1]:
+                self.frame_numbers.append(number)
+                self.frame_uids.append(frame_uid)
+            else:
+                position = bisect_left(self.frame_numbers, number)
+                self.frame_numbers.insert(position, number)
+                self.frame_uids.insert(position, frame_uid)
+        self.data_by_frame[number] = data
+
+    def remove(self, number: int) -> None:
+        if self.data_by_frame.pop(number, None) is None:
+            return
+        position = bisect_left(self.frame_numbers, number)
+        del self.frame_numbers[position]
+        del self.frame_uids[position]
+
+
+class ElementFrameIndex:
+    """
+    Inverted index from element UIDs to the frames in which the element has in-frame data.
+
+    Frames of an element are kept sorted by frame number, so range queries take O(log n) plus the size of the result.
+    The in-frame data of an element at a given frame is retrieved in constant time.
+    Use add_frame() and remove_frame() to keep the index up to date while frames are edited.
+    """
+
+    def __init__(self) -> None:
+        self._tracks: dict[RdfAgentType, dict[ElementUid, _ElementTrack]] = {t: {} for t in RdfAgentType}
+        self._elements_by_frame: dict[int, list[tuple[RdfAgentType, ElementUid]]] = {}
+
+    @classmethod
+    def from_frames(cls, frames: Mapping[Uid, Frame]) -> "ElementFrameIndex":
+        index = cls()
+        # Adding the frames in order means every track is built by appending only
+        for frame_uid in sorted(frames, key=frame_number):
+            index.add_frame(frame_uid, frames[frame_uid])
+        return index
+
+    @classmethod
+    def from_openlabel(cls, openlabel: "OpenLabel") -> "ElementFrameIndex":
+        return cls.from_frames(openlabel.frames or {})
+
+    def add_frame(self, frame_uid: Uid, frame: Frame) -> None:
+        """Adds a frame to the index. If a frame with this number was added before, it is replaced."""
+        number = frame_number(frame_uid)
+        if number in self._elements_by_frame:
+            self.remove_frame(frame_uid)
+
+        elements: list[tuple[RdfAgentType, ElementUid]] = []
+        for element_type, in_frame in _iter_elements_in_frame(frame):
+            tracks = self._tracks[element_type]
+            for uid, data in in_frame:
+                track = tracks.get(uid)
+                if track is None:
+                    track = tracks[uid] = _ElementTrack()
+                track.add(number, frame_uid, data)
+                elements.append((element_type, uid))
+
+        self._elements_by_frame[number] = elements
+
+    def remove_frame(self, frame_uid: FrameUid) -> None:
+        number = frame_number(frame_uid)
+        elements = self._elements_by_frame.pop(number, None)
+        if elements is None:
+            return
+
+        for element_type, uid in elements:
+            tracks = self._tracks[element_type]
+            track = tracks[uid]
+            track.remove(number)
+            if not track.frame_numbers:
+                del tracks[uid]
+
+    def __contains__(self, frame_uid: FrameUid) -> bool:
+        return frame_number(frame_uid) in self._elements_by_frame
+
+    def element_uids(self, element_type: RdfAgentType) -> Iterable[ElementUid]:
+        """All elements of this type that have in-frame data in at least one frame."""
+        return self._tracks[element_type].keys()
+
+    def frames(self, element_type: RdfAgentType, uid: ElementUid) -> Sequence[Uid]:
+        """The keys of all frames in which the element has in-frame data, sorted by frame number."""
+        track = self._tracks[element_type].get(uid)
+        return tuple(track.frame_uids) if track is not None else ()
+
+    def frames_in_range(
+        self,
+        element_type: RdfAgentType,
+        uid: ElementUid,
+        frame_start: FrameUid,
+        frame_end: FrameUid,
+    ) -> Sequence[Uid]:
+        """Same as frames(), restricted to frame_start <= frame <= frame_end."""
+        track = self._tracks[element_type].get(uid)
+        if track is None:
+            return ()
+        start = bisect_left(track.frame_numbers, frame_number(frame_start))
+        end = bisect_right(track.frame_numbers, frame_number(frame_end))
+        return tuple(track.frame_uids[start:end])
+
+    def in_frame(self, element_type: RdfAgentType, uid: ElementUid, frame_uid: FrameUid) -> Optional[ElementInFrame]:
+        track = self._tracks[element_type].get(uid)
+        if track is None:
+            return None
+        return track.data_by_frame.get(frame_number(frame_uid))
+
+    def object_frames(self, uid: ObjectUid) -> Sequence[Uid]:
+        return self.frames(RdfAgentType.Object, uid)
+
+    def object_in_frame(self, uid: ObjectUid, frame_uid: FrameUid) -> Optional[ObjectInFrame]:
+        data = self.in_frame(RdfAgentType.Object, uid, frame_uid)
+        assert data is None or isinstance(data, ObjectInFrame)
+        return data
+
+
+def _iter_elements_in_frame(
+    frame: Frame,
+) -> Iterable[tuple[RdfAgentType, Iterable[tuple[ElementUid, ElementInFrame]]]]:
+    element_maps: list[tuple[RdfAgentType, Optional[Mapping[ElementUid, ElementInFrame]]]] = [
+        (RdfAgentType.Object, frame.objects),
+        (RdfAgentType.Action, frame.actions),
+        (RdfAgentType.Event, frame.events),
+        (RdfAgentType.Context, frame.contexts),
+    ]
+    for element_type, elements in element_maps:
+        if elements:
+            yield element_type, elements.items()
@@ -0,0 +1,135 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Generic, Hashable, Iterable, Optional, TypeVar
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.relation import RdfAgentType
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame_interval import FrameIntervalSet
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import ElementUid, FrameUid
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+if TYPE_CHECKING:
+    from uai_openlabel.openlabel import OpenLabel
+
+__all__: list[str] = []
+
+V = TypeVar("V", bound=Hashable)
+
+
+@dataclass
+class _Node(Generic[V]):
+    center: int
+    by_start: list[tuple[int, int, V]]
+    by_end: list[tuple[int, int, V]]
+    left: "Optional[_Node[V]]"
+    right: "Optional[_Node[V]]"
+
+
+class FrameIntervalTree(Generic[V]):
+    """
+    Centered interval tree answering which values are alive at a frame or within a range of frames
+    in O(log n + k) time for n intervals and k results.
+    """
+
+    def __init__(self, items: Iterable[tuple[V, FrameIntervalSet]]):
+        intervals = [(start, end, value) for value, interval_set in items for start, end in interval_set.ranges]
+        self._root = self._build(intervals)
+        self._size = len(intervals)
+
+    @classmethod
+    def from_elements(cls, openlabel: "OpenLabel") -> "FrameIntervalTree[tuple[RdfAgentType, ElementUid]]":
+        """Indexes the frame_intervals of all objects, actions, events and contexts of the OpenLabel."""
+        elements_by_type = {
+            RdfAgentType.Object: openlabel.objects,
+            RdfAgentType.Action: openlabel.actions,
+            RdfAgentType.Event: openlabel.events,
+            RdfAgentType.Context: openlabel.contexts,
+        }
+        return FrameIntervalTree(
+            ((agent_type, uid), FrameIntervalSet.from_intervals(element.frame_intervals))
+            for agent_type, elements in elements_by_type.items()
+            for uid, element in (elements or {}).items()
+            if element.frame_intervals is not None
+        )
+
+    def __len__(self) -> int:
+        """The number of intervals in the tree."""
+        return self._size
+
+    @classmethod
+    def _build(cls, intervals: list[tuple[int, int, V]]) -> "Optional[_Node[V]]":
+        if not intervals:
+            return None
+        endpoints = sorted(endpoint for start, end, _ in intervals for endpoint in (start, end))
+        center = endpoints[len(endpoints) // 2]
+
+        left: list[tuple[int, int, V]] = []
+        right: list[tuple[int, int, V]] = []
+        overlapping: list[tuple[int, int, V]] = []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                overlapping.append(interval)
+
+        return _Node(
+            center=center,
+            by_start=sorted(overlapping, key=lambda i: i[0]),
+            by_end=sorted(overlapping, key=lambda i: i[1], reverse=True),
+            left=cls._build(left),
+            right=cls._build(right),
+        )
+
+    def at(self, frame: FrameUid) -> list[V]:
+        """The values alive at the frame."""
+        return self.overlapping(frame, frame)
+
+    def overlapping(self, start: FrameUid, end: FrameUid) -> list[V]:
+        """The values alive in at least one frame of the inclusive range [start, end], each reported once."""
+        first, last = frame_number(start), frame_number(end)
+        found: dict[V, None] = {}
+        node = self._root
+        pending: list[_Node[V]] = []
+        while node is not None or pending:
+            if node is None:
+                node = pending.pop()
+            if last < node.center:
+                for interval_start, _, value in node.by_start:
+                    if interval_start > last:
+                        break
+                    found[value] = None
+                node = node.left
+            elif first > node.center:
+                for _, interval_end, value in node.by_end:
+                    if interval_end < first:
+                        break
+                    found[value] = None
+                node = node.right
+            else:
+                for _, _, value in node.by_start:
+                    found[value] = None
+                if node.right is not None and last > node.center:
+                    pending.append(node.right)
+                node = node.left if first < node.center else None
+        return list(found)
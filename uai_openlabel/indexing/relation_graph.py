@@ -0,0 +1,186 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Mapping, Optional, Sequence
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.relation import RdfAgent, RdfAgentType, Relation
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import ElementUid, FrameUid, RelationUid, Uid
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+if TYPE_CHECKING:
+    from uai_openlabel.openlabel import OpenLabel
+
+__all__: list[str] = []
+
+
+class RdfRole(Enum):
+    Subject = "subject"
+    Object = "object"
+
+
+class Direction(Enum):
+    """Outgoing edges lead from the RDF subjects of a relation to its RDF objects, incoming ones the other way round."""
+
+    Outgoing = "outgoing"
+    Incoming = "incoming"
+    Both = "both"
+
+
+@dataclass(frozen=True, eq=False)
+class RelationMembership:
+    """
+    The participation of an element in a relation.
+
+    :param relation_uid: The key of the relation.
+    :param relation: The relation itself.
+    :param role: Whether the element is one of the RDF subjects or RDF objects of the relation.
+    :param frame_uid: The frame if the relation is defined in Frame.relations, None if it's defined in OpenLabel.relations.
+    """
+
+    relation_uid: RelationUid
+    relation: Relation
+    role: RdfRole
+    frame_uid: Optional[Uid]
+
+    def exists_at(self, frame: int) -> bool:
+        """Relations in OpenLabel.relations without frame_intervals exist in all frames."""
+        if self.frame_uid is not None:
+            return frame_number(self.frame_uid) == frame
+        if self.relation.frame_intervals is None:
+            return True
+        return any(
+            frame_number(interval.frame_start) <= frame <= frame_number(interval.frame_end)
+            for interval in self.relation.frame_intervals
+        )
+
+
+class RelationGraph:
+    """
+    Graph of the elements connected by relations, built in one pass over OpenLabel.relations and Frame.relations.
+
+    Every element has an adjacency list of the relations it participates in, so queries on an element take time
+    proportional to the number of its relations rather than to the number of relations in the document.
+    """
+
+    def __init__(self) -> None:
+        self._adjacency: dict[RdfAgentType, dict[ElementUid, list[RelationMembership]]] = {t: {} for t in RdfAgentType}
+        self._relations_by_type: dict[str, list[tuple[RelationUid, Relation, Optional[Uid]]]] = {}
+
+    @classmethod
+    def from_openlabel(cls, openlabel: "OpenLabel") -> "RelationGraph":
+        graph = cls()
+        graph.add_relations(openlabel.relations or {}, frame_uid=None)
+        for frame_uid, frame in (openlabel.frames or {}).items():
+            if frame.relations:
+                graph.add_relations(frame.relations, frame_uid=frame_uid)
+        return graph
+
+    def add_relations(self, relations: Mapping[RelationUid, Relation], frame_uid: Optional[Uid]) -> None:
+        for relation_uid, relation in relations.items():
+            self._relations_by_type.setdefault(relation.type, []).append((relation_uid, relation, frame_uid))
+            for role, agents in ((RdfRole.Subject, relation.rdf_subjects), (RdfRole.Object, relation.rdf_objects)):
+                membership = RelationMembership(relation_uid=relation_uid, relation=relation, role=role, frame_uid=frame_uid)
+                for agent in agents:
+                    self._adjacency[agent.type].setdefault(agent.uid, []).append(membership)
+
+    def elements(self, agent_type: RdfAgentType) -> Sequence[ElementUid]:
+        """All elements of this type that take part in at least one relation."""
+        return tuple(self._adjacency[agent_type])
+
+    def relations_of_type(self, relation_type: str) -> Sequence[tuple[RelationUid, Relation]]:
+        return tuple((relation_uid, relation) for relation_uid, relation, _ in self._relations_by_type.get(relation_type, ()))
+
+    def relations_of(
+        self,
+        agent_type: RdfAgentType,
+        uid: ElementUid,
+        relation_type: Optional[str] = None,
+        role: Optional[RdfRole] = None,
+        frame: Optional[FrameUid] = None,
+    ) -> list[RelationMembership]:
+        """The relations the element takes part in, optionally filtered by relation type, role and frame."""
+        frame_filter = frame_number(frame) if frame is not None else None
+        return [
+            membership
+            for membership in self._adjacency[agent_type].get(uid, ())
+            if (relation_type is None or membership.relation.type == relation_type)
+            and (role is None or membership.role == role)
+            and (frame_filter is None or membership.exists_at(frame_filter))
+        ]
+
+    def neighbors(
+        self,
+        agent_type: RdfAgentType,
+        uid: ElementUid,
+        relation_type: Optional[str] = None,
+        direction: Direction = Direction.Both,
+        neighbor_type: Optional[RdfAgentType] = None,
+        frame: Optional[FrameUid] = None,
+    ) -> list[RdfAgent]:
+        """Elements connected to this element by a single relation, in order of first occurrence and without duplicates."""
+        roles = {
+            Direction.Outgoing: (RdfRole.Subject,),
+            Direction.Incoming: (RdfRole.Object,),
+            Direction.Both: (RdfRole.Subject, RdfRole.Object),
+        }[direction]
+
+        found: dict[tuple[RdfAgentType, ElementUid], RdfAgent] = {}
+        for membership in self.relations_of(agent_type, uid, relation_type=relation_type, frame=frame):
+            if membership.role not in roles:
+                continue
+            relation = membership.relation
+            others = relation.rdf_objects if membership.role == RdfRole.Subject else relation.rdf_subjects
+            for other in others:
+                if (neighbor_type is None or other.type == neighbor_type) and (other.type, other.uid) != (agent_type, uid):
+                    found.setdefault((other.type, other.uid), other)
+        return list(found.values())
+
+    def reachable(
+        self,
+        agent_type: RdfAgentType,
+        uid: ElementUid,
+        relation_types: Optional[Sequence[str]] = None,
+        direction: Direction = Direction.Outgoing,
+        neighbor_type: Optional[RdfAgentType] = None,
+        max_depth: Optional[int] = None,
+        frame: Optional[FrameUid] = None,
+    ) -> list[tuple[RdfAgent, int]]:
+        """
+        Breadth-first traversal from the element along relations of the given types.
+        Returns the reached elements, not including the start, with their distance in number of relations.
+        If neighbor_type is set, the traversal only passes through elements of that type.
+        """
+        visited = {(agent_type, uid)}
+        result: list[tuple[RdfAgent, int]] = []
+        queue = deque([(agent_type, uid, 0)])
+        while queue:
+            current_type, current_uid, depth = queue.popleft()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for relation_type in relation_types if relation_types is not None else (None,):
+                for neighbor in self.neighbors(current_type, current_uid, relation_type, direction, neighbor_type, frame):
+                    if (neighbor.type, neighbor.uid) in visited:
+                        continue
+                    visited.add((neighbor.type, neighbor.uid))
+                    result.append((neighbor, depth + 1))
+                    queue.append((neighbor.type, neighbor.uid, depth + 1))
+        return result
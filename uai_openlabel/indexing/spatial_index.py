@@ -0,0 +1,288 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Mapping, Optional, Sequence, Union
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.geometric_data import (
+    ThreeDBoundingBoxEuler,
+    ThreeDBoundingBoxQuaternion,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.object import ObjectInFrame
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import CoordinateSystemUid, Meter, ObjectUid
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
+__all__: list[str] = []
+
+
+Point3D = tuple[Meter, Meter, Meter]
+Cuboid = Union[ThreeDBoundingBoxEuler, ThreeDBoundingBoxQuaternion]
+
+
+@dataclass(frozen=True)
+class IndexedCuboid:
+    """
+    A cuboid of an object in a frame, together with its axis-aligned bounding box.
+
+    :param object_uid: The object the cuboid belongs to.
+    :param cuboid: The cuboid as found in the object_data of the ObjectInFrame.
+    :param center: The x, y, z of the cuboid.
+    :param box_min: The minimum corner of the axis-aligned box enclosing the rotated cuboid.
+    :param box_max: The maximum corner of the axis-aligned box enclosing the rotated cuboid.
+    """
+
+    object_uid: ObjectUid
+    cuboid: Cuboid
+    center: Point3D
+    box_min: Point3D
+    box_max: Point3D
+
+    @classmethod
+    def from_cuboid(cls, object_uid: ObjectUid, cuboid: Cuboid) -> "IndexedCuboid":
+        center = (cuboid.val[0], cuboid.val[1], cuboid.val[2])
+        if isinstance(cuboid, ThreeDBoundingBoxEuler):
+            euler_val = cuboid.val
+            rotation = _rotation_from_euler_zyx(euler_val[3], euler_val[4], euler_val[5])
+            size = (euler_val[6], euler_val[7], euler_val[8])
+        else:
+            quaternion_val = cuboid.val
+            rotation = _rotation_from_quaternion(quaternion_val[3], quaternion_val[4], quaternion_val[5], quaternion_val[6])
+            size = (quaternion_val[7], quaternion_val[8], quaternion_val[9])
+
+        # Half extents of the rotated cuboid along the world axes
+        half_extents = [sum(abs(rotation[row][col]) * size[col] / 2 for col in range(3)) for row in range(3)]
+        return cls(
+            object_uid=object_uid,
+            cuboid=cuboid,
+            center=center,
+            box_min=(center[0] - half_extents[0], center[1] - half_extents[1], center[2] - half_extents[2]),
+            box_max=(center[0] + half_extents[0], center[1] + half_extents[1], center[2] + half_extents[2]),
+        )
+
+
+class _Node:
+    __slots__ = ("axis", "box_max", "box_min", "entry", "left", "right")
+
+    def __init__(
+        self,
+        entry: int,
+        axis: int,
+        left: Optional["_Node"],
+        right: Optional["_Node"],
+        box_min: list[float],
+        box_max: list[float],
+    ):
+        self.entry = entry
+        self.axis = axis
+        self.left = left
+        self.right = right
+        self.box_min = box_min
+        self.box_max = box_max
+
+
+class CuboidSpatialIndex:
+    """
+    Spatial index over the cuboids of one frame, answering radius, k-nearest and box queries.
+
+    Distances are measured between cuboid centers. Box queries test against the axis-aligned box enclosing each cuboid.
+    Without NumPy, the queries are answered by a KD-tree over the cuboid centers.
+    With NumPy installed, they are answered by vectorized computations over all cuboids, which is faster
+    for the few hundred cuboids typically found in a frame.
+    Results are sorted by distance to the query point, box query results are in insertion order.
+    """
+
+    def __init__(self, cuboids: Sequence[IndexedCuboid], use_numpy: Optional[bool] = None):
+        self.cuboids: tuple[IndexedCuboid, ...] = tuple(cuboids)
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        if self.use_numpy and np is None:
+            raise ImportError("NumPy is not installed, install uai_openlabel with the numpy extra to use it")
+
+        if self.use_numpy:
+            self._centers = np.array([c.center for c in self.cuboids], dtype=float).reshape(-1, 3)
+            self._box_mins = np.array([c.box_min for c in self.cuboids], dtype=float).reshape(-1, 3)
+            self._box_maxs = np.array([c.box_max for c in self.cuboids], dtype=float).reshape(-1, 3)
+            self._root: Optional[_Node] = None
+        else:
+            self._root = self._build(list(range(len(self.cuboids))), depth=0)
+
+    @classmethod
+    def from_objects(
+        cls,
+        objects: Mapping[ObjectUid, ObjectInFrame],
+        coordinate_system: Optional[CoordinateSystemUid] = None,
+        use_numpy: Optional[bool] = None,
+    ) -> "CuboidSpatialIndex":
+        """Indexes all cuboids of the objects. If a coordinate system is given, only cuboids in it are indexed."""
+        cuboids = [
+            IndexedCuboid.from_cuboid(object_uid, cuboid)
+            for object_uid, object_in_frame in objects.items()
+            for cuboid in object_in_frame.object_data.cuboid or ()
+            if coordinate_system is None or cuboid.coordinate_system == coordinate_system
+        ]
+        return cls(cuboids, use_numpy)
+
+    def __len__(self) -> int:
+        return len(self.cuboids)
+
+    def within_radius(self, point: Point3D, radius: Meter) -> list[IndexedCuboid]:
+        """All cuboids whose center is at most radius away from the point."""
+        if self.use_numpy:
+            squared_distances = ((self._centers - np.asarray(point, dtype=float)) ** 2).sum(axis=1)
+            hits = np.nonzero(squared_distances <= radius * radius)[0]
+            order = hits[np.argsort(squared_distances[hits], kind="stable")]
+            return [self.cuboids[i] for i in order]
+
+        found: list[tuple[float, int]] = []
+        self._collect_within_radius(self._root, point, radius * radius, found)
+        return [self.cuboids[i] for _, i in sorted(found)]
+
+    def nearest(self, point: Point3D, k: int = 1) -> list[IndexedCuboid]:
+        """The k cuboids whose centers are closest to the point."""
+        if k <= 0 or not self.cuboids:
+            return []
+        if self.use_numpy:
+            squared_distances = ((self._centers - np.asarray(point, dtype=float)) ** 2).sum(axis=1)
+            return [self.cuboids[i] for i in np.argsort(squared_distances, kind="stable")[:k]]
+
+        # Best-first search: nodes are visited in order of the distance of their bounding box to the point
+        best: list[tuple[float, int]] = []  # max-heap of the k best found so far, via negated distances
+        candidates: list[tuple[float, int, _Node]] = []
+        if self._root is not None:
+            candidates.append((0.0, id(self._root), self._root))
+        while candidates:
+            box_distance, _, node = heapq.heappop(candidates)
+            if len(best) == k and box_distance > -best[0][0]:
+                break
+            distance = _squared_distance(point, self.cuboids[node.entry].center)
+            if len(best) < k:
+                heapq.heappush(best, (-distance, -node.entry))
+            elif (distance, node.entry) < (-best[0][0], -best[0][1]):
+                heapq.heapreplace(best, (-distance, -node.entry))
+            for child in (node.left, node.right):
+                if child is not None:
+                    heapq.heappush(candidates, (_squared_distance_to_box(point, child), id(child), child))
+        return [self.cuboids[i] for _, i in sorted((-d, -i) for d, i in best)]
+
+    def intersecting_box(self, box_min: Point3D, box_max: Point3D) -> list[IndexedCuboid]:
+        """All cuboids whose axis-aligned bounding box intersects the axis-aligned box given by its corners."""
+        if self.use_numpy:
+            mask = np.all(self._box_maxs >= np.asarray(box_min, dtype=float), axis=1) & np.all(
+                self._box_mins <= np.asarray(box_max, dtype=float), axis=1
+            )
+            return [self.cuboids[i] for i in np.nonzero(mask)[0]]
+
+        found: list[int] = []
+        self._collect_intersecting(self._root, box_min, box_max, found)
+        return [self.cuboids[i] for i in sorted(found)]
+
+    def within_radius_of_object(self, object_uid: ObjectUid, radius: Meter) -> list[IndexedCuboid]:
+        """All cuboids of other objects whose center is at most radius away from the center of the object's first cuboid."""
+        reference = next((c for c in self.cuboids if c.object_uid == object_uid), None)
+        if reference is None:
+            return []
+        return [c for c in self.within_radius(reference.center, radius) if c.object_uid != object_uid]
+
+    def _build(self, entries: list[int], depth: int) -> Optional[_Node]:
+        if not entries:
+            return None
+        axis = depth % 3
+        entries.sort(key=lambda i: self.cuboids[i].center[axis])
+        median = len(entries) // 2
+        left = self._build(entries[:median], depth + 1)
+        right = self._build(entries[median + 1 :], depth + 1)
+
+        cuboid = self.cuboids[entries[median]]
+        box_min, box_max = list(cuboid.box_min), list(cuboid.box_max)
+        for child in (left, right):
+            if child is not None:
+                for dim in range(3):
+                    box_min[dim] = min(box_min[dim], child.box_min[dim])
+                    box_max[dim] = max(box_max[dim], child.box_max[dim])
+        return _Node(entries[median], axis, left, right, box_min, box_max)
+
+    def _collect_within_radius(
+        self, node: Optional[_Node], point: Point3D, squared_radius: float, found: list[tuple[float, int]]
+    ) -> None:
+        if node is None or _squared_distance_to_box(point, node) > squared_radius:
+            return
+        distance = _squared_distance(point, self.cuboids[node.entry].center)
+        if distance <= squared_radius:
+            found.append((distance, node.entry))
+        self._collect_within_radius(node.left, point, squared_radius, found)
+        self._collect_within_radius(node.right, point, squared_radius, found)
+
+    def _collect_intersecting(self, node: Optional[_Node], box_min: Point3D, box_max: Point3D, found: list[int]) -> None:
+        if node is None or not _boxes_intersect(node.box_min, node.box_max, box_min, box_max):
+            return
+        cuboid = self.cuboids[node.entry]
+        if _boxes_intersect(cuboid.box_min, cuboid.box_max, box_min, box_max):
+            found.append(node.entry)
+        self._collect_intersecting(node.left, box_min, box_max, found)
+        self._collect_intersecting(node.right, box_min, box_max, found)
+
+
+def _squared_distance(a: Point3D, b: Point3D) -> float:
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+def _squared_distance_to_box(point: Point3D, node: _Node) -> float:
+    distance = 0.0
+    for dim in range(3):
+        if point[dim] < node.box_min[dim]:
+            distance += (node.box_min[dim] - point[dim]) ** 2
+        elif point[dim] > node.box_max[dim]:
+            distance += (point[dim] - node.box_max[dim]) ** 2
+    return distance
+
+
+def _boxes_intersect(a_min: Sequence[float], a_max: Sequence[float], b_min: Sequence[float], b_max: Sequence[float]) -> bool:
+    return all(a_max[dim] >= b_min[dim] and a_min[dim] <= b_max[dim] for dim in range(3))
+
+
+# The rotations below duplicate uai_openlabel.geometry.rotation on purpose: that module requires NumPy, while this
+# index must also work with the standard library only. A test checks that both agree.
+def _rotation_from_euler_zyx(roll: float, pitch: float, yaw: float) -> list[list[float]]:
+    """R = Rz(yaw) * Ry(pitch) * Rx(roll)"""
+    cr, sr = math.cos(roll), math.sin(roll)
+    cp, sp = math.cos(pitch), math.sin(pitch)
+    cy, sy = math.cos(yaw), math.sin(yaw)
+    return [
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+        [-sp, cp * sr, cp * cr],
+    ]
+
+
+def _rotation_from_quaternion(x: float, y: float, z: float, w: float) -> list[list[float]]:
+    """The quaternion is given in the SciPy convention (x, y, z, w) and may be in non-unit form."""
+    norm = math.sqrt(x * x + y * y + z * z + w * w)
+    if norm == 0.0:
+        raise ValueError("Can't compute a rotation from a quaternion with norm 0")
+    x, y, z, w = x / norm, y / norm, z / norm, w / norm
+    return [
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ]
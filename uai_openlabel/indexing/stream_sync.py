@@ -0,0 +1,205 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Mapping, Optional, Union
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.timestamp_index import (
+    TimestampIndex,
+    TimestampUnit,
+    parse_timestamp_ns,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.stream.stream import Stream
+
+# noinspection PyProtectedMember
+from uai_openlabel.stream.stream_properties import SyncByFrameShift, SyncByFrameStream
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import FrameUid, Number, StreamUid, Uid
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+if TYPE_CHECKING:
+    from uai_openlabel.openlabel import OpenLabel
+
+__all__: list[str] = []
+
+Sync = Union[SyncByFrameStream, SyncByFrameShift]
+
+
+@dataclass(frozen=True)
+class StreamAssociation:
+    """
+    A frame of one stream and the frame of another stream with the closest timestamp.
+
+    :param source_frame: The master frame holding the source stream frame.
+    :param source_frame_stream: The internal frame number of the source stream.
+    :param target_frame: The master frame holding the target stream frame.
+    :param target_frame_stream: The internal frame number of the target stream.
+    :param time_difference_ns: The target timestamp minus the source timestamp, in nanoseconds.
+    """
+
+    source_frame: Uid
+    source_frame_stream: int
+    target_frame: Uid
+    target_frame_stream: int
+    time_difference_ns: int
+
+
+class _StreamTable:
+    def __init__(self) -> None:
+        self.stream_frame_by_master: dict[int, int] = {}
+        self.masters_by_stream_frame: dict[int, list[Uid]] = {}
+        self.timestamps: list[tuple[Uid, int]] = []
+        self.timestamp_by_master: dict[int, int] = {}
+        self._timestamp_index: Optional[TimestampIndex] = None
+
+    def add(self, master_frame: Uid, stream_frame: int, timestamp_ns: Optional[int]) -> None:
+        self.stream_frame_by_master[frame_number(master_frame)] = stream_frame
+        self.masters_by_stream_frame.setdefault(stream_frame, []).append(master_frame)
+        if timestamp_ns is not None:
+            self.timestamps.append((master_frame, timestamp_ns))
+            self.timestamp_by_master[frame_number(master_frame)] = timestamp_ns
+
+    @property
+    def timestamp_index(self) -> TimestampIndex:
+        if self._timestamp_index is None:
+            self._timestamp_index = TimestampIndex(self.timestamps, TimestampUnit.Nanosecond)
+        return self._timestamp_index
+
+
+class StreamSyncIndex:
+    """
+    Lookup tables between the master frames of an OpenLABEL and the internal frame numbers of its streams,
+    built in one pass over the frames.
+
+    The sync of a stream in FrameProperties.streams of a frame takes precedence over the sync of the stream itself.
+    A SyncByFrameStream gives the stream frame directly, a SyncByFrameShift gives the difference between the master frame
+    and the stream frame, i.e. stream frame = master frame - frame_shift. Without any sync, the stream frame equals
+    the master frame. Only streams defined in the OpenLABEL or in the frame properties are indexed. A stream defined only
+    in the frame properties of some frames is indexed at every frame like a stream of the OpenLABEL without sync.
+    Frames are processed in the order of their frame numbers.
+
+    Timestamps are taken from SyncByFrameStream.timestamp and interpreted in the given unit.
+    """
+
+    def __init__(
+        self,
+        streams: Mapping[StreamUid, Stream],
+        frames: Mapping[Uid, Frame],
+        unit: TimestampUnit = TimestampUnit.Second,
+    ):
+        self.unit = unit
+        default_syncs = {stream_uid: _sync(stream) for stream_uid, stream in streams.items()}
+        self._tables: dict[StreamUid, _StreamTable] = {stream_uid: _StreamTable() for stream_uid in streams}
+
+        sorted_frames = sorted(frames.items(), key=lambda item: frame_number(item[0]))
+        frame_syncs_by_frame = []
+        for frame_uid, frame in sorted_frames:
+            frame_streams = frame.frame_properties.streams if frame.frame_properties is not None else None
+            frame_syncs = {stream_uid: _sync(stream) for stream_uid, stream in (frame_streams or {}).items()}
+            frame_syncs_by_frame.append(frame_syncs)
+            for stream_uid in frame_syncs.keys() - self._tables.keys():
+                self._tables[stream_uid] = _StreamTable()
+
+        for (frame_uid, _), frame_syncs in zip(sorted_frames, frame_syncs_by_frame):
+            master = frame_number(frame_uid)
+            for stream_uid, table in self._tables.items():
+                stream_frame = _stream_frame(master, default_syncs.get(stream_uid), master)
+                frame_sync = frame_syncs.get(stream_uid)
+                stream_frame = _stream_frame(master, frame_sync, stream_frame)
+                timestamp = frame_sync.timestamp if isinstance(frame_sync, SyncByFrameStream) else None
+                table.add(frame_uid, stream_frame, parse_timestamp_ns(timestamp, unit) if timestamp is not None else None)
+
+    @classmethod
+    def from_openlabel(cls, openlabel: "OpenLabel", unit: TimestampUnit = TimestampUnit.Second) -> "StreamSyncIndex":
+        return cls(openlabel.streams or {}, openlabel.frames or {}, unit)
+
+    @property
+    def streams(self) -> list[StreamUid]:
+        return list(self._tables)
+
+    def stream_frame(self, stream: StreamUid, master_frame: FrameUid) -> Optional[int]:
+        """The internal frame number of the stream at the master frame."""
+        table = self._tables.get(stream)
+        return table.stream_frame_by_master.get(frame_number(master_frame)) if table is not None else None
+
+    def master_frames(self, stream: StreamUid, stream_frame: FrameUid) -> tuple[Uid, ...]:
+        """The master frames holding the internal frame of the stream, sorted by frame number."""
+        table = self._tables.get(stream)
+        return tuple(table.masters_by_stream_frame.get(frame_number(stream_frame), ())) if table is not None else ()
+
+    def master_frame(self, stream: StreamUid, stream_frame: FrameUid) -> Optional[Uid]:
+        """The master frame with the lowest frame number holding the internal frame of the stream."""
+        master_frames = self.master_frames(stream, stream_frame)
+        return master_frames[0] if master_frames else None
+
+    def timestamp_ns(self, stream: StreamUid, master_frame: FrameUid) -> Optional[int]:
+        """The timestamp of the stream at the master frame, in nanoseconds."""
+        table = self._tables.get(stream)
+        return table.timestamp_by_master.get(frame_number(master_frame)) if table is not None else None
+
+    def nearest(self, stream: StreamUid, timestamp: Union[str, Number]) -> Optional[Uid]:
+        """The master frame whose timestamp of the stream is closest to the timestamp."""
+        table = self._tables.get(stream)
+        return table.timestamp_index.nearest(parse_timestamp_ns(timestamp, self.unit)) if table is not None else None
+
+    def associate(
+        self, source: StreamUid, target: StreamUid, max_difference: Optional[Number] = None
+    ) -> list[StreamAssociation]:
+        """
+        Associates every timestamped frame of the source stream with the frame of the target stream closest in time,
+        sorted by source timestamp. Pairs further apart than max_difference, in the unit of this index, are left out.
+        """
+        source_table, target_table = self._tables.get(source), self._tables.get(target)
+        if source_table is None or target_table is None:
+            return []
+        max_difference_ns = parse_timestamp_ns(max_difference, self.unit) if max_difference is not None else None
+
+        associations = []
+        for source_frame, source_ns in sorted(source_table.timestamps, key=lambda item: item[1]):
+            target_frame = target_table.timestamp_index.nearest(source_ns)
+            if target_frame is None:
+                break
+            target_ns = target_table.timestamp_by_master[frame_number(target_frame)]
+            if max_difference_ns is not None and abs(target_ns - source_ns) > max_difference_ns:
+                continue
+            associations.append(
+                StreamAssociation(
+                    source_frame=source_frame,
+                    source_frame_stream=source_table.stream_frame_by_master[frame_number(source_frame)],
+                    target_frame=target_frame,
+                    target_frame_stream=target_table.stream_frame_by_master[frame_number(target_frame)],
+                    time_difference_ns=target_ns - source_ns,
+                )
+            )
+        return associations
+
+
+def _sync(stream: Stream) -> Optional[Sync]:
+    return stream.stream_properties.sync if stream.stream_properties is not None else None
+
+
+def _stream_frame(master: int, sync: Optional[Sync], default: int) -> int:
+    if isinstance(sync, SyncByFrameShift) and sync.frame_shift is not None:
+        return master - sync.frame_shift
+    if isinstance(sync, SyncByFrameStream) and sync.frame_stream is not None:
+        return frame_number(sync.frame_stream)
+    return default
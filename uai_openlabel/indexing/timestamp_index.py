@@ -0,0 +1,184 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from enum import Enum
+from typing import TYPE_CHECKING, Iterable, Mapping, Optional, Sequence, Union
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.stream.stream_properties import SyncByFrameStream
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import FrameUid, Number, StreamUid, Uid
+
+if TYPE_CHECKING:
+    from uai_openlabel.openlabel import OpenLabel
+
+__all__: list[str] = []
+
+
+class TimestampUnit(Enum):
+    """The unit of numerical timestamps, given as the number of nanoseconds per unit."""
+
+    Second = 1_000_000_000
+    Millisecond = 1_000_000
+    Microsecond = 1_000
+    Nanosecond = 1
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_FRACTION = re.compile(r"(?<=\d\d:\d\d:\d\d)[.,](\d+)")
+
+
+def parse_timestamp_ns(timestamp: Union[str, Number], unit: TimestampUnit = TimestampUnit.Second) -> int:
+    """
+    Converts an OpenLABEL timestamp to integer nanoseconds.
+
+    Numbers and numerical strings, e.g. "1700126000005000", are interpreted in the given unit.
+    Other strings are parsed as ISO 8601 date and time, e.g. "2023-11-16T09:13:20.005Z", and converted to nanoseconds
+    since the Unix epoch. Date and times without time zone are assumed to be in UTC. Fractional seconds are kept
+    up to nanoseconds, further digits are truncated.
+    """
+    if isinstance(timestamp, bool):
+        raise TypeError(f"Can't parse timestamp {timestamp!r}")
+    if isinstance(timestamp, int):
+        return timestamp * unit.value
+    if isinstance(timestamp, float):
+        # Going via the shortest string representation avoids binary rounding errors, e.g. for 0.1 s
+        return _decimal_to_ns(Decimal(repr(timestamp)), unit, timestamp)
+
+    stripped = timestamp.strip()
+    try:
+        return _decimal_to_ns(Decimal(stripped), unit, timestamp)
+    except InvalidOperation:
+        pass
+
+    # datetime holds microseconds at most, and before Python 3.11 fromisoformat only accepts 3 or 6 fractional digits
+    fraction_ns = 0
+    fraction = _FRACTION.search(stripped)
+    if fraction is not None:
+        fraction_ns = int(fraction.group(1)[:9].ljust(9, "0"))
+        stripped = stripped[: fraction.start()] + stripped[fraction.end() :]
+    try:
+        parsed = datetime.fromisoformat(stripped[:-1] + "+00:00" if stripped.endswith("Z") else stripped)
+    except ValueError:
+        raise ValueError(f"Can't parse timestamp {timestamp!r}") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    delta = parsed - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000_000 + fraction_ns
+
+
+def _decimal_to_ns(value: Decimal, unit: TimestampUnit, timestamp_for_logging: Union[str, Number]) -> int:
+    if not value.is_finite():
+        raise ValueError(f"Can't parse timestamp {timestamp_for_logging!r}")
+    return int((value * unit.value).to_integral_value())
+
+
+class TimestampIndex:
+    """
+    Frames sorted by their timestamp, for finding the frame closest to a point in time via binary search.
+
+    All timestamps are parsed once when building the index. Query timestamps are given in the same form as in the
+    OpenLABEL data and are parsed with the same unit.
+    """
+
+    def __init__(self, frame_timestamps: Iterable[tuple[Uid, Union[str, Number]]], unit: TimestampUnit = TimestampUnit.Second):
+        self.unit = unit
+
+        parsed = sorted(((parse_timestamp_ns(ts, unit), frame_uid) for frame_uid, ts in frame_timestamps), key=lambda p: p[0])
+        self._timestamps_ns = array("q", (ts for ts, _ in parsed))
+        self._frame_uids: list[Uid] = [frame_uid for _, frame_uid in parsed]
+        self._timestamp_by_frame: dict[str, int] = {str(frame_uid): ts for ts, frame_uid in parsed}
+
+    @classmethod
+    def from_frames(
+        cls,
+        frames: Mapping[Uid, Frame],
+        unit: TimestampUnit = TimestampUnit.Second,
+        stream: Optional[StreamUid] = None,
+    ) -> "TimestampIndex":
+        """
+        Indexes FrameProperties.timestamp of every frame. If a stream is given, the timestamps of this stream given by
+        its SyncByFrameStream in FrameProperties.streams are used instead. Frames without timestamp are left out.
+        """
+        frame_timestamps: list[tuple[Uid, Union[str, Number]]] = []
+        for frame_uid, frame in frames.items():
+            timestamp = _frame_timestamp(frame) if stream is None else _stream_timestamp(frame, stream)
+            if timestamp is not None:
+                frame_timestamps.append((frame_uid, timestamp))
+        return cls(frame_timestamps, unit)
+
+    @classmethod
+    def from_openlabel(
+        cls,
+        openlabel: "OpenLabel",
+        unit: TimestampUnit = TimestampUnit.Second,
+        stream: Optional[StreamUid] = None,
+    ) -> "TimestampIndex":
+        return cls.from_frames(openlabel.frames or {}, unit, stream)
+
+    def __len__(self) -> int:
+        return len(self._frame_uids)
+
+    def timestamp_ns(self, frame_uid: FrameUid) -> Optional[int]:
+        return self._timestamp_by_frame.get(str(frame_uid))
+
+    def floor(self, timestamp: Union[str, Number]) -> Optional[Uid]:
+        """The last frame at or before the timestamp."""
+        position = bisect_right(self._timestamps_ns, parse_timestamp_ns(timestamp, self.unit))
+        return self._frame_uids[position - 1] if position > 0 else None
+
+    def ceil(self, timestamp: Union[str, Number]) -> Optional[Uid]:
+        """The first frame at or after the timestamp."""
+        position = bisect_left(self._timestamps_ns, parse_timestamp_ns(timestamp, self.unit))
+        return self._frame_uids[position] if position < len(self._frame_uids) else None
+
+    def nearest(self, timestamp: Union[str, Number]) -> Optional[Uid]:
+        """The frame closest to the timestamp. On a tie, the earlier frame is returned."""
+        timestamp_ns = parse_timestamp_ns(timestamp, self.unit)
+        position = bisect_left(self._timestamps_ns, timestamp_ns)
+        if position == len(self._frame_uids):
+            return self._frame_uids[-1] if self._frame_uids else None
+        if position == 0:
+            return self._frame_uids[0]
+        before, after = self._timestamps_ns[position - 1], self._timestamps_ns[position]
+        return self._frame_uids[position - 1] if timestamp_ns - before <= after - timestamp_ns else self._frame_uids[position]
+
+    def window(self, start: Union[str, Number], end: Union[str, Number]) -> Sequence[Uid]:
+        """All frames with start <= timestamp <= end, sorted by timestamp."""
+        first = bisect_left(self._timestamps_ns, parse_timestamp_ns(start, self.unit))
+        last = bisect_right(self._timestamps_ns, parse_timestamp_ns(end, self.unit))
+        return tuple(self._frame_uids[first:last])
+
+
+def _frame_timestamp(frame: Frame) -> Optional[Union[str, Number]]:
+    return frame.frame_properties.timestamp if frame.frame_properties is not None else None
+
+
+def _stream_timestamp(frame: Frame, stream: StreamUid) -> Optional[Union[str, Number]]:
+    if frame.frame_properties is None or frame.frame_properties.streams is None:
+        return None
+    frame_stream = frame.frame_properties.streams.get(stream)
+    if frame_stream is None or frame_stream.stream_properties is None:
+        return None
+    sync = frame_stream.stream_properties.sync
+    return sync.timestamp if isinstance(sync, SyncByFrameStream) else None
@@ -13,7 +13,7 @@
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 from dataclasses import dataclass, field
-from typing import Any, Mapping, Optional, Sequence, TypeVar, Union, cast
+from typing import TYPE_CHECKING, Any, Mapping, Optional, Sequence, TypeVar, Union, cast
 
 from uai_openlabel import ElementDataPointer, map_data_to_data_pointer_type
 
@@ -41,6 +41,12 @@ from uai_openlabel.frame import Frame
 # noinspection PyProtectedMember
 from uai_openlabel.frame_interval import FrameInterval
 
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.data_pointer_index import DataPointerIndex
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.timestamp_index import TimestampUnit
+
 # noinspection PyProtectedMember
 from uai_openlabel.metadata import Metadata
 
@@ -73,6 +79,9 @@ from uai_openlabel.types_and_constants import (
     Uid,
 )
 
+if TYPE_CHECKING:
+    from uai_openlabel.geometry.trajectory import Trajectory
+
 __all__: list[str] = []
 
 T = TypeVar("T", bound="OpenLabel")
@@ -215,13 +224,45 @@ class OpenLabel(JsonSnakeCaseSerializableMixin):
             tags=None,
         )
 
+    def update_frame_intervals(self) -> DataPointerIndex:
+        """
+        Derives frame_intervals and the element data pointers from the frames in one pass, replacing the existing ones
+        of all elements with in-frame data. Elements with static data only keep theirs.
+        Keep the returned index to update them after editing frames, without rescanning all frames:
+        call its add_frame() or remove_frame() for each edit, then apply() it to this OpenLabel. Elements with in-frame
+        data that are defined after this call are set by the next apply().
+        """
+        index = DataPointerIndex.from_openlabel(self)
+        index.apply(self)
+        return index
+
+    def trajectories(
+        self,
+        cuboid_name: Optional[AttributeName] = None,
+        coordinate_system: Optional[CoordinateSystemUid] = None,
+        unit: TimestampUnit = TimestampUnit.Second,
+    ) -> dict[ObjectUid, "Trajectory"]:
+        """
+        The timestamps, cuboid centers, yaw and sizes of every object with cuboid data, as arrays ordered by frame.
+        See uai_openlabel.geometry.extract_trajectories, this requires NumPy.
+        """
+        from uai_openlabel.geometry.trajectory import extract_trajectories
+
+        return extract_trajectories(self.frames or {}, cuboid_name, coordinate_system, unit)
+
     @classmethod
-    def from_dict(cls: type[J], kvs: dict[str, Any], *, infer_missing: bool = False) -> J:
+    def from_dict(cls: type[J], kvs: dict[str, Any], *, infer_missing: bool = False, validate: bool = False) -> J:
         """
         Any ASAM OpenLABEL JSON data shall have a root key named openlabel.
+        With validate, kvs is checked against the JSON schema first, and a SchemaValidationError listing all violations
+        is raised for invalid data, see uai_openlabel.validate_openlabel.
         """
         if list(kvs.keys()) == ["openlabel"]:
             kvs = kvs["openlabel"]
+        if validate:
+            from uai_openlabel.schema_validation import validate_openlabel
+
+            validate_openlabel(kvs)
         return super().from_dict(kvs, infer_missing=infer_missing)
 
     def to_dict(
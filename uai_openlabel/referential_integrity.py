@@ -0,0 +1,314 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Checks of the references within an OpenLABEL document, which its JSON schema can't express: UIDs of elements,
+coordinate systems, streams and ontologies have to be declared, and the frame intervals and data pointers of elements
+have to match the frames.
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, cast
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.data_to_pointer_type_mapping import (
+    map_data_to_data_pointer_type,
+)
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.generic_data import Attributes, GenericData
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.element_data_pointer import ElementDataPointer
+
+# noinspection PyProtectedMember
+from uai_openlabel.elements.relation import RdfAgentType, Relation
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame_interval import FrameIntervalSet
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.data_pointer_index import PointerType
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.element_frame_index import _iter_elements_in_frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.openlabel import OpenLabel
+
+# noinspection PyProtectedMember
+from uai_openlabel.schema_validation import SchemaPath, _json_path
+
+# noinspection PyProtectedMember
+from uai_openlabel.streaming import OpenLabelReader, Source
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import AttributeName, ElementUid, FrameUid, Uid
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+__all__: list[str] = []
+
+_ELEMENT_FIELDS = {
+    RdfAgentType.Object: "objects",
+    RdfAgentType.Action: "actions",
+    RdfAgentType.Event: "events",
+    RdfAgentType.Context: "contexts",
+}
+
+
+@dataclass(frozen=True)
+class IntegrityViolation:
+    """A broken reference or an inconsistency, with the path of the value where it was found."""
+
+    path: SchemaPath
+    message: str
+
+    @property
+    def json_path(self) -> str:
+        return _json_path(self.path)
+
+    def __str__(self) -> str:
+        return f"{self.json_path}: {self.message}"
+
+
+class _Track:
+    """
+    The frames in which an element has data, and the frames and types of its named data.
+    Frames are kept as (start, end) ranges, the last of which grows while the frames are consecutive.
+    """
+
+    __slots__ = ("data_frames", "data_types", "frames")
+
+    def __init__(self) -> None:
+        self.frames: list[tuple[int, int]] = []
+        self.data_frames: dict[AttributeName, list[tuple[int, int]]] = {}
+        self.data_types: dict[AttributeName, set[PointerType]] = {}
+
+
+class IntegrityChecker:
+    """
+    Checks the references of an OpenLABEL document in a single pass over its frames:
+
+    - Elements in frames and RDF agents of relations are declared in the OpenLabel.
+    - Coordinate systems of data, transforms and coordinate system parents and children are declared.
+    - Streams of frame properties are declared, as are the ontologies of elements and relations.
+    - The frame intervals of the OpenLabel are those of its frames.
+    - Elements have in-frame data in exactly the frames of their frame_intervals, without gaps. This includes
+      elements with frame_intervals or data pointers that appear in none of the frames.
+    - Declared element data pointers name the in-frame data of the element, with its type and frame intervals.
+
+    Create the checker with the OpenLabel, whose frames may be omitted, and add each frame with add_frame().
+    Only the frame ranges, names and types of in-frame data are kept, so memory grows with the number of tracks,
+    data names and their gaps, not with the number of frames or the size of the data.
+    """
+
+    def __init__(self, openlabel: OpenLabel):
+        self._openlabel = openlabel
+        self._elements: dict[RdfAgentType, Mapping[ElementUid, Any]] = {
+            element_type: getattr(openlabel, field) or {} for element_type, field in _ELEMENT_FIELDS.items()
+        }
+        self._coordinate_systems = openlabel.coordinate_systems or {}
+        self._tracks: dict[RdfAgentType, dict[ElementUid, _Track]] = {element_type: {} for element_type in RdfAgentType}
+        self._frames: list[tuple[int, int]] = []
+        self._violations: list[IntegrityViolation] = []
+        self._check_header()
+
+    def add_frame(self, frame_uid: FrameUid, frame: Frame) -> None:
+        number = frame_number(frame_uid)
+        _add_frame(self._frames, number)
+        path: SchemaPath = ("frames", str(frame_uid))
+        for element_type, in_frame in _iter_elements_in_frame(frame):
+            declared = self._elements[element_type]
+            tracks = self._tracks[element_type]
+            field = _ELEMENT_FIELDS[element_type]
+            for uid, element in in_frame:
+                element_path = (*path, field, str(uid))
+                if uid not in declared:
+                    self._report(element_path, f"Undeclared {element_type.value} {uid}")
+                    continue
+                track = tracks.get(uid)
+                if track is None:
+                    track = tracks[uid] = _Track()
+                _add_frame(track.frames, number)
+                element_data = cast(Attributes, getattr(element, f"{element_type.value}_data"))
+                for data in element_data:
+                    if data.name is not None:
+                        _add_frame(track.data_frames.setdefault(data.name, []), number)
+                        track.data_types.setdefault(data.name, set()).add(map_data_to_data_pointer_type(data))
+                    if data.coordinate_system is not None or data.attributes is not None:
+                        self._check_data((data,), (*element_path, f"{element_type.value}_data"))
+        for relation_uid, relation in (frame.relations or {}).items():
+            self._check_relation(relation, (*path, "relations", str(relation_uid)))
+        properties = frame.frame_properties
+        if properties is not None:
+            for stream in properties.streams or {}:
+                if stream not in (self._openlabel.streams or {}):
+                    self._report((*path, "frame_properties", "streams", stream), f"Undeclared stream {stream}")
+            for name, transform in (properties.transforms or {}).items():
+                for key in ("src", "dst"):
+                    self._check_coordinate_system(getattr(transform, key), (*path, "frame_properties", "transforms", name, key))
+
+    def add_frames(self, frames: Mapping[Uid, Frame]) -> None:
+        for frame_uid, frame in frames.items():
+            self.add_frame(frame_uid, frame)
+
+    def violations(self) -> list[IntegrityViolation]:
+        """All violations found in the OpenLabel and the frames added so far."""
+        violations = list(self._violations)
+        if self._frames and self._openlabel.frame_intervals is not None:
+            frames = FrameIntervalSet(self._frames)
+            if FrameIntervalSet.from_intervals(self._openlabel.frame_intervals) != frames:
+                violations.append(IntegrityViolation(("frame_intervals",), f"The frames are {_describe(frames)}"))
+        for element_type, elements in self._elements.items():
+            field = _ELEMENT_FIELDS[element_type]
+            tracks = self._tracks[element_type]
+            pointers_field = f"{element_type.value}_data_pointers"
+            for uid, element in elements.items():
+                track = tracks.get(uid)
+                if track is None:
+                    # Without any frames added, only the header is checked
+                    if not self._frames or (element.frame_intervals is None and getattr(element, pointers_field) is None):
+                        continue
+                    # The declared frames and data pointers of an element without in-frame data are all gaps
+                    track = _Track()
+                violations.extend(self._track_violations(element_type, (field, str(uid)), element, track))
+        return violations
+
+    def _check_header(self) -> None:
+        openlabel = self._openlabel
+        for uid, coordinate_system in self._coordinate_systems.items():
+            path: SchemaPath = ("coordinate_systems", uid)
+            if coordinate_system.parent != "":
+                self._check_coordinate_system(coordinate_system.parent, (*path, "parent"))
+            for index, child in enumerate(coordinate_system.children or ()):
+                self._check_coordinate_system(child, (*path, "children", index))
+        for element_type, elements in self._elements.items():
+            field = _ELEMENT_FIELDS[element_type]
+            for uid, element in elements.items():
+                self._check_ontology(element.ontology_uid, (field, str(uid), "ontology_uid"))
+                element_data = getattr(element, f"{element_type.value}_data")
+                if element_data is not None:
+                    self._check_data(element_data, (field, str(uid), f"{element_type.value}_data"))
+        for relation_uid, relation in (openlabel.relations or {}).items():
+            self._check_relation(relation, ("relations", str(relation_uid)))
+
+    def _check_data(self, element_data: Iterable[GenericData], path: SchemaPath) -> None:
+        for data in element_data:
+            if data.coordinate_system is not None:
+                self._check_coordinate_system(data.coordinate_system, (*path, data.name or "", "coordinate_system"))
+            if data.attributes is not None:
+                self._check_data(data.attributes, (*path, data.name or "", "attributes"))
+
+    def _check_relation(self, relation: Relation, path: SchemaPath) -> None:
+        self._check_ontology(relation.ontology_uid, (*path, "ontology_uid"))
+        for role in ("rdf_subjects", "rdf_objects"):
+            for index, agent in enumerate(getattr(relation, role)):
+                if agent.uid not in self._elements[agent.type]:
+                    self._report((*path, role, index), f"Undeclared {agent.type.value} {agent.uid}")
+
+    def _check_coordinate_system(self, coordinate_system: str, path: SchemaPath) -> None:
+        if coordinate_system not in self._coordinate_systems:
+            self._report(path, f"Undeclared coordinate system {coordinate_system!r}")
+
+    def _check_ontology(self, ontology_uid: Optional[str], path: SchemaPath) -> None:
+        if ontology_uid is not None and ontology_uid not in (self._openlabel.ontologies or {}):
+            self._report(path, f"Undeclared ontology {ontology_uid}")
+
+    def _track_violations(
+        self, element_type: RdfAgentType, path: SchemaPath, element: Any, track: _Track
+    ) -> list[IntegrityViolation]:
+        violations = []
+        frames = FrameIntervalSet(track.frames)
+        if element.frame_intervals is None:
+            if frames:
+                violations.append(
+                    IntegrityViolation((*path, "frame_intervals"), f"Missing, has data in frames {_describe(frames)}")
+                )
+        else:
+            declared = FrameIntervalSet.from_intervals(element.frame_intervals)
+            outside = frames - declared
+            if outside:
+                violations.append(
+                    IntegrityViolation(
+                        (*path, "frame_intervals"), f"Has data in frames {_describe(outside)} outside its frame intervals"
+                    )
+                )
+            gaps = declared - frames
+            if gaps:
+                violations.append(
+                    IntegrityViolation(
+                        (*path, "frame_intervals"), f"Has no data in frames {_describe(gaps)} of its frame intervals"
+                    )
+                )
+
+        pointers: Optional[Mapping[AttributeName, ElementDataPointer]] = getattr(element, f"{element_type.value}_data_pointers")
+        if pointers is None:
+            return violations
+        pointers_path = (*path, f"{element_type.value}_data_pointers")
+        for name in sorted(track.data_frames.keys() - pointers.keys()):
+            violations.append(IntegrityViolation(pointers_path, f"Missing pointer to the in-frame data {name!r}"))
+        for name, pointer in pointers.items():
+            if name not in track.data_frames:
+                violations.append(IntegrityViolation((*pointers_path, name), "Points to no in-frame data"))
+                continue
+            types = track.data_types[name]
+            if pointer.type is not None and types != {pointer.type}:
+                found = ", ".join(sorted(data_type.value for data_type in types))
+                violations.append(
+                    IntegrityViolation((*pointers_path, name, "type"), f"Is {pointer.type.value}, but the data is {found}")
+                )
+            data_frames = FrameIntervalSet(track.data_frames[name])
+            if FrameIntervalSet.from_intervals(pointer.frame_intervals) != data_frames:
+                violations.append(
+                    IntegrityViolation(
+                        (*pointers_path, name, "frame_intervals"), f"The data is in frames {_describe(data_frames)}"
+                    )
+                )
+        return violations
+
+    def _report(self, path: SchemaPath, message: str) -> None:
+        self._violations.append(IntegrityViolation(path, message))
+
+
+def check_integrity(openlabel: OpenLabel) -> list[IntegrityViolation]:
+    """All broken references and inconsistencies of the OpenLabel, see IntegrityChecker."""
+    checker = IntegrityChecker(openlabel)
+    checker.add_frames(openlabel.frames or {})
+    return checker.violations()
+
+
+def check_file_integrity(source: Source, chunk_size: int = 1 << 20) -> list[IntegrityViolation]:
+    """Same as check_integrity() for an OpenLABEL JSON document, which is read one frame at a time."""
+    reader = OpenLabelReader(source, chunk_size)
+    checker = IntegrityChecker(reader.header())
+    for frame_uid, frame in reader.frames():
+        checker.add_frame(frame_uid, frame)
+    return checker.violations()
+
+
+def _add_frame(ranges: list[tuple[int, int]], number: int) -> None:
+    """Adds the frame to the ranges, extending the last range if the frame continues or repeats it."""
+    if ranges and ranges[-1][0] <= number <= ranges[-1][1] + 1:
+        ranges[-1] = (ranges[-1][0], max(ranges[-1][1], number))
+    else:
+        ranges.append((number, number))
+
+
+def _describe(frames: FrameIntervalSet) -> str:
+    return ", ".join(str(start) if start == end else f"{start}-{end}" for start, end in frames.ranges)
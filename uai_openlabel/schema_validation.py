@@ -0,0 +1,508 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Validation of raw OpenLABEL JSON data against the JSON schema of the data model, before deserialization.
+The schema is generated by apischema once per class and compiled into nested checks, which report all violations
+with their paths instead of stopping at the first one.
+"""
+
+import functools
+import math
+import operator
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional, Union
+
+import apischema
+from apischema.json_schema import deserialization_schema
+
+# noinspection PyProtectedMember
+from uai_openlabel.openlabel import OpenLabel
+
+# noinspection PyProtectedMember
+from uai_openlabel.streaming import OpenLabelReader, Source
+
+__all__: list[str] = []
+
+SchemaPath = tuple[Union[str, int], ...]
+
+_Test = Callable[[Any], bool]
+_Check = Callable[[Any, SchemaPath, list["SchemaViolation"]], None]
+
+_PYTHON_TYPES: dict[str, tuple[type, ...]] = {
+    "object": (dict,),
+    "array": (list, tuple),
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+
+# Keywords without influence on validation
+_ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "default", "examples", "readOnly", "writeOnly"}
+
+
+@dataclass(frozen=True)
+class _Compiled:
+    """
+    A schema compiled into a fast test without paths and a check, which reports the violations of values failing the test.
+    Valid data is only tested, only invalid branches of the data are checked.
+    """
+
+    test: _Test
+    check: _Check
+
+
+@dataclass(frozen=True)
+class SchemaViolation:
+    """A value that doesn't match the schema, with the path of keys and list indices leading to it."""
+
+    path: SchemaPath
+    message: str
+
+    @property
+    def json_path(self) -> str:
+        """The path in JSONPath notation, e.g. $.frames['0'].objects['1'].object_data.cuboid[0].val"""
+        return _json_path(self.path)
+
+    def __str__(self) -> str:
+        return f"{self.json_path}: {self.message}"
+
+
+class SchemaValidationError(ValueError):
+    """Raised for data violating the schema, with all violations found."""
+
+    def __init__(self, violations: list[SchemaViolation]):
+        self.violations = violations
+        shown = "\n".join(str(violation) for violation in violations[:20])
+        more = f"\n... and {len(violations) - 20} more" if len(violations) > 20 else ""
+        super().__init__(f"{len(violations)} schema violation(s):\n{shown}{more}")
+
+
+class SchemaValidator:
+    """
+    A JSON schema compiled into checks. Supported are the keywords generated by apischema, i.e. type, enum, const,
+    properties, required, additionalProperties, items, prefixItems, minItems, maxItems, anyOf and local $refs,
+    as well as oneOf, allOf, minimum, maximum, exclusiveMinimum, exclusiveMaximum, minLength, maxLength and pattern.
+    Other keywords are ignored.
+    """
+
+    def __init__(self, schema: Mapping[str, Any], definitions: Optional[Mapping[str, Any]] = None):
+        self.schema = schema
+        self._definitions: Mapping[str, Any] = schema.get("$defs", {}) if definitions is None else definitions
+        # Compiled schemas by the id of their schema, which is kept alive by self.schema
+        self._compiled: dict[int, _Compiled] = {}
+        # Definitions being compiled, referenced recursively
+        self._pending: dict[str, list[_Compiled]] = {}
+        self._root = self._compile(schema)
+
+    def is_valid(self, data: Any) -> bool:
+        return self._root.test(data)
+
+    def violations(self, data: Any, path: SchemaPath = ()) -> list[SchemaViolation]:
+        """All violations of the schema by data, with their paths starting with path."""
+        violations: list[SchemaViolation] = []
+        if not self._root.test(data):
+            self._root.check(data, path, violations)
+        return violations
+
+    def validate(self, data: Any, path: SchemaPath = ()) -> None:
+        """Raises a SchemaValidationError with all violations of the schema by data, if any."""
+        violations = self.violations(data, path)
+        if violations:
+            raise SchemaValidationError(violations)
+
+    def at(self, *keys: str) -> "SchemaValidator":
+        """The validator of the values found below the keys in valid data, e.g. at("frames", "0") for a frame."""
+        schema = self.schema
+        for key in keys:
+            schema = self._member_schema(schema, key)
+        return self if schema is self.schema else SchemaValidator(schema, self._definitions)
+
+    def _member_schema(self, schema: Mapping[str, Any], key: str) -> Mapping[str, Any]:
+        schema = self._resolve(schema)
+        if key in schema.get("properties", {}):
+            return schema["properties"][key]  # type: ignore[no-any-return]
+        if isinstance(schema.get("additionalProperties"), Mapping):
+            return schema["additionalProperties"]  # type: ignore[no-any-return]
+        for branch in schema.get("anyOf", ()):
+            branch = self._resolve(branch)
+            if "properties" in branch or isinstance(branch.get("additionalProperties"), Mapping):
+                return self._member_schema(branch, key)
+        raise KeyError(f"The schema has no member {key!r}")
+
+    def _resolve(self, schema: Mapping[str, Any]) -> Mapping[str, Any]:
+        while "$ref" in schema:
+            schema = self._definitions[_definition_name(schema["$ref"])]
+        return schema
+
+    def _compile(self, schema: Union[Mapping[str, Any], bool]) -> _Compiled:
+        if schema is True:
+            return _ANYTHING
+        if schema is False:
+            return _NOTHING
+        assert isinstance(schema, Mapping)
+        compiled = self._compiled.get(id(schema))
+        if compiled is None:
+            compiled = self._compiled[id(schema)] = self._compile_schema(schema)
+        return compiled
+
+    def _compile_schema(self, schema: Mapping[str, Any]) -> _Compiled:
+        keywords = set(schema) - _ANNOTATIONS
+        type_part = _type_part(schema["type"]) if "type" in schema else None
+        parts: list[_Compiled] = []
+        if "$ref" in schema:
+            parts.append(self._compile_ref(schema["$ref"]))
+        if "enum" in schema:
+            parts.append(_enum_part(schema["enum"]))
+        if "const" in schema:
+            parts.append(_enum_part([schema["const"]]))
+        for keyword in ("anyOf", "oneOf", "allOf"):
+            if keyword in schema:
+                parts.append(self._compile_combination(keyword, [self._compile(branch) for branch in schema[keyword]]))
+        if keywords & {"properties", "required", "additionalProperties"}:
+            parts.append(self._compile_object(schema))
+        if keywords & {"items", "prefixItems", "minItems", "maxItems"}:
+            parts.append(self._compile_array(schema))
+        if keywords & {"minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"}:
+            parts.append(_range_part(schema))
+        if keywords & {"minLength", "maxLength", "pattern"}:
+            parts.append(_string_part(schema))
+
+        if type_part is None:
+            if not parts:
+                return _ANYTHING
+            if len(parts) == 1:
+                return parts[0]
+        elif not parts:
+            return type_part
+        tests = [part.test for part in parts]
+        type_test = type_part.test if type_part is not None else None
+
+        def test(value: Any) -> bool:
+            if type_test is not None and not type_test(value):
+                return False
+            for part_test in tests:
+                if not part_test(value):
+                    return False
+            return True
+
+        def check(value: Any, path: SchemaPath, violations: list[SchemaViolation]) -> None:
+            # Other keywords are only checked for values of the right type
+            if type_part is not None and not type_part.test(value):
+                type_part.check(value, path, violations)
+                return
+            for part in parts:
+                if not part.test(value):
+                    part.check(value, path, violations)
+
+        return _Compiled(test, check)
+
+    def _compile_ref(self, ref: str) -> _Compiled:
+        name = _definition_name(ref)
+        if name not in self._definitions:
+            raise ValueError(f"Unresolvable reference {ref}")
+        if name not in self._pending:
+            self._pending[name] = []
+            compiled = self._compile(self._definitions[name])
+            self._pending[name].append(compiled)
+            return compiled
+        # A recursive reference, to a definition which is being compiled or was compiled recursively
+        target = self._pending[name]
+        if target:
+            return target[0]
+        return _Compiled(lambda value: target[0].test(value), lambda *arguments: target[0].check(*arguments))
+
+    def _compile_combination(self, keyword: str, branches: list[_Compiled]) -> _Compiled:
+        tests = [branch.test for branch in branches]
+        if keyword == "allOf":
+
+            def all_of_test(value: Any) -> bool:
+                return all(branch_test(value) for branch_test in tests)
+
+            def all_of_check(value: Any, path: SchemaPath, violations: list[SchemaViolation]) -> None:
+                for branch in branches:
+                    if not branch.test(value):
+                        branch.check(value, path, violations)
+
+            return _Compiled(all_of_test, all_of_check)
+
+        if keyword == "anyOf":
+
+            def combination_test(value: Any) -> bool:
+                for branch_test in tests:
+                    if branch_test(value):
+                        return True
+                return False
+
+        else:
+
+            def combination_test(value: Any) -> bool:
+                return sum(branch_test(value) for branch_test in tests) == 1
+
+        def combination_check(value: Any, path: SchemaPath, violations: list[SchemaViolation]) -> None:
+            matching = sum(branch_test(value) for branch_test in tests)
+            if matching > 1:
+                violations.append(SchemaViolation(path, f"Matches {matching} schemas of oneOf instead of one"))
+                return
+            # The branches failing only below this value are those of the right type, report the closest one
+            nested: list[list[SchemaViolation]] = []
+            for branch in branches:
+                branch_violations: list[SchemaViolation] = []
+                branch.check(value, path, branch_violations)
+                if all(len(violation.path) > len(path) for violation in branch_violations):
+                    nested.append(branch_violations)
+            if nested:
+                closest = min(nested, key=len)
+                violations.extend(closest)
+            else:
+                violations.append(SchemaViolation(path, f"{_describe(value)} doesn't match any of the allowed schemas"))
+
+        return _Compiled(combination_test, combination_check)
+
+    def _compile_object(self, schema: Mapping[str, Any]) -> _Compiled:
+        properties = {key: self._compile(value) for key, value in schema.get("properties", {}).items()}
+        property_tests = {key: compiled.test for key, compiled in properties.items()}
+        required = list(schema.get("required", ()))
+        additional = schema.get("additionalProperties", True)
+        additional_compiled = None if additional is True else self._compile(additional)
+        additional_test = None if additional_compiled is None else additional_compiled.test
+
+        def test(value: Any) -> bool:
+            if not isinstance(value, dict):
+                return True
+            for key in required:
+                if key not in value:
+                    return False
+            for key, member in value.items():
+                property_test = property_tests.get(key)
+                if property_test is not None:
+                    if not property_test(member):
+                        return False
+                elif additional_test is not None and not additional_test(member):
+                    return False
+            return True
+
+        def check(value: Any, path: SchemaPath, violations: list[SchemaViolation]) -> None:
+            if not isinstance(value, dict):
+                return
+            for key in required:
+                if key not in value:
+                    violations.append(SchemaViolation(path, f"Missing required property {key!r}"))
+            for key, member in value.items():
+                compiled = properties.get(key, additional_compiled)
+                if compiled is None or compiled.test(member):
+                    continue
+                if compiled is _NOTHING:
+                    violations.append(SchemaViolation(path, f"Unexpected property {key!r}"))
+                else:
+                    compiled.check(member, (*path, key), violations)
+
+        return _Compiled(test, check)
+
+    def _compile_array(self, schema: Mapping[str, Any]) -> _Compiled:
+        prefix = [self._compile(item) for item in schema.get("prefixItems", ())]
+        prefix_tests = [compiled.test for compiled in prefix]
+        items = schema.get("items", True)
+        items_compiled = None if items is True else self._compile(items)
+        items_test = None if items_compiled is None else items_compiled.test
+        min_items = schema.get("minItems", 0)
+        max_items = schema.get("maxItems", math.inf)
+
+        def test(value: Any) -> bool:
+            if not isinstance(value, (list, tuple)):
+                return True
+            if not min_items <= len(value) <= max_items:
+                return False
+            for item_test, item in zip(prefix_tests, value):
+                if not item_test(item):
+                    return False
+            if items_test is not None:
+                for index in range(len(prefix_tests), len(value)):
+                    if not items_test(value[index]):
+                        return False
+            return True
+
+        def check(value: Any, path: SchemaPath, violations: list[SchemaViolation]) -> None:
+            if not isinstance(value, (list, tuple)):
+                return
+            if not min_items <= len(value) <= max_items:
+                expected = min_items if min_items == max_items else f"between {min_items} and {max_items}"
+                violations.append(SchemaViolation(path, f"Expected {expected} items, got {len(value)}"))
+                if items is False:
+                    return
+            for index, (compiled, item) in enumerate(zip(prefix, value)):
+                if not compiled.test(item):
+                    compiled.check(item, (*path, index), violations)
+            if items_compiled is not None:
+                for index in range(len(prefix), len(value)):
+                    if not items_compiled.test(value[index]):
+                        items_compiled.check(value[index], (*path, index), violations)
+
+        return _Compiled(test, check)
+
+
+@functools.lru_cache(maxsize=None)
+def schema_validator(cls: type) -> SchemaValidator:
+    """
+    The validator of raw data deserialized into cls by its from_dict method. Compiled once per class and process.
+    """
+    return SchemaValidator(
+        deserialization_schema(cls, aliaser=apischema.utils.to_snake_case, additional_properties=True, all_refs=True)
+    )
+
+
+def openlabel_violations(document: Mapping[str, Any]) -> list[SchemaViolation]:
+    """
+    All schema violations of a raw OpenLABEL document, with or without the root key "openlabel".
+    Paths start below the root key.
+    """
+    if list(document.keys()) == ["openlabel"]:
+        document = document["openlabel"]
+    return schema_validator(OpenLabel).violations(document)
+
+
+def openlabel_stream_violations(source: Source, chunk_size: int = 1 << 20) -> Iterator[SchemaViolation]:
+    """
+    The schema violations of an OpenLABEL JSON document read piece by piece, see OpenLabelReader.
+    Paths start below the root key. The document is assumed to be syntactically valid JSON, a ValueError is raised
+    where it isn't.
+    """
+    validator = schema_validator(OpenLabel)
+    openlabel_schema = validator._resolve(validator.schema)
+    # Frames are validated with the same validator, found once
+    frame_validator: Optional[SchemaValidator] = None
+    present = set()
+    for path, value in OpenLabelReader(source, chunk_size).raw_items():
+        present.add(path[0])
+        if path[0] == "frames":
+            if frame_validator is None:
+                frame_validator = validator.at(*path)
+            yield from frame_validator.violations(value, path)
+        elif path[0] in openlabel_schema.get("properties", {}):
+            yield from validator.at(*path).violations(value, path)
+    for key in openlabel_schema.get("required", ()):
+        if key not in present:
+            yield SchemaViolation((), f"Missing required property {key!r}")
+
+
+def validate_openlabel(document: Mapping[str, Any]) -> None:
+    """Raises a SchemaValidationError with all schema violations of a raw OpenLABEL document, if any."""
+    violations = openlabel_violations(document)
+    if violations:
+        raise SchemaValidationError(violations)
+
+
+def _fail(value: Any, path: SchemaPath, violations: list[SchemaViolation]) -> None:
+    violations.append(SchemaViolation(path, "No value is allowed here"))
+
+
+_ANYTHING = _Compiled(lambda value: True, lambda value, path, violations: None)
+_NOTHING = _Compiled(lambda value: False, _fail)
+
+
+def _type_part(types: Union[str, list[str]]) -> _Compiled:
+    names = [types] if isinstance(types, str) else list(types)
+    exact = frozenset(python_type for name in names for python_type in _PYTHON_TYPES[name])
+    expected = " or ".join(names)
+
+    def test(value: Any) -> bool:
+        # Subclasses are accepted as well, except for booleans, which aren't numbers in JSON
+        return type(value) in exact or (
+            not isinstance(value, bool) and any(isinstance(value, python_type) for python_type in exact)
+        )
+
+    def check(value: Any, path: SchemaPath, violations: list[SchemaViolation]) -> None:
+        violations.append(SchemaViolation(path, f"Expected {expected}, got {_describe(value)}"))
+
+    return _Compiled(test, check)
+
+
+def _enum_part(values: list[Any]) -> _Compiled:
+    # Compare types as well, since True == 1 in Python but not in JSON
+    allowed = [(type(value), value) for value in values]
+
+    def test(value: Any) -> bool:
+        return (type(value), value) in allowed
+
+    def check(value: Any, path: SchemaPath, violations: list[SchemaViolation]) -> None:
+        violations.append(SchemaViolation(path, f"{value!r} is not one of {values}"))
+
+    return _Compiled(test, check)
+
+
+def _range_part(schema: Mapping[str, Any]) -> _Compiled:
+    bounds: list[tuple[Callable[[float, float], bool], float, str]] = []
+    for keyword, bound_test, message in (
+        ("minimum", operator.ge, "at least"),
+        ("maximum", operator.le, "at most"),
+        ("exclusiveMinimum", operator.gt, "greater than"),
+        ("exclusiveMaximum", operator.lt, "less than"),
+    ):
+        if keyword in schema:
+            bounds.append((bound_test, schema[keyword], message))
+
+    def test(value: Any) -> bool:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return True
+        return all(bound_test(value, bound) for bound_test, bound, _ in bounds)
+
+    def check(value: Any, path: SchemaPath, violations: list[SchemaViolation]) -> None:
+        for bound_test, bound, message in bounds:
+            if not bound_test(value, bound):
+                violations.append(SchemaViolation(path, f"Expected a number {message} {bound}, got {value}"))
+
+    return _Compiled(test, check)
+
+
+def _string_part(schema: Mapping[str, Any]) -> _Compiled:
+    min_length = schema.get("minLength", 0)
+    max_length = schema.get("maxLength", math.inf)
+    pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+
+    def test(value: Any) -> bool:
+        if not isinstance(value, str):
+            return True
+        return min_length <= len(value) <= max_length and (pattern is None or pattern.search(value) is not None)
+
+    def check(value: Any, path: SchemaPath, violations: list[SchemaViolation]) -> None:
+        if not min_length <= len(value) <= max_length:
+            violations.append(SchemaViolation(path, f"Expected between {min_length} and {max_length} characters"))
+        if pattern is not None and pattern.search(value) is None:
+            violations.append(SchemaViolation(path, f"{value!r} doesn't match the pattern {pattern.pattern!r}"))
+
+    return _Compiled(test, check)
+
+
+def _definition_name(ref: str) -> str:
+    if not ref.startswith("#/$defs/"):
+        raise ValueError(f"Only references to local definitions are supported, got {ref}")
+    return ref[len("#/$defs/") :]
+
+
+def _json_path(path: SchemaPath) -> str:
+    return "$" + "".join(
+        f"[{key}]" if isinstance(key, int) else f".{key}" if key.isidentifier() else f"[{key!r}]" for key in path
+    )
+
+
+def _describe(value: Any) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    for name in ("integer", "number", "string", "object", "array", "null"):
+        if isinstance(value, _PYTHON_TYPES[name]):
+            return name
+    return type(value).__name__
@@ -17,6 +17,9 @@ from typing import Any, Protocol, TypeVar, cast, runtime_checkable
 
 import apischema
 
+# noinspection PyProtectedMember
+from uai_openlabel.binary_format import _gc_paused, decode_binary, encode_binary
+
 __all__: list[str] = []
 
 T = TypeVar("T", bound="JsonSnakeCaseSerializableMixin")
@@ -68,3 +71,14 @@ class JsonSnakeCaseSerializableMixin(DataclassLike):
                 type=cls,
             ),
         )
+
+    def to_binary(self, exclude_none: bool = False, exclude_defaults: bool = False) -> bytes:
+        """The to_dict output in the binary encoding of uai_openlabel.encode_binary."""
+        with _gc_paused():
+            return encode_binary(self.to_dict(exclude_none=exclude_none, exclude_defaults=exclude_defaults))
+
+    @classmethod
+    def from_binary(cls: type[T], data: bytes) -> T:
+        """The inverse of to_binary, i.e. from_dict of the data decoded by uai_openlabel.decode_binary."""
+        with _gc_paused():
+            return cls.from_dict(decode_binary(data))
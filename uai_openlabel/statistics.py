@@ -0,0 +1,355 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Statistics over OpenLABEL datasets, collected frame by frame from the streaming reader.
+All accumulators are mergeable, so files can be processed in parallel and their partial statistics merged.
+"""
+
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Iterable, Optional, Union
+
+# noinspection PyProtectedMember
+from uai_openlabel.data_types.generic_data import Attributes
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.indexing.timestamp_index import TimestampUnit, parse_timestamp_ns
+
+# noinspection PyProtectedMember
+from uai_openlabel.openlabel import OpenLabel
+
+# noinspection PyProtectedMember
+from uai_openlabel.streaming import OpenLabelReader, Source
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import AttributeName, ObjectUid
+
+__all__: list[str] = []
+
+_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class QuantileSketch:
+    """
+    Mergeable sketch of a distribution of numbers, answering quantiles with a bounded relative error.
+    Values are counted in buckets whose bounds grow geometrically, as in DDSketch. Its size grows with the logarithm
+    of the range of the values, not with their number.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"The relative accuracy must be between 0 and 1, got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._positive: Counter[int] = Counter()
+        self._negative: Counter[int] = Counter()
+        self._zeros = 0
+        self.count = 0
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value > 0:
+            self._positive[self._key(value)] += count
+        elif value < 0:
+            self._negative[self._key(-value)] += count
+        else:
+            self._zeros += count
+        self.count += count
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Can't merge sketches of different relative accuracy")
+        self._positive.update(other._positive)
+        self._negative.update(other._negative)
+        self._zeros += other._zeros
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """The value at the quantile q between 0 and 1, NaN for an empty sketch."""
+        if not 0 <= q <= 1:
+            raise ValueError(f"The quantile must be between 0 and 1, got {q}")
+        if self.count == 0:
+            return float("nan")
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self._negative, reverse=True):
+            seen += self._negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self._zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self._positive):
+            seen += self._positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self._positive))
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self._gamma**key / (self._gamma + 1)
+
+
+class NumericSummary:
+    """The count, sum, minimum, maximum and distribution of a stream of numbers. Mergeable."""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.sketch.add(value)
+
+    def merge(self, other: "NumericSummary") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float("nan")
+
+    def quantile(self, q: float) -> float:
+        """The approximate value at the quantile q, clamped to the exact minimum and maximum."""
+        return min(max(self.sketch.quantile(q), self.minimum), self.maximum) if self.count else float("nan")
+
+    def to_dict(self) -> dict[str, Any]:
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "min": self.minimum,
+            "max": self.maximum,
+            "mean": self.mean,
+            "quantiles": {str(q): self.quantile(q) for q in _QUANTILES},
+        }
+
+
+class SequenceStatistics:
+    """The number of frames and the time span of one sequence, i.e. one OpenLABEL file."""
+
+    def __init__(self) -> None:
+        self.num_frames = 0
+        self.num_timestamps = 0
+        self.first_timestamp_ns: Optional[int] = None
+        self.last_timestamp_ns: Optional[int] = None
+
+    def add_timestamp(self, timestamp_ns: int, count: int = 1) -> None:
+        self.num_timestamps += count
+        if self.first_timestamp_ns is None or timestamp_ns < self.first_timestamp_ns:
+            self.first_timestamp_ns = timestamp_ns
+        if self.last_timestamp_ns is None or timestamp_ns > self.last_timestamp_ns:
+            self.last_timestamp_ns = timestamp_ns
+
+    def merge(self, other: "SequenceStatistics") -> None:
+        self.num_frames += other.num_frames
+        if other.first_timestamp_ns is not None and other.last_timestamp_ns is not None:
+            self.add_timestamp(other.first_timestamp_ns, count=other.num_timestamps)
+            self.add_timestamp(other.last_timestamp_ns, count=0)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """The time between the first and the last timestamp in seconds."""
+        if self.first_timestamp_ns is None or self.last_timestamp_ns is None:
+            return None
+        return (self.last_timestamp_ns - self.first_timestamp_ns) / 1e9
+
+    @property
+    def frame_rate(self) -> Optional[float]:
+        """The mean number of timestamped frames per second."""
+        duration = self.duration
+        return (self.num_timestamps - 1) / duration if duration else None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"frames": self.num_frames, "duration": self.duration, "frame_rate": self.frame_rate}
+
+
+class DatasetStatistics:
+    """
+    Counts and distributions over OpenLABEL files: objects per type, values per attribute, objects per frame,
+    cuboid sizes per object type and the frame rate of every sequence.
+
+    Feed each file with add_openlabel(), or with add_header() followed by add_frame() for every frame, and merge()
+    the statistics of several files. Attributes of objects are counted both from the static object data and from
+    the frames, numerical attributes as distributions and boolean or text attributes as counts per value.
+    """
+
+    def __init__(self, unit: TimestampUnit = TimestampUnit.Second, relative_accuracy: float = 0.01):
+        self.unit = unit
+        self.relative_accuracy = relative_accuracy
+        self.objects_per_type: Counter[str] = Counter()
+        self.object_frames_per_type: Counter[str] = Counter()
+        self.attribute_values: dict[AttributeName, Counter[str]] = {}
+        self.numeric_attributes: dict[AttributeName, NumericSummary] = {}
+        self.objects_per_frame: Counter[int] = Counter()
+        self.cuboid_sizes: dict[str, list[NumericSummary]] = {}
+        self.sequences: dict[str, SequenceStatistics] = {}
+        self._types: dict[ObjectUid, str] = {}
+        self._sequence = SequenceStatistics()
+
+    def add_header(self, openlabel: OpenLabel, sequence: str) -> None:
+        """Starts a new sequence with the objects of the OpenLabel. Its frames are ignored."""
+        self._types = {uid: obj.type for uid, obj in (openlabel.objects or {}).items()}
+        self._sequence = self.sequences.setdefault(sequence, SequenceStatistics())
+        self.objects_per_type.update(self._types.values())
+        for obj in (openlabel.objects or {}).values():
+            if obj.object_data is not None:
+                self._add_attributes(obj.object_data)
+
+    def add_frame(self, frame: Frame) -> None:
+        """Adds a frame of the current sequence."""
+        self._sequence.num_frames += 1
+        if frame.frame_properties is not None and frame.frame_properties.timestamp is not None:
+            self._sequence.add_timestamp(parse_timestamp_ns(frame.frame_properties.timestamp, self.unit))
+        objects = frame.objects or {}
+        self.objects_per_frame[len(objects)] += 1
+        for object_uid, object_in_frame in objects.items():
+            object_type = self._types.get(object_uid, "")
+            self.object_frames_per_type[object_type] += 1
+            object_data = object_in_frame.object_data
+            self._add_attributes(object_data)
+            for cuboid in object_data.cuboid or ():
+                for summary, size in zip(self._cuboid_sizes(object_type), cuboid.val[-3:]):
+                    summary.add(float(size))
+
+    def add_openlabel(self, openlabel: OpenLabel, sequence: str) -> None:
+        self.add_header(openlabel, sequence)
+        for frame in (openlabel.frames or {}).values():
+            self.add_frame(frame)
+
+    def merge(self, other: "DatasetStatistics") -> None:
+        """Adds the statistics of other files. Sequences of the same name are expected to be disjoint."""
+        self.objects_per_type.update(other.objects_per_type)
+        self.object_frames_per_type.update(other.object_frames_per_type)
+        for name, values in other.attribute_values.items():
+            self.attribute_values.setdefault(name, Counter()).update(values)
+        for name, summary in other.numeric_attributes.items():
+            self.numeric_attributes.setdefault(name, NumericSummary(self.relative_accuracy)).merge(summary)
+        self.objects_per_frame.update(other.objects_per_frame)
+        for object_type, sizes in other.cuboid_sizes.items():
+            for own_summary, other_summary in zip(self._cuboid_sizes(object_type), sizes):
+                own_summary.merge(other_summary)
+        for name, sequence in other.sequences.items():
+            self.sequences.setdefault(name, SequenceStatistics()).merge(sequence)
+
+    @property
+    def num_frames(self) -> int:
+        return sum(sequence.num_frames for sequence in self.sequences.values())
+
+    def report(self) -> dict[str, Any]:
+        """All statistics as a JSON serializable dictionary."""
+        num_frames = sum(self.objects_per_frame.values())
+        return {
+            "sequences": len(self.sequences),
+            "frames": self.num_frames,
+            "objects_per_type": dict(self.objects_per_type.most_common()),
+            "object_frames_per_type": dict(self.object_frames_per_type.most_common()),
+            "objects_per_frame": {
+                "mean": (
+                    sum(count * frames for count, frames in self.objects_per_frame.items()) / num_frames if num_frames else None
+                ),
+                "histogram": {str(count): self.objects_per_frame[count] for count in sorted(self.objects_per_frame)},
+            },
+            "attribute_values": {name: dict(values.most_common()) for name, values in sorted(self.attribute_values.items())},
+            "numeric_attributes": {name: summary.to_dict() for name, summary in sorted(self.numeric_attributes.items())},
+            "cuboid_sizes": {
+                object_type: dict(zip(("sx", "sy", "sz"), (summary.to_dict() for summary in sizes)))
+                for object_type, sizes in sorted(self.cuboid_sizes.items())
+            },
+            "sequence_details": {name: sequence.to_dict() for name, sequence in sorted(self.sequences.items())},
+        }
+
+    def _cuboid_sizes(self, object_type: str) -> list[NumericSummary]:
+        """The summaries of the x, y and z sizes of cuboids of the object type."""
+        if object_type not in self.cuboid_sizes:
+            self.cuboid_sizes[object_type] = [NumericSummary(self.relative_accuracy) for _ in range(3)]
+        return self.cuboid_sizes[object_type]
+
+    def _add_attributes(self, attributes: Attributes) -> None:
+        for data in attributes.boolean or ():
+            if data.name is not None:
+                self.attribute_values.setdefault(data.name, Counter())[str(data.val).lower()] += 1
+        for text in attributes.text or ():
+            if text.name is not None:
+                self.attribute_values.setdefault(text.name, Counter())[text.val] += 1
+        for number in attributes.num or ():
+            if number.name is not None:
+                summary = self.numeric_attributes.get(number.name)
+                if summary is None:
+                    summary = self.numeric_attributes[number.name] = NumericSummary(self.relative_accuracy)
+                summary.add(float(number.val))
+
+
+def collect_statistics(
+    source: Source,
+    sequence: Optional[str] = None,
+    unit: TimestampUnit = TimestampUnit.Second,
+    relative_accuracy: float = 0.01,
+) -> DatasetStatistics:
+    """
+    The statistics of one OpenLABEL JSON document, read frame by frame. The sequence is named after the file
+    unless given.
+    """
+    statistics = DatasetStatistics(unit, relative_accuracy)
+    reader = OpenLabelReader(source)
+    statistics.add_header(reader.header(), sequence if sequence is not None else _sequence_name(source))
+    for _, frame in reader.frames():
+        statistics.add_frame(frame)
+    return statistics
+
+
+def collect_dataset_statistics(
+    paths: Iterable[Union[str, "os.PathLike[str]"]],
+    workers: Optional[int] = None,
+    unit: TimestampUnit = TimestampUnit.Second,
+    relative_accuracy: float = 0.01,
+) -> DatasetStatistics:
+    """
+    The merged statistics of many OpenLABEL JSON files, each read by collect_statistics in a pool of worker processes.
+    With workers=1 the files are read in this process. By default, there is one worker per CPU.
+    """
+    statistics = DatasetStatistics(unit, relative_accuracy)
+    collect = partial(collect_statistics, unit=unit, relative_accuracy=relative_accuracy)
+    paths = list(paths)
+    if workers == 1 or len(paths) <= 1:
+        for path in paths:
+            statistics.merge(collect(path))
+        return statistics
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(collect, paths):
+            statistics.merge(part)
+    return statistics
+
+
+def _sequence_name(source: Source) -> str:
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return str(getattr(source, "name", "<stream>"))
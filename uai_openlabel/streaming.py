@@ -0,0 +1,338 @@
+# Copyright © 2024 understandAI GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files
+# (the “Software”), to deal in the Software without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Reading and writing OpenLABEL JSON documents piece by piece, for documents too large to be loaded as a whole.
+Only one top-level field or one frame is held in memory at a time.
+"""
+
+import itertools
+import json
+import os
+import re
+from types import TracebackType
+from typing import Any, Iterator, Mapping, Optional, TextIO, TypeVar, Union
+
+# noinspection PyProtectedMember
+from uai_openlabel.frame import Frame
+
+# noinspection PyProtectedMember
+from uai_openlabel.openlabel import OpenLabel
+
+# noinspection PyProtectedMember
+from uai_openlabel.serializer import JsonSnakeCaseSerializableMixin
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import FrameUid, Uid
+
+# noinspection PyProtectedMember
+from uai_openlabel.utils import frame_number
+
+__all__: list[str] = []
+
+JsonPath = tuple[str, ...]
+Source = Union[str, "os.PathLike[str]", TextIO]
+
+T = TypeVar("T")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+class _JsonScanner:
+    """Scans a JSON text read in chunks. Values are decoded by the json module once they are complete in the buffer."""
+
+    def __init__(self, file: TextIO, chunk_size: int):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        # Offset of the buffer in the text, for error messages
+        self._offset = 0
+        self._eof = False
+
+    def peek(self) -> str:
+        """The next character that isn't whitespace, an empty string at the end of the text."""
+        while True:
+            self._position = _WHITESPACE.match(self._buffer, self._position).end()  # type: ignore[union-attr]
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read_more(0):
+                return ""
+
+    def expect(self, character: str) -> None:
+        found = self.peek()
+        if found != character:
+            raise ValueError(f"Expected {character!r} at offset {self._offset + self._position}, found {found or 'the end'!r}")
+        self._position += 1
+
+    def value(self) -> Any:
+        """Decodes the next value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError as e:
+                # The value may continue in the next chunk. Reading as much as is buffered keeps retries linear in total.
+                if self._read_more(len(self._buffer) - self._position):
+                    continue
+                raise ValueError(f"Invalid JSON at offset {self._offset + e.pos}: {e.msg}") from None
+            if end == len(self._buffer) and isinstance(value, (int, float)) and self._read_more(0):
+                # A number at the end of the buffer may have more digits in the next chunk
+                continue
+            self._position = end
+            return value
+
+    def members(self) -> Iterator[str]:
+        """Iterates over the keys of the next object. The caller must consume the value of each key before continuing."""
+        self.expect("{")
+        if self.peek() == "}":
+            self._position += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise ValueError(f"Expected an object key at offset {self._offset + self._position}")
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self._position += 1
+                continue
+            self.expect("}")
+            return
+
+    def _read_more(self, at_least: int) -> bool:
+        if self._eof:
+            return False
+        chunk = self._file.read(max(self._chunk_size, at_least))
+        if not chunk:
+            self._eof = True
+            return False
+        self._offset += self._position
+        self._buffer = self._buffer[self._position :] + chunk
+        self._position = 0
+        return True
+
+
+class OpenLabelReader:
+    """
+    Reads an OpenLABEL JSON document from a path or a text file piece by piece, keeping only one frame in memory at a time.
+    The document may have the root key "openlabel" or not.
+
+    Every method reads the document anew. Text files are read from their current position on the first read,
+    and must be seekable to be read more than once.
+    """
+
+    def __init__(self, source: Source, chunk_size: int = _DEFAULT_CHUNK_SIZE):
+        self._source = source
+        self._chunk_size = chunk_size
+        self._start = None if isinstance(source, (str, os.PathLike)) else source.tell()
+
+    def raw_items(self, include_fields: bool = True, include_frames: bool = True) -> Iterator[tuple[JsonPath, Any]]:
+        """
+        The decoded JSON of the top-level fields and frames in the order of the document, with their paths below the root:
+        ("metadata",) for fields and ("frames", frame uid) for frames. Items not included are decoded and dropped.
+        """
+        if isinstance(self._source, (str, os.PathLike)):
+            with open(self._source, encoding="utf-8") as file:
+                yield from self._scan(file, include_fields, include_frames)
+        else:
+            assert self._start is not None
+            self._source.seek(self._start)
+            yield from self._scan(self._source, include_fields, include_frames)
+
+    def raw_frames(self) -> Iterator[tuple[Uid, dict[str, Any]]]:
+        for path, frame in self.raw_items(include_fields=False):
+            yield Uid(path[1]), frame
+
+    def frames(self) -> Iterator[tuple[Uid, Frame]]:
+        for frame_uid, frame in self.raw_frames():
+            yield frame_uid, Frame.from_dict(frame)
+
+    def raw_header(self) -> dict[str, Any]:
+        """All top-level fields except the frames."""
+        return {path[0]: value for path, value in self.raw_items(include_frames=False)}
+
+    def header(self) -> OpenLabel:
+        """An OpenLabel with all top-level fields except the frames."""
+        return OpenLabel.from_dict(self.raw_header())
+
+    def _scan(self, file: TextIO, include_fields: bool, include_frames: bool) -> Iterator[tuple[JsonPath, Any]]:
+        scanner = _JsonScanner(file, self._chunk_size)
+        keys = scanner.members()
+        first_key = next(keys, None)
+        if first_key == "openlabel":
+            yield from _scan_openlabel(scanner, scanner.members(), include_fields, include_frames)
+            for key in keys:
+                raise ValueError(f"Unexpected key {key!r} next to the root key 'openlabel'")
+        elif first_key is not None:
+            yield from _scan_openlabel(scanner, itertools.chain([first_key], keys), include_fields, include_frames)
+        if scanner.peek() != "":
+            raise ValueError("Unexpected data after the end of the document")
+
+
+def _scan_openlabel(
+    scanner: _JsonScanner, keys: Iterator[str], include_fields: bool, include_frames: bool
+) -> Iterator[tuple[JsonPath, Any]]:
+    for key in keys:
+        if key == "frames" and scanner.peek() == "{":
+            for frame_uid in scanner.members():
+                frame = scanner.value()
+                if include_frames:
+                    yield ("frames", frame_uid), frame
+        else:
+            value = scanner.value()
+            if include_fields:
+                yield (key,), value
+
+
+class OpenLabelWriter:
+    """
+    Writes an OpenLABEL JSON document with the root key "openlabel" piece by piece, keeping nothing in memory.
+    Top-level fields may be written before and after the frames, which have to be written one after another.
+    Use it as a context manager or call close(), which completes the document.
+    """
+
+    def __init__(self, target: Source, indent: Optional[int] = None):
+        self._owns_file = isinstance(target, (str, os.PathLike))
+        self._file: TextIO = open(target, "w", encoding="utf-8") if isinstance(target, (str, os.PathLike)) else target
+        self._indent = indent
+        self._keys: set[str] = set()
+        self._frames_open = False
+        self._frames_written = False
+        self._num_frames = 0
+        self._closed = False
+        self._file.write('{"openlabel": {')
+
+    def write_field(self, key: str, value: Any) -> None:
+        """Writes a top-level field other than the frames, given as JSON data or as a serializable dataclass."""
+        if key == "frames":
+            raise ValueError("Frames are written with write_frame()")
+        self._close_frames()
+        self._write_member(key, _to_json(value), level=1)
+
+    def write_fields(self, fields: Mapping[str, Any]) -> None:
+        for key, value in fields.items():
+            self.write_field(key, value)
+
+    def write_frame(self, frame_uid: FrameUid, frame: Union[Frame, Mapping[str, Any]]) -> None:
+        if not self._frames_open:
+            if self._frames_written:
+                raise ValueError("The frames have to be written one after another, without other fields in between")
+            self._write_member("frames", None, level=1)
+            self._file.write("{")
+            self._frames_open = self._frames_written = True
+        if self._num_frames:
+            self._file.write(",")
+        self._newline(level=2)
+        self._file.write(f"{json.dumps(str(frame_uid))}: {self._dumps(_to_json(frame), level=2)}")
+        self._num_frames += 1
+
+    @property
+    def num_frames(self) -> int:
+        return self._num_frames
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._close_frames()
+        self._newline(level=0)
+        self._file.write("}}\n")
+        self._closed = True
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> "OpenLabelWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        elif self._owns_file:
+            self._file.close()
+
+    def _write_member(self, key: str, value: Any, level: int) -> None:
+        if key in self._keys:
+            raise ValueError(f"The field {key!r} was written already")
+        if self._keys:
+            self._file.write(",")
+        self._keys.add(key)
+        self._newline(level)
+        self._file.write(f"{json.dumps(key)}: ")
+        if key != "frames":
+            self._file.write(self._dumps(value, level))
+
+    def _close_frames(self) -> None:
+        if self._frames_open:
+            self._newline(level=1)
+            self._file.write("}")
+            self._frames_open = False
+
+    def _newline(self, level: int) -> None:
+        # The root key and the OpenLabel share a line, so members of the OpenLabel are at level 1
+        if self._indent is not None:
+            self._file.write("\n" + " " * (self._indent * level))
+
+    def _dumps(self, value: Any, level: int) -> str:
+        text = json.dumps(value, indent=self._indent, ensure_ascii=False)
+        if self._indent is None:
+            return text
+        return text.replace("\n", "\n" + " " * (self._indent * level))
+
+
+def pair_by_frame_number(
+    first: Iterator[tuple[FrameUid, T]], second: Iterator[tuple[FrameUid, T]]
+) -> Iterator[tuple[int, Optional[T], Optional[T]]]:
+    """
+    Pairs the frames of two frame streams by frame number, like a merge join. Both streams must list their frames by
+    increasing frame number, otherwise a ValueError is raised. Frames are yielded by frame number, a frame without
+    partner is paired with None as soon as the other stream has passed it, so only one frame per stream is held.
+    """
+    streams = (_numbered_frames(first), _numbered_frames(second))
+    heads = [next(streams[0], None), next(streams[1], None)]
+    while True:
+        head_first, head_second = heads
+        if head_first is None and head_second is None:
+            return
+        if head_second is None or (head_first is not None and head_first[0] < head_second[0]):
+            assert head_first is not None
+            yield head_first[0], head_first[1], None
+            heads[0] = next(streams[0], None)
+        elif head_first is None or head_second[0] < head_first[0]:
+            yield head_second[0], None, head_second[1]
+            heads[1] = next(streams[1], None)
+        else:
+            yield head_first[0], head_first[1], head_second[1]
+            heads = [next(streams[0], None), next(streams[1], None)]
+
+
+def _numbered_frames(frames: Iterator[tuple[FrameUid, T]]) -> Iterator[tuple[int, T]]:
+    previous: Optional[int] = None
+    for frame_uid, frame in frames:
+        number = frame_number(frame_uid)
+        if previous is not None and number <= previous:
+            raise ValueError(f"Frames must be listed by increasing frame number, but frame {frame_uid} follows {previous}")
+        previous = number
+        yield number, frame
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, JsonSnakeCaseSerializableMixin):
+        return value.to_dict(exclude_none=True)
+    return value
@@ -13,7 +13,10 @@
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 import logging
-from typing import Any, Optional, Sequence, TypeVar, Union
+from typing import Any, Callable, Optional, Sequence, TypeVar, Union, cast
+
+# noinspection PyProtectedMember
+from uai_openlabel.types_and_constants import FrameUid
 
 __all__: list[str] = []
 
@@ -30,6 +33,14 @@ T = TypeVar("T")
 V = TypeVar("V")
 
 
+def frame_number(frame_uid: FrameUid) -> int:
+    """Frame keys are strings containing numerical frame identifiers, e.g. "001". Converts them to the frame number."""
+    try:
+        return int(frame_uid)
+    except ValueError:
+        raise ValueError(f"{frame_uid} is not a numerical frame identifier") from None
+
+
 def unpack_sequence_of_length_1(
     seq: Union[T, list[T], tuple[T]],
     field_name_for_logging: str,
@@ -56,16 +67,47 @@ def convert_values(
     field_name_for_logging: str,
 ) -> Sequence[Union[T, V]]:
     """No need to add conversion target to dont_convert"""
-    extended_dont_convert = [conversion_target] + [t for t in dont_convert]
-    to_be_converted = [v.__class__ not in extended_dont_convert for v in values]
-    if any(to_be_converted):
-        logger.info(
-            "The values of field %s aren't of types %s and will be converted to %s",
-            field_name_for_logging,
-            [t.__name__ for t in extended_dont_convert],
-            conversion_target.__name__,
-        )
+    extended_dont_convert = (conversion_target, *dont_convert)
+    if all(v.__class__ in extended_dont_convert for v in values):
+        return list(values)
 
+    logger.info(
+        "The values of field %s aren't of types %s and will be converted to %s",
+        field_name_for_logging,
+        [t.__name__ for t in extended_dont_convert],
+        conversion_target.__name__,
+    )
     # see https://github.com/python/mypy/issues/10343
-    converted_val = [conversion_target(v) if to_be_converted[i] else v for i, v in enumerate(values)]  # type: ignore[call-arg]
-    return converted_val
+    return [v if v.__class__ in extended_dont_convert else conversion_target(v) for v in values]  # type: ignore[call-arg, misc]
+
+
+_INDEX_CACHE_KEY = "_index_cache"
+
+
+class CachedIndexMixin:
+    """
+    Keeps lazily built lookup structures next to the dataclass fields of an instance.
+
+    The cached indices are dropped whenever a dataclass field is reassigned.
+    Sequences and mappings that are mutated in place can't be detected, call invalidate_index_cache() after doing so.
+    """
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if _INDEX_CACHE_KEY in self.__dict__ and name in getattr(self, "__dataclass_fields__", ()):
+            del self.__dict__[_INDEX_CACHE_KEY]
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Cached indices are cheap to rebuild, so they aren't pickled or deep-copied."""
+        state = dict(self.__dict__)
+        state.pop(_INDEX_CACHE_KEY, None)
+        return state
+
+    def invalidate_index_cache(self) -> None:
+        self.__dict__.pop(_INDEX_CACHE_KEY, None)
+
+    def _cached_index(self, key: str, build: Callable[[], T]) -> T:
+        cache = self.__dict__.setdefault(_INDEX_CACHE_KEY, {})
+        if key not in cache:
+            cache[key] = build()
+        return cast(T, cache[key])